@@ -2,15 +2,24 @@
 Repository for handling log data operations.
 """
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from typing import Dict, Tuple, List, Optional
 
+from data_ingestion.cache import ParsedCache
+from data_ingestion.checkpoint import CheckpointStore
 from data_ingestion.merger import LogMerger
+from data_ingestion.transaction_keys import TransactionKeyEncoder
 from processing.normalizer import LogNormalizer
 from processing.latency_analysis import LatencyAnalyzer
 from processing.flow_mapper import FlowMapper
+from processing.latency_cube import LatencyCube
 from utils.logger import setup_logger
-from utils.config import SOURCE_DIR
+from utils.config import (
+    SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS,
+    TAIL_MODE, CHECKPOINT_PATH, PARALLEL_PARSING, PARSE_SHARDS,
+    PARSE_CACHE, PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES
+)
 
 logger = setup_logger('repository')
 
@@ -20,16 +29,24 @@ class LogRepository:
         try:
             logger.info("Initializing LogRepository...")
             self.merger = LogMerger(
-                secucheck_path=f"{SOURCE_DIR}/logs_SecuCheck.json",
-                midflow_path=f"{SOURCE_DIR}/logs_MidFlow_ESB.csv",
-                corebank_path=f"{SOURCE_DIR}/logs_CoreBank.log"
+                secucheck_path=SECUCHECK_LOGS,
+                midflow_path=MIDFLOW_LOGS,
+                corebank_path=COREBANK_LOGS,
+                checkpoint_store=CheckpointStore(CHECKPOINT_PATH) if TAIL_MODE else None,
+                parallel=PARALLEL_PARSING,
+                num_shards=PARSE_SHARDS,
+                cache=ParsedCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES) if PARSE_CACHE else None
             )
             self.normalizer = LogNormalizer()
             self.latency_analyzer = LatencyAnalyzer()
             self.flow_mapper = FlowMapper()
+            self.key_encoder = TransactionKeyEncoder()
+            self.latency_cube = LatencyCube()
             
             # Cache
             self._data: Optional[pd.DataFrame] = None
+            self._key_index: Optional[pd.Index] = None
+            self._flow_summary: Optional[Dict] = None
             self._last_update: Optional[datetime] = None
             logger.info("LogRepository initialized successfully")
         except Exception as e:
@@ -55,34 +72,107 @@ class LogRepository:
             logger.info("Refreshing data...")
             df = self.merger.merge_logs()
             logger.info(f"Merged data shape: {df.shape}")
-            self._data = self.normalizer.normalize_dataframe(df)
+            previous, previous_index = self._data, self._key_index
+            self._data = self.normalizer.normalize_dataframe(df, inplace=True)
             logger.info(f"Normalized data shape: {self._data.shape}")
+            # Hash index on the integer transaction key for trace lookups
+            self._key_index = pd.Index(self._data['txn_key'])
+            self._update_cube(previous, previous_index)
+            self._flow_summary = None
             self._last_update = datetime.now()
             logger.info("Data refresh completed successfully")
         except Exception as e:
             logger.error(f"Error refreshing data: {str(e)}")
             raise
             
+    def _appended_rows(self, previous: pd.DataFrame, previous_index: pd.Index) -> Optional[pd.DataFrame]:
+        """
+        Find the rows a refresh added, if it left the earlier rows as they were.
+        
+        Args:
+            previous (pd.DataFrame): Data before the refresh
+            previous_index (pd.Index): Transaction keys of the data before the refresh
+            
+        Returns:
+            Optional[pd.DataFrame]: New rows, or None if earlier rows changed or went
+                away (e.g. a transaction completed) and the cube must be rebuilt
+        """
+        if not (previous_index.is_unique and self._key_index.is_unique):
+            return None
+        positions = self._key_index.get_indexer(previous_index)
+        if (positions < 0).any():
+            return None
+        
+        columns = [LatencyCube.TIME_COLUMN] + LatencyCube.DIMENSIONS + LatencyCube.METRICS
+        for col in columns:
+            before = previous[col].reset_index(drop=True)
+            after = self._data[col].iloc[positions].reset_index(drop=True)
+            if isinstance(before.dtype, pd.CategoricalDtype) or isinstance(after.dtype, pd.CategoricalDtype):
+                before, after = before.astype(object), after.astype(object)
+            if not before.equals(after):
+                return None
+                
+        added = np.ones(len(self._data), dtype=bool)
+        added[positions] = False
+        return self._data[added]
+        
+    def _update_cube(self, previous: Optional[pd.DataFrame], previous_index: Optional[pd.Index]) -> None:
+        """
+        Fold the rows of a refresh into the latency cube, rebuilding it only
+        when earlier rows changed.
+        """
+        appended = None if previous is None else self._appended_rows(previous, previous_index)
+        if appended is None:
+            self.latency_cube = LatencyCube().update(self._data)
+            logger.info(f"Built latency cube: {self.latency_cube.cells()} cells")
+        else:
+            self.latency_cube.update(appended)
+            logger.info(f"Added {len(appended)} rows to the latency cube")
+            
     def get_transaction(self, transaction_id: str) -> Tuple[pd.DataFrame, List[str], List[float]]:
         """Get transaction data and its flow."""
         df = self.get_data()
-        transaction = df[df['transaction_id'] == transaction_id]
+        positions = self._key_index.get_indexer_for([self.key_encoder.encode_one(transaction_id)])
+        transaction = df.iloc[positions[positions >= 0]]
+        # A hashed key may be shared by another ID, so the match is confirmed on the ID itself
+        transaction = transaction[transaction['transaction_id'] == transaction_id]
         
         if transaction.empty:
             return None, [], []
             
-        flow, timestamps = self.flow_mapper.map_transaction_flow(df, transaction_id)
+        flow, timestamps = self.flow_mapper.map_row_flow(transaction.iloc[0])
         return transaction, flow, timestamps
     
     def get_analysis_stats(self) -> Dict:
         """Get analysis statistics."""
-        df = self.get_data()
+        self.get_data()
         
-        # Calculate statistics
-        latency_stats = self.latency_analyzer.calculate_basic_stats(
-            df, ['service_latency', 'total_latency', 'e2e_latency']
+        # Latency statistics and bottleneck counts roll up the latency cube
+        latency_stats = {
+            col: self.latency_cube.stats(col)
+            for col in ['service_latency', 'total_latency', 'e2e_latency']
+        }
+        bottlenecks = sum(
+            int(self.latency_cube.exceedances(col)['count'].sum())
+            for col in ['service_latency', 'e2e_latency']
         )
         
+        if self._flow_summary is None:
+            self._flow_summary = self._summarize_flows(self._data)
+        flow_stats, pattern_anomalies, sequence_anomalies = self._flow_summary
+        
+        return {
+            'latency_stats': latency_stats,
+            'flow_stats': flow_stats,
+            'anomaly_counts': {
+                'pattern': pattern_anomalies,
+                'sequence': sequence_anomalies,
+                'bottlenecks': bottlenecks
+            }
+        }
+        
+    def _summarize_flows(self, df: pd.DataFrame) -> Tuple[Dict, int, int]:
+        """Flow statistics and flow anomaly counts, computed once per refresh."""
         # Analyze flows
         flow_patterns, flow_stats = self.flow_mapper.analyze_flow_patterns(df)
         flow_anomalies = self.flow_mapper.detect_anomalies(df)
@@ -95,15 +185,7 @@ class LogRepository:
             lambda x: 'LONG_DURATION' in x
         )])
         
-        return {
-            'latency_stats': latency_stats,
-            'flow_stats': flow_stats,
-            'anomaly_counts': {
-                'pattern': pattern_anomalies,
-                'sequence': sequence_anomalies,
-                'bottlenecks': len(self.latency_analyzer.find_bottlenecks(df))
-            }
-        }
+        return flow_stats, pattern_anomalies, sequence_anomalies
     
     def get_last_update(self) -> Optional[datetime]:
         """Get the timestamp of the last data update."""
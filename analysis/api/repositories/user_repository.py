@@ -25,7 +25,7 @@ class UserRepository:
         df = self.log_repository.get_data()
         
         # Filter logs for this user
-        user_transactions = df[df['user_id'] == user_id]
+        user_transactions = self.log_repository.normalizer.format_ip(df[df['user_id'] == user_id])
         
         if user_transactions.empty:
             return None
@@ -2,7 +2,7 @@
 Service layer for log analysis operations.
 """
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 import pandas as pd
 import numpy as np
 
@@ -17,6 +17,7 @@ from ..models.schemas import (
     PaginationParams
 )
 from utils.logger import setup_logger
+from data_ingestion.timestamps import format_timestamps
 
 logger = setup_logger('service')
 
@@ -139,25 +140,11 @@ class LogService:
         if query.operation:
             df = df[df['operation'] == query.operation]
             
-        # Get bottlenecks using analyzer
-        bottlenecks_df = self.repository.latency_analyzer.find_bottlenecks(df)
+        # Get the slowest bottlenecks up to the limit using analyzer
+        bottlenecks_df = self.repository.latency_analyzer.find_bottlenecks(df, top_k=query.limit)
         
         # Convert to list of BottleneckDetail
-        bottlenecks = []
-        for _, row in bottlenecks_df.iterrows():
-            bottlenecks.append(
-                BottleneckDetail(
-                    transaction_id=row['transaction_id'],
-                    stage=row['stage'],
-                    latency=row['latency'],
-                    threshold=row['threshold'],
-                    operation=row['operation'],
-                    module=row['module']
-                )
-            )
-            
-        # Apply limit
-        return bottlenecks[:query.limit]
+        return [BottleneckDetail(**row) for row in bottlenecks_df.to_dict('records')]
         
     def get_bottlenecks_summary(
         self,
@@ -175,40 +162,35 @@ class LogService:
             Summary statistics
         """
         df = self.repository.get_data()
+        cube = self.repository.latency_cube
         
-        # Apply time range filter if provided
-        if start_time:
-            df = df[df['timestamp_secu'] >= start_time]
-        if end_time:
-            df = df[df['timestamp_secu'] <= end_time]
-            
-        # Get bottlenecks
-        bottlenecks_df = self.repository.latency_analyzer.find_bottlenecks(df)
-        
-        if bottlenecks_df.empty:
-            return BottleneckSummary(
-                total_bottlenecks=0,
-                by_stage={},
-                by_operation={},
-                by_module={},
-                avg_latency={},
-                threshold_exceeded={}
-            )
-            
-        # Calculate summary statistics
-        by_stage = bottlenecks_df['stage'].value_counts().to_dict()
-        by_operation = bottlenecks_df['operation'].value_counts().to_dict()
-        by_module = bottlenecks_df['module'].value_counts().to_dict()
-        
-        # Calculate average latencies by stage
-        avg_latency = bottlenecks_df.groupby('stage')['latency'].mean().to_dict()
-        
-        # Calculate average threshold exceedance
-        bottlenecks_df['exceeded_by'] = bottlenecks_df['latency'] - bottlenecks_df['threshold']
-        threshold_exceeded = bottlenecks_df.groupby('stage')['exceeded_by'].mean().to_dict()
-        
+        # Bottlenecks are the latencies above each stage's p95, counted from the latency cube
+        # (and from the rows of the minutes the range covers only partly)
+        stages = {'MIDDLEWARE': 'service_latency', 'END_TO_END': 'e2e_latency'}
+        by_stage = {}
+        by_operation = {}
+        by_module = {}
+        avg_latency = {}
+        threshold_exceeded = {}
+        for stage, col in stages.items():
+            cells = cube.exceedances(
+                col, by=['operation', 'module'], start=start_time, end=end_time, rows=df
+            ).reset_index()
+            if cells.empty:
+                continue
+                
+            # Total and breakdowns add up the same integer counts
+            count = int(cells['count'].sum())
+            by_stage[stage] = count
+            avg_latency[stage] = cells['sum'].sum() / count
+            threshold_exceeded[stage] = avg_latency[stage] - cells['threshold'].iloc[0]
+            for key, counts in ((by_operation, cells.groupby('operation', observed=True)['count'].sum()),
+                                (by_module, cells.groupby('module', observed=True)['count'].sum())):
+                for value, n in counts.items():
+                    key[str(value)] = key.get(str(value), 0) + int(n)
+                    
         return BottleneckSummary(
-            total_bottlenecks=len(bottlenecks_df),
+            total_bottlenecks=sum(by_stage.values()),
             by_stage=by_stage,
             by_operation=by_operation,
             by_module=by_module,
@@ -225,6 +207,9 @@ class LogService:
         """
         Get latency trends over time.
         
+        Windows of whole minutes are rolled up from the latency cube; shorter
+        ones are computed from the rows.
+        
         Args:
             start_time: Start of time range
             end_time: End of time range
@@ -234,12 +219,62 @@ class LogService:
             List of latency trends by time window
         """
         df = self.repository.get_data()
+        cube = self.repository.latency_cube
+        if not cube.supports_window(window):
+            return self._latency_trends_from_rows(df, start_time, end_time, window)
+            
+        latencies = cube.rollup('e2e_latency', percentiles=(95, 99), window=window, start=start_time, end=end_time)
+        bottlenecks = [
+            cube.exceedances(col, window=window, start=start_time, end=end_time, rows=df)['count']
+            for col in ['service_latency', 'e2e_latency']
+        ]
+        windows = latencies.index.union(bottlenecks[0].index).union(bottlenecks[1].index)
+        latencies = latencies.reindex(windows)
+        num_bottlenecks = sum(counts.reindex(windows, fill_value=0) for counts in bottlenecks)
         
+        return [
+            LatencyTrend(
+                timestamp=name,
+                avg_latency=latencies.at[name, 'mean'],
+                percentile_95=latencies.at[name, 'p95'],
+                percentile_99=latencies.at[name, 'p99'],
+                num_bottlenecks=int(num_bottlenecks[name])
+            )
+            for name in windows
+        ]
+        
+    @staticmethod
+    def _utc(timestamp: datetime) -> pd.Timestamp:
+        """Timestamp in UTC; naive timestamps are taken as UTC."""
+        timestamp = pd.Timestamp(timestamp)
+        if timestamp.tzinfo is None:
+            return timestamp.tz_localize('UTC')
+        return timestamp.tz_convert('UTC')
+        
+    def _latency_trends_from_rows(
+        self,
+        df: pd.DataFrame,
+        start_time: datetime,
+        end_time: datetime,
+        window: str
+    ) -> List[LatencyTrend]:
+        """
+        Compute latency trends from the rows, for windows shorter than the cube's minutes.
+        
+        Like the cube, naive times are taken as UTC and windows are labelled
+        with UTC timestamps, whatever the window length.
+        """
+        times = df['timestamp_secu']
+        if times.dt.tz is None:
+            times = times.dt.tz_localize('UTC')
+        else:
+            times = times.dt.tz_convert('UTC')
+            
         # Filter by time range
         df = df[
-            (df['timestamp_secu'] >= start_time) &
-            (df['timestamp_secu'] <= end_time)
-        ]
+            (times >= self._utc(start_time)) &
+            (times <= self._utc(end_time))
+        ].assign(timestamp_secu=times)
         
         if df.empty:
             return []
@@ -247,20 +282,19 @@ class LogService:
         # Resample by time window
         df.set_index('timestamp_secu', inplace=True)
         resampled = df.resample(window)
+        num_bottlenecks = self.repository.latency_analyzer.count_bottlenecks(df, pd.Grouper(freq=window))
         
         trends = []
         for name, group in resampled:
             if not group.empty:
                 # Calculate metrics for this window
-                bottlenecks = self.repository.latency_analyzer.find_bottlenecks(group)
-                
                 trends.append(
                     LatencyTrend(
                         timestamp=name,
                         avg_latency=group['e2e_latency'].mean(),
                         percentile_95=group['e2e_latency'].quantile(0.95),
                         percentile_99=group['e2e_latency'].quantile(0.99),
-                        num_bottlenecks=len(bottlenecks)
+                        num_bottlenecks=int(num_bottlenecks[name])
                     )
                 )
                 
@@ -295,20 +329,23 @@ class LogService:
             end_idx = min(start_idx + pagination.page_size, total_records)
             
             # Slice dataframe
-            df_page = df.iloc[start_idx:end_idx]
+            df_page = self.repository.normalizer.format_ip(df.iloc[start_idx:end_idx])
+            
+            # ISO strings of the page's timestamps, built column by column
+            timestamps = {
+                'security': format_timestamps(df_page['timestamp_secu']),
+                'middleware_start': format_timestamps(df_page['start_time']),
+                'middleware_end': format_timestamps(df_page['end_time']),
+                'core_banking': format_timestamps(df_page['timestamp_core'])
+            }
             
             # Convert to format más simple y estandarizado
             records = []
-            for _, row in df_page.iterrows():
+            for position, (_, row) in enumerate(df_page.iterrows()):
                 try:
                     record = {
                         'transaction_id': str(row['transaction_id']),
-                        'timestamps': {
-                            'security': row['timestamp_secu'].replace(tzinfo=timezone.utc).isoformat() if pd.notna(row['timestamp_secu']) else None,
-                            'middleware_start': row['start_time'].replace(tzinfo=timezone.utc).isoformat() if pd.notna(row['start_time']) else None,
-                            'middleware_end': row['end_time'].replace(tzinfo=timezone.utc).isoformat() if pd.notna(row['end_time']) else None,
-                            'core_banking': row['timestamp_core'].replace(tzinfo=timezone.utc).isoformat() if pd.notna(row['timestamp_core']) else None
-                        },
+                        'timestamps': {stage: values[position] for stage, values in timestamps.items()},
                         'operation': str(row['operation']) if pd.notna(row['operation']) else None,
                         'status': str(row['status']) if pd.notna(row['status']) else None,
                         'amount': float(row['amount']) if pd.notna(row['amount']) else None,
@@ -0,0 +1,128 @@
+"""
+Benchmark of bottleneck extraction: the former row-by-row iterrows loop
+against the vectorized find_bottlenecks, its top_k mode and count_bottlenecks
+by time window, with a check that the results are identical.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_bottlenecks --rows 10000000 --top-k 100
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.latency_analysis import LatencyAnalyzer
+
+MODULES = ['WEB', 'MOBILE', 'API']
+OPERATIONS = ['DEPOSIT', 'WITHDRAWAL', 'TRANSFER']
+
+
+def build_frame(num_rows: int) -> pd.DataFrame:
+    """
+    Build merged-like rows over a day.
+    
+    Args:
+        num_rows (int): Number of rows
+        
+    Returns:
+        pd.DataFrame: transaction_id, timestamp_secu, operation, module,
+            service_latency and e2e_latency (5% missing)
+    """
+    rng = np.random.default_rng(0)
+    service = rng.lognormal(-1.8, 0.5, num_rows)
+    e2e = rng.lognormal(2.0, 0.4, num_rows)
+    service[rng.random(num_rows) < 0.05] = np.nan
+    e2e[rng.random(num_rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        'transaction_id': pd.array([f"txn-{i:08d}" for i in range(num_rows)], dtype='string'),
+        'timestamp_secu': pd.Timestamp('2025-05-13') + pd.to_timedelta(np.sort(rng.integers(0, 86_400_000, num_rows)), unit='ms'),
+        'operation': pd.Categorical.from_codes(rng.integers(0, len(OPERATIONS), num_rows), categories=OPERATIONS),
+        'module': pd.Categorical.from_codes(rng.integers(0, len(MODULES), num_rows), categories=MODULES),
+        'service_latency': service,
+        'e2e_latency': e2e
+    })
+
+
+def iterrows_bottlenecks(df: pd.DataFrame, threshold_percentile: float = 95) -> pd.DataFrame:
+    """Bottlenecks with a quantile, a mask and a dict per row, as find_bottlenecks did."""
+    bottlenecks = []
+    for stage, col in LatencyAnalyzer.BOTTLENECK_STAGES:
+        threshold = df[col].quantile(threshold_percentile / 100)
+        for _, txn in df[df[col] > threshold].iterrows():
+            bottlenecks.append({
+                'transaction_id': txn['transaction_id'],
+                'stage': stage,
+                'latency': txn[col],
+                'threshold': threshold,
+                'operation': txn['operation'],
+                'module': txn['module']
+            })
+    return pd.DataFrame(bottlenecks)
+
+
+def same_bottlenecks(first: pd.DataFrame, second: pd.DataFrame) -> bool:
+    """Whether two bottleneck frames hold the same rows in the same order."""
+    return len(first) == len(second) and all(
+        np.array_equal(first[col].to_numpy(dtype=object), second[col].to_numpy(dtype=object))
+        for col in ['transaction_id', 'stage', 'latency', 'threshold', 'operation', 'module']
+    )
+
+
+def timed(func):
+    """Run a function and return its result and elapsed seconds."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print times and identity checks."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=10_000_000)
+    arg_parser.add_argument('--iterrows-rows', type=int, default=200_000,
+                            help='Rows the iterrows loop runs on; its time is scaled to --rows')
+    arg_parser.add_argument('--top-k', type=int, default=100)
+    arg_parser.add_argument('--window', default='30s')
+    args = arg_parser.parse_args()
+    
+    analyzer = LatencyAnalyzer()
+    df = build_frame(args.rows)
+    print(f"Rows: {args.rows:,}")
+    
+    # The loop is too slow for the whole frame; time it on a prefix and check identity there
+    prefix = df.iloc[:args.iterrows_rows]
+    expected, loop_time = timed(lambda: iterrows_bottlenecks(prefix))
+    identical = same_bottlenecks(analyzer.find_bottlenecks(prefix), expected)
+    print(
+        f"\niterrows on {len(prefix):,} rows {loop_time:6.2f}s, "
+        f"~{loop_time * args.rows / len(prefix):.0f}s scaled to {args.rows:,}"
+    )
+    
+    everything, full_time = timed(lambda: analyzer.find_bottlenecks(df))
+    print(f"find_bottlenecks           {full_time * 1000:8.1f}ms  {len(everything):,} bottlenecks")
+    
+    top, top_time = timed(lambda: analyzer.find_bottlenecks(df, top_k=args.top_k))
+    slowest = everything.iloc[np.lexsort((np.arange(len(everything)), -everything['latency'].to_numpy()))[:args.top_k]]
+    identical &= same_bottlenecks(top, slowest.reset_index(drop=True))
+    print(f"find_bottlenecks top_k={args.top_k:<4} {top_time * 1000:8.1f}ms")
+    
+    # Trend counts: find_bottlenecks per resample window against one grouped pass
+    timeline = df.set_index('timestamp_secu')
+    counts, count_time = timed(lambda: analyzer.count_bottlenecks(timeline, pd.Grouper(freq=args.window)))
+    windows = timeline.iloc[:args.iterrows_rows].resample(args.window)
+    per_window, window_time = timed(lambda: {
+        name: len(analyzer.find_bottlenecks(group)) for name, group in windows if not group.empty
+    })
+    prefix_counts = analyzer.count_bottlenecks(timeline.iloc[:args.iterrows_rows], pd.Grouper(freq=args.window))
+    identical &= all(int(prefix_counts[name]) == count for name, count in per_window.items())
+    print(
+        f"\nTrends by {args.window}: find_bottlenecks per window on {args.iterrows_rows:,} rows {window_time:6.2f}s, "
+        f"count_bottlenecks on {args.rows:,} rows {count_time:6.2f}s ({len(counts):,} windows)"
+    )
+    
+    print(f"\nResults identical: {identical}")
+
+
+if __name__ == "__main__":
+    main()
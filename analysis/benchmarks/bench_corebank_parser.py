@@ -0,0 +1,60 @@
+"""
+Benchmark of the per-line and bulk CoreBank parsers.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_corebank_parser --lines 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from data_ingestion.corebank_parser import CorebankParser
+
+SAMPLE_LINE = (
+    "2025-05-13 08:00:10 INFO [mobile] user65@198.81.20.19 Transacción ejecutada "
+    "(transaction: txn-{:07d}, tipo: consignar, cuenta: ahorros, estado: Completada, valor: 429947.36)\n"
+)
+
+
+def write_sample_file(path: str, num_lines: int) -> None:
+    """
+    Write a synthetic CoreBank log file.
+    
+    Args:
+        path (str): Output file path
+        num_lines (int): Number of lines to write
+    """
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(num_lines):
+            f.write(SAMPLE_LINE.format(i))
+
+
+def main():
+    """Run the benchmark and print lines/sec for both parsers."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--lines', type=int, default=10_000_000)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'logs_CoreBank.log')
+        write_sample_file(path, args.lines)
+        parser = CorebankParser(path)
+        
+        start = time.perf_counter()
+        per_line_df = parser.parse_file()
+        per_line_time = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        bulk_df, report = parser.parse_file_bulk()
+        bulk_time = time.perf_counter() - start
+        
+    print(f"Lines: {args.lines}")
+    print(f"parse_file:      {per_line_time:8.2f}s  {args.lines / per_line_time:12,.0f} lines/s")
+    print(f"parse_file_bulk: {bulk_time:8.2f}s  {args.lines / bulk_time:12,.0f} lines/s")
+    print(f"Speed-up: {per_line_time / bulk_time:.2f}x")
+    print(f"Identical output: {per_line_df.equals(bulk_df)} (rejected: {report['rejected']})")
+
+
+if __name__ == "__main__":
+    main()
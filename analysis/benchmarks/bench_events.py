@@ -0,0 +1,132 @@
+"""
+Benchmark of per-event records on the online ingestion path: a dict per
+parsed line versus slotted event records, in memory per event, allocated
+blocks and time to build the parsed frame of a micro-batch.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_events --events 200000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion.corebank_parser import CorebankParser
+from data_ingestion.timestamps import parse_timestamps
+
+MODULES = ['mobile', 'web', 'api']
+OPERATIONS = ['consignar', 'retirar', 'transferir']
+STATUSES = ['Completada', 'Rechazada']
+
+
+def build_lines(num_events: int) -> list:
+    """
+    Build CoreBank log lines with a realistic mix of users, modules and operations.
+    
+    Args:
+        num_events (int): Number of lines
+        
+    Returns:
+        list: Log lines
+    """
+    rng = np.random.default_rng(0)
+    users = rng.integers(0, 1000, num_events)
+    modules = rng.integers(0, len(MODULES), num_events)
+    operations = rng.integers(0, len(OPERATIONS), num_events)
+    statuses = rng.integers(0, len(STATUSES), num_events)
+    amounts = rng.uniform(1000, 1_000_000, num_events).round(2)
+    return [
+        f"2025-05-13 08:{i // 60 % 60:02d}:{i % 60:02d} INFO [{MODULES[modules[i]]}] "
+        f"user{users[i]}@10.0.{users[i] % 256}.{i % 256} Transacción ejecutada "
+        f"(transaction: txn-{i:07d}, tipo: {OPERATIONS[operations[i]]}, cuenta: ahorros, "
+        f"estado: {STATUSES[statuses[i]]}, valor: {amounts[i]})"
+        for i in range(num_events)
+    ]
+
+
+def parse_line_dict(parser: CorebankParser, line: str) -> dict:
+    """Parse a line into a dict, as the parsers did before event records."""
+    timestamp, module, user_id, ip_address, details = parser.LINE_PATTERN.match(line).groups()
+    details_dict = dict(pair.split(': ') for pair in details.split(', '))
+    return {
+        'timestamp': timestamp,
+        'module': module,
+        'user_id': user_id,
+        'ip_address': ip_address,
+        'transaction_id': details_dict['transaction'],
+        'operation': details_dict['tipo'],
+        'account_type': details_dict['cuenta'],
+        'status': details_dict['estado'],
+        'amount': float(details_dict['valor'])
+    }
+
+
+def build_frame_dicts(parser: CorebankParser, records: list) -> pd.DataFrame:
+    """Build the parsed frame from dicts, as the parsers did before event records."""
+    df = pd.DataFrame(records)
+    df['timestamp'] = parse_timestamps(df['timestamp'])
+    df = df.rename(columns={'timestamp': 'timestamp_core'})
+    df['txn_key'] = parser.key_encoder.encode(df['transaction_id'])
+    return parser._encode_categories(df[parser.COLUMNS])
+
+
+def measure(parse, lines: list):
+    """
+    Parse every line and measure what the parsed records hold.
+    
+    Args:
+        parse (Callable): Function from a log line to a record
+        lines (list): Log lines
+        
+    Returns:
+        Tuple[list, float, int, float]: Records, bytes per event, allocated
+            blocks per event and parse seconds
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = [parse(line) for line in lines]
+    elapsed = time.perf_counter() - start
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    
+    stats = snapshot.statistics('filename')
+    size = sum(stat.size for stat in stats)
+    blocks = sum(stat.count for stat in stats)
+    return records, size / len(lines), blocks / len(lines), elapsed
+
+
+def main():
+    """Run the benchmark and print memory, allocations and time for dicts and events."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--events', type=int, default=200_000)
+    args = arg_parser.parse_args()
+    
+    lines = build_lines(args.events)
+    dict_parser = CorebankParser()
+    event_parser = CorebankParser()
+    print(f"Events: {args.events}")
+    
+    dicts, dict_bytes, dict_blocks, dict_time = measure(lambda line: parse_line_dict(dict_parser, line), lines)
+    events, event_bytes, event_blocks, event_time = measure(event_parser.parse_line, lines)
+    print(f"\n{'':8} {'bytes/event':>12} {'blocks/event':>13} {'parse':>8}")
+    print(f"{'dicts':8} {dict_bytes:12.0f} {dict_blocks:13.1f} {dict_time:7.2f}s")
+    print(f"{'events':8} {event_bytes:12.0f} {event_blocks:13.1f} {event_time:7.2f}s")
+    print(f"Memory ratio: {dict_bytes / event_bytes:.2f}x")
+    
+    start = time.perf_counter()
+    dict_df = build_frame_dicts(dict_parser, dicts)
+    dict_frame_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    event_df = event_parser.build_frame(events)
+    event_frame_time = time.perf_counter() - start
+    
+    print(f"\nFrame build  dicts {dict_frame_time:6.2f}s  events {event_frame_time:6.2f}s  same: {dict_df.equals(event_df)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark of grouped latency statistics: one groupby per statistic versus
+grouped_stats, which factorizes and sorts once, by one and by three dimensions.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_group_stats --rows 1000000 10000000 50000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.group_stats import grouped_stats
+
+MODULES = ['WEB', 'MOBILE', 'API']
+OPERATIONS = ['DEPOSIT', 'WITHDRAWAL', 'TRANSFER']
+STATUSES = ['COMPLETED', 'REJECTED']
+
+
+def build_frame(num_rows: int) -> pd.DataFrame:
+    """
+    Build merged-like rows with categorical keys and lognormal latencies.
+    
+    Args:
+        num_rows (int): Number of rows
+        
+    Returns:
+        pd.DataFrame: Columns module, operation, status and e2e_latency (5% missing)
+    """
+    rng = np.random.default_rng(0)
+    latency = rng.lognormal(0.5, 0.8, num_rows)
+    latency[rng.random(num_rows) < 0.05] = np.nan
+    return pd.DataFrame({
+        'module': pd.Categorical.from_codes(rng.integers(0, len(MODULES), num_rows), categories=MODULES),
+        'operation': pd.Categorical.from_codes(rng.integers(0, len(OPERATIONS), num_rows), categories=OPERATIONS),
+        'status': pd.Categorical.from_codes(rng.integers(0, len(STATUSES), num_rows), categories=STATUSES),
+        'e2e_latency': latency
+    })
+
+
+def groupby_per_statistic(df: pd.DataFrame, dimensions: list, value_col: str) -> pd.DataFrame:
+    """Compute the statistics with one groupby each, as analyze_by_dimension did."""
+    valid_df = df[df[value_col].notna()]
+    grouped = pd.DataFrame()
+    grouped['mean'] = valid_df.groupby(dimensions, observed=True)[value_col].mean()
+    grouped['median'] = valid_df.groupby(dimensions, observed=True)[value_col].median()
+    grouped['std'] = valid_df.groupby(dimensions, observed=True)[value_col].std()
+    grouped['min'] = valid_df.groupby(dimensions, observed=True)[value_col].min()
+    grouped['max'] = valid_df.groupby(dimensions, observed=True)[value_col].max()
+    grouped['p95'] = valid_df.groupby(dimensions, observed=True)[value_col].quantile(0.95)
+    grouped['p99'] = valid_df.groupby(dimensions, observed=True)[value_col].quantile(0.99)
+    grouped['count'] = valid_df.groupby(dimensions, observed=True)[value_col].count()
+    return grouped
+
+
+def timed(func):
+    """Run a function and return its result and elapsed seconds."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print the time of both implementations for each size."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, nargs='+', default=[1_000_000, 10_000_000, 50_000_000])
+    args = arg_parser.parse_args()
+    
+    print(f"{'rows':>12} {'dimensions':>26} {'groupby x8':>11} {'one pass':>9} {'speed-up':>9}  same")
+    for num_rows in args.rows:
+        df = build_frame(num_rows)
+        for dimensions in (['module'], ['module', 'operation', 'status']):
+            expected, groupby_time = timed(lambda: groupby_per_statistic(df, dimensions, 'e2e_latency'))
+            result, one_pass_time = timed(lambda: grouped_stats(df, dimensions, 'e2e_latency'))
+            same = expected.round(9).equals(result.round(9))
+            print(
+                f"{num_rows:>12,} {' x '.join(dimensions):>26} {groupby_time:10.2f}s "
+                f"{one_pass_time:8.2f}s {groupby_time / one_pass_time:8.2f}x  {same}"
+            )
+        del df
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of the single-pass and sort-merge transaction joins against two
+four-key pandas merges.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_hash_join --rows 10000000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion.hash_join import TransactionJoin
+from data_ingestion.merger import JOIN_COLUMNS
+from data_ingestion.sort_merge import SortMergeJoin
+
+
+def build_sources(num_rows: int):
+    """
+    Build synthetic security, middleware and core banking frames.
+    
+    Middleware and core banking hold 90% of the transactions, shuffled.
+    
+    Args:
+        num_rows (int): Number of security check rows
+        
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: Frames of the three sources
+    """
+    rng = np.random.default_rng(0)
+    keys = np.arange(num_rows, dtype=np.int64)
+    users = pd.Categorical.from_codes(rng.integers(0, 100, num_rows), [f"user{i}" for i in range(100)])
+    modules = pd.Categorical.from_codes(rng.integers(0, 3, num_rows), ['api', 'mobile', 'web'])
+    ips = (keys % 65536).astype(str).astype(object)
+    times = pd.Timestamp('2025-05-13') + pd.to_timedelta(keys, unit='s')
+    
+    secu = pd.DataFrame({
+        'transaction_id': keys.astype(str).astype(object),
+        'txn_key': keys,
+        'timestamp_secu': times,
+        'validation_result': pd.Categorical.from_codes(rng.integers(0, 2, num_rows), ['Aprobada', 'Rechazada']),
+        'failure_reason': pd.Categorical.from_codes(np.zeros(num_rows, dtype=np.int8), ['']),
+        'verifications': 'token',
+        'user_id': users,
+        'ip_address': ips,
+        'module': modules
+    })
+    
+    def subset(columns):
+        rows = rng.permutation(num_rows)[:num_rows * 9 // 10]
+        frame = secu.iloc[rows][['txn_key', 'user_id', 'ip_address', 'module']].reset_index(drop=True)
+        for col, values in columns.items():
+            frame[col] = values(len(frame))
+        return frame
+        
+    mid = subset({
+        'start_time': lambda n: times[:n],
+        'end_time': lambda n: times[:n],
+        'operation': lambda n: pd.Categorical.from_codes(rng.integers(0, 3, n), ['consignar', 'retirar', 'transferir']),
+        'service_latency': lambda n: rng.random(n),
+        'total_latency': lambda n: rng.random(n)
+    })
+    core = subset({
+        'timestamp_core': lambda n: times[:n],
+        'status': lambda n: pd.Categorical.from_codes(np.zeros(n, dtype=np.int8), ['Completada']),
+        'amount': lambda n: rng.random(n) * 1e6,
+        'account_type': lambda n: pd.Categorical.from_codes(rng.integers(0, 2, n), ['ahorros', 'corriente'])
+    })
+    return secu, mid, core
+
+
+def two_merges(secu, mid, core):
+    """Join the sources the way merge_logs used to."""
+    keys = ['txn_key', 'user_id', 'ip_address', 'module']
+    merged = pd.merge(secu.copy(), mid, on=keys, how='left', suffixes=('_secu', ''))
+    merged = pd.merge(merged, core, on=keys, how='left', suffixes=('', '_core'))
+    return merged[list(JOIN_COLUMNS)]
+
+
+def single_pass(secu, mid, core):
+    """Join the sources with TransactionJoin."""
+    joined, _ = TransactionJoin().join('secucheck', secu, {'midflow': mid, 'corebank': core}, JOIN_COLUMNS)
+    return joined
+
+
+def sort_merge(secu, mid, core):
+    """Join the sources with SortMergeJoin."""
+    joined, _ = SortMergeJoin().join('secucheck', secu, {'midflow': mid, 'corebank': core}, JOIN_COLUMNS)
+    return joined
+
+
+def in_key_order(df):
+    """Sort a source by transaction key, as it is read from a log file."""
+    return df.sort_values('txn_key', kind='stable').reset_index(drop=True)
+
+
+def measure(func, *args):
+    """
+    Run a join and measure its time and peak traced memory.
+    
+    Returns:
+        Tuple[pd.DataFrame, float, int]: Result, elapsed seconds and peak bytes
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    """Run the benchmark and print time and peak memory of each join."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=10_000_000)
+    args = arg_parser.parse_args()
+    
+    secu, mid, core = build_sources(args.rows)
+    
+    merged, merge_time, merge_peak = measure(two_merges, secu, mid, core)
+    output_bytes = merged.memory_usage(index=False).sum()
+    del merged
+    joined, join_time, join_peak = measure(single_pass, secu, mid, core)
+    del joined
+    _, sort_time, sort_peak = measure(sort_merge, secu, mid, core)
+    
+    # Log files are written in transaction order: both joins on sorted runs
+    mid, core = in_key_order(mid), in_key_order(core)
+    _, join_sorted_time, _ = measure(single_pass, secu, mid, core)
+    _, sort_sorted_time, _ = measure(sort_merge, secu, mid, core)
+    
+    print(f"Rows: {args.rows}  (output {output_bytes / 1e6:,.0f} MB)")
+    print(f"Two pd.merge calls: {merge_time:8.2f}s  peak {merge_peak / 1e6:8,.0f} MB")
+    print(f"TransactionJoin:    {join_time:8.2f}s  peak {join_peak / 1e6:8,.0f} MB")
+    print(f"SortMergeJoin:      {sort_time:8.2f}s  peak {sort_peak / 1e6:8,.0f} MB")
+    print(f"Speed-up: {merge_time / join_time:.2f}x")
+    print(f"Sources in key order: TransactionJoin {join_sorted_time:.2f}s  SortMergeJoin {sort_sorted_time:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark of IP normalization: per-row string rewriting versus uint32 encoding.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_ip_normalization --rows 10000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.normalizer import LogNormalizer
+
+
+def build_ips(num_rows: int, num_distinct: int) -> pd.Series:
+    """
+    Build a column of dotted-quad IP strings, some with leading zeros.
+    
+    Args:
+        num_rows (int): Number of rows
+        num_distinct (int): Number of distinct addresses
+        
+    Returns:
+        pd.Series: IP address strings, one Python string per row as parsed from the logs
+    """
+    rng = np.random.default_rng(0)
+    octets = rng.integers(0, 256, (num_distinct, 4))
+    distinct = [f"{a}.{b}.{c:03d}.{d}" for a, b, c, d in octets]
+    rows = rng.integers(0, num_distinct, num_rows)
+    return pd.Series([str(distinct[i]) for i in rows], name='ip_address')
+
+
+def timed(func):
+    """Run a function and return its result and elapsed seconds."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print time and memory of both normalizations."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=10_000_000)
+    arg_parser.add_argument('--distinct', type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+    
+    normalizer = LogNormalizer()
+    ips = build_ips(args.rows, args.distinct)
+    string_bytes = ips.memory_usage(index=False, deep=True)
+    
+    strings, string_time = timed(lambda: ips.apply(lambda x: '.'.join(str(int(i)) for i in x.split('.'))))
+    encoded, encode_time = timed(lambda: normalizer.normalize_ip(ips.to_frame()))
+    encoded_bytes = encoded['ip_address'].memory_usage(index=False, deep=True)
+    formatted, format_time = timed(lambda: normalizer.format_ip(encoded))
+    
+    print(f"Rows: {args.rows}  ({args.distinct} distinct addresses)")
+    print(f"String rewrite:  {string_time:8.2f}s  {string_bytes / args.rows:6.1f} bytes/row")
+    print(f"uint32 encoding: {encode_time:8.2f}s  {encoded_bytes / args.rows:6.1f} bytes/row  ({string_time / encode_time:.1f}x)")
+    print(f"Strings for output: {format_time:8.2f}s")
+    print(f"Identical strings: {bool((formatted['ip_address'].to_numpy() == strings.to_numpy()).all())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of dashboard queries over a week of rows: statistics computed
+from the rows at each call versus rolled up from the latency cube.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_latency_cube --rows 2000000 --days 7
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.latency_cube import LatencyCube
+from processing.latency_analysis import LatencyAnalyzer
+
+MODULES = ['WEB', 'MOBILE', 'API']
+OPERATIONS = ['DEPOSIT', 'WITHDRAWAL', 'TRANSFER']
+STATUSES = ['COMPLETED', 'REJECTED']
+METRICS = ['service_latency', 'total_latency', 'e2e_latency']
+
+
+def build_frame(num_rows: int, days: int) -> pd.DataFrame:
+    """
+    Build normalized-like rows spread over a number of days.
+    
+    Args:
+        num_rows (int): Number of rows
+        days (int): Days covered
+        
+    Returns:
+        pd.DataFrame: timestamp_secu (UTC), dimension columns and lognormal latencies
+    """
+    rng = np.random.default_rng(0)
+    seconds = np.sort(rng.integers(0, days * 86400, num_rows))
+    service = rng.lognormal(-1.8, 0.5, num_rows)
+    service[rng.random(num_rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        'timestamp_secu': pd.Timestamp('2025-05-13', tz='UTC') + pd.to_timedelta(seconds, unit='s'),
+        'module': pd.Categorical.from_codes(rng.integers(0, len(MODULES), num_rows), categories=MODULES),
+        'operation': pd.Categorical.from_codes(rng.integers(0, len(OPERATIONS), num_rows), categories=OPERATIONS),
+        'status': pd.Categorical.from_codes(rng.integers(0, len(STATUSES), num_rows), categories=STATUSES),
+        'service_latency': service,
+        'total_latency': service + rng.lognormal(-0.5, 0.3, num_rows),
+        'e2e_latency': service + rng.lognormal(2.0, 0.4, num_rows)
+    })
+
+
+def timed(func, repeat: int = 1):
+    """Run a function and return its result and best elapsed seconds."""
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def rows_trends(df: pd.DataFrame, window: str) -> pd.DataFrame:
+    """Mean, p95 and p99 of e2e latency by time window, from the rows."""
+    grouped = df.set_index('timestamp_secu')['e2e_latency'].resample(window)
+    return pd.DataFrame({'mean': grouped.mean(), 'p95': grouped.quantile(0.95), 'p99': grouped.quantile(0.99)})
+
+
+def main():
+    """Run the benchmark and print ingestion cost, query times and percentile error."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=2_000_000)
+    arg_parser.add_argument('--days', type=int, default=7)
+    arg_parser.add_argument('--batches', type=int, default=28)
+    args = arg_parser.parse_args()
+    
+    df = build_frame(args.rows, args.days)
+    analyzer = LatencyAnalyzer()
+    print(f"Rows: {args.rows} over {args.days} days")
+    
+    # Incremental ingestion, batch by batch, then the first fold into the cells
+    cube = LatencyCube()
+    start = time.perf_counter()
+    for part in np.array_split(np.arange(len(df)), args.batches):
+        cube.update(df.iloc[part])
+        cube.cells()
+    ingest_time = time.perf_counter() - start
+    print(f"Ingestion: {args.batches} batches in {ingest_time:.2f}s, {cube.cells():,} minute cells")
+    
+    day_start = pd.Timestamp('2025-05-15 09:30', tz='UTC')
+    day_end = day_start + pd.Timedelta(hours=26)
+    queries = [
+        (
+            'Overall stats, 3 columns',
+            lambda: analyzer.calculate_basic_stats(df, METRICS),
+            lambda: {metric: cube.stats(metric) for metric in METRICS}
+        ),
+        (
+            'p95/p99 by module x operation',
+            lambda: df.groupby(['module', 'operation'], observed=True)['e2e_latency'].quantile([0.95, 0.99]),
+            lambda: cube.rollup('e2e_latency', (95, 99), by=['module', 'operation'])
+        ),
+        (
+            'Bottleneck counts by module',
+            lambda: df.loc[df['service_latency'] > df['service_latency'].quantile(0.95), 'module'].value_counts(),
+            lambda: cube.exceedances('service_latency', 95, by=['module'])
+        ),
+        (
+            'Trends, 1h windows',
+            lambda: rows_trends(df, '1h'),
+            lambda: cube.rollup('e2e_latency', (95, 99), window='1h')
+        ),
+        (
+            'Trends, 5min windows',
+            lambda: rows_trends(df, '5min'),
+            lambda: cube.rollup('e2e_latency', (95, 99), window='5min')
+        ),
+        (
+            '26h range, one module',
+            lambda: df.loc[
+                (df['timestamp_secu'] >= day_start) & (df['timestamp_secu'] < day_end) & (df['module'] == 'WEB'),
+                'e2e_latency'
+            ].quantile([0.5, 0.95, 0.99]),
+            lambda: cube.rollup('e2e_latency', start=day_start, end=day_end - pd.Timedelta(minutes=1), module='WEB')
+        )
+    ]
+    
+    print(f"\n{'query':32} {'rows':>9} {'cube':>9} {'speed-up':>9}")
+    for name, from_rows, from_cube in queries:
+        _, rows_time = timed(from_rows)
+        _, cube_time = timed(from_cube, repeat=3)
+        print(f"{name:32} {rows_time * 1000:7.0f}ms {cube_time * 1000:7.1f}ms {rows_time / cube_time:8.0f}x")
+        
+    # Bottleneck counts are exact, not estimated
+    expected = df.loc[df['service_latency'] > df['service_latency'].quantile(0.95), 'module'].value_counts()
+    counted = cube.exceedances('service_latency', 95, by=['module'])['count'].reindex(expected.index)
+    print(f"Bottleneck counts by module identical: {counted.tolist() == expected.tolist()}")
+    
+    # Percentile error of the cube against exact quantiles of each 5-minute window
+    exact = rows_trends(df, '5min')
+    rolled = cube.rollup('e2e_latency', (95, 99), window='5min').reindex(exact.index)
+    for col in ['p95', 'p99']:
+        error = np.nanmax(np.abs(rolled[col] / exact[col] - 1))
+        print(f"Max relative error of {col} over 5-minute windows: {error:.4f} (accuracy {cube.relative_accuracy})")
+
+
+if __name__ == "__main__":
+    main()
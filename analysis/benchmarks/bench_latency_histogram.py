@@ -0,0 +1,148 @@
+"""
+Benchmark of latency histograms: percentile error against exact quantiles
+on the bundled logs (whole columns, by module and operation, merged from
+partitions and subtracted across time windows), and time against pandas
+quantile on larger synthetic columns. Exits with status 1 if an error
+exceeds the relative accuracy or a merge or subtraction check fails.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_latency_histogram --values 10000000
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion.merger import LogMerger
+from processing.group_stats import grouped_stats, percentile_name
+from processing.latency_histogram import LatencyHistogram, LogBuckets, group_histograms
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+LATENCY_COLS = ['service_latency', 'total_latency', 'e2e_latency']
+PERCENTILES = LatencyHistogram.DEFAULT_PERCENTILES
+
+
+def relative_error(estimates: np.ndarray, exact: np.ndarray) -> float:
+    """
+    Largest error of the estimates relative to the exact values.
+    
+    Exact values within LogBuckets.MIN_VALUE of zero are compared in
+    absolute terms, as the histogram tells them apart only down to it.
+    
+    Returns:
+        float: Maximum relative error
+    """
+    scale = np.maximum(np.abs(exact), LogBuckets.MIN_VALUE)
+    return float(np.max(np.abs(estimates - exact) / scale)) if len(exact) else 0.0
+
+
+def same_histogram(first: LatencyHistogram, second: LatencyHistogram) -> bool:
+    """Whether two histograms hold the same bucket counts and count."""
+    first_state, second_state = first.to_dict(), second.to_dict()
+    return all(first_state[key] == second_state[key] for key in ['count', 'keys', 'counts'])
+
+
+def check_bundled_logs(accuracy: float) -> bool:
+    """
+    Compare histogram percentiles with exact quantiles on the bundled logs.
+    
+    Args:
+        accuracy (float): Relative accuracy of the histograms
+        
+    Returns:
+        bool: Whether every check held
+    """
+    df = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+    fractions = np.asarray(PERCENTILES) / 100
+    print(f"Bundled logs: {len(df)} transactions, relative accuracy {accuracy}")
+    print(f"\n{'column':16} {'values':>7} {'buckets':>8} {'whole':>8} {'by group':>9} {'merged':>7} {'windows':>8}")
+    
+    passed = True
+    for col in LATENCY_COLS:
+        values = df[col].dropna().to_numpy(dtype=np.float64)
+        histogram = LatencyHistogram(accuracy).update(values)
+        whole_error = relative_error(histogram.quantiles(fractions), np.quantile(values, fractions))
+        
+        # Percentiles of each module and operation
+        exact = grouped_stats(df, ['module', 'operation'], col, PERCENTILES)
+        histograms = group_histograms(df, ['module', 'operation'], col, accuracy)
+        estimates = np.array([list(h.percentiles(PERCENTILES).values()) for h in histograms])
+        group_error = relative_error(estimates, exact[[percentile_name(p) for p in PERCENTILES]].to_numpy())
+        
+        # Partitions serialized and merged, as separate processes would
+        merged = LatencyHistogram(accuracy)
+        for part in np.array_split(df[col].to_numpy(dtype=np.float64, na_value=np.nan), 8):
+            state = json.dumps(LatencyHistogram(accuracy).update(part).to_dict())
+            merged.merge(LatencyHistogram.from_dict(json.loads(state)))
+        merged_ok = same_histogram(merged, histogram) and merged.count == histogram.count
+        
+        # The later half of the logs, as the running histogram minus the earlier one
+        timed = df.dropna(subset=[col]).sort_values('timestamp_secu')
+        split = len(timed) // 2
+        earlier = LatencyHistogram(accuracy).update(timed[col].iloc[:split])
+        later = histogram.copy().subtract(earlier)
+        window_ok = same_histogram(later, LatencyHistogram(accuracy).update(timed[col].iloc[split:]))
+        window_error = relative_error(later.quantiles(fractions), np.quantile(timed[col].iloc[split:], fractions))
+        
+        passed &= max(whole_error, group_error, window_error) <= accuracy and merged_ok and window_ok
+        print(
+            f"{col:16} {len(values):7} {histogram.bucket_count():8} {whole_error:8.4f} "
+            f"{group_error:9.4f} {str(merged_ok):>7} {window_error:8.4f}"
+        )
+    return passed
+
+
+def check_synthetic(num_values: int, accuracy: float) -> bool:
+    """
+    Time histogram percentiles against pandas quantile on a lognormal column.
+    
+    Args:
+        num_values (int): Number of values
+        accuracy (float): Relative accuracy of the histogram
+        
+    Returns:
+        bool: Whether the error held within the accuracy
+    """
+    rng = np.random.default_rng(0)
+    values = pd.Series(rng.lognormal(-1.0, 1.2, num_values))
+    fractions = np.asarray(PERCENTILES) / 100
+    
+    start = time.perf_counter()
+    exact = values.quantile(fractions).to_numpy()
+    exact_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    histogram = LatencyHistogram(accuracy).update(values)
+    build_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    estimates = histogram.quantiles(fractions)
+    read_time = time.perf_counter() - start
+    
+    error = relative_error(estimates, exact)
+    size = len(json.dumps(histogram.to_dict()))
+    print(f"\nSynthetic: {num_values:,} lognormal values")
+    print(f"pandas quantile {exact_time:.2f}s  histogram build {build_time:.2f}s, read {read_time * 1000:.2f}ms")
+    print(f"Max relative error {error:.4f}, {histogram.bucket_count()} buckets, {size:,} bytes serialized")
+    return error <= accuracy
+
+
+def main():
+    """Run the benchmark and print percentile errors, checks and times."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--values', type=int, default=10_000_000)
+    arg_parser.add_argument('--accuracy', type=float, default=0.01)
+    args = arg_parser.parse_args()
+    
+    passed = check_bundled_logs(args.accuracy)
+    passed &= check_synthetic(args.values, args.accuracy)
+    print(f"\nWithin accuracy bounds: {passed}")
+    if not passed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the normalization pipeline: copying with raw columns versus in place.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_normalizer --rows 2000000
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.bench_hash_join import build_sources
+from data_ingestion.merger import join_sources
+from data_ingestion.sort_merge import SortMergeJoin
+from processing.normalizer import LogNormalizer
+
+NUMERIC_COLUMNS = ['service_latency', 'total_latency', 'e2e_latency', 'amount']
+
+
+def build_merged(num_rows: int):
+    """
+    Build a merged frame like merge_logs returns.
+    
+    Args:
+        num_rows (int): Number of security check rows
+        
+    Returns:
+        pd.DataFrame: Merged data
+    """
+    secu, mid, core = build_sources(num_rows)
+    merged, _ = join_sources(SortMergeJoin(), {'secucheck': secu, 'midflow': mid, 'corebank': core})
+    
+    # The join sources carry plain numbers as IPs; turn them into dotted quads
+    hosts = {str(i): f"10.0.{i >> 8}.{i & 255}" for i in range(65536)}
+    merged['ip_address'] = merged['ip_address'].map(hosts)
+    return merged
+
+
+def run(merged, inplace: bool, keep_raw: bool, traced: bool):
+    """
+    Normalize a fresh copy of the merged frame.
+    
+    Returns:
+        Tuple[Dict, int, int]:
+            Stage statistics, overall peak bytes (0 if not traced) and output bytes
+    """
+    df = merged.copy()
+    normalizer = LogNormalizer()
+    if traced:
+        tracemalloc.start()
+    result = normalizer.normalize_dataframe(df, NUMERIC_COLUMNS, inplace=inplace, keep_raw=keep_raw)
+    peak = 0
+    if traced:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return normalizer.stage_stats, peak, int(result.memory_usage(index=False).sum())
+
+
+def main():
+    """Run the benchmark and print time and peak memory of each stage in both modes."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=2_000_000)
+    args = arg_parser.parse_args()
+    
+    merged = build_merged(args.rows)
+    input_bytes = merged.memory_usage(index=False).sum()
+    print(f"Rows: {args.rows}  (merged frame {input_bytes / 1e6:,.0f} MB)")
+    
+    for label, inplace, keep_raw in [('Copy, raw columns', False, True), ('In place', True, False)]:
+        timings, _, _ = run(merged, inplace, keep_raw, traced=False)
+        peaks, peak, output_bytes = run(merged, inplace, keep_raw, traced=True)
+        total = sum(stats['seconds'] for stats in timings.values())
+        print(f"\n{label}: {total:.2f}s  peak {peak / 1e6:,.0f} MB  output {output_bytes / 1e6:,.0f} MB")
+        for stage, stats in timings.items():
+            print(f"  {stage:<12} {stats['seconds']:8.2f}s  peak +{peaks[stage]['peak_bytes'] / 1e6:8,.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
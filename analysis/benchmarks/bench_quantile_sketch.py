@@ -0,0 +1,116 @@
+"""
+Benchmark of the quantile sketch: rank error and time against exact pandas
+quantiles. Exits with status 1 if the error exceeds the documented bound.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_quantile_sketch --values 10000000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from processing.quantile_sketch import QuantileSketch, merge_sketches
+
+FRACTIONS = np.linspace(0.01, 0.99, 99)
+
+
+def distributions(num_values: int):
+    """
+    Build test columns: latency-like, uniform, sorted and heavily repeated values.
+    
+    Args:
+        num_values (int): Values per column
+        
+    Returns:
+        Dict[str, np.ndarray]: Columns by name
+    """
+    rng = np.random.default_rng(0)
+    return {
+        'lognormal': rng.lognormal(0, 1.5, num_values),
+        'uniform': rng.random(num_values),
+        'sorted': np.sort(rng.exponential(1.0, num_values)),
+        'repeated': rng.integers(0, 20, num_values).astype(np.float64)
+    }
+
+
+def sketch_once(values, k):
+    """Sketch the whole column in one update."""
+    return QuantileSketch(k).update(values)
+
+
+def sketch_chunks(values, k, num_chunks=1000):
+    """Sketch the column chunk by chunk, as a stream of micro-batches."""
+    sketch = QuantileSketch(k)
+    for chunk in np.array_split(values, num_chunks):
+        sketch.update(chunk)
+    return sketch
+
+
+def sketch_partitions(values, k, num_partitions=16):
+    """Sketch partitions separately and merge them, as parallel workers would."""
+    parts = [{'col': QuantileSketch(k).update(part)} for part in np.array_split(values, num_partitions)]
+    return merge_sketches(parts)['col']
+
+
+def sketch_persisted(values, k, num_chunks=10):
+    """Sketch the column in chunks, saving and reloading the sketch between them."""
+    state = None
+    for chunk in np.array_split(values, num_chunks):
+        sketch = QuantileSketch(k) if state is None else QuantileSketch.from_dict(state)
+        state = sketch.update(chunk).to_dict()
+    return QuantileSketch.from_dict(state)
+
+
+def rank_error(sorted_values, sketch):
+    """
+    Largest rank error of the sketch's quantiles.
+    
+    A quantile estimate is correct if its rank range among the inputs
+    (ties included) covers the requested fraction; the error is the
+    distance to that range.
+    
+    Returns:
+        float: Maximum normalized rank error over FRACTIONS
+    """
+    estimates = sketch.quantiles(FRACTIONS)
+    low = np.searchsorted(sorted_values, estimates, side='left') / len(sorted_values)
+    high = np.searchsorted(sorted_values, estimates, side='right') / len(sorted_values)
+    return float(np.maximum(np.maximum(low - FRACTIONS, FRACTIONS - high), 0).max())
+
+
+def main():
+    """Run the benchmark: rank error, size and time of each sketching, and the bound."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--values', type=int, default=10_000_000)
+    arg_parser.add_argument('--k', type=int, default=200)
+    args = arg_parser.parse_args()
+    
+    bound = QuantileSketch.RANK_ERROR / args.k
+    print(f"Values: {args.values}  k={args.k}  documented rank error bound {bound:.2%}")
+    worst = 0.0
+    for name, values in distributions(args.values).items():
+        start = time.perf_counter()
+        pd.Series(values).quantile([0.25, 0.75])
+        exact_time = time.perf_counter() - start
+        sorted_values = np.sort(values)
+        
+        print(f"\n{name}: pandas quantile {exact_time:.2f}s")
+        for label, build in [('one update', sketch_once), ('1000 chunks', sketch_chunks),
+                             ('16 partitions', sketch_partitions), ('persisted', sketch_persisted)]:
+            start = time.perf_counter()
+            sketch = build(values, args.k)
+            elapsed = time.perf_counter() - start
+            error = rank_error(sorted_values, sketch)
+            worst = max(worst, error)
+            print(f"  {label:<14} {elapsed:6.2f}s  max rank error {error:.3%}  retained {sketch.retained()} values")
+            
+    print(f"\nWorst rank error: {worst:.3%} ({'within' if worst <= bound else 'ABOVE'} the documented {bound:.2%})")
+    if worst > bound:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
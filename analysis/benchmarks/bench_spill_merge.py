@@ -0,0 +1,107 @@
+"""
+Benchmark of the out-of-core partitioned merge against the in-memory merge.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_spill_merge --transactions 2000000 --budget-mb 256
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from data_ingestion.categories import concat_frames
+from data_ingestion.columnar import read_frame
+from data_ingestion.merger import LogMerger
+
+
+def write_sample_logs(tmp_dir: str, num_transactions: int):
+    """
+    Write synthetic security check, middleware and core banking logs.
+    
+    Args:
+        tmp_dir (str): Output directory
+        num_transactions (int): Number of transactions
+        
+    Returns:
+        Tuple[str, str, str]: Paths of the three log files
+    """
+    paths = tuple(os.path.join(tmp_dir, name) for name in (
+        'logs_SecuCheck.json', 'logs_MidFlow_ESB.csv', 'logs_CoreBank.log'
+    ))
+    with open(paths[0], 'w', encoding='utf-8') as secu, \
+            open(paths[1], 'w', encoding='utf-8') as mid, \
+            open(paths[2], 'w', encoding='utf-8') as core:
+        mid.write("timestamp,nivel_log,transaction_id,direction,operation,status_code,latency_ms,user_id,ip_address,modulo\n")
+        for i in range(num_transactions):
+            txn = f"txn-{i:08d}"
+            user = f"user{i % 100}"
+            ip = f"10.0.{i // 256 % 256}.{i % 256}"
+            second = f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}"
+            secu.write(json.dumps({
+                'timestamp': f"2025-05-13 {second}",
+                'transaction_id': txn,
+                'user_id': user,
+                'ip_address': ip,
+                'resultado_validación': 'Aprobada',
+                'motivo_fallo': '',
+                'modulo': 'mobile',
+                'verificaciones_realizadas': ['token']
+            }) + "\n")
+            mid.write(f"2025-05-13 {second},INFO,{txn},request,consignar,200,,{user},{ip},mobile\n")
+            mid.write(f"2025-05-13 {second},INFO,{txn},response,consignar,200,120,{user},{ip},mobile\n")
+            core.write(
+                f"2025-05-13 {second} INFO [mobile] {user}@{ip} Transacción ejecutada "
+                f"(transaction: {txn}, tipo: consignar, cuenta: ahorros, estado: Completada, valor: 1000.0)\n"
+            )
+    return paths
+
+
+def measure(func, *args):
+    """
+    Run a merge and measure its time and peak traced memory.
+    
+    Returns:
+        Tuple[Any, float, int]: Result, elapsed seconds and peak bytes
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    """Run the benchmark and print time and peak memory of both merges."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--transactions', type=int, default=2_000_000)
+    arg_parser.add_argument('--budget-mb', type=int, default=256)
+    args = arg_parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        merger = LogMerger(*write_sample_logs(tmp_dir, args.transactions))
+        output_dir = os.path.join(tmp_dir, 'merged')
+        
+        merged, memory_time, memory_peak = measure(merger.merge_logs)
+        paths, spill_time, spill_peak = measure(
+            merger.merge_logs_spilled,
+            output_dir,
+            args.budget_mb * 1024 ** 2,
+            os.path.join(tmp_dir, 'spill')
+        )
+        
+        spilled = concat_frames([read_frame(path) for path in paths])
+        spilled = spilled.set_index('txn_key').loc[merged['txn_key']].reset_index()[merged.columns]
+        identical = merged.equals(spilled)
+        
+    print(f"Transactions: {args.transactions}  budget {args.budget_mb} MB  partitions {len(paths)}")
+    print(f"merge_logs:         {memory_time:8.2f}s  peak {memory_peak / 1e6:8,.0f} MB")
+    print(f"merge_logs_spilled: {spill_time:8.2f}s  peak {spill_peak / 1e6:8,.0f} MB")
+    print(f"Identical rows: {identical}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of timestamp handling: inferred versus explicit parsing, and
+per-row Timestamp methods versus bulk work on epoch integers.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_timestamps --rows 1000000
+"""
+import argparse
+import time
+from datetime import timezone
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion.timestamps import elapsed_seconds, epoch_seconds, format_timestamps, parse_timestamps
+
+
+def build_timestamps(num_rows: int) -> np.ndarray:
+    """
+    Build log timestamp strings spread over a month.
+    
+    Args:
+        num_rows (int): Number of rows
+        
+    Returns:
+        np.ndarray: Strings like 2025-05-13 08:00:00 (object array)
+    """
+    rng = np.random.default_rng(0)
+    seconds = rng.integers(0, 30 * 86400, num_rows).astype('timedelta64[s]')
+    values = np.datetime64('2025-05-13T08:00:00') + seconds
+    return np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ').astype(object)
+
+
+def timed(func):
+    """Run a function and return its result and elapsed seconds."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print the time of each way of handling timestamps."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=1_000_000)
+    args = arg_parser.parse_args()
+    
+    strings = build_timestamps(args.rows)
+    print(f"Rows: {args.rows}")
+    
+    inferred, infer_time = timed(lambda: pd.Series(pd.to_datetime(strings)))
+    parsed, parse_time = timed(lambda: pd.Series(parse_timestamps(strings)))
+    print(f"\nParsing     inferred {infer_time:6.2f}s  explicit format {parse_time:6.2f}s  same: {inferred.equals(parsed)}")
+    
+    end = parsed + pd.Timedelta(seconds=1.5)
+    by_row, row_time = timed(lambda: [(e - s).total_seconds() for s, e in zip(parsed, end)])
+    bulk, bulk_time = timed(lambda: elapsed_seconds(parsed, end))
+    print(f"Latencies   per row  {row_time:6.2f}s  epoch integers  {bulk_time:6.2f}s  same: {np.array_equal(by_row, bulk)}")
+    
+    by_row, row_time = timed(lambda: [ts.timestamp() for ts in parsed])
+    bulk, bulk_time = timed(lambda: epoch_seconds(parsed))
+    print(f"Epoch secs  per row  {row_time:6.2f}s  epoch integers  {bulk_time:6.2f}s  same: {np.array_equal(by_row, bulk)}")
+    
+    by_row, row_time = timed(lambda: [ts.replace(tzinfo=timezone.utc).isoformat() for ts in parsed])
+    bulk, bulk_time = timed(lambda: format_timestamps(parsed))
+    print(f"ISO strings per row  {row_time:6.2f}s  bulk            {bulk_time:6.2f}s  same: {list(bulk) == by_row}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark of joins and lookups on string transaction IDs versus int64 keys.
+
+Run from the analysis directory:
+    python -m benchmarks.bench_transaction_keys --rows 50000000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_ingestion.transaction_keys import TransactionKeyEncoder
+
+
+def build_frames(num_rows: int):
+    """
+    Build two frames sharing transaction IDs in different orders.
+    
+    Args:
+        num_rows (int): Number of transactions
+        
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Left and right frames with string IDs and keys
+    """
+    encoder = TransactionKeyEncoder()
+    ids = pd.Series([f"txn-{i:08d}" for i in range(num_rows)])
+    keys = encoder.encode(ids)
+    order = np.random.default_rng(0).permutation(num_rows)
+    
+    left = pd.DataFrame({'transaction_id': ids, 'txn_key': keys, 'left_value': np.arange(num_rows)})
+    right = pd.DataFrame({
+        'transaction_id': ids.to_numpy()[order],
+        'txn_key': keys[order],
+        'right_value': np.arange(num_rows)
+    })
+    return left, right
+
+
+def timed(func):
+    """Run a function and return its elapsed seconds."""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print timings for both key types."""
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--rows', type=int, default=50_000_000)
+    arg_parser.add_argument('--lookups', type=int, default=100)
+    args = arg_parser.parse_args()
+    
+    encoder = TransactionKeyEncoder()
+    left, right = build_frames(args.rows)
+    
+    encode_time = timed(lambda: encoder.encode(left['transaction_id']))
+    
+    string_merge = timed(lambda: pd.merge(left, right.drop(columns='txn_key'), on='transaction_id'))
+    key_merge = timed(lambda: pd.merge(left, right.drop(columns='transaction_id'), on='txn_key'))
+    
+    targets = [f"txn-{i:08d}" for i in np.random.default_rng(1).integers(0, args.rows, args.lookups)]
+    string_lookup = timed(lambda: [left[left['transaction_id'] == target] for target in targets])
+    
+    def key_lookup():
+        index = pd.Index(left['txn_key'])
+        for target in targets:
+            positions = index.get_indexer_for([encoder.encode_one(target)])
+            left.iloc[positions[positions >= 0]]
+    indexed_lookup = timed(key_lookup)
+    
+    print(f"Rows: {args.rows}")
+    print(f"Encode IDs:        {encode_time:8.2f}s")
+    print(f"Merge on string:   {string_merge:8.2f}s")
+    print(f"Merge on txn_key:  {key_merge:8.2f}s  ({string_merge / key_merge:.2f}x)")
+    print(f"{args.lookups} lookups, string scan:   {string_lookup:8.2f}s")
+    print(f"{args.lookups} lookups, key index:     {indexed_lookup:8.2f}s  ({string_lookup / indexed_lookup:.1f}x, index build included)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+"""
+Pytest configuration: tests import the analysis packages (data_ingestion,
+processing, ...) from this directory.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
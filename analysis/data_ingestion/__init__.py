@@ -3,8 +3,12 @@ Data ingestion module for LogView360.
 """
 
 from .merger import LogMerger
+from .streaming_merger import StreamingMerger
 from .secucheck_parser import SecucheckParser
 from .midflow_parser import MidflowParser
 from .corebank_parser import CorebankParser
+from .checkpoint import CheckpointStore
+from .cache import ParsedCache
+from .transaction_keys import TransactionKeyEncoder
 
-__all__ = ['LogMerger', 'SecucheckParser', 'MidflowParser', 'CorebankParser'] 
\ No newline at end of file
+__all__ = ['LogMerger', 'StreamingMerger', 'SecucheckParser', 'MidflowParser', 'CorebankParser', 'CheckpointStore', 'ParsedCache', 'TransactionKeyEncoder'] 
\ No newline at end of file
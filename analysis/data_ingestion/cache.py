@@ -0,0 +1,358 @@
+"""
+Columnar cache of parsed log sources keyed by file fingerprint.
+"""
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from .categories import concat_frames
+from .columnar import decode_frame, encode_frame
+from .log_set import LogFileSet, is_log_set
+
+logger = setup_logger('parse_cache')
+
+
+class ParsedCache:
+    """Cache of parser output stored as NumPy archives, one array per column."""
+    
+    # Bytes hashed at the head and at the tail of a source file
+    HASH_BLOCK = 64 * 1024
+    
+    # Bumped whenever parser output changes, so older entries are ignored
+    FORMAT_VERSION = 2
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_dir (str): Directory holding cached frames and their metadata
+            max_bytes (int): Cache size above which least recently used entries are evicted
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        
+    def _hash_range(self, path: str, start: int, length: int) -> str:
+        """
+        Hash a byte range of a file.
+        
+        Args:
+            path (str): Path to the file
+            start (int): First byte to hash
+            length (int): Number of bytes to hash
+            
+        Returns:
+            str: Hex digest of the range
+        """
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return hashlib.blake2b(f.read(length), digest_size=16).hexdigest()
+            
+    def fingerprint(self, path: str) -> Dict:
+        """
+        Fingerprint a source file by size, mtime and a hash of its head and tail.
+        
+        A rotated log set is fingerprinted file by file, so adding, removing
+        or changing any of its files invalidates the entry.
+        
+        Args:
+            path (str): Path to the source file, or a directory or glob of rotated files
+            
+        Returns:
+            Dict: Fingerprint fields
+        """
+        if is_log_set(path):
+            return {
+                'path': path,
+                'files': [self._file_fingerprint(file_path) for file_path in LogFileSet(path).resolve()]
+            }
+        return self._file_fingerprint(path)
+        
+    def _file_fingerprint(self, path: str) -> Dict:
+        """
+        Fingerprint a single file.
+        
+        Args:
+            path (str): Path to the file
+            
+        Returns:
+            Dict: Fingerprint fields
+        """
+        stat = os.stat(path)
+        head_len = min(stat.st_size, self.HASH_BLOCK)
+        tail_start = max(stat.st_size - self.HASH_BLOCK, 0)
+        return {
+            'path': os.path.abspath(path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'inode': stat.st_ino,
+            'head_len': head_len,
+            'head_hash': self._hash_range(path, 0, head_len),
+            'tail_hash': self._hash_range(path, tail_start, stat.st_size - tail_start)
+        }
+        
+    def _entry_key(self, path: str, name: str) -> str:
+        """
+        Build the file name prefix of a cache entry.
+        
+        Args:
+            path (str): Path to the source file
+            name (str): Name of the parser output
+            
+        Returns:
+            str: Entry key
+        """
+        digest = hashlib.blake2b(os.path.abspath(path).encode('utf-8'), digest_size=8).hexdigest()
+        return f"{name}-{digest}"
+        
+    def _meta_path(self, key: str) -> str:
+        """Path of the metadata file of an entry."""
+        return os.path.join(self.cache_dir, f"{key}.json")
+        
+    def _read_meta(self, key: str) -> Optional[Dict]:
+        """
+        Read the metadata of an entry.
+        
+        Args:
+            key (str): Entry key
+            
+        Returns:
+            Optional[Dict]: Metadata, or None if the entry does not exist
+        """
+        meta_path = self._meta_path(key)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {str(e)}")
+            return None
+            
+    def _write_meta(self, key: str, meta: Dict) -> None:
+        """Write the metadata of an entry atomically."""
+        meta['last_access'] = time.time()
+        tmp_path = f"{self._meta_path(key)}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self._meta_path(key))
+        
+    def _write_part(self, key: str, part: int, df: pd.DataFrame) -> Tuple[str, List[Dict]]:
+        """
+        Write one part of an entry.
+        
+        Args:
+            key (str): Entry key
+            part (int): Part number
+            df (pd.DataFrame): Rows of the part
+            
+        Returns:
+            Tuple[str, List[Dict]]: Part file name and column schema
+        """
+        arrays, schema = encode_frame(df)
+        file_name = f"{key}.{part}.npz"
+        with open(os.path.join(self.cache_dir, file_name), 'wb') as f:
+            np.savez(f, **arrays)
+        return file_name, schema
+        
+    def _load_parts(self, key: str, meta: Dict) -> pd.DataFrame:
+        """
+        Load and concatenate the parts of an entry.
+        
+        Args:
+            key (str): Entry key
+            meta (Dict): Entry metadata
+            
+        Returns:
+            pd.DataFrame: Cached frame
+        """
+        frames = []
+        for file_name in meta['parts']:
+            with np.load(os.path.join(self.cache_dir, file_name), allow_pickle=False) as archive:
+                frames.append(decode_frame(archive, meta['schema']))
+        self._write_meta(key, meta)
+        if len(frames) == 1:
+            return frames[0]
+        return concat_frames(frames)
+        
+    def _remove_entry(self, key: str, meta: Optional[Dict]) -> None:
+        """Delete the files of an entry."""
+        for file_name in (meta or {}).get('parts', []):
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except FileNotFoundError:
+                pass
+        try:
+            os.remove(self._meta_path(key))
+        except FileNotFoundError:
+            pass
+            
+    def load(self, path: str, name: str, fingerprint: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+        """
+        Load a parser output if its source file is unchanged.
+        
+        Args:
+            path (str): Path to the source file
+            name (str): Name of the parser output
+            fingerprint (Dict, optional): Fingerprint of the source (taken now if omitted)
+                
+        Returns:
+            Optional[pd.DataFrame]: Cached frame, or None on a miss
+        """
+        key = self._entry_key(path, name)
+        meta = self._read_meta(key)
+        if meta is None or meta.get('mode') != 'full' or meta.get('format') != self.FORMAT_VERSION:
+            return None
+        if meta['fingerprint'] != (fingerprint or self.fingerprint(path)):
+            logger.info(f"Cache stale for {name}: source changed")
+            return None
+        try:
+            return self._load_parts(key, meta)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding broken cache entry {key}: {str(e)}")
+            self._remove_entry(key, meta)
+            return None
+            
+    def store(self, path: str, name: str, df: pd.DataFrame, fingerprint: Optional[Dict] = None) -> None:
+        """
+        Store a parser output for a source file.
+        
+        Args:
+            path (str): Path to the source file
+            name (str): Name of the parser output
+            df (pd.DataFrame): Parser output
+            fingerprint (Dict, optional): Fingerprint taken before parsing (now if omitted)
+        """
+        key = self._entry_key(path, name)
+        self._remove_entry(key, self._read_meta(key))
+        try:
+            file_name, schema = self._write_part(key, 0, df)
+        except TypeError as e:
+            logger.warning(f"Not caching {name}: {str(e)}")
+            return
+        self._write_meta(key, {
+            'mode': 'full',
+            'format': self.FORMAT_VERSION,
+            'fingerprint': fingerprint or self.fingerprint(path),
+            'schema': schema,
+            'parts': [file_name]
+        })
+        self.evict()
+        
+    def load_tail(self, path: str, name: str) -> Optional[Tuple[pd.DataFrame, int, int]]:
+        """
+        Load tail-mode data accumulated for a source file.
+        
+        The entry is valid while the file has the same inode, has not shrunk
+        below the offset already consumed and still starts with the same bytes.
+        
+        Args:
+            path (str): Path to the source file
+            name (str): Name of the parser output
+            
+        Returns:
+            Optional[Tuple[pd.DataFrame, int, int]]: Cached frame, inode and byte offset
+                consumed, or None on a miss
+        """
+        key = self._entry_key(path, name)
+        meta = self._read_meta(key)
+        if meta is None or meta.get('mode') != 'tail' or meta.get('format') != self.FORMAT_VERSION:
+            return None
+        stat = os.stat(path)
+        if (
+            stat.st_ino != meta['inode']
+            or stat.st_size < meta['offset']
+            or self._hash_range(path, 0, meta['head_len']) != meta['head_hash']
+        ):
+            logger.info(f"Cache stale for {name}: source rotated or truncated")
+            return None
+        try:
+            return self._load_parts(key, meta), meta['inode'], meta['offset']
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Discarding broken cache entry {key}: {str(e)}")
+            self._remove_entry(key, meta)
+            return None
+            
+    def store_tail(
+        self,
+        path: str,
+        name: str,
+        df: pd.DataFrame,
+        inode: int,
+        offset: int,
+        append: bool = False
+    ) -> None:
+        """
+        Store or extend tail-mode data for a source file.
+        
+        Args:
+            path (str): Path to the source file
+            name (str): Name of the parser output
+            df (pd.DataFrame): Rows to store (only the delta when appending)
+            inode (int): Inode of the file that was read
+            offset (int): Byte offset consumed so far
+            append (bool): Add df as a new part instead of replacing the entry
+        """
+        key = self._entry_key(path, name)
+        meta = self._read_meta(key)
+        if (
+            not append
+            or meta is None
+            or meta.get('mode') != 'tail'
+            or meta.get('format') != self.FORMAT_VERSION
+        ):
+            self._remove_entry(key, meta)
+            meta = {'mode': 'tail', 'format': self.FORMAT_VERSION, 'parts': []}
+            
+        head_len = min(offset, self.HASH_BLOCK)
+        meta.update({
+            'inode': inode,
+            'offset': offset,
+            'head_len': head_len,
+            'head_hash': self._hash_range(path, 0, head_len)
+        })
+        
+        if not df.empty or not meta['parts']:
+            try:
+                file_name, schema = self._write_part(key, len(meta['parts']), df)
+            except TypeError as e:
+                logger.warning(f"Not caching {name}: {str(e)}")
+                self._remove_entry(key, meta)
+                return
+            meta['parts'].append(file_name)
+            meta['schema'] = schema
+            
+        self._write_meta(key, meta)
+        self.evict()
+        
+    def evict(self) -> None:
+        """Evict least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith('.json'):
+                continue
+            key = file_name[:-len('.json')]
+            meta = self._read_meta(key)
+            if meta is None:
+                continue
+            size = sum(
+                os.path.getsize(os.path.join(self.cache_dir, part))
+                for part in meta['parts']
+                if os.path.exists(os.path.join(self.cache_dir, part))
+            )
+            entries.append((meta.get('last_access', 0), key, meta, size))
+            total += size
+            
+        for _, key, meta, size in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            logger.info(f"Evicting cache entry {key} ({size} bytes)")
+            self._remove_entry(key, meta)
+            total -= size
@@ -0,0 +1,97 @@
+"""
+Fixed category sets for the dictionary-encoded columns of the log sources.
+"""
+from typing import Dict, List, Optional
+import pandas as pd
+
+from utils.logger import setup_logger
+
+logger = setup_logger('categories')
+
+# Raw values of each categorical column, shared by every source. Categories are
+# kept sorted so group-bys list them in the same order as plain strings would.
+# Columns mapped to None are categorical with categories taken from the data.
+CATEGORY_SETS: Dict[str, Optional[List[str]]] = {
+    'module': ['api', 'mobile', 'web'],
+    'operation': ['consignar', 'retirar', 'transferir'],
+    'status': ['Aprobada', 'Completada', 'Fallida', 'Rechazada'],
+    'account_type': ['ahorros', 'corriente'],
+    'validation_result': ['Aprobada', 'Rechazada'],
+    'failure_reason': ['', 'IP sospechosa', 'Límite diario excedido', 'Token inválido'],
+    'user_id': None
+}
+
+
+def to_categorical(series: pd.Series, column: str) -> pd.Series:
+    """
+    Encode a column as a categorical with its fixed category set.
+    
+    Values outside the fixed set are kept as extra categories and reported.
+    
+    Args:
+        series (pd.Series): Column values
+        column (str): Column name in CATEGORY_SETS
+        
+    Returns:
+        pd.Series: Categorical column
+    """
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        series = series.astype('category')
+        
+    categories = CATEGORY_SETS.get(column)
+    if categories is None:
+        return series
+        
+    unknown = series.cat.categories.difference(categories)
+    if len(unknown):
+        logger.warning(f"Unexpected {column} values: {list(unknown)}")
+    return series.cat.set_categories(sorted(list(categories) + list(unknown)))
+
+
+def unify_categories(frames: List[pd.DataFrame]) -> List[pd.DataFrame]:
+    """
+    Give categorical columns shared by several frames the same categories.
+    
+    Equal category sets let concatenations and merges keep the columns
+    categorical instead of falling back to object strings.
+    
+    Args:
+        frames (List[pd.DataFrame]): Frames to align
+        
+    Returns:
+        List[pd.DataFrame]: Frames with the sorted union of their categories
+    """
+    unions: Dict[str, pd.Index] = {}
+    for frame in frames:
+        for col in frame.columns:
+            if isinstance(frame[col].dtype, pd.CategoricalDtype):
+                categories = frame[col].cat.categories
+                if col in unions:
+                    unions[col] = unions[col].union(categories)
+                else:
+                    unions[col] = categories
+                    
+    aligned = []
+    for frame in frames:
+        changed = {
+            col: frame[col].cat.set_categories(categories)
+            for col, categories in unions.items()
+            if col in frame.columns
+            and isinstance(frame[col].dtype, pd.CategoricalDtype)
+            and not frame[col].cat.categories.equals(categories)
+        }
+        aligned.append(frame.assign(**changed) if changed else frame)
+    return aligned
+
+
+def concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Concatenate frames, keeping their categorical columns categorical.
+    
+    Args:
+        frames (List[pd.DataFrame]): Frames to concatenate, in order
+        
+    Returns:
+        pd.DataFrame: Concatenated frame
+    """
+    return pd.concat(unify_categories(frames), ignore_index=True)
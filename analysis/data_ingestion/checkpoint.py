@@ -0,0 +1,149 @@
+"""
+Persisted byte-offset checkpoints for incremental (tail mode) ingestion.
+"""
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import os
+
+from utils.logger import setup_logger
+
+logger = setup_logger('checkpoint')
+
+
+class CheckpointStore:
+    """Store of the last read byte offset, inode and content fingerprint by log file."""
+    
+    # Bytes just before the offset hashed into the fingerprint
+    FINGERPRINT_SIZE = 4096
+    
+    def __init__(self, checkpoint_path: str):
+        """
+        Initialize the checkpoint store.
+        
+        Args:
+            checkpoint_path (str): Path to the JSON file holding the checkpoints
+        """
+        self.checkpoint_path = checkpoint_path
+        self._checkpoints: Dict[str, Dict[str, Any]] = self._load()
+        
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Load checkpoints from disk.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Checkpoints by absolute file path
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint file {self.checkpoint_path}: {str(e)}")
+            return {}
+            
+    def _save(self) -> None:
+        """Write checkpoints to disk atomically."""
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._checkpoints, f, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+        
+    def _fingerprint(self, log_path: str, offset: int) -> str:
+        """
+        Hash the bytes of a log file just before an offset.
+        
+        Args:
+            log_path (str): Path to the log file
+            offset (int): Byte offset the hashed bytes end at
+            
+        Returns:
+            str: Hex digest of up to FINGERPRINT_SIZE bytes before the offset
+        """
+        start = max(0, offset - self.FINGERPRINT_SIZE)
+        with open(log_path, 'rb') as f:
+            f.seek(start)
+            return hashlib.blake2b(f.read(offset - start), digest_size=16).hexdigest()
+            
+    def get(self, log_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the checkpoint for a log file.
+        
+        Args:
+            log_path (str): Path to the log file
+            
+        Returns:
+            Optional[Dict[str, Any]]: Stored inode, offset and fingerprint, or None if
+                unknown
+        """
+        return self._checkpoints.get(os.path.abspath(log_path))
+        
+    def update(self, log_path: str, inode: int, offset: int) -> None:
+        """
+        Record the inode and byte offset reached for a log file.
+        
+        The bytes read just before the offset are fingerprinted from the file,
+        so a file rewritten in place can be told from one that grew.
+        
+        Args:
+            log_path (str): Path to the log file
+            inode (int): Inode of the file that was read
+            offset (int): Byte offset just after the last complete line read
+        """
+        self._checkpoints[os.path.abspath(log_path)] = {
+            'inode': inode,
+            'offset': offset,
+            'fingerprint': self._fingerprint(log_path, offset)
+        }
+        self._save()
+        
+    def reset(self, log_path: str) -> None:
+        """
+        Forget the checkpoint for a log file so it is read from the start.
+        
+        Args:
+            log_path (str): Path to the log file
+        """
+        if self._checkpoints.pop(os.path.abspath(log_path), None) is not None:
+            self._save()
+            
+    def resolve_start(self, log_path: str) -> Tuple[int, int]:
+        """
+        Work out where to resume reading a log file.
+        
+        The stored offset is discarded when the file was rotated (different
+        inode) or truncated (current size smaller than the stored offset), and
+        when the bytes before the offset changed: a file truncated in place
+        (copytruncate) that grew past the offset before this call.
+        
+        Args:
+            log_path (str): Path to the log file
+            
+        Returns:
+            Tuple[int, int]: Current inode and byte offset to resume from
+        """
+        stat = os.stat(log_path)
+        checkpoint = self.get(log_path)
+        
+        if checkpoint is None:
+            return stat.st_ino, 0
+            
+        if checkpoint['inode'] != stat.st_ino:
+            logger.info(f"Rotation detected for {log_path}, reading from start")
+            return stat.st_ino, 0
+            
+        if stat.st_size < checkpoint['offset']:
+            logger.info(f"Truncation detected for {log_path}, reading from start")
+            return stat.st_ino, 0
+            
+        # Checkpoints written before fingerprints were recorded are trusted
+        fingerprint = checkpoint.get('fingerprint')
+        if fingerprint is not None and self._fingerprint(log_path, checkpoint['offset']) != fingerprint:
+            logger.info(f"Content before offset changed in {log_path}, reading from start")
+            return stat.st_ino, 0
+            
+        return stat.st_ino, checkpoint['offset']
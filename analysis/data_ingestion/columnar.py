@@ -0,0 +1,122 @@
+"""
+Columnar encoding of DataFrames as NumPy archives, one array per column.
+"""
+from typing import Dict, List, Tuple
+import json
+import numpy as np
+import pandas as pd
+
+# Archive entry holding the column schema of self-describing files
+SCHEMA_ENTRY = '__schema__'
+
+
+def encode_frame(df: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], List[Dict]]:
+    """
+    Encode a frame as plain NumPy arrays.
+    
+    Strings are dictionary-encoded (codes plus unique values) so no
+    Python objects are pickled. Nullable integer, float and boolean
+    columns are stored as their values plus a mask of missing ones.
+    
+    Args:
+        df (pd.DataFrame): Frame to encode
+        
+    Returns:
+        Tuple[Dict[str, np.ndarray], List[Dict]]: Arrays by name and column schema
+    """
+    arrays = {}
+    schema = []
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        prefix = f"c{i}"
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            arrays[f"{prefix}_codes"] = series.cat.codes.to_numpy()
+            arrays[f"{prefix}_values"] = np.asarray(series.cat.categories, dtype=str)
+            schema.append({'name': col, 'kind': 'category', 'ordered': bool(series.cat.ordered)})
+        elif isinstance(series.dtype, pd.DatetimeTZDtype):
+            arrays[prefix] = series.dt.tz_localize(None).to_numpy()
+            schema.append({'name': col, 'kind': 'datetime_tz', 'tz': str(series.dt.tz)})
+        elif isinstance(series.array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray)):
+            mask = series.isna().to_numpy()
+            arrays[prefix] = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+            arrays[f"{prefix}_mask"] = mask
+            schema.append({'name': col, 'kind': 'masked', 'dtype': series.dtype.name})
+        elif series.dtype == object:
+            codes, uniques = pd.factorize(series)
+            inferred = pd.api.types.infer_dtype(uniques)
+            if inferred not in ('string', 'empty'):
+                raise TypeError(f"Column {col} holds non-string objects")
+            arrays[f"{prefix}_codes"] = codes
+            arrays[f"{prefix}_values"] = np.asarray(uniques, dtype=str)
+            schema.append({'name': col, 'kind': 'object'})
+        else:
+            arrays[prefix] = series.to_numpy()
+            schema.append({'name': col, 'kind': 'plain'})
+    return arrays, schema
+
+
+def decode_frame(archive, schema: List[Dict]) -> pd.DataFrame:
+    """
+    Decode a frame encoded by encode_frame.
+    
+    Args:
+        archive: Loaded NumPy archive
+        schema (List[Dict]): Column schema
+        
+    Returns:
+        pd.DataFrame: Decoded frame
+    """
+    columns = {}
+    for i, spec in enumerate(schema):
+        prefix = f"c{i}"
+        if spec['kind'] == 'category':
+            columns[spec['name']] = pd.Categorical.from_codes(
+                archive[f"{prefix}_codes"],
+                categories=archive[f"{prefix}_values"].astype(object),
+                ordered=spec['ordered']
+            )
+        elif spec['kind'] == 'datetime_tz':
+            columns[spec['name']] = pd.Series(archive[prefix]).dt.tz_localize(spec['tz'])
+        elif spec['kind'] == 'masked':
+            column = pd.array(archive[prefix], dtype=spec['dtype'])
+            column[archive[f"{prefix}_mask"]] = pd.NA
+            columns[spec['name']] = column
+        elif spec['kind'] == 'object':
+            codes = archive[f"{prefix}_codes"]
+            values = archive[f"{prefix}_values"].astype(object)
+            column = np.empty(len(codes), dtype=object)
+            column[:] = None
+            valid = codes >= 0
+            column[valid] = values[codes[valid]]
+            columns[spec['name']] = column
+        else:
+            columns[spec['name']] = archive[prefix]
+    return pd.DataFrame(columns)
+
+
+def write_frame(path: str, df: pd.DataFrame) -> None:
+    """
+    Write a frame to a self-describing archive that carries its own schema.
+    
+    Args:
+        path (str): Archive path (.npz)
+        df (pd.DataFrame): Frame to write
+    """
+    arrays, schema = encode_frame(df)
+    arrays[SCHEMA_ENTRY] = np.array(json.dumps(schema))
+    with open(path, 'wb') as f:
+        np.savez(f, **arrays)
+
+
+def read_frame(path: str) -> pd.DataFrame:
+    """
+    Read a frame written by write_frame.
+    
+    Args:
+        path (str): Archive path (.npz)
+        
+    Returns:
+        pd.DataFrame: Decoded frame
+    """
+    with np.load(path, allow_pickle=False) as archive:
+        return decode_frame(archive, json.loads(str(archive[SCHEMA_ENTRY])))
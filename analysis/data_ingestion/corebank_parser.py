@@ -1,28 +1,111 @@
 """
 Parser for core banking logs.
 """
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import re
 from datetime import datetime
 
 from utils.logger import setup_logger
+from utils.config import MAX_WORKERS, FILE_INDEX_PATH
+from .categories import concat_frames, to_categorical
+from .checkpoint import CheckpointStore
+from .events import CorePostingEvent
+from .log_set import LogFileSet, is_log_set, open_log
+from .sharding import compute_byte_ranges, read_byte_range
+from .timestamps import TIMESTAMP_FORMAT, parse_timestamps
+from .transaction_keys import TransactionKeyEncoder
 
 logger = setup_logger('corebank_parser')
 
+def _parse_shard(log_path: str, start: int, end: int) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Parse one byte range of a core banking log file in a worker process.
+    
+    Args:
+        log_path (str): Path to the core banking log file
+        start (int): First byte of the range (start of a line)
+        end (int): Byte offset just after the range (start of a line or EOF)
+        
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Parsed log data and parse report for the range
+    """
+    text = read_byte_range(log_path, start, end).decode('utf-8')
+    return CorebankParser(log_path).parse_text_bulk(text)
+
+def _parse_set_file(log_path: str) -> Tuple[Tuple[pd.DataFrame, Dict], pd.Timestamp, pd.Timestamp]:
+    """
+    Parse one file of a rotated log set in a worker process.
+    
+    Args:
+        log_path (str): Path to a plain or compressed core banking log file
+        
+    Returns:
+        Tuple[Tuple[pd.DataFrame, Dict], pd.Timestamp, pd.Timestamp]:
+            Parsed log data with its parse report, and the first and last timestamp
+    """
+    with open_log(log_path) as f:
+        df, report = CorebankParser(log_path).parse_text_bulk(f.read())
+    return (df, report), df['timestamp_core'].min(), df['timestamp_core'].max()
+
 class CorebankParser:
     """Parser for core banking logs."""
     
-    def __init__(self, log_path: str):
+    # Timestamp, module, user, IP and free-form details of a line
+    LINE_PATTERN = re.compile(
+        r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) INFO \[(.*?)\] (.*?)@(.*?) Transacción ejecutada \((.*?)\)'
+    )
+    
+    # All nine fields of every line of a file, used by the bulk parser
+    BULK_PATTERN = re.compile(
+        r'^[ \t]*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) INFO '
+        r'\[([^\]\n]*)\] ([^@\n]*)@([^ \n]*) Transacción ejecutada '
+        r'\(transaction: ([^,)\n]*), tipo: ([^,)\n]*), cuenta: ([^,)\n]*), '
+        r'estado: ([^,)\n]*), valor: ([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)\)',
+        re.MULTILINE
+    )
+    BULK_FIELDS = [
+        'timestamp_core', 'module', 'user_id', 'ip_address', 'transaction_id',
+        'operation', 'account_type', 'status', 'amount'
+    ]
+    
+    TIMESTAMP_FORMAT = TIMESTAMP_FORMAT
+    
+    REJECTED_SAMPLE_SIZE = 5
+    
+    COLUMNS = [
+        'timestamp_core', 'transaction_id', 'txn_key', 'operation', 'status',
+        'amount', 'account_type', 'user_id', 'ip_address', 'module'
+    ]
+    
+    CATEGORICAL_COLUMNS = ['operation', 'status', 'account_type', 'user_id', 'module']
+    
+    def __init__(
+        self,
+        log_path: Optional[str] = None,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        time_range: Optional[Tuple[datetime, datetime]] = None
+    ):
         """
         Initialize the parser.
         
         Args:
-            log_path (str): Path to the core banking log file
+            log_path (str, optional): Path to the core banking log file, or a directory
+                or glob of rotated files (None for a parser fed single lines or events)
+            checkpoint_store (CheckpointStore, optional): Store of tail mode byte offsets
+            time_range (Tuple[datetime, datetime], optional): Skip rotated files known
+                to fall outside it
         """
         self.log_path = log_path
+        self.checkpoint_store = checkpoint_store
+        self.time_range = time_range
+        self.key_encoder = TransactionKeyEncoder()
         
-    def parse_line(self, line: str) -> Optional[Dict]:
+        # Whether the last tail read started over from the beginning of the file
+        self.read_from_start = False
+        
+    def parse_line(self, line: str) -> Optional[CorePostingEvent]:
         """
         Parse a single log line.
         
@@ -30,17 +113,14 @@ class CorebankParser:
             line (str): Log line to parse
             
         Returns:
-            Optional[Dict]: Parsed log entry or None if line is invalid
+            Optional[CorePostingEvent]: Parsed log entry or None if line is invalid
         """
         try:
             # Example line:
             # 2025-05-13 08:00:10 INFO [mobile] user65@198.81.20.19 Transacción ejecutada (transaction: txn-0000, tipo: consignar, cuenta: ahorros, estado: Completada, valor: 429947.36)
             
             # Extract timestamp and basic info
-            match = re.match(
-                r'(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) INFO \[(.*?)\] (.*?)@(.*?) Transacción ejecutada \((.*?)\)',
-                line
-            )
+            match = self.LINE_PATTERN.match(line)
             
             if not match:
                 return None
@@ -53,22 +133,57 @@ class CorebankParser:
                 key, value = pair.split(': ')
                 details_dict[key] = value
                 
-            return {
-                'timestamp': timestamp,
-                'module': module,
-                'user_id': user_id,
-                'ip_address': ip_address,
-                'transaction_id': details_dict['transaction'],
-                'operation': details_dict['tipo'],
-                'account_type': details_dict['cuenta'],
-                'status': details_dict['estado'],
-                'amount': float(details_dict['valor'])
-            }
+            return CorePostingEvent(
+                timestamp_core=timestamp,
+                transaction_id=details_dict['transaction'],
+                operation=details_dict['tipo'],
+                status=details_dict['estado'],
+                amount=float(details_dict['valor']),
+                account_type=details_dict['cuenta'],
+                user_id=user_id,
+                ip_address=ip_address,
+                module=module
+            )
             
         except Exception as e:
             logger.error(f"Error parsing line: {str(e)}")
             return None
             
+    def build_frame(self, events: Sequence[CorePostingEvent]) -> pd.DataFrame:
+        """
+        Build the output DataFrame from parsed events, column by column.
+        
+        Args:
+            events (Sequence[CorePostingEvent]): Parsed log entries, e.g. a micro-batch
+            
+        Returns:
+            pd.DataFrame: Parsed log data with ordered columns
+        """
+        df = CorePostingEvent.frame(events)
+        
+        # Convert timestamp to datetime
+        df['timestamp_core'] = parse_timestamps(df['timestamp_core'])
+        df['amount'] = df['amount'].astype('float64')
+        
+        # Integer join key; the string ID is kept for output only
+        df['txn_key'] = self.key_encoder.encode(df['transaction_id'])
+        
+        return self._encode_categories(df[self.COLUMNS])
+        
+    def _encode_categories(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Dictionary-encode the low-cardinality string columns.
+        
+        Args:
+            df (pd.DataFrame): Parsed log data
+            
+        Returns:
+            pd.DataFrame: Parsed log data with categorical columns
+        """
+        for col in self.CATEGORICAL_COLUMNS:
+            df[col] = to_categorical(df[col], col)
+        return df
+        
     def parse_file(self) -> pd.DataFrame:
         """
         Parse the entire log file.
@@ -77,29 +192,322 @@ class CorebankParser:
             pd.DataFrame: Parsed log data
         """
         try:
-            parsed_logs = []
-            with open(self.log_path, 'r') as f:
-                for line in f:
-                    parsed_line = self.parse_line(line.strip())
-                    if parsed_line:
-                        parsed_logs.append(parsed_line)
+            paths = LogFileSet(self.log_path).resolve() if is_log_set(self.log_path) else [self.log_path]
             
-            df = pd.DataFrame(parsed_logs)
+            events = []
+            for path in paths:
+                with open_log(path) as f:
+                    for line in f:
+                        event = self.parse_line(line.strip())
+                        if event:
+                            events.append(event)
             
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            return self.build_frame(events)
             
-            # Rename timestamp column
-            df = df.rename(columns={'timestamp': 'timestamp_core'})
+        except Exception as e:
+            logger.error(f"Error parsing file: {str(e)}")
+            raise
+            
+    def _find_rejected_lines(self, text: str) -> List[str]:
+        """
+        Scan text line by line for lines the bulk parser rejects.
+        
+        Only used when the bulk extraction accepted fewer lines than the text holds.
+        
+        Args:
+            text (str): Raw log text
+            
+        Returns:
+            List[str]: Non-blank lines that did not match or had an invalid timestamp
+        """
+        rejected = []
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            match = self.BULK_PATTERN.match(line)
+            if match:
+                try:
+                    datetime.strptime(match.group(1), self.TIMESTAMP_FORMAT)
+                    continue
+                except ValueError:
+                    pass
+            rejected.append(line)
+        return rejected
+        
+    def parse_text_bulk(self, text: str) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Parse a block of log text with a single vectorized extraction.
+        
+        Args:
+            text (str): Raw log text, one entry per line
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict]:
+                Parsed log data with the same columns and types as parse_file and
+                Dictionary with line counts and a sample of rejected lines
+        """
+        records = self.BULK_PATTERN.findall(text)
+        fields = pd.DataFrame(records, columns=self.BULK_FIELDS)
+        
+        fields['timestamp_core'] = parse_timestamps(fields['timestamp_core'], errors='coerce')
+        fields['amount'] = fields['amount'].astype('float64')
+        fields['txn_key'] = self.key_encoder.encode(fields['transaction_id'])
+        fields = self._encode_categories(fields)
+        valid = fields['timestamp_core'].notna()
+        
+        total_lines = text.count('\n') + (1 if text and not text.endswith('\n') else 0)
+        report = {
+            'total_lines': total_lines,
+            'parsed': int(valid.sum()),
+            'rejected': 0,
+            'rejected_sample': []
+        }
+        
+        # Every line accounted for: skip the per-line scan
+        if report['parsed'] < total_lines:
+            rejected = self._find_rejected_lines(text)
+            report['rejected'] = len(rejected)
+            report['rejected_sample'] = rejected[:self.REJECTED_SAMPLE_SIZE]
+            
+        if report['rejected']:
+            logger.warning(
+                f"Rejected {report['rejected']} of {total_lines} lines, "
+                f"sample: {report['rejected_sample']}"
+            )
+            
+        if not valid.all():
+            fields = fields[valid].reset_index(drop=True)
+            
+        return fields[self.COLUMNS], report
+        
+    def parse_file_bulk(self) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Parse the entire log file with the vectorized bulk parser.
+        
+        Returns:
+            Tuple[pd.DataFrame, Dict]:
+                Parsed log data and
+                Dictionary with line counts and a sample of rejected lines
+        """
+        try:
+            if is_log_set(self.log_path):
+                return self._parse_log_set()
+                
+            with open(self.log_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+                
+            return self.parse_text_bulk(text)
             
-            # Order columns
-            columns = [
-                'timestamp_core', 'transaction_id', 'operation', 'status',
-                'amount', 'account_type', 'user_id', 'ip_address', 'module'
-            ]
+        except Exception as e:
+            logger.error(f"Error parsing file: {str(e)}")
+            raise
             
-            return df[columns]
+    def iter_chunks(
+        self,
+        block_size: int = 64 * 1024 ** 2,
+        start: Optional[int] = None
+    ) -> Iterator[Tuple[pd.DataFrame, Dict]]:
+        """
+        Parse the log file in blocks of whole lines with the bulk parser.
+        
+        Memory use is bounded by the block size rather than the file size.
+        Rotated sets are read file by file, oldest first.
+        
+        With a start offset (tail mode) only the complete lines of a single
+        uncompressed file from that byte offset on are read, and each report
+        records in 'end' the byte offset just after its block.
+        
+        Args:
+            block_size (int): Approximate number of characters read per block
+            start (int, optional): Byte offset to resume a single uncompressed file from
             
+        Returns:
+            Iterator[Tuple[pd.DataFrame, Dict]]: Parsed data and report, block by block
+        """
+        try:
+            if start is not None:
+                yield from self._iter_complete_lines(block_size, start)
+                return
+                
+            paths = LogFileSet(self.log_path).resolve() if is_log_set(self.log_path) else [self.log_path]
+            for path in paths:
+                with open_log(path) as f:
+                    while True:
+                        lines = f.readlines(block_size)
+                        if not lines:
+                            break
+                        yield self.parse_text_bulk(''.join(lines))
+                        
         except Exception as e:
             logger.error(f"Error parsing file: {str(e)}")
+            raise
+            
+    def _iter_complete_lines(self, block_size: int, start: int) -> Iterator[Tuple[pd.DataFrame, Dict]]:
+        """Parse the complete lines from a byte offset, in blocks; see iter_chunks."""
+        end = start
+        with open(self.log_path, 'rb') as f:
+            f.seek(start)
+            while True:
+                lines = f.readlines(block_size)
+                # Only the last line of the file can lack its newline: leave it for the next read
+                partial = bool(lines) and not lines[-1].endswith(b'\n')
+                if partial:
+                    lines.pop()
+                if lines:
+                    data = b''.join(lines)
+                    end += len(data)
+                    df, report = self.parse_text_bulk(data.decode('utf-8'))
+                    report['end'] = end
+                    yield df, report
+                if partial or not lines:
+                    break
+                    
+    def _parse_log_set(self) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Parse every file of a rotated log set, one worker process per file.
+        
+        Returns:
+            Tuple[pd.DataFrame, Dict]:
+                Parsed log data in chronological file order and
+                Dictionary with line counts, a sample of rejected lines and per-file counts
+        """
+        log_set = LogFileSet(self.log_path, FILE_INDEX_PATH)
+        results = log_set.map(_parse_set_file, self.time_range)
+        
+        files = []
+        rejected_sample = []
+        for path, (_, file_report) in results:
+            files.append({
+                'path': path,
+                'parsed': file_report['parsed'],
+                'rejected': file_report['rejected']
+            })
+            rejected_sample.extend(file_report['rejected_sample'])
+            
+        report = {
+            'total_lines': sum(r['total_lines'] for _, (_, r) in results),
+            'parsed': sum(f['parsed'] for f in files),
+            'rejected': sum(f['rejected'] for f in files),
+            'rejected_sample': rejected_sample[:self.REJECTED_SAMPLE_SIZE],
+            'files': files
+        }
+        
+        if not results:
+            return self.parse_text_bulk('')[0], report
+        return concat_frames([df for _, (df, _) in results]), report
+        
+    def parse_file_sharded(self, num_shards: int = MAX_WORKERS) -> Tuple[pd.DataFrame, Dict]:
+        """
+        Parse the entire log file split into newline-aligned byte ranges.
+        
+        Each range is parsed by the bulk parser in a worker process and the
+        partial frames are concatenated in file order, so the result is the
+        same as parse_file_bulk.
+        
+        Args:
+            num_shards (int): Number of byte ranges (and worker processes)
+            
+        Returns:
+            Tuple[pd.DataFrame, Dict]:
+                Parsed log data and
+                Dictionary with line counts, a sample of rejected lines and per-shard counts
+        """
+        if is_log_set(self.log_path):
+            # Rotated sets are already split per file
+            return self.parse_file_bulk()
+            
+        try:
+            ranges = compute_byte_ranges(self.log_path, num_shards)
+            if not ranges:
+                # Empty file
+                df, report = self.parse_text_bulk('')
+                report['shards'] = []
+                return df, report
+                
+            if len(ranges) == 1:
+                results = [_parse_shard(self.log_path, *ranges[0])]
+            else:
+                with ProcessPoolExecutor(max_workers=len(ranges)) as pool:
+                    results = list(pool.map(
+                        _parse_shard,
+                        [self.log_path] * len(ranges),
+                        [start for start, _ in ranges],
+                        [end for _, end in ranges]
+                    ))
+                    
+            shards = []
+            rejected_sample = []
+            for i, ((start, end), (_, shard_report)) in enumerate(zip(ranges, results)):
+                logger.info(
+                    f"Shard {i} [{start}, {end}): parsed {shard_report['parsed']}, "
+                    f"rejected {shard_report['rejected']}"
+                )
+                shards.append({
+                    'start': start,
+                    'end': end,
+                    'parsed': shard_report['parsed'],
+                    'rejected': shard_report['rejected']
+                })
+                rejected_sample.extend(shard_report['rejected_sample'])
+                
+            report = {
+                'total_lines': sum(r['total_lines'] for _, r in results),
+                'parsed': sum(shard['parsed'] for shard in shards),
+                'rejected': sum(shard['rejected'] for shard in shards),
+                'rejected_sample': rejected_sample[:self.REJECTED_SAMPLE_SIZE],
+                'shards': shards
+            }
+            
+            return concat_frames([df for df, _ in results]), report
+            
+        except Exception as e:
+            logger.error(f"Error parsing file in shards: {str(e)}")
+            raise
+            
+    def parse_new_lines(self, reset: bool = False, block_size: int = 64 * 1024 ** 2) -> pd.DataFrame:
+        """
+        Parse only the lines appended since the previous call (tail mode).
+        
+        The byte offset and inode reached are persisted in the checkpoint
+        store. A rotated or truncated file is read again from the start, which
+        read_from_start records so that callers replace the rows they
+        accumulated instead of extending them. The new bytes are read in
+        blocks, and a trailing line without newline is left for the next call.
+        
+        Args:
+            reset (bool): Ignore the stored checkpoint and read from the start
+            block_size (int): Approximate number of bytes read per block
+            
+        Returns:
+            pd.DataFrame: Parsed log data for the new lines only
+        """
+        if self.checkpoint_store is None:
+            raise ValueError("Tail mode requires a checkpoint store")
+        if is_log_set(self.log_path):
+            raise ValueError("Tail mode requires a single uncompressed log file")
+            
+        try:
+            if reset:
+                self.checkpoint_store.reset(self.log_path)
+            inode, offset = self.checkpoint_store.resolve_start(self.log_path)
+            self.read_from_start = offset == 0
+            
+            frames = []
+            end = offset
+            parsed = 0
+            for df, report in self.iter_chunks(block_size, start=offset):
+                frames.append(df)
+                end = report['end']
+                parsed += report['parsed']
+            df = concat_frames(frames) if frames else self.parse_text_bulk('')[0]
+            
+            self.checkpoint_store.update(self.log_path, inode, end)
+            logger.info(
+                f"Tail read {end - offset} bytes from offset {offset}: {parsed} new entries"
+            )
+            
+            return df
+            
+        except Exception as e:
+            logger.error(f"Error parsing new lines: {str(e)}")
             raise 
\ No newline at end of file
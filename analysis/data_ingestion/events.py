@@ -0,0 +1,199 @@
+"""
+Compact per-event records of the log sources, for the online ingestion path.
+"""
+from typing import Dict, List, Optional, Sequence
+from operator import attrgetter
+from sys import intern
+import pandas as pd
+
+
+class Event:
+    """
+    Base of the slotted event records.
+    
+    Records have a fixed set of attributes and no instance dict, so an event
+    costs one small object plus its field values. Low-cardinality text
+    fields (module, operation, status, user) are interned, so events share
+    one string per distinct value. Timestamps stay as text until a batch is
+    parsed in bulk. A batch of events turns into DataFrame columns in one
+    pass, without building a dict per event.
+    """
+    
+    __slots__ = ()
+    
+    # DataFrame column of each field named differently, e.g. raw log names
+    COLUMN_NAMES: Dict[str, str] = {}
+    
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{field}={getattr(self, field)!r}" for field in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+        
+    def __eq__(self, other) -> bool:
+        return type(other) is type(self) and all(
+            getattr(self, field) == getattr(other, field) for field in self.__slots__
+        )
+        
+    @classmethod
+    def columns(cls, events: Sequence['Event']) -> Dict[str, List]:
+        """
+        Transpose a batch of events into column lists.
+        
+        Args:
+            events (Sequence[Event]): Events of this class
+            
+        Returns:
+            Dict[str, List]: Values by column name, ready for pd.DataFrame
+        """
+        return {
+            cls.COLUMN_NAMES.get(field, field): list(map(attrgetter(field), events))
+            for field in cls.__slots__
+        }
+        
+    @classmethod
+    def frame(cls, events: Sequence['Event']) -> pd.DataFrame:
+        """
+        Build a frame of raw values from a batch of events, for the parser to type.
+        
+        Args:
+            events (Sequence[Event]): Events of this class
+            
+        Returns:
+            pd.DataFrame: One object column per field, also when the batch is empty
+        """
+        return pd.DataFrame(cls.columns(events), dtype=object)
+
+
+class SecurityCheckEvent(Event):
+    """Security check of a transaction."""
+    
+    __slots__ = (
+        'timestamp_secu', 'transaction_id', 'user_id', 'ip_address',
+        'validation_result', 'failure_reason', 'module', 'verifications'
+    )
+    
+    def __init__(
+        self,
+        timestamp_secu: str,
+        transaction_id: str,
+        user_id: str,
+        ip_address: str,
+        validation_result: str,
+        failure_reason: str,
+        module: str,
+        verifications: str
+    ):
+        """
+        Initialize the event.
+        
+        Args:
+            timestamp_secu (str): Timestamp in TIMESTAMP_FORMAT
+            transaction_id (str): Transaction ID
+            user_id (str): User ID
+            ip_address (str): Client IP address
+            validation_result (str): Raw validation result, e.g. 'Aprobada'
+            failure_reason (str): Raw failure reason, empty if none
+            module (str): Raw module, e.g. 'mobile'
+            verifications (str): Comma-separated verifications performed
+        """
+        self.timestamp_secu = timestamp_secu
+        self.transaction_id = transaction_id
+        self.user_id = intern(user_id)
+        self.ip_address = ip_address
+        self.validation_result = intern(validation_result)
+        self.failure_reason = intern(failure_reason)
+        self.module = intern(module)
+        self.verifications = verifications
+
+
+class MiddlewareEvent(Event):
+    """Middleware request or response row; `direction` tells which."""
+    
+    __slots__ = (
+        'timestamp', 'level', 'transaction_id', 'direction', 'operation',
+        'status_code', 'latency_ms', 'user_id', 'ip_address', 'module'
+    )
+    COLUMN_NAMES = {'level': 'nivel_log', 'module': 'modulo'}
+    
+    def __init__(
+        self,
+        timestamp: str,
+        level: str,
+        transaction_id: str,
+        direction: str,
+        operation: str,
+        status_code: Optional[int],
+        latency_ms: Optional[float],
+        user_id: str,
+        ip_address: str,
+        module: str
+    ):
+        """
+        Initialize the event.
+        
+        Args:
+            timestamp (str): Timestamp in TIMESTAMP_FORMAT
+            level (str): Log level, e.g. 'INFO'
+            transaction_id (str): Transaction ID
+            direction (str): 'request' or 'response'
+            operation (str): Raw operation, e.g. 'consignar'
+            status_code (int, optional): HTTP status code (None if blank)
+            latency_ms (float, optional): Service latency in milliseconds (responses only)
+            user_id (str): User ID
+            ip_address (str): Client IP address
+            module (str): Raw module, e.g. 'mobile'
+        """
+        self.timestamp = timestamp
+        self.level = intern(level)
+        self.transaction_id = transaction_id
+        self.direction = intern(direction)
+        self.operation = intern(operation)
+        self.status_code = status_code
+        self.latency_ms = latency_ms
+        self.user_id = intern(user_id)
+        self.ip_address = ip_address
+        self.module = intern(module)
+
+
+class CorePostingEvent(Event):
+    """Transaction posted by core banking."""
+    
+    __slots__ = (
+        'timestamp_core', 'transaction_id', 'operation', 'status',
+        'amount', 'account_type', 'user_id', 'ip_address', 'module'
+    )
+    
+    def __init__(
+        self,
+        timestamp_core: str,
+        transaction_id: str,
+        operation: str,
+        status: str,
+        amount: float,
+        account_type: str,
+        user_id: str,
+        ip_address: str,
+        module: str
+    ):
+        """
+        Initialize the event.
+        
+        Args:
+            timestamp_core (str): Timestamp in TIMESTAMP_FORMAT
+            transaction_id (str): Transaction ID
+            operation (str): Raw operation, e.g. 'consignar'
+            status (str): Raw status, e.g. 'Completada'
+            amount (float): Transaction amount
+            account_type (str): Raw account type, e.g. 'ahorros'
+            user_id (str): User ID
+            ip_address (str): Client IP address
+            module (str): Raw module, e.g. 'mobile'
+        """
+        self.timestamp_core = timestamp_core
+        self.transaction_id = transaction_id
+        self.operation = intern(operation)
+        self.status = intern(status)
+        self.amount = amount
+        self.account_type = intern(account_type)
+        self.user_id = intern(user_id)
+        self.ip_address = ip_address
+        self.module = intern(module)
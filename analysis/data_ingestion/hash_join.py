@@ -0,0 +1,276 @@
+"""
+Single-pass left join of log sources on the integer transaction key.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+
+logger = setup_logger('hash_join')
+
+
+class TransactionJoin:
+    """
+    Left join of several log sources onto a base source by transaction key.
+    
+    Each joined source is indexed once on the key. Rows are then aligned to
+    the base by position, and the remaining identity columns are checked
+    with a vectorized mask instead of being part of the join key. Matches
+    that disagree on them are left out of the join and reported.
+    """
+    
+    def __init__(
+        self,
+        key: str = 'txn_key',
+        check_columns: Sequence[str] = ('user_id', 'ip_address', 'module')
+    ):
+        """
+        Initialize the join.
+        
+        Args:
+            key (str): Integer transaction key column
+            check_columns (Sequence[str]): Columns a match must agree on with the base
+        """
+        self.key = key
+        self.check_columns = list(check_columns)
+        
+    def _align(
+        self,
+        base: pd.DataFrame,
+        other: pd.DataFrame,
+        name: str,
+        check_columns: Sequence[str]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the consistent row of a source matching each base row.
+        
+        Sources with repeated keys are indexed one occurrence at a time, so a
+        base row is matched to the first occurrence that passes the check.
+        
+        Args:
+            base (pd.DataFrame): Base source
+            other (pd.DataFrame): Source to align to the base
+            name (str): Source name used in log messages
+            check_columns (Sequence[str]): Columns a match must agree on with the base
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                Row position in the source for each base row (-1 when missing) and
+                mismatched columns for base rows whose key matched only inconsistent
+                rows (else None)
+        """
+        base_keys = base[self.key].to_numpy()
+        keys = other[self.key].to_numpy()
+        
+        # The hash table built for the uniqueness check is reused by get_indexer
+        index = pd.Index(keys)
+        if index.is_unique:
+            levels = [None]
+        else:
+            occurrence = other.groupby(self.key, sort=False).cumcount().to_numpy()
+            logger.info(f"{name}: {int((occurrence > 0).sum())} repeated transaction keys")
+            levels = [np.flatnonzero(occurrence == level) for level in range(occurrence.max() + 1)]
+            
+        positions = np.full(len(base), -1, dtype=np.int64)
+        mismatched = np.full(len(base), None, dtype=object)
+        pending = np.arange(len(base))
+        
+        for rows in levels:
+            if rows is None:
+                found = index.get_indexer(base_keys)
+                hit = found >= 0
+                candidates = pending[hit]
+                candidate_rows = found[hit]
+            else:
+                found = pd.Index(keys[rows]).get_indexer(base_keys[pending])
+                hit = found >= 0
+                candidates = pending[hit]
+                candidate_rows = rows[found[hit]]
+                
+            self._accept(base, other, candidates, candidate_rows, check_columns, positions, mismatched)
+            
+            pending = pending[positions[pending] < 0]
+            if not len(pending):
+                break
+                
+        mismatched[positions >= 0] = None
+        return positions, mismatched
+        
+    def _accept(
+        self,
+        base: pd.DataFrame,
+        other: pd.DataFrame,
+        candidates: np.ndarray,
+        candidate_rows: np.ndarray,
+        check_columns: Sequence[str],
+        positions: np.ndarray,
+        mismatched: np.ndarray
+    ) -> np.ndarray:
+        """
+        Check candidate matches and record the consistent ones.
+        
+        Args:
+            base (pd.DataFrame): Base source
+            other (pd.DataFrame): Source being aligned
+            candidates (np.ndarray): Base rows with a candidate match
+            candidate_rows (np.ndarray): Candidate row in the source for each of them
+            check_columns (Sequence[str]): Columns a match must agree on with the base
+            positions (np.ndarray): Matched source row of each base row, updated in place
+            mismatched (np.ndarray): Mismatched columns of each base row, updated in place
+                with the first inconsistent candidate
+                
+        Returns:
+            np.ndarray: True for the candidates that were accepted
+        """
+        disagreeing = {
+            col: ~self._agrees(base[col].iloc[candidates], other[col], candidate_rows)
+            for col in check_columns
+        }
+        consistent = np.ones(len(candidates), dtype=bool)
+        for disagrees in disagreeing.values():
+            consistent &= ~disagrees
+            
+        positions[candidates[consistent]] = candidate_rows[consistent]
+        for i in np.flatnonzero(~consistent):
+            if mismatched[candidates[i]] is None:
+                mismatched[candidates[i]] = ','.join(
+                    col for col in check_columns if disagreeing[col][i]
+                )
+        return consistent
+        
+    def _align_all(
+        self,
+        base: pd.DataFrame,
+        others: Dict[str, pd.DataFrame],
+        check_columns: Dict[str, Sequence[str]]
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Align every source to the base, one hash index per source.
+        
+        Args:
+            base (pd.DataFrame): Base source
+            others (Dict[str, pd.DataFrame]): Sources to align, by name
+            check_columns (Dict[str, Sequence[str]]): Columns each source must agree on
+                with the base
+                
+        Returns:
+            Dict[str, Tuple[np.ndarray, np.ndarray]]:
+                Positions and mismatched columns of each source, as _align
+        """
+        return {
+            name: self._align(base, other, name, check_columns[name])
+            for name, other in others.items()
+        }
+        
+    @staticmethod
+    def _values(series: pd.Series):
+        """Underlying array of a column: extension array or NumPy array."""
+        if isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+            return series.array
+        return series.to_numpy()
+        
+    def _take(self, series: pd.Series, positions: np.ndarray):
+        """
+        Gather source values by position, with missing values where the position is -1.
+        
+        Args:
+            series (pd.Series): Source column
+            positions (np.ndarray): Row positions, -1 for no match
+            
+        Returns:
+            Gathered values, integer and boolean columns upcast as in a left merge
+        """
+        return pd.api.extensions.take(self._values(series), positions, allow_fill=True)
+        
+    def _agrees(self, base: pd.Series, other: pd.Series, positions: np.ndarray) -> np.ndarray:
+        """
+        Compare a base column with the matched source values.
+        
+        Args:
+            base (pd.Series): Base column
+            other (pd.Series): Source column
+            positions (np.ndarray): Matched row positions (all valid)
+            
+        Returns:
+            np.ndarray: True where the values are equal or both missing
+        """
+        if (
+            isinstance(base.dtype, pd.CategoricalDtype)
+            and isinstance(other.dtype, pd.CategoricalDtype)
+            and base.cat.categories.equals(other.cat.categories)
+        ):
+            # Compare dictionary codes; -1 (missing) on both sides counts as equal
+            return base.cat.codes.to_numpy() == other.cat.codes.to_numpy()[positions]
+            
+        base_values = base.to_numpy(dtype=object)
+        other_values = other.to_numpy(dtype=object)[positions]
+        agrees = np.asarray(base_values == other_values, dtype=bool)
+        
+        # Missing on both sides also counts as equal; only unequal pairs need the check
+        unequal = np.flatnonzero(~agrees)
+        agrees[unequal] = pd.isna(base_values[unequal]) & pd.isna(other_values[unequal])
+        return agrees
+        
+    def join(
+        self,
+        base_name: str,
+        base: pd.DataFrame,
+        others: Dict[str, pd.DataFrame],
+        columns: Dict[str, str],
+        check_columns: Optional[Dict[str, Sequence[str]]] = None
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Join sources onto the base in one pass.
+        
+        Args:
+            base_name (str): Name of the base source
+            base (pd.DataFrame): Base source; every row appears once in the result, in order
+            others (Dict[str, pd.DataFrame]): Sources to join, by name
+            columns (Dict[str, str]): Output columns, in order, and their source
+            check_columns (Dict[str, Sequence[str]], optional): Columns each source must
+                agree on with the base, when they differ from the join's check columns
+                
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Joined frame and
+                Report of matches rejected by the consistency check
+                (transaction_id, source and mismatched columns)
+        """
+        try:
+            checks = {name: list((check_columns or {}).get(name, self.check_columns)) for name in others}
+            positions: Dict[str, np.ndarray] = {}
+            mismatches: List[pd.DataFrame] = []
+            
+            for name, (source_positions, mismatched) in self._align_all(base, others, checks).items():
+                positions[name] = source_positions
+                rejected = np.flatnonzero(pd.notna(mismatched))
+                if len(rejected):
+                    logger.warning(
+                        f"{name}: {len(rejected)} rows share a transaction key with "
+                        f"{base_name} but differ on {', '.join(checks[name])}"
+                    )
+                    mismatches.append(pd.DataFrame({
+                        'transaction_id': base['transaction_id'].to_numpy()[rejected],
+                        'source': name,
+                        'mismatched_columns': mismatched[rejected]
+                    }))
+                    
+            data = {}
+            for col, source in columns.items():
+                if source == base_name:
+                    data[col] = self._values(base[col])
+                else:
+                    data[col] = self._take(others[source][col], positions[source])
+                    
+            joined = pd.DataFrame(data, copy=False)
+            
+            report = (
+                pd.concat(mismatches, ignore_index=True) if mismatches
+                else pd.DataFrame(columns=['transaction_id', 'source', 'mismatched_columns'])
+            )
+            return joined, report
+            
+        except Exception as e:
+            logger.error(f"Error joining sources: {str(e)}")
+            raise
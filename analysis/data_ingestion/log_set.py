@@ -0,0 +1,262 @@
+"""
+Rotated and compressed log sets: file discovery, ordering and streaming decompression.
+"""
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import glob
+import gzip
+import io
+import json
+import os
+import re
+import pandas as pd
+
+from utils.logger import setup_logger
+from utils.config import MAX_WORKERS
+
+logger = setup_logger('log_set')
+
+COMPRESSED_SUFFIXES = ('.gz', '.zst')
+
+# Date (and optional time) embedded in a rotated file name, e.g. 2025-05-13, 20250513-0800
+EMBEDDED_TIME_PATTERN = re.compile(
+    r'(?<!\d)(\d{4})-?(\d{2})-?(\d{2})(?:[T_-]?(\d{2})-?(\d{2})(?:-?(\d{2}))?)?(?!\d)'
+)
+
+# Numeric logrotate suffix, e.g. .log.1 or .log.2.gz
+ROTATION_PATTERN = re.compile(r'\.(\d+)(?:\.(?:gz|zst))?$')
+
+
+def is_log_set(path: str) -> bool:
+    """
+    Tell whether a source path needs the log set reader.
+    
+    Args:
+        path (str): File path, glob pattern or directory
+        
+    Returns:
+        bool: True for directories, glob patterns and compressed files
+    """
+    return os.path.isdir(path) or glob.has_magic(path) or path.endswith(COMPRESSED_SUFFIXES)
+
+
+def open_log(path: str) -> TextIO:
+    """
+    Open a log file as text, decompressing .gz and .zst files on the fly.
+    
+    Decompression is streamed: no temporary file is written and only the
+    block being read is held in memory.
+    
+    Args:
+        path (str): Path to a plain, gzip or zstd log file
+        
+    Returns:
+        TextIO: UTF-8 text stream
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+        
+    if path.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(f"Reading {path} requires the zstandard package") from e
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+        return io.TextIOWrapper(reader, encoding='utf-8')
+        
+    return open(path, 'r', encoding='utf-8')
+
+
+class LogFileSet:
+    """Ordered set of rotated, possibly compressed files of one log source."""
+    
+    def __init__(self, pattern: str, index_path: Optional[str] = None):
+        """
+        Initialize the log set.
+        
+        Args:
+            pattern (str): File path, glob pattern or directory
+            index_path (str, optional): JSON file recording the time range of each file
+        """
+        self.pattern = pattern
+        self.index_path = index_path
+        self._index: Dict[str, Dict] = self._load_index()
+        
+    def _load_index(self) -> Dict[str, Dict]:
+        """
+        Load the per-file time range index from disk.
+        
+        Returns:
+            Dict[str, Dict]: Index entries by absolute file path
+        """
+        if not self.index_path or not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable file index {self.index_path}: {str(e)}")
+            return {}
+            
+    def _save_index(self) -> None:
+        """Write the per-file time range index to disk atomically."""
+        if not self.index_path:
+            return
+        # Another source may have written its own files since we loaded
+        index = self._load_index()
+        index.update(self._index)
+        self._index = index
+        
+        directory = os.path.dirname(self.index_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+        
+    @staticmethod
+    def _sort_key(path: str) -> Tuple:
+        """
+        Build the chronological sort key of a file.
+        
+        Files are ordered by the date embedded in their name. Files without
+        one are ordered by their logrotate number (higher is older), and the
+        live file, with neither, goes last.
+        
+        Args:
+            path (str): Path to the file
+            
+        Returns:
+            Tuple: Sort key, oldest first
+        """
+        name = os.path.basename(path)
+        rotation_match = ROTATION_PATTERN.search(name)
+        rotation = int(rotation_match.group(1)) if rotation_match else 0
+        
+        embedded = None
+        time_match = EMBEDDED_TIME_PATTERN.search(name)
+        if time_match:
+            try:
+                embedded = datetime(*(int(part) for part in time_match.groups() if part))
+            except ValueError:
+                embedded = None
+                
+        if embedded is None:
+            embedded = datetime.min if rotation else datetime.max
+            
+        return embedded, -rotation, os.path.getmtime(path), name
+        
+    def resolve(self) -> List[str]:
+        """
+        List the files of the set, oldest first.
+        
+        Returns:
+            List[str]: File paths in chronological order
+        """
+        if os.path.isdir(self.pattern):
+            paths = [os.path.join(self.pattern, name) for name in os.listdir(self.pattern)]
+        else:
+            paths = glob.glob(self.pattern)
+            
+        paths = [path for path in paths if os.path.isfile(path)]
+        if not paths:
+            raise FileNotFoundError(f"No log files match {self.pattern}")
+            
+        return sorted(paths, key=self._sort_key)
+        
+    def _index_entry(self, path: str) -> Optional[Dict]:
+        """
+        Get the index entry of a file if it is still current.
+        
+        Args:
+            path (str): Path to the file
+            
+        Returns:
+            Optional[Dict]: Recorded time range, or None if unknown or the file changed
+        """
+        entry = self._index.get(os.path.abspath(path))
+        if entry is None:
+            return None
+        stat = os.stat(path)
+        if entry['size'] != stat.st_size or entry['mtime_ns'] != stat.st_mtime_ns:
+            return None
+        return entry
+        
+    def files_for_range(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        List the files that may hold entries between start and end.
+        
+        Files whose recorded time range lies outside [start, end] are
+        skipped; files not yet indexed are always kept.
+        
+        Args:
+            start (datetime, optional): Start of the time range
+            end (datetime, optional): End of the time range
+            
+        Returns:
+            List[str]: File paths in chronological order
+        """
+        selected = []
+        for path in self.resolve():
+            entry = self._index_entry(path)
+            if entry is not None and entry['min_timestamp'] is not None:
+                if end is not None and pd.Timestamp(entry['min_timestamp']) > pd.Timestamp(end):
+                    continue
+                if start is not None and pd.Timestamp(entry['max_timestamp']) < pd.Timestamp(start):
+                    continue
+            selected.append(path)
+        return selected
+        
+    def map(
+        self,
+        parse_one: Callable[[str], Tuple[Any, Optional[pd.Timestamp], Optional[pd.Timestamp]]],
+        time_range: Optional[Tuple[Optional[datetime], Optional[datetime]]] = None,
+        max_workers: int = MAX_WORKERS
+    ) -> List[Tuple[str, Any]]:
+        """
+        Parse every file of the set, one worker process per file.
+        
+        The time range each file covers is recorded in the index so later
+        time-range queries can skip it without decompressing it.
+        
+        Args:
+            parse_one (Callable): Module-level function parsing one file and
+                returning its result with the min and max timestamp it holds
+            time_range (Tuple[datetime, datetime], optional): Only parse files that may
+                overlap it
+            max_workers (int): Maximum number of worker processes
+            
+        Returns:
+            List[Tuple[str, Any]]: File paths and their parse results, oldest first
+        """
+        try:
+            paths = self.files_for_range(*time_range) if time_range else self.resolve()
+            logger.info(f"Parsing {len(paths)} files of {self.pattern}")
+            
+            if len(paths) <= 1 or max_workers <= 1:
+                outputs = [parse_one(path) for path in paths]
+            else:
+                with ProcessPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+                    outputs = list(pool.map(parse_one, paths))
+                    
+            for path, (_, min_ts, max_ts) in zip(paths, outputs):
+                stat = os.stat(path)
+                self._index[os.path.abspath(path)] = {
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'min_timestamp': None if pd.isna(min_ts) else pd.Timestamp(min_ts).isoformat(),
+                    'max_timestamp': None if pd.isna(max_ts) else pd.Timestamp(max_ts).isoformat()
+                }
+            self._save_index()
+            
+            return [(path, result) for path, (result, _, _) in zip(paths, outputs)]
+            
+        except Exception as e:
+            logger.error(f"Error parsing log set {self.pattern}: {str(e)}")
+            raise
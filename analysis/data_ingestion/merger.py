@@ -1,37 +1,378 @@
 """
 Merger for combining logs from different sources by transaction ID.
 """
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import math
+import os
+import time
 import pandas as pd
+import numpy as np
 from datetime import datetime
 
 from utils.logger import setup_logger
-from .secucheck_parser import SecucheckParser
-from .midflow_parser import MidflowParser
+from utils.config import MAX_WORKERS, MERGE_MEMORY_BUDGET, MERGED_PARTITIONS_DIR, SPILL_DIR
 from .corebank_parser import CorebankParser
+from .categories import concat_frames, unify_categories
+from .checkpoint import CheckpointStore
+from .hash_join import TransactionJoin
+from .sort_merge import SortMergeJoin
+from .sources import SOURCES, SourceRegistry
+from .schema import validate_frame
+from .timestamps import elapsed_seconds
+from .cache import ParsedCache
+from .columnar import write_frame
+from .log_set import LogFileSet, is_log_set
+from .spill import PartitionSpill
 
 logger = setup_logger('merger')
 
+def _timed(func: Callable, *args) -> Tuple[Any, float]:
+    """
+    Run a function and measure its wall-clock time.
+    
+    Args:
+        func (Callable): Function to run
+        *args: Arguments for the function
+        
+    Returns:
+        Tuple[Any, float]: Function result and elapsed seconds
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+# Source of each joined column of the built-in sources; IDs and identity columns come from the base
+JOIN_COLUMNS = SOURCES.join_columns()
+
+# Preferred order of merged columns; columns of other registered sources follow
+MERGED_LAYOUT = [
+    'transaction_id', 'txn_key',
+    'timestamp_secu', 'start_time', 'end_time', 'timestamp_core',
+    'operation', 'status', 'amount',
+    'validation_result', 'failure_reason',
+    'service_latency', 'total_latency', 'e2e_latency',
+    'verifications',
+    'user_id', 'ip_address', 'module',
+    'account_type'
+]
+
+# Columns of the merged data of the built-in sources, in logical order
+MERGED_COLUMNS = SOURCES.merged_columns(MERGED_LAYOUT)
+
+# Column kinds of the merged data of the built-in sources
+MERGED_SCHEMA = SOURCES.merged_schema(MERGED_LAYOUT)
+
+def join_sources(
+    joiner: TransactionJoin,
+    frames: Dict[str, pd.DataFrame],
+    registry: SourceRegistry = SOURCES
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Join parsed sources onto the base source and derive completion flags and latencies.
+    
+    Args:
+        joiner (TransactionJoin): Join used to align the sources
+        frames (Dict[str, pd.DataFrame]): Parsed frame of every registered source, by name
+        registry (SourceRegistry): Registered sources
+        
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]:
+            Combined log data, one row per base row, and
+            Report of matches rejected for inconsistent user, IP or module
+            
+    Raises:
+        SchemaError: If a source frame or the merged data has a column of an undeclared kind
+    """
+    for source in registry:
+        validate_frame(frames[source.name], source.schema, f"parsing {source.name}")
+        
+    # Share category sets so merge keys and columns stay categorical
+    names = [source.name for source in registry]
+    frames = dict(zip(names, unify_categories([frames[name] for name in names])))
+    
+    # Align every other source to the base in one pass
+    base = registry.base
+    merged, mismatches = joiner.join(
+        base.name,
+        frames[base.name],
+        {source.name: frames[source.name] for source in registry.joined},
+        registry.join_columns(),
+        {source.name: source.check_columns for source in registry.joined}
+    )
+    
+    # Add transaction status flags
+    for source in registry:
+        merged[source.flag] = merged[source.presence_column].notna()
+    
+    # Calculate completion percentage
+    merged['completion_pct'] = merged[registry.flags()].mean(axis=1) * 100
+    
+    # Calculate end-to-end latency only for complete flows
+    first, last = (registry[name] for name in registry.e2e_sources)
+    start_column, end_column = first.stages[0][1], last.stages[-1][1]
+    complete_flows = merged[first.flag] & merged[last.flag]
+    e2e_latency = elapsed_seconds(merged[start_column], merged[end_column])
+    merged['e2e_latency'] = np.where(complete_flows.to_numpy(), e2e_latency, np.nan)
+    
+    schema = registry.merged_schema(MERGED_LAYOUT)
+    return validate_frame(merged[list(schema)], schema, 'merge'), mismatches
+
 class LogMerger:
     """Merger for combining logs from different sources."""
     
+    # Bytes of memory needed to merge a bucket per byte of raw log it holds
+    # (parsed frames are about as large as the text, plus the joined output)
+    SPILL_MEMORY_FACTOR = 3
+    
+    # Parsing a chunk holds about ten times its raw size in Python objects,
+    # so chunks are kept to this fraction of the budget
+    SPILL_PARSE_FRACTION = 16
+    
+    # Approximate bytes of a raw log row, used to turn chunk bytes into rows
+    SPILL_ROW_BYTES = 256
+    
     def __init__(
         self,
         secucheck_path: str,
         midflow_path: str,
-        corebank_path: str
+        corebank_path: str,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        parallel: bool = False,
+        max_workers: int = MAX_WORKERS,
+        num_shards: int = 1,
+        cache: Optional[ParsedCache] = None,
+        registry: SourceRegistry = SOURCES,
+        source_paths: Optional[Dict[str, str]] = None
     ):
         """
         Initialize the merger.
         
         Args:
-            secucheck_path (str): Path to security check logs
-            midflow_path (str): Path to middleware flow logs
-            corebank_path (str): Path to core banking logs
+            secucheck_path (str): Path to security check logs (file, directory or glob)
+            midflow_path (str): Path to middleware flow logs (file, directory or glob)
+            corebank_path (str): Path to core banking logs (file, directory or glob)
+            checkpoint_store (CheckpointStore, optional): Enables tail mode for
+                core banking logs, parsing only lines appended since the last merge
+            parallel (bool): Parse the three sources at the same time in a process pool
+            max_workers (int): Maximum number of worker processes in parallel mode
+            num_shards (int): Byte ranges each core banking and middleware file is
+                split into and parsed in worker processes (1 disables sharding)
+            cache (ParsedCache, optional): Cache of parser output, reused while a
+                source file is unchanged and extended with tail-mode deltas
+            registry (SourceRegistry): Sources to merge; the built-in three by default
+            source_paths (Dict[str, str], optional): Paths of registered sources other
+                than the built-in three, by source name
         """
         self.secucheck_path = secucheck_path
         self.midflow_path = midflow_path
         self.corebank_path = corebank_path
+        self.checkpoint_store = checkpoint_store
+        self.parallel = parallel
+        self.max_workers = max_workers
+        self.num_shards = num_shards
+        self.cache = cache
+        self.registry = registry
+        
+        self.paths = {
+            'secucheck': secucheck_path,
+            'midflow': midflow_path,
+            'corebank': corebank_path,
+            **(source_paths or {})
+        }
+        missing = [source.name for source in registry if source.name not in self.paths]
+        if missing:
+            raise ValueError(f"No log path for registered sources: {missing}")
+        
+        # Accumulated core banking data in tail mode
+        self._core_df: Optional[pd.DataFrame] = None
+        
+        self.joiner = SortMergeJoin(key=registry.base.key, check_columns=registry.base.check_columns)
+        
+        # Rows of the last merge that matched a transaction but not its user, IP or module
+        self.mismatches: Optional[pd.DataFrame] = None
+        
+    def _parse_corebank_tail(self) -> pd.DataFrame:
+        """
+        Parse core banking logs incrementally (tail mode).
+        
+        Returns:
+            pd.DataFrame: Core banking data for the whole file
+        """
+        parser = CorebankParser(self.corebank_path, self.checkpoint_store)
+        
+        if self._core_df is None:
+            cached = None
+            if self.cache is not None:
+                cached = self.cache.load_tail(self.corebank_path, 'corebank_tail')
+                
+            if cached is None:
+                # First run in this process: nothing accumulated yet, read everything
+                self._core_df = parser.parse_new_lines(reset=True)
+                self._store_tail(self._core_df, append=False)
+                return self._core_df
+                
+            # Resume from the data accumulated by a previous process
+            self._core_df, inode, offset = cached
+            self.checkpoint_store.update(self.corebank_path, inode, offset)
+            
+        delta = parser.parse_new_lines()
+        if parser.read_from_start:
+            # Rotated or truncated: the delta is the whole file again, not new lines
+            self._core_df = delta
+            self._store_tail(delta, append=False)
+            return self._core_df
+            
+        if not delta.empty:
+            self._core_df = concat_frames([self._core_df, delta])
+        self._store_tail(delta, append=True)
+                
+        return self._core_df
+        
+    def _store_tail(self, df: pd.DataFrame, append: bool) -> None:
+        """
+        Record tail-mode core banking data in the cache, if enabled.
+        
+        Args:
+            df (pd.DataFrame): Rows read (only the delta when appending)
+            append (bool): Extend the cached data instead of replacing it
+        """
+        if self.cache is None:
+            return
+        checkpoint = self.checkpoint_store.get(self.corebank_path)
+        self.cache.store_tail(
+            self.corebank_path,
+            'corebank_tail',
+            df,
+            checkpoint['inode'],
+            checkpoint['offset'],
+            append=append
+        )
+        
+    def _load_cached(self, name: str, path: str, fingerprint: Dict) -> Optional[Any]:
+        """
+        Load a source's parser output from the cache.
+        
+        Args:
+            name (str): Source name
+            path (str): Path to the source file
+            fingerprint (Dict): Current fingerprint of the source file
+            
+        Returns:
+            Optional[Any]: Parser output, or None on a miss
+        """
+        frames = [
+            self.cache.load(path, entry, fingerprint)
+            for entry in self.registry[name].cache_entries
+        ]
+        if any(frame is None for frame in frames):
+            return None
+        return tuple(frames) if len(frames) > 1 else frames[0]
+        
+    def _store_cached(self, name: str, path: str, result: Any, fingerprint: Dict) -> None:
+        """
+        Store a source's parser output in the cache.
+        
+        Args:
+            name (str): Source name
+            path (str): Path to the source file
+            result (Any): Parser output
+            fingerprint (Dict): Fingerprint of the source file taken before parsing
+        """
+        frames = result if isinstance(result, tuple) else (result,)
+        for entry, frame in zip(self.registry[name].cache_entries, frames):
+            self.cache.store(path, entry, frame, fingerprint)
+        
+    def _parse_sources(self) -> Dict[str, Any]:
+        """
+        Parse the registered log sources, in a process pool when parallel mode is on.
+        
+        Tail mode keeps core banking state in this process, so that source is
+        then parsed here while the pool handles the others.
+        
+        Returns:
+            Dict[str, Any]: Parser output by source name
+        """
+        tail = 'corebank' if self.checkpoint_store is not None and 'corebank' in self.registry else None
+        jobs = {
+            source.name: (source.parse, (self.paths[source.name], self.num_shards))
+            for source in self.registry
+            if source.name != tail
+        }
+            
+        results = {}
+        
+        # Reuse cached output of unchanged sources
+        fingerprints = {}
+        if self.cache is not None:
+            for name, (_, args) in list(jobs.items()):
+                fingerprints[name] = self.cache.fingerprint(args[0])
+                cached = _timed(self._load_cached, name, args[0], fingerprints[name])
+                if cached[0] is not None:
+                    logger.info(f"Loaded {name} from cache")
+                    results[name] = cached
+                    del jobs[name]
+                    
+        if self.parallel and jobs:
+            with ProcessPoolExecutor(max_workers=min(self.max_workers, len(jobs))) as pool:
+                futures = {
+                    name: pool.submit(_timed, func, *args)
+                    for name, (func, args) in jobs.items()
+                }
+                if tail:
+                    results[tail] = _timed(self._parse_corebank_tail)
+                for name, future in futures.items():
+                    results[name] = future.result()
+        else:
+            for name, (func, args) in jobs.items():
+                results[name] = _timed(func, *args)
+            if tail:
+                results[tail] = _timed(self._parse_corebank_tail)
+                
+        for name, (_, args) in jobs.items():
+            if name in fingerprints:
+                self._store_cached(name, args[0], results[name][0], fingerprints[name])
+                
+        # Log per-source timings to show which source dominates
+        for name, (_, elapsed) in results.items():
+            logger.info(f"Parsed {name} in {elapsed:.2f}s")
+            
+        return {name: result for name, (result, _) in results.items()}
+        
+    def _count_flows(self, merged: pd.DataFrame) -> Dict[str, int]:
+        """
+        Count transactions by the sources they were seen in.
+        
+        Args:
+            merged (pd.DataFrame): Combined log data
+            
+        Returns:
+            Dict[str, int]: Total, per-source and complete-flow counts
+        """
+        first, last = (self.registry[name].flag for name in self.registry.e2e_sources)
+        counts = {'total': len(merged)}
+        for flag in self.registry.flags():
+            counts[flag] = int(merged[flag].sum())
+        counts['complete'] = int((merged[first] & merged[last]).sum())
+        return counts
+        
+    def _log_statistics(self, counts: Dict[str, int], unmatched: Dict[str, int]) -> None:
+        """
+        Log merge statistics.
+        
+        Args:
+            counts (Dict[str, int]): Flow counts from _count_flows
+            unmatched (Dict[str, int]): Unmatched events by source, e.g. middleware
+                requests without response
+        """
+        total = max(counts['total'], 1)
+        logger.info(f"Total transactions: {counts['total']}")
+        for source in self.registry:
+            logger.info(f"With {source.label}: {counts[source.flag]} ({counts[source.flag] / total * 100:.1f}%)")
+        logger.info(f"Complete flows: {counts['complete']} ({counts['complete'] / total * 100:.1f}%)")
+        for name, count in unmatched.items():
+            logger.info(f"{self.registry[name].unmatched_label}: {count}")
+        logger.info(f"Matches rejected for inconsistent user, IP or module: {len(self.mismatches)}")
         
     def merge_logs(self) -> pd.DataFrame:
         """
@@ -42,75 +383,138 @@ class LogMerger:
         """
         try:
             # Parse individual logs
-            secu_df = SecucheckParser(self.secucheck_path).parse_file()
-            mid_df = MidflowParser(self.midflow_path).parse_file()
-            core_df = CorebankParser(self.corebank_path).parse_file()
-            
-            # Start with security checks as base
-            merged = secu_df.copy()
-            
-            # Add middleware flow data
-            merged = pd.merge(
-                merged,
-                mid_df,
-                on=['transaction_id', 'user_id', 'ip_address', 'module'],
-                how='left',
-                suffixes=('_secu', '')
-            )
+            start = time.perf_counter()
+            frames = {}
+            unmatched = {}
+            for name, result in self._parse_sources().items():
+                frames[name], extra = self.registry[name].split_result(result)
+                if extra is not None:
+                    unmatched[name] = len(extra)
+            logger.info(f"Parsed all sources in {time.perf_counter() - start:.2f}s")
             
-            # Add core banking data
-            merged = pd.merge(
-                merged,
-                core_df,
-                on=['transaction_id', 'user_id', 'ip_address', 'module'],
-                how='left',
-                suffixes=('', '_core')
-            )
+            merged, self.mismatches = join_sources(self.joiner, frames, self.registry)
+            self._log_statistics(self._count_flows(merged), unmatched)
             
-            # Add transaction status flags
-            merged['has_security_check'] = merged['timestamp_secu'].notna()
-            merged['has_middleware_flow'] = merged['service_latency'].notna()
-            merged['has_core_banking'] = merged['timestamp_core'].notna()
+            return merged
             
-            # Calculate completion percentage
-            merged['completion_pct'] = (
-                merged[['has_security_check', 'has_middleware_flow', 'has_core_banking']]
-                .mean(axis=1) * 100
+        except Exception as e:
+            logger.error(f"Error merging logs: {str(e)}")
+            raise
+            
+    def _input_bytes(self) -> int:
+        """Total size on disk of the registered sources."""
+        total = 0
+        for path in (self.paths[source.name] for source in self.registry):
+            paths = LogFileSet(path).resolve() if is_log_set(path) else [path]
+            total += sum(os.path.getsize(p) for p in paths)
+        return total
+        
+    def _spill_sources(self, spill: PartitionSpill, chunk_rows: int, block_bytes: int) -> Dict[str, int]:
+        """
+        Stream the registered sources into the spill buckets.
+        
+        Args:
+            spill (PartitionSpill): Buckets to fill
+            chunk_rows (int): Rows parsed at a time by row-based readers
+            block_bytes (int): Characters parsed at a time by block-based readers
+            
+        Returns:
+            Dict[str, int]: Unmatched events by source
+        """
+        unmatched = {}
+        for source in self.registry:
+            if source.stream is None:
+                raise ValueError(f"Source {source.name} has no streaming reader")
+            for result in source.stream(self.paths[source.name], chunk_rows, block_bytes):
+                frame, extra = source.split_result(result)
+                spill.add(source.name, frame)
+                if extra is not None:
+                    unmatched[source.name] = unmatched.get(source.name, 0) + len(extra)
+                    
+        spill.flush()
+        return unmatched
+        
+    def merge_logs_spilled(
+        self,
+        output_dir: str = MERGED_PARTITIONS_DIR,
+        memory_budget: int = MERGE_MEMORY_BUDGET,
+        spill_dir: str = SPILL_DIR
+    ) -> List[str]:
+        """
+        Merge logs from all sources without holding them in memory at once.
+        
+        Each source is streamed and hash-partitioned by transaction key into
+        buckets on disk, sized so one bucket of every source fits the memory
+        budget while it is joined. Buckets are then merged one at a time and
+        written as columnar partition files (see columnar.read_frame). The
+        partitions together hold exactly the rows of merge_logs; within a
+        partition rows keep the order of the base source. Parallel parsing,
+        sharding, tail mode and the parse cache do not apply in this mode.
+        
+        Args:
+            output_dir (str): Directory for the merged partition files
+            memory_budget (int): Approximate bytes of parsed data held in memory
+            spill_dir (str): Directory under which the temporary bucket files are written,
+                in a private subdirectory removed afterwards
+            
+        Returns:
+            List[str]: Paths of the merged partition files, one per non-empty bucket
+        """
+        try:
+            start = time.perf_counter()
+            input_bytes = self._input_bytes()
+            num_buckets = max(1, math.ceil(input_bytes * self.SPILL_MEMORY_FACTOR / memory_budget))
+            logger.info(
+                f"Spilling {input_bytes / 1e6:,.1f} MB of logs into {num_buckets} buckets "
+                f"for a {memory_budget / 1e6:,.0f} MB budget"
             )
             
-            # Calculate end-to-end latency only for complete flows
-            merged['e2e_latency'] = None
-            complete_flows = merged['has_security_check'] & merged['has_core_banking']
-            if complete_flows.any():
-                merged.loc[complete_flows, 'e2e_latency'] = (
-                    merged.loc[complete_flows, 'timestamp_core'] - 
-                    merged.loc[complete_flows, 'timestamp_secu']
-                ).dt.total_seconds()
-            
-            # Order columns logically
-            columns = [
-                'transaction_id',
-                'timestamp_secu', 'start_time', 'end_time', 'timestamp_core',
-                'operation', 'status', 'amount',
-                'validation_result', 'failure_reason',
-                'service_latency', 'total_latency', 'e2e_latency',
-                'verifications',
-                'user_id', 'ip_address', 'module',
-                'account_type',
-                'has_security_check', 'has_middleware_flow', 'has_core_banking',
-                'completion_pct'
-            ]
-            
-            # Log merge statistics
-            total_txns = len(merged)
-            logger.info(f"Total transactions: {total_txns}")
-            logger.info(f"With security check: {merged['has_security_check'].sum()} ({merged['has_security_check'].mean()*100:.1f}%)")
-            logger.info(f"With middleware flow: {merged['has_middleware_flow'].sum()} ({merged['has_middleware_flow'].mean()*100:.1f}%)")
-            logger.info(f"With core banking: {merged['has_core_banking'].sum()} ({merged['has_core_banking'].mean()*100:.1f}%)")
-            logger.info(f"Complete flows: {complete_flows.sum()} ({complete_flows.mean()*100:.1f}%)")
-            
-            return merged[columns]
+            # Buffers and the chunk being parsed share the budget while spilling
+            spill = PartitionSpill(spill_dir, num_buckets, flush_bytes=memory_budget // 4)
+            try:
+                block_bytes = memory_budget // self.SPILL_PARSE_FRACTION
+                chunk_rows = max(1, block_bytes // self.SPILL_ROW_BYTES)
+                unmatched = self._spill_sources(spill, chunk_rows, block_bytes)
+                logger.info(f"Spilled all sources in {time.perf_counter() - start:.2f}s")
+                
+                bucket_budget = memory_budget // self.SPILL_MEMORY_FACTOR
+                oversized = int((spill.bucket_bytes > bucket_budget).sum())
+                if oversized:
+                    logger.warning(f"{oversized} buckets exceed {bucket_budget} bytes; consider a larger budget")
+                    
+                os.makedirs(output_dir, exist_ok=True)
+                paths = []
+                counts = {}
+                mismatches = []
+                for bucket in range(num_buckets):
+                    base_df = spill.load(self.registry.base.name, bucket)
+                    if base_df.empty:
+                        continue
+                    frames = {self.registry.base.name: base_df}
+                    for source in self.registry.joined:
+                        frames[source.name] = spill.load(source.name, bucket)
+                    merged, bucket_mismatches = join_sources(self.joiner, frames, self.registry)
+                    mismatches.append(bucket_mismatches)
+                    
+                    for name, value in self._count_flows(merged).items():
+                        counts[name] = counts.get(name, 0) + value
+                    
+                    path = os.path.join(output_dir, f"merged-{bucket:05d}.npz")
+                    write_frame(path, merged)
+                    paths.append(path)
+            finally:
+                spill.cleanup()
+                
+            self.mismatches = pd.concat(mismatches, ignore_index=True) if mismatches else pd.DataFrame(
+                columns=['transaction_id', 'source', 'mismatched_columns']
+            )
+            if not counts:
+                counts = dict.fromkeys(['total', 'complete'] + self.registry.flags(), 0)
+            self._log_statistics(counts, unmatched)
+            logger.info(f"Wrote {len(paths)} merged partitions to {output_dir} in {time.perf_counter() - start:.2f}s")
+            
+            return paths
             
         except Exception as e:
-            logger.error(f"Error merging logs: {str(e)}")
-            raise 
\ No newline at end of file
+            logger.error(f"Error merging logs out of core: {str(e)}")
+            raise
\ No newline at end of file
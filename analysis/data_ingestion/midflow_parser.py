@@ -1,80 +1,665 @@
 """
 Parser for middleware flow logs.
 """
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+import io
+import numpy as np
 import pandas as pd
 from datetime import datetime
 
 from utils.logger import setup_logger
+from utils.config import CSV_CHUNK_SIZE, PENDING_REQUEST_TTL, MAX_WORKERS, FILE_INDEX_PATH
+from .categories import CATEGORY_SETS
+from .events import MiddlewareEvent
+from .log_set import LogFileSet, is_log_set, open_log
+from .schema import empty_frame
+from .sharding import compute_byte_ranges, read_byte_range
+from .timestamps import elapsed_seconds, parse_timestamps
+from .transaction_keys import TransactionKeyEncoder
 
 logger = setup_logger('midflow_parser')
 
+def _parse_shard(
+    log_path: str,
+    header: List[str],
+    start: int,
+    end: int
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]:
+    """
+    Read and pair one byte range of a middleware CSV file in a worker process.
+    
+    Args:
+        log_path (str): Path to the middleware flow log file
+        header (List[str]): CSV column names
+        start (int): First byte of the range (start of a row)
+        end (int): Byte offset just after the range (start of a row or EOF)
+        
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]:
+            Pairs found in the range, requests and responses left unpaired,
+            and the number of rows in the range
+    """
+    parser = MidflowParser(log_path)
+    data = read_byte_range(log_path, start, end)
+    return parser._pair_partition(parser._read_chunk(io.BytesIO(data), header))
+
+def _parse_set_file(
+    log_path: str
+) -> Tuple[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int], pd.Timestamp, pd.Timestamp]:
+    """
+    Read and pair one file of a rotated log set in a worker process.
+    
+    Args:
+        log_path (str): Path to a plain or compressed middleware flow log file
+        
+    Returns:
+        Tuple[Tuple, pd.Timestamp, pd.Timestamp]:
+            Pairs found in the file, requests and responses left unpaired and the
+            number of rows of the file, then its first and last timestamp
+    """
+    parser = MidflowParser(log_path)
+    with open_log(log_path) as f:
+        chunk = parser._read_chunk(f)
+        
+    return parser._pair_partition(chunk), chunk['timestamp'].min(), chunk['timestamp'].max()
+
 class MidflowParser:
     """Parser for middleware flow logs."""
     
-    def __init__(self, log_path: str):
+    DTYPES = {
+        'nivel_log': 'category',
+        'transaction_id': str,
+        'direction': 'category',
+        'operation': 'category',
+        # Nullable: a blank status code is missing, not a parse error for the whole chunk
+        'status_code': 'Int16',
+        'latency_ms': 'float64',
+        'user_id': 'category',
+        'ip_address': str,
+        'modulo': 'category'
+    }
+    
+    CATEGORICAL_COLUMNS = ['nivel_log', 'operation', 'user_id', 'modulo']
+    
+    # Columns besides transaction_id that a response must share with its request
+    PAIR_KEYS = ['operation', 'user_id', 'ip_address', 'modulo']
+    
+    COLUMNS = [
+        'transaction_id', 'txn_key', 'start_time', 'end_time', 'operation',
+        'status_code', 'service_latency', 'total_latency',
+        'user_id', 'ip_address', 'module'
+    ]
+    
+    ORPHAN_COLUMNS = [
+        'transaction_id', 'txn_key', 'start_time', 'operation', 'status_code',
+        'user_id', 'ip_address', 'module'
+    ]
+    
+    # Kind of every column of the rows, pairs and orphans the parser builds (see schema.KIND_CHECKS),
+    # used to type frames left without rows
+    COLUMN_KINDS = {
+        'timestamp': 'datetime', 'start_time': 'datetime', 'end_time': 'datetime',
+        'nivel_log': 'category', 'transaction_id': 'string', 'txn_key': 'int',
+        'direction': 'category', 'operation': 'category', 'status_code': 'int',
+        'latency_ms': 'float', 'service_latency': 'float', 'total_latency': 'float',
+        'user_id': 'category', 'ip_address': 'string', 'modulo': 'category', 'module': 'category',
+        # Row of an event in its partition or file, and serial reading chunk of a response
+        'row': 'int', 'row_req': 'int', 'row_resp': 'int', 'chunk': 'int'
+    }
+    
+    def __init__(self, log_path: Optional[str] = None, time_range: Optional[Tuple[datetime, datetime]] = None):
         """
         Initialize the parser.
         
         Args:
-            log_path (str): Path to the middleware flow log file
+            log_path (str, optional): Path to the middleware flow log file, or a directory
+                or glob of rotated files (None for a parser fed single rows or events)
+            time_range (Tuple[datetime, datetime], optional): Skip rotated files known
+                to fall outside it
         """
         self.log_path = log_path
+        self.time_range = time_range
+        self.key_encoder = TransactionKeyEncoder()
         
-    def parse_file(self) -> pd.DataFrame:
+        # Categories seen so far, shared by every chunk so they concatenate cleanly.
+        # Columns with a fixed category set start from it.
+        self._categories: Dict[str, pd.Index] = {
+            col: pd.Index(CATEGORY_SETS.get('module' if col == 'modulo' else col) or [], dtype=object)
+            for col in self.CATEGORICAL_COLUMNS
+        }
+        
+        # Requests waiting for their response between chunks or micro-batches
+        self._pending = pd.DataFrame()
+        self._unmatched_responses = 0
+        
+    def _align_categories(self, df: pd.DataFrame) -> pd.DataFrame:
         """
-        Parse the entire log file.
+        Recode categorical columns to the categories seen so far.
+        
+        New categories are appended, so codes of earlier frames stay valid.
         
+        Args:
+            df (pd.DataFrame): Frame with categorical columns
+            
         Returns:
-            pd.DataFrame: Parsed log data with request-response pairs
+            pd.DataFrame: Frame using the shared category sets
+        """
+        for col in self.CATEGORICAL_COLUMNS:
+            name = 'module' if col == 'modulo' and col not in df.columns else col
+            if name not in df.columns:
+                continue
+            new = df[name].cat.categories.difference(self._categories[col])
+            if len(new):
+                self._categories[col] = self._categories[col].append(new)
+            df[name] = df[name].cat.set_categories(self._categories[col])
+        return df
+        
+    def _empty(self, columns: List[str]) -> pd.DataFrame:
+        """
+        Build a frame without rows whose columns have their declared kinds and
+        category sets.
+        
+        Args:
+            columns (List[str]): Columns of the frame
+            
+        Returns:
+            pd.DataFrame: Typed empty frame
+        """
+        frame = empty_frame({col: self.COLUMN_KINDS[col] for col in columns})
+        # Columns read from the CSV keep the dtype they are read with, e.g. Int16 status codes
+        frame = frame.astype({
+            col: dtype for col, dtype in self.DTYPES.items()
+            if col in frame.columns and dtype != 'category'
+        })
+        return self._align_categories(frame)
+        
+    def _concat(self, frames: List[pd.DataFrame], columns: List[str]) -> pd.DataFrame:
+        """
+        Concatenate frames emitted at different points of the stream.
+        
+        Args:
+            frames (List[pd.DataFrame]): Frames to concatenate
+            columns (List[str]): Columns of the result
+            
+        Returns:
+            pd.DataFrame: Concatenated frame with shared category sets
+        """
+        frames = [frame for frame in frames if not frame.empty]
+        # First pass collects every category, second gives all frames the final sets
+        for frame in frames:
+            self._align_categories(frame)
+        frames = [self._align_categories(frame) for frame in frames]
+        if not frames:
+            return self._empty(columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+        
+    def iter_pairs(
+        self,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        ttl: float = PENDING_REQUEST_TTL
+    ) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+        """
+        Stream request-response pairs from the log file.
+        
+        Requests wait in a pending table until their response arrives, at
+        which point the pair is emitted. Requests still pending more than
+        `ttl` seconds behind the newest event, and those left at the end of
+        the file, are emitted as orphans. Memory depends on the number of
+        in-flight requests, not on the file size. Rotated sets are read file
+        by file, oldest first, so pairs may span a rotation.
+        
+        Args:
+            chunk_size (int): Number of CSV rows read at a time
+            ttl (float): Seconds a request may wait for its response
+            
+        Returns:
+            Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+                Request-response pairs and orphan requests without response
         """
         try:
-            # Read CSV file
-            df = pd.read_csv(self.log_path)
-            
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Create separate dataframes for requests and responses
-            requests = df[df['direction'] == 'request'].copy()
-            responses = df[df['direction'] == 'response'].copy()
-            
-            # Rename timestamp columns before merge
-            requests = requests.rename(columns={'timestamp': 'start_time'})
-            responses = responses.rename(columns={'timestamp': 'end_time'})
-            
-            # Merge requests and responses on transaction_id
-            merged = pd.merge(
-                requests,
-                responses,
-                on=['transaction_id', 'operation', 'user_id', 'ip_address', 'modulo'],
-                suffixes=('_req', '_resp')
+            self._pending = pd.DataFrame()
+            self._unmatched_responses = 0
+            
+            paths = LogFileSet(self.log_path).resolve() if is_log_set(self.log_path) else [self.log_path]
+            
+            for path in paths:
+                with open_log(path) as f:
+                    for chunk in pd.read_csv(f, dtype=self.DTYPES, chunksize=chunk_size):
+                        yield self._pair_chunk(self._prepare_chunk(chunk), ttl)
+                        
+            if self._unmatched_responses:
+                logger.warning(f"{self._unmatched_responses} responses without matching request")
+                
+            yield self._build_pairs(pd.DataFrame()), self._build_orphans(self._pending)
+            
+        except Exception as e:
+            logger.error(f"Error parsing file: {str(e)}")
+            raise
+            
+    def _pair_chunk(self, chunk: pd.DataFrame, ttl: float) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Pair the responses of a typed chunk with the pending requests.
+        
+        Requests of the chunk join the pending table; those pending more
+        than `ttl` seconds behind the newest event of the chunk are evicted.
+        
+        Args:
+            chunk (pd.DataFrame): Typed rows, in log order
+            ttl (float): Seconds a request may wait for its response
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Pairs and evicted orphan requests
+        """
+        requests, responses = self._split_directions(chunk)
+        pending = self._concat([self._pending, requests], list(requests.columns))
+        merged, pending, unmatched = self._pair(pending, responses)
+        self._unmatched_responses += len(unmatched)
+        
+        # Evict requests whose response is overdue
+        watermark = chunk['timestamp'].max()
+        expired = pending['start_time'] < watermark - pd.Timedelta(seconds=ttl)
+        self._pending = pending[~expired]
+        
+        return self._build_pairs(merged), self._build_orphans(pending[expired])
+        
+    def parse_line(self, line: str) -> Optional[MiddlewareEvent]:
+        """
+        Parse a single CSV row, with the columns of the log header.
+        
+        Args:
+            line (str): Row to parse, e.g. '2025-05-13 08:00:06,INFO,txn-0000,response,...'
+            
+        Returns:
+            Optional[MiddlewareEvent]: Parsed request or response, or None if invalid
+        """
+        try:
+            (timestamp, level, transaction_id, direction, operation,
+             status_code, latency_ms, user_id, ip_address, module) = line.rstrip('\r\n').split(',')
+            return MiddlewareEvent(
+                timestamp=timestamp,
+                level=level,
+                transaction_id=transaction_id,
+                direction=direction,
+                operation=operation,
+                status_code=int(status_code) if status_code else None,
+                latency_ms=float(latency_ms) if latency_ms else None,
+                user_id=user_id,
+                ip_address=ip_address,
+                module=module
+            )
+        except ValueError as e:
+            logger.error(f"Error parsing line: {str(e)}")
+            return None
+            
+    def build_frame(self, events: Sequence[MiddlewareEvent]) -> pd.DataFrame:
+        """
+        Build typed rows from parsed events, column by column, as read from the CSV.
+        
+        Args:
+            events (Sequence[MiddlewareEvent]): Requests and responses, in log order
+            
+        Returns:
+            pd.DataFrame: Typed rows
+        """
+        return self._prepare_chunk(MiddlewareEvent.frame(events).astype(self.DTYPES))
+        
+    def pair_events(
+        self,
+        events: Sequence[MiddlewareEvent],
+        ttl: float = PENDING_REQUEST_TTL
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Pair a micro-batch of events with the requests still waiting from earlier batches.
+        
+        Args:
+            events (Sequence[MiddlewareEvent]): Requests and responses, in log order
+            ttl (float): Seconds a request may wait for its response
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Request-response pairs completed by the batch and orphan requests evicted
+        """
+        try:
+            return self._pair_chunk(self.build_frame(events), ttl)
+        except Exception as e:
+            logger.error(f"Error pairing middleware events: {str(e)}")
+            raise
+            
+    def _read_chunk(self, source, header: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read a block of CSV rows with the declared dtypes.
+        
+        Args:
+            source: Path or file-like object with CSV rows
+            header (List[str], optional): Column names when the block has no header row
+            
+        Returns:
+            pd.DataFrame: Typed rows
+        """
+        chunk = pd.read_csv(
+            source,
+            dtype=self.DTYPES,
+            names=header,
+            header=None if header else 'infer'
+        )
+        return self._prepare_chunk(chunk)
+        
+    def _prepare_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert timestamps, add the integer transaction key and share category sets.
+        
+        Args:
+            chunk (pd.DataFrame): CSV rows as read
+            
+        Returns:
+            pd.DataFrame: Typed rows
+        """
+        # Convert timestamp to datetime
+        chunk['timestamp'] = parse_timestamps(chunk['timestamp'])
+        
+        # Requests and responses are paired on the integer key
+        chunk['txn_key'] = self.key_encoder.encode(chunk['transaction_id'])
+        
+        return self._align_categories(chunk)
+        
+    def _split_directions(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Split rows into requests and responses.
+        
+        Rows of any other direction (a typo, a missing value) are left out
+        and counted in a warning rather than paired as responses.
+        
+        Args:
+            chunk (pd.DataFrame): Typed CSV rows
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]: Requests (start_time), responses (end_time)
+        """
+        is_request = (chunk['direction'] == 'request').to_numpy()
+        is_response = (chunk['direction'] == 'response').to_numpy()
+        other = ~(is_request | is_response)
+        if other.any():
+            logger.warning(
+                f"Skipped {int(other.sum())} rows of unknown direction, "
+                f"sample: {chunk.loc[other, 'direction'].astype(str).unique()[:5].tolist()}"
             )
+        requests = chunk.loc[is_request].rename(columns={'timestamp': 'start_time'})
+        responses = chunk.loc[is_response].rename(columns={'timestamp': 'end_time'})
+        return requests, responses
+        
+    def _pair(
+        self,
+        pending: pd.DataFrame,
+        responses: pd.DataFrame
+    ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+        """
+        Pair responses with pending requests on the transaction key.
+        
+        Args:
+            pending (pd.DataFrame): Requests waiting for a response
+            responses (pd.DataFrame): Newly read responses
             
-            # Calculate total latency
-            merged['total_latency'] = (
-                merged['end_time'] - merged['start_time']
-            ).dt.total_seconds()
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+                Matched request-response rows, requests still pending and
+                responses without matching request
+        """
+        merged = pd.merge(
+            pending,
+            responses.drop(columns='transaction_id'),
+            on='txn_key',
+            suffixes=('_req', '_resp')
+        )
+        consistent = pd.Series(True, index=merged.index)
+        for key in self.PAIR_KEYS:
+            consistent &= merged[f'{key}_req'] == merged[f'{key}_resp']
+        merged = merged[consistent].copy()
+        
+        pending = pending[~pending['txn_key'].isin(merged['txn_key'])]
+        unmatched = responses[~responses['txn_key'].isin(merged['txn_key'])]
+        
+        return merged, pending, unmatched
+        
+    def _build_pairs(self, merged: pd.DataFrame) -> pd.DataFrame:
+        """
+        Build output rows from matched request-response rows.
+        
+        Args:
+            merged (pd.DataFrame): Requests joined with their responses
             
-            # Clean up and rename columns
-            merged = merged.rename(columns={
-                'status_code_resp': 'status_code',
-                'modulo': 'module',
-                'latency_ms_resp': 'latency_ms'  # La latencia está en la fila de respuesta
-            })
+        Returns:
+            pd.DataFrame: Request-response pairs with latencies
+        """
+        if merged.empty:
+            return self._empty(self.COLUMNS)
             
-            # Convert service latency to seconds
-            merged['service_latency'] = merged['latency_ms'] / 1000
+        # Calculate total latency
+        merged['total_latency'] = elapsed_seconds(merged['start_time'], merged['end_time'])
+        
+        # Clean up and rename columns
+        merged = merged.rename(columns={
+            'operation_req': 'operation',
+            'user_id_req': 'user_id',
+            'ip_address_req': 'ip_address',
+            'status_code_resp': 'status_code',
+            'modulo_req': 'module',
+            'latency_ms_resp': 'latency_ms'  # La latencia está en la fila de respuesta
+        })
+        
+        # Convert service latency to seconds
+        merged['service_latency'] = merged['latency_ms'] / 1000
+        
+        return merged[self.COLUMNS]
+        
+    def _build_orphans(self, orphans: pd.DataFrame) -> pd.DataFrame:
+        """
+        Build output rows for requests that never got a response.
+        
+        Args:
+            orphans (pd.DataFrame): Evicted pending requests
             
-            # Select and order columns
-            columns = [
-                'transaction_id', 'start_time', 'end_time', 'operation',
-                'status_code', 'service_latency', 'total_latency',
-                'user_id', 'ip_address', 'module'
-            ]
+        Returns:
+            pd.DataFrame: Requests without response
+        """
+        if orphans.empty:
+            return self._empty(self.ORPHAN_COLUMNS)
+        return orphans.rename(columns={'modulo': 'module'})[self.ORPHAN_COLUMNS]
+        
+    def parse_file_with_orphans(
+        self,
+        chunk_size: int = CSV_CHUNK_SIZE,
+        ttl: float = PENDING_REQUEST_TTL
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Parse the entire log file, keeping requests without response.
+        
+        Rotated sets are read one worker process per file and paired across
+        files afterwards, as parse_file_sharded does with byte ranges.
+        
+        Args:
+            chunk_size (int): Number of CSV rows read at a time
+            ttl (float): Seconds a request may wait for its response
             
-            return merged[columns]
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Request-response pairs and orphan requests without response
+        """
+        if is_log_set(self.log_path):
+            return self._parse_log_set(chunk_size)
+            
+        pairs, orphans = [], []
+        for pair_chunk, orphan_chunk in self.iter_pairs(chunk_size, ttl):
+            pairs.append(pair_chunk)
+            orphans.append(orphan_chunk)
+            
+        orphans_df = self._concat(orphans, self.ORPHAN_COLUMNS)
+        if not orphans_df.empty:
+            logger.info(f"{len(orphans_df)} requests without response")
+            
+        return self._concat(pairs, self.COLUMNS), orphans_df
+        
+    def parse_file_sharded(
+        self,
+        num_shards: int = MAX_WORKERS,
+        chunk_size: int = CSV_CHUNK_SIZE
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Parse the entire log file split into newline-aligned byte ranges.
+        
+        Each range is read and paired in a worker process. Requests and
+        responses left unpaired at range boundaries are paired afterwards,
+        and pairs are put back in the order parse_file_with_orphans emits
+        them for the same chunk size. Requests are only orphaned when no
+        response exists in the whole file, so the output matches
+        parse_file_with_orphans whenever responses arrive within its TTL.
+        
+        Args:
+            num_shards (int): Number of byte ranges (and worker processes)
+            chunk_size (int): Rows per chunk of the serial reader whose order pairs follow
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Request-response pairs and orphan requests without response
+        """
+        if is_log_set(self.log_path):
+            # Rotated sets are already split per file
+            return self._parse_log_set(chunk_size)
+            
+        try:
+            with open(self.log_path, 'rb') as f:
+                header_line = f.readline()
+            header = header_line.decode('utf-8').strip().split(',')
+            ranges = compute_byte_ranges(self.log_path, num_shards, start_offset=len(header_line))
+            
+            with ProcessPoolExecutor(max_workers=max(len(ranges), 1)) as pool:
+                results = list(pool.map(
+                    _parse_shard,
+                    [self.log_path] * len(ranges),
+                    [header] * len(ranges),
+                    [start for start, _ in ranges],
+                    [end for _, end in ranges]
+                ))
+                
+            for i, ((start, end), (pairs, pending, unmatched, _)) in enumerate(zip(ranges, results)):
+                logger.info(
+                    f"Shard {i} [{start}, {end}): {len(pairs)} pairs, "
+                    f"{len(pending)} requests and {len(unmatched)} responses left for boundary pairing"
+                )
+                
+            # The serial reader's chunks run across byte ranges
+            return self._pair_partitions(results, chunk_size, restart_chunks=False)
             
         except Exception as e:
-            logger.error(f"Error parsing file: {str(e)}")
-            raise 
\ No newline at end of file
+            logger.error(f"Error parsing file in shards: {str(e)}")
+            raise
+            
+    def _parse_log_set(self, chunk_size: int = CSV_CHUNK_SIZE) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Read and pair every file of a rotated log set, one worker process per file.
+        
+        Args:
+            chunk_size (int): Rows per chunk of the serial reader whose order pairs follow
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Request-response pairs and orphan requests without response
+        """
+        log_set = LogFileSet(self.log_path, FILE_INDEX_PATH)
+        results = [result for _, result in log_set.map(_parse_set_file, self.time_range)]
+        # The serial reader starts a new chunk at each file
+        return self._pair_partitions(results, chunk_size, restart_chunks=True)
+        
+    def _pair_partition(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]:
+        """
+        Pair the rows of one partition, keeping the row of each event to restore file order.
+        
+        Args:
+            chunk (pd.DataFrame): Typed rows of the partition, in log order
+            
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]:
+                Pairs with the rows of their request and response (row_req, row_resp),
+                requests and responses left unpaired (row), and the number of rows
+        """
+        chunk['row'] = np.arange(len(chunk))
+        requests, responses = self._split_directions(chunk)
+        merged, pending, unmatched = self._pair(requests, responses)
+        
+        pairs = self._build_pairs(merged)
+        pairs['row_req'] = merged['row_req'].to_numpy(dtype=np.int64)
+        pairs['row_resp'] = merged['row_resp'].to_numpy(dtype=np.int64)
+        return pairs, pending, unmatched, len(chunk)
+        
+    def _pair_partitions(
+        self,
+        results: List[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]],
+        chunk_size: int,
+        restart_chunks: bool
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Combine partitions paired separately, pairing what crossed their boundaries.
+        
+        The serial reader emits the pairs completed by each chunk of rows in
+        the order of their requests, so pairs are sorted by the chunk holding
+        their response, then by the row of their request.
+        
+        Args:
+            results (List[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, int]]):
+                Output of _pair_partition for each partition, in order
+            chunk_size (int): Rows per chunk of the serial reader
+            restart_chunks (bool): Whether the serial reader starts a new chunk at
+                each partition (files of a rotated set) or reads across them (byte ranges)
+                
+        Returns:
+            Tuple[pd.DataFrame, pd.DataFrame]:
+                Request-response pairs and orphan requests without response
+        """
+        # Rows and chunks of each partition, counted from the start of the file or set
+        pairs, pending, responses = [], [], []
+        row_offset, chunk_offset = 0, 0
+        for partition_pairs, partition_pending, unmatched, num_rows in results:
+            first_row = row_offset if restart_chunks else 0
+            pairs.append(partition_pairs.assign(
+                row_req=partition_pairs['row_req'] + row_offset,
+                chunk=chunk_offset + (partition_pairs['row_resp'] + row_offset - first_row) // chunk_size
+            ).drop(columns='row_resp'))
+            pending.append(partition_pending.assign(row=partition_pending['row'] + row_offset))
+            responses.append(unmatched.assign(
+                row=unmatched['row'] + row_offset,
+                chunk=chunk_offset + (unmatched['row'] + row_offset - first_row) // chunk_size
+            ))
+            row_offset += num_rows
+            if restart_chunks:
+                chunk_offset += -(-num_rows // chunk_size)
+                
+        pending = self._concat(pending, list(self.DTYPES) + ['txn_key', 'start_time', 'row'])
+        responses = self._concat(responses, list(self.DTYPES) + ['txn_key', 'end_time', 'row', 'chunk'])
+        # Responses may have added categories since the requests were aligned
+        merged, orphans, unmatched = self._pair(self._align_categories(pending), responses)
+        
+        if len(unmatched):
+            logger.warning(f"{len(unmatched)} responses without matching request")
+            
+        boundary_pairs = self._build_pairs(merged)
+        boundary_pairs['row_req'] = merged['row_req'].to_numpy(dtype=np.int64)
+        boundary_pairs['chunk'] = merged['chunk'].to_numpy(dtype=np.int64)
+        pairs_df = self._concat(pairs + [boundary_pairs], self.COLUMNS + ['row_req', 'chunk'])
+        order = np.lexsort((pairs_df['row_req'].to_numpy(), pairs_df['chunk'].to_numpy()))
+        pairs_df = pairs_df.iloc[order].reset_index(drop=True)[self.COLUMNS]
+        
+        orphans_df = self._build_orphans(orphans).reset_index(drop=True)
+        if not orphans_df.empty:
+            logger.info(f"{len(orphans_df)} requests without response")
+            
+        return pairs_df, orphans_df
+        
+    def parse_file(self) -> pd.DataFrame:
+        """
+        Parse the entire log file.
+        
+        Returns:
+            pd.DataFrame: Parsed log data with request-response pairs
+        """
+        pairs, _ = self.parse_file_with_orphans()
+        return pairs
@@ -0,0 +1,94 @@
+"""
+Declared column types of parsed and merged log data, checked at the end of each stage.
+"""
+from typing import Callable, Dict, Mapping
+import numpy as np
+import pandas as pd
+
+
+class SchemaError(TypeError):
+    """A column of another type than declared, e.g. numbers held as Python objects."""
+
+
+def _is_string(dtype) -> bool:
+    """Python strings (object) or the pandas string dtype."""
+    return dtype == object or isinstance(dtype, pd.StringDtype)
+
+
+# Test of a column dtype for each kind of column
+KIND_CHECKS: Dict[str, Callable[[object], bool]] = {
+    # datetime64[ns], naive or with a time zone
+    'datetime': pd.api.types.is_datetime64_ns_dtype,
+    'float': pd.api.types.is_float_dtype,
+    'int': pd.api.types.is_integer_dtype,
+    'uint': pd.api.types.is_unsigned_integer_dtype,
+    # UInt32 IPv4 addresses, missing for IPv6 and missing values
+    'uint32': lambda dtype: isinstance(dtype, pd.UInt32Dtype) or dtype == np.uint32,
+    'numeric': lambda dtype: pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype),
+    # NumPy bool or the nullable boolean dtype
+    'bool': pd.api.types.is_bool_dtype,
+    'category': lambda dtype: isinstance(dtype, pd.CategoricalDtype),
+    'string': _is_string
+}
+
+# Dtype of an empty column of each kind
+EMPTY_DTYPES = {
+    'datetime': 'datetime64[ns]',
+    'float': 'float64',
+    'int': 'int64',
+    'uint': 'uint64',
+    'uint32': 'UInt32',
+    'numeric': 'float64',
+    'bool': 'bool',
+    'category': 'category',
+    'string': 'object'
+}
+
+
+def validate_frame(
+    df: pd.DataFrame,
+    schema: Mapping[str, str],
+    stage: str,
+    required: bool = True
+) -> pd.DataFrame:
+    """
+    Check the columns of a frame against their declared kinds.
+    
+    Args:
+        df (pd.DataFrame): Stage output
+        schema (Mapping[str, str]): Kind of each column, one of KIND_CHECKS
+        stage (str): Stage name for the error message, e.g. 'merge'
+        required (bool): Fail on declared columns missing from the frame
+        
+    Returns:
+        pd.DataFrame: The frame, unchanged
+        
+    Raises:
+        SchemaError: If a column is missing or of another kind, e.g. an object
+            column where a float was declared
+    """
+    problems = []
+    for col, kind in schema.items():
+        if col not in df.columns:
+            if required:
+                problems.append(f"{col} is missing")
+            continue
+        dtype = df[col].dtype
+        if not KIND_CHECKS[kind](dtype):
+            problems.append(f"{col} is {dtype}, expected {kind}")
+    if problems:
+        raise SchemaError(f"Schema violation after {stage}: {'; '.join(problems)}")
+    return df
+
+
+def empty_frame(schema: Mapping[str, str]) -> pd.DataFrame:
+    """
+    Build an empty frame with typed columns.
+    
+    Args:
+        schema (Mapping[str, str]): Kind of each column, in order
+        
+    Returns:
+        pd.DataFrame: Frame without rows whose columns have the declared kinds
+    """
+    return pd.DataFrame({col: pd.Series(dtype=EMPTY_DTYPES[kind]) for col, kind in schema.items()})
@@ -1,58 +1,286 @@
 """
 Parser for security check logs.
 """
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
 import pandas as pd
 import json
 from datetime import datetime
 
 from utils.logger import setup_logger
+from utils.config import BATCH_SIZE, FILE_INDEX_PATH
+from .categories import concat_frames, to_categorical
+from .events import SecurityCheckEvent
+from .log_set import LogFileSet, is_log_set, open_log
+from .schema import empty_frame
+from .timestamps import parse_timestamps
+from .transaction_keys import TransactionKeyEncoder
 
 logger = setup_logger('secucheck_parser')
 
+def _parse_set_file(log_path: str) -> Tuple[pd.DataFrame, pd.Timestamp, pd.Timestamp]:
+    """
+    Parse one file of a rotated log set in a worker process.
+    
+    Args:
+        log_path (str): Path to a plain or compressed security check log file
+        
+    Returns:
+        Tuple[pd.DataFrame, pd.Timestamp, pd.Timestamp]: Parsed log data and its first
+            and last timestamp
+    """
+    df = SecucheckParser(log_path).concat_batches()
+    return df, df['timestamp_secu'].min(), df['timestamp_secu'].max()
+
 class SecucheckParser:
     """Parser for security check logs."""
     
-    def __init__(self, log_path: str):
+    # Characters of text read from the file per refill of the decode buffer
+    READ_SIZE = 1 << 20
+    
+    # Characters an object may span before it is reported as malformed
+    MAX_RECORD_SIZE = 16 << 20
+    
+    COLUMN_RENAMES = {
+        'resultado_validación': 'validation_result',
+        'motivo_fallo': 'failure_reason',
+        'modulo': 'module',
+        'verificaciones_realizadas': 'verifications',
+        'timestamp': 'timestamp_secu'
+    }
+    
+    CATEGORICAL_COLUMNS = ['validation_result', 'failure_reason', 'user_id', 'module']
+    
+    # Kind of every column of the parsed frame (see schema.KIND_CHECKS), used to type files without entries
+    COLUMN_KINDS = {
+        'timestamp_secu': 'datetime', 'transaction_id': 'string', 'user_id': 'category',
+        'ip_address': 'string', 'validation_result': 'category', 'failure_reason': 'category',
+        'module': 'category', 'verifications': 'string', 'txn_key': 'int'
+    }
+    
+    def __init__(self, log_path: Optional[str] = None, time_range: Optional[Tuple[datetime, datetime]] = None):
         """
         Initialize the parser.
         
         Args:
-            log_path (str): Path to the security check log file
+            log_path (str, optional): Path to the security check log file (JSON array
+                or NDJSON), or a directory or glob of rotated files (None for a parser
+                fed records or events)
+            time_range (Tuple[datetime, datetime], optional): Skip rotated files known
+                to fall outside it
         """
         self.log_path = log_path
+        self.time_range = time_range
+        self.key_encoder = TransactionKeyEncoder()
         
-    def parse_file(self) -> pd.DataFrame:
+    def _iter_stream(self, f: TextIO) -> Iterator[Dict]:
         """
-        Parse the entire log file.
+        Decode JSON objects from a text stream one at a time.
+        
+        An object that still does not decode once MAX_RECORD_SIZE characters
+        from its start are buffered is malformed, not split across reads: the
+        decode error is raised instead of buffering the rest of the file.
         
+        Args:
+            f (TextIO): Open log file
+            
         Returns:
-            pd.DataFrame: Parsed log data
+            Iterator[Dict]: Log entries in stream order
         """
-        try:
-            with open(self.log_path, 'r') as f:
-                logs = json.load(f)
+        decoder = json.JSONDecoder()
+        buffer = ''
+        pos = 0
+        eof = False
+        
+        while True:
+            # Skip whitespace, array brackets and separators between objects
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[]':
+                pos += 1
                 
-            # Convert list of dictionaries to DataFrame
-            df = pd.DataFrame(logs)
+            if pos == len(buffer):
+                if eof:
+                    return
+                buffer = f.read(self.READ_SIZE)
+                pos = 0
+                eof = not buffer
+                continue
+                
+            try:
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or len(buffer) - pos >= self.MAX_RECORD_SIZE:
+                    raise
+                # Object split across reads: keep its start and refill
+                chunk = f.read(self.READ_SIZE)
+                eof = not chunk
+                buffer = buffer[pos:] + chunk
+                pos = 0
+                continue
+                
+            pos = end
+            yield record
             
-            # Convert timestamp to datetime
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+    def iter_records(self) -> Iterator[Dict]:
+        """
+        Walk the log file one JSON object at a time.
+        
+        Accepts a top-level JSON array (pretty-printed or not) as well as
+        NDJSON. Only the object being decoded is held in memory. Rotated
+        sets are read file by file, oldest first.
+        
+        Returns:
+            Iterator[Dict]: Log entries in file order
+        """
+        paths = LogFileSet(self.log_path).resolve() if is_log_set(self.log_path) else [self.log_path]
+        for path in paths:
+            with open_log(path) as f:
+                yield from self._iter_stream(f)
+                
+    def parse_record(self, record: Dict) -> SecurityCheckEvent:
+        """
+        Turn a decoded log entry into an event.
+        
+        Args:
+            record (Dict): JSON object of one security check
             
-            # Normalize column names
-            df = df.rename(columns={
-                'resultado_validación': 'validation_result',
-                'motivo_fallo': 'failure_reason',
-                'modulo': 'module',
-                'verificaciones_realizadas': 'verifications',
-                'timestamp': 'timestamp_secu'
-            })
+        Returns:
+            SecurityCheckEvent: Parsed log entry
+        """
+        return SecurityCheckEvent(
+            timestamp_secu=record['timestamp'],
+            transaction_id=record['transaction_id'],
+            user_id=record['user_id'],
+            ip_address=record['ip_address'],
+            validation_result=record['resultado_validación'],
+            failure_reason=record['motivo_fallo'],
+            module=record['modulo'],
+            verifications=self._join_verifications(record.get('verificaciones_realizadas'))
+        )
+        
+    def build_frame(self, events: Sequence[SecurityCheckEvent]) -> pd.DataFrame:
+        """
+        Build a normalized DataFrame from parsed events, column by column.
+        
+        Args:
+            events (Sequence[SecurityCheckEvent]): Parsed log entries, e.g. a micro-batch
             
-            # Convert verifications list to string for easier processing
-            df['verifications'] = df['verifications'].apply(lambda x: ','.join(x))
+        Returns:
+            pd.DataFrame: Parsed log data, with the columns of iter_batches
+        """
+        return self._type_frame(SecurityCheckEvent.frame(events))
+        
+    def _build_batch(self, columns: Dict[str, List]) -> pd.DataFrame:
+        """
+        Build a normalized DataFrame from a batch of column values.
+        
+        Args:
+            columns (Dict[str, List]): Raw values by original column name
             
-            return df
+        Returns:
+            pd.DataFrame: Parsed log data for the batch
+        """
+        # Normalize column names
+        df = pd.DataFrame(columns).rename(columns=self.COLUMN_RENAMES)
+        
+        # Convert verifications list to string for easier processing
+        if 'verifications' not in df.columns:
+            df['verifications'] = None
+        df['verifications'] = df['verifications'].apply(self._join_verifications)
+        
+        return self._type_frame(df)
+        
+    @staticmethod
+    def _join_verifications(verifications: Optional[List[str]]) -> str:
+        """
+        Comma-separated verifications; an entry without any (null or missing)
+        gives an empty string.
+        """
+        return ','.join(verifications) if verifications else ''
+        
+    def _type_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Parse timestamps, encode categories and add the integer transaction key.
+        
+        Args:
+            df (pd.DataFrame): Raw values with normalized column names
             
+        Returns:
+            pd.DataFrame: Parsed log data
+        """
+        # Convert timestamp to datetime
+        df['timestamp_secu'] = parse_timestamps(df['timestamp_secu'])
+        
+        for col in self.CATEGORICAL_COLUMNS:
+            if col in df.columns:
+                df[col] = to_categorical(df[col], col)
+                
+        # Integer join key; the string ID is kept for output only
+        df['txn_key'] = self.key_encoder.encode(df['transaction_id'])
+        
+        return df
+        
+    def iter_batches(self, batch_size: int = BATCH_SIZE) -> Iterator[pd.DataFrame]:
+        """
+        Parse the log file into fixed-size DataFrame batches.
+        
+        Memory use is bounded by the batch size rather than the file size.
+        
+        Args:
+            batch_size (int): Number of log entries per batch
+            
+        Returns:
+            Iterator[pd.DataFrame]: Parsed log data, one batch at a time
+        """
+        try:
+            columns: Dict[str, List] = {}
+            count = 0
+            
+            for record in self.iter_records():
+                for key, value in record.items():
+                    if key not in columns:
+                        # Column first seen mid-batch: backfill earlier rows
+                        columns[key] = [None] * count
+                    columns[key].append(value)
+                count += 1
+                
+                # Pad columns missing from this record
+                for values in columns.values():
+                    if len(values) < count:
+                        values.append(None)
+                        
+                if count == batch_size:
+                    yield self._build_batch(columns)
+                    columns = {}
+                    count = 0
+                    
+            if count:
+                yield self._build_batch(columns)
+                
         except Exception as e:
             logger.error(f"Error parsing file: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+            
+    def parse_file(self) -> pd.DataFrame:
+        """
+        Parse the entire log file.
+        
+        Rotated sets are parsed one worker process per file.
+        
+        Returns:
+            pd.DataFrame: Parsed log data
+        """
+        if is_log_set(self.log_path):
+            results = LogFileSet(self.log_path, FILE_INDEX_PATH).map(_parse_set_file, self.time_range)
+            frames = [df for _, df in results if not df.empty]
+            return concat_frames(frames) if frames else empty_frame(self.COLUMN_KINDS)
+            
+        return self.concat_batches()
+        
+    def concat_batches(self) -> pd.DataFrame:
+        """
+        Parse the log file batch by batch into a single frame.
+        
+        Returns:
+            pd.DataFrame: Parsed log data, typed and without rows for a file without entries
+        """
+        frames = list(self.iter_batches())
+        return concat_frames(frames) if frames else empty_frame(self.COLUMN_KINDS)
@@ -0,0 +1,62 @@
+"""
+Helpers for splitting a log file into newline-aligned byte ranges.
+"""
+from typing import List, Tuple
+import os
+
+
+def compute_byte_ranges(path: str, num_shards: int, start_offset: int = 0) -> List[Tuple[int, int]]:
+    """
+    Split a file into byte ranges that start and end on line boundaries.
+    
+    Args:
+        path (str): Path to the file
+        num_shards (int): Desired number of ranges
+        start_offset (int): First byte to include (e.g. just after a CSV header)
+        
+    Returns:
+        List[Tuple[int, int]]: (start, end) byte offsets in file order; fewer than
+            num_shards when the file has too few lines
+    """
+    size = os.path.getsize(path)
+    boundaries = [start_offset]
+    
+    with open(path, 'rb') as f:
+        for i in range(1, num_shards):
+            target = start_offset + (size - start_offset) * i // num_shards
+            if target <= boundaries[-1]:
+                continue
+                
+            # Move to the start of the first line beginning at or after target
+            f.seek(target - 1)
+            f.readline()
+            position = f.tell()
+            
+            if position >= size:
+                break
+            if position > boundaries[-1]:
+                boundaries.append(position)
+                
+    boundaries.append(size)
+    return [
+        (start, end)
+        for start, end in zip(boundaries[:-1], boundaries[1:])
+        if end > start
+    ]
+
+
+def read_byte_range(path: str, start: int, end: int) -> bytes:
+    """
+    Read a byte range of a file.
+    
+    Args:
+        path (str): Path to the file
+        start (int): First byte to read
+        end (int): Byte offset just after the last byte to read
+        
+    Returns:
+        bytes: File content between start and end
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return f.read(end - start)
@@ -0,0 +1,131 @@
+"""
+N-way sort-merge join of log sources on the integer transaction key.
+"""
+from typing import Dict, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from .hash_join import TransactionJoin
+
+logger = setup_logger('sort_merge')
+
+
+class SortMergeJoin(TransactionJoin):
+    """
+    Left join of any number of log sources onto a base source by transaction key.
+    
+    The keys of all sources are merged into one sorted sequence with a stable
+    sort. Log sources are written in transaction order, so each arrives as a
+    sorted run and the sort reduces to a linear merge of the runs. Rows with
+    the same key then sit next to each other, base rows first and every
+    source's rows in file order. A single scan of that sequence finds, for
+    each base row, the candidate rows of every source. Candidates go through
+    the same identity check as TransactionJoin, occurrence by occurrence, so
+    both joins give the same result.
+    """
+    
+    def _align_all(
+        self,
+        base: pd.DataFrame,
+        others: Dict[str, pd.DataFrame],
+        check_columns: Dict[str, Sequence[str]]
+    ) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+        """
+        Align every source to the base in one merge of their sorted keys.
+        
+        Args:
+            base (pd.DataFrame): Base source
+            others (Dict[str, pd.DataFrame]): Sources to align, by name
+            check_columns (Dict[str, Sequence[str]]): Columns each source must agree on
+                with the base
+                
+        Returns:
+            Dict[str, Tuple[np.ndarray, np.ndarray]]:
+                Row position in each source for each base row (-1 when missing) and
+                mismatched columns for base rows whose key matched only inconsistent
+                rows (else None)
+        """
+        names = list(others)
+        frames = [base] + list(others.values())
+        lengths = [len(frame) for frame in frames]
+        offsets = np.cumsum([0] + lengths)
+        all_keys = np.concatenate([np.asarray(frame[self.key].to_numpy(), dtype=np.int64) for frame in frames])
+        
+        # Stable sort of the concatenated runs: a linear merge when each run is sorted
+        order = np.argsort(all_keys, kind='stable')
+        sorted_keys = all_keys[order]
+        stream = np.repeat(np.arange(len(frames), dtype=np.int16), lengths)[order]
+        
+        # Consecutive entries with the same key form a group
+        group_start = np.empty(len(order), dtype=bool)
+        group_start[:1] = True
+        np.not_equal(sorted_keys[1:], sorted_keys[:-1], out=group_start[1:])
+        group = np.cumsum(group_start, dtype=np.int64) - 1
+        num_groups = int(group[-1]) + 1 if len(group) else 0
+        
+        base_entries = np.flatnonzero(stream == 0)
+        base_group = np.empty(len(base), dtype=np.int64)
+        base_group[order[base_entries]] = group[base_entries]
+        
+        alignments = {}
+        for i, name in enumerate(names, start=1):
+            entries = np.flatnonzero(stream == i)
+            counts = np.bincount(group[entries], minlength=num_groups)
+            first = np.cumsum(counts) - counts
+            rows = order[entries] - offsets[i]
+            
+            repeated = int(np.maximum(counts - 1, 0).sum())
+            if repeated:
+                logger.info(f"{name}: {repeated} repeated transaction keys")
+                
+            alignments[name] = self._match_runs(
+                base, others[name], check_columns[name], base_group, counts, first, rows
+            )
+        return alignments
+        
+    def _match_runs(
+        self,
+        base: pd.DataFrame,
+        other: pd.DataFrame,
+        check_columns: Sequence[str],
+        base_group: np.ndarray,
+        counts: np.ndarray,
+        first: np.ndarray,
+        rows: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Match base rows to the run of source rows sharing their key.
+        
+        Args:
+            base (pd.DataFrame): Base source
+            other (pd.DataFrame): Source being aligned
+            check_columns (Sequence[str]): Columns a match must agree on with the base
+            base_group (np.ndarray): Key group of each base row
+            counts (np.ndarray): Source rows in each key group
+            first (np.ndarray): Index in `rows` of the first source row of each group
+            rows (np.ndarray): Source rows in merged order
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                Positions and mismatched columns, as TransactionJoin._align
+        """
+        positions = np.full(len(base), -1, dtype=np.int64)
+        mismatched = np.full(len(base), None, dtype=object)
+        pending = np.arange(len(base))
+        
+        level = 0
+        while len(pending):
+            groups = base_group[pending]
+            has_candidate = counts[groups] > level
+            pending = pending[has_candidate]
+            if not len(pending):
+                break
+                
+            candidate_rows = rows[first[groups[has_candidate]] + level]
+            accepted = self._accept(base, other, pending, candidate_rows, check_columns, positions, mismatched)
+            pending = pending[~accepted]
+            level += 1
+            
+        mismatched[positions >= 0] = None
+        return positions, mismatched
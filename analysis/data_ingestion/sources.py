@@ -0,0 +1,358 @@
+"""
+Registry of log sources: how each is parsed and what it contributes to the merged data.
+"""
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Sequence, Tuple
+import pandas as pd
+
+from .secucheck_parser import SecucheckParser
+from .midflow_parser import MidflowParser
+from .corebank_parser import CorebankParser
+
+
+# Source parsing jobs, defined at module level so worker processes can run them
+
+def _parse_secucheck(path: str, num_shards: int = 1) -> pd.DataFrame:
+    """Parse security check logs."""
+    return SecucheckParser(path).parse_file()
+
+
+def _parse_midflow(path: str, num_shards: int = 1) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Parse middleware flow logs into pairs and orphan requests."""
+    if num_shards > 1:
+        return MidflowParser(path).parse_file_sharded(num_shards)
+    return MidflowParser(path).parse_file_with_orphans()
+
+
+def _parse_corebank(path: str, num_shards: int = 1) -> pd.DataFrame:
+    """Parse core banking logs with the bulk parser."""
+    if num_shards > 1:
+        core_df, _ = CorebankParser(path).parse_file_sharded(num_shards)
+    else:
+        core_df, _ = CorebankParser(path).parse_file_bulk()
+    return core_df
+
+
+# Streaming readers used by the out-of-core merge
+
+def _stream_secucheck(path: str, chunk_rows: int, block_bytes: int) -> Iterator[pd.DataFrame]:
+    """Stream security check logs in batches of rows."""
+    return SecucheckParser(path).iter_batches(chunk_rows)
+
+
+def _stream_midflow(path: str, chunk_rows: int, block_bytes: int) -> Iterator[Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Stream middleware request-response pairs and orphan requests."""
+    return MidflowParser(path).iter_pairs(chunk_rows)
+
+
+def _stream_corebank(path: str, chunk_rows: int, block_bytes: int) -> Iterator[pd.DataFrame]:
+    """Stream core banking logs in blocks of lines, starting with an empty typed frame."""
+    parser = CorebankParser(path)
+    yield parser.parse_text_bulk('')[0]
+    for core_df, _ in parser.iter_chunks(block_bytes):
+        yield core_df
+
+
+# Event readers used by the streaming merger; each call makes a parser whose state,
+# such as middleware requests waiting for their response, lasts across micro-batches
+
+def _secucheck_events() -> Callable[[Sequence[Any]], pd.DataFrame]:
+    """Build security check frames from SecurityCheckEvent batches."""
+    return SecucheckParser().build_frame
+
+
+def _midflow_events() -> Callable[[Sequence[Any]], Tuple[pd.DataFrame, pd.DataFrame]]:
+    """Pair MiddlewareEvent batches into request-response pairs and orphan requests."""
+    return MidflowParser().pair_events
+
+
+def _corebank_events() -> Callable[[Sequence[Any]], pd.DataFrame]:
+    """Build core banking frames from CorePostingEvent batches."""
+    return CorebankParser().build_frame
+
+
+# Kinds of the default key columns shared by every source (see schema.KIND_CHECKS)
+KEY_DTYPES = {'txn_key': 'int', 'user_id': 'category', 'ip_address': 'string', 'module': 'category'}
+
+
+class LogSource:
+    """Declaration of a log source taking part in the merge."""
+    
+    def __init__(
+        self,
+        name: str,
+        parse: Callable[..., Any],
+        columns: Sequence[str],
+        dtypes: Mapping[str, str],
+        stages: Sequence[Tuple[str, str]],
+        flag: str,
+        label: str,
+        presence_column: Optional[str] = None,
+        key_columns: Sequence[str] = ('txn_key', 'user_id', 'ip_address', 'module'),
+        stream: Optional[Callable[..., Iterator[Any]]] = None,
+        event_reader: Optional[Callable[[], Callable[[Sequence[Any]], Any]]] = None,
+        cache_entries: Optional[Sequence[str]] = None,
+        unmatched_label: Optional[str] = None
+    ):
+        """
+        Declare a source.
+        
+        Args:
+            name (str): Source name
+            parse (Callable): Module-level function (path, num_shards) returning the parsed
+                frame, or a tuple of the frame and a frame of unmatched events
+            columns (Sequence[str]): Columns of the parsed frame copied to the merged data
+            dtypes (Mapping[str, str]): Kind of each column of the parsed frame, key columns
+                included unless they are in KEY_DTYPES, e.g. {'amount': 'float'}
+            stages (Sequence[Tuple[str, str]]): Flow stages of the source, in order,
+                with their timestamp column
+            flag (str): Merged column telling whether this source saw the transaction
+            label (str): Description used in merge statistics, e.g. 'core banking'
+            presence_column (str, optional): Column that is set whenever the source matched
+                (defaults to the first stage timestamp)
+            key_columns (Sequence[str]): Integer transaction key followed by the identity
+                columns a match must agree on with the base source
+            stream (Callable, optional): Function (path, chunk_rows, block_bytes) yielding
+                parse results chunk by chunk, used by the out-of-core merge
+            event_reader (Callable, optional): Function returning a function that turns
+                a batch of event records into a parse result, for the streaming merger
+            cache_entries (Sequence[str], optional): Cache entry of each frame from parse
+            unmatched_label (str, optional): Description of the unmatched events from parse
+        """
+        self.name = name
+        self.parse = parse
+        self.columns = list(columns)
+        self.dtypes = {**KEY_DTYPES, **dtypes}
+        self.stages = list(stages)
+        self.flag = flag
+        self.label = label
+        self.presence_column = presence_column or self.stages[0][1]
+        self.key_columns = list(key_columns)
+        self.stream = stream
+        self.event_reader = event_reader
+        self.cache_entries = list(cache_entries or [name])
+        self.unmatched_label = unmatched_label
+        
+    @property
+    def key(self) -> str:
+        """Integer transaction key column."""
+        return self.key_columns[0]
+        
+    @property
+    def check_columns(self) -> List[str]:
+        """Identity columns a match must agree on with the base source."""
+        return self.key_columns[1:]
+        
+    @property
+    def schema(self) -> Dict[str, str]:
+        """Kinds of the key columns and merged columns of the parsed frame."""
+        return {col: self.dtypes[col] for col in dict.fromkeys(self.key_columns + self.columns)}
+        
+    @property
+    def event_time_column(self) -> str:
+        """Timestamp of the first stage, used as the event time."""
+        return self.stages[0][1]
+        
+    def split_result(self, result: Any) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+        """
+        Separate a parse result into the joinable frame and unmatched events.
+        
+        Args:
+            result (Any): Output of parse or of one stream step
+            
+        Returns:
+            Tuple[pd.DataFrame, Optional[pd.DataFrame]]: Parsed frame and unmatched
+                events, if any
+        """
+        if isinstance(result, tuple):
+            return result[0], result[1]
+        return result, None
+
+
+class SourceRegistry:
+    """
+    Ordered set of log sources.
+    
+    The first source registered is the base: every merged row is one of its
+    rows, and the other sources are joined onto it by transaction key. The
+    order of registration is also the order of the flow stages.
+    """
+    
+    def __init__(self, e2e_sources: Tuple[str, str] = ('secucheck', 'corebank')):
+        """
+        Initialize the registry.
+        
+        Args:
+            e2e_sources (Tuple[str, str]): Sources whose first and last stage bound the
+                end-to-end latency; a flow is complete when both are present
+        """
+        self._sources: Dict[str, LogSource] = {}
+        self.e2e_sources = e2e_sources
+        
+    def register(self, source: LogSource) -> LogSource:
+        """
+        Add a source.
+        
+        Args:
+            source (LogSource): Source declaration
+            
+        Returns:
+            LogSource: The registered source
+        """
+        if source.name in self._sources:
+            raise ValueError(f"Source already registered: {source.name}")
+        if self._sources and source.key != self.base.key:
+            raise ValueError(f"Source {source.name} is keyed on {source.key}, not {self.base.key}")
+            
+        taken = {col: name for name, other in self._sources.items() for col in other.columns}
+        clashes = [col for col in source.columns if col in taken and col not in source.key_columns]
+        if clashes:
+            raise ValueError(f"Columns of {source.name} already provided by other sources: {clashes}")
+            
+        self._sources[source.name] = source
+        return source
+        
+    def __getitem__(self, name: str) -> LogSource:
+        return self._sources[name]
+        
+    def __contains__(self, name: str) -> bool:
+        return name in self._sources
+        
+    def __iter__(self) -> Iterator[LogSource]:
+        return iter(self._sources.values())
+        
+    def __len__(self) -> int:
+        return len(self._sources)
+        
+    @property
+    def base(self) -> LogSource:
+        """Source every merged row comes from."""
+        return next(iter(self._sources.values()))
+        
+    @property
+    def joined(self) -> List[LogSource]:
+        """Sources joined onto the base."""
+        return list(self._sources.values())[1:]
+        
+    def join_columns(self) -> Dict[str, str]:
+        """
+        Source of each joined column.
+        
+        Returns:
+            Dict[str, str]: Column name to source name; identity columns come from the base
+        """
+        columns = {}
+        for source in self:
+            for col in source.columns:
+                columns.setdefault(col, source.name)
+        return columns
+        
+    def stages(self) -> List[str]:
+        """
+        Flow stages of every source, in order.
+        
+        Returns:
+            List[str]: Stage names
+        """
+        return [stage for source in self for stage, _ in source.stages]
+        
+    def flags(self) -> List[str]:
+        """
+        Per-source presence flags of the merged data.
+        
+        Returns:
+            List[str]: Flag column names
+        """
+        return [source.flag for source in self]
+        
+    def merged_columns(self, layout: Sequence[str]) -> List[str]:
+        """
+        Columns of the merged data.
+        
+        Args:
+            layout (Sequence[str]): Preferred order of known columns
+            
+        Returns:
+            List[str]: Columns in the layout that are provided, then columns of other
+                sources, then the presence flags and completion percentage
+        """
+        provided = set(self.join_columns()) | {'e2e_latency'}
+        ordered = [col for col in layout if col in provided]
+        extra = [col for col in self.join_columns() if col not in ordered]
+        return ordered + extra + self.flags() + ['completion_pct']
+        
+    def merged_schema(self, layout: Sequence[str]) -> Dict[str, str]:
+        """
+        Column kinds of the merged data.
+        
+        Args:
+            layout (Sequence[str]): Preferred order of known columns
+            
+        Returns:
+            Dict[str, str]: Kind of each merged column, in merged_columns order;
+                flags are bool, latencies and completion percentage float
+        """
+        kinds = {col: self[name].dtypes[col] for col, name in self.join_columns().items()}
+        kinds['e2e_latency'] = 'float'
+        kinds.update({flag: 'bool' for flag in self.flags()})
+        kinds['completion_pct'] = 'float'
+        return {col: kinds[col] for col in self.merged_columns(layout)}
+
+
+def default_registry() -> SourceRegistry:
+    """
+    Build the registry of the built-in sources.
+    
+    Returns:
+        SourceRegistry: Security checks (base), middleware flow and core banking
+    """
+    registry = SourceRegistry()
+    registry.register(LogSource(
+        name='secucheck',
+        parse=_parse_secucheck,
+        stream=_stream_secucheck,
+        event_reader=_secucheck_events,
+        columns=[
+            'transaction_id', 'txn_key', 'timestamp_secu', 'validation_result', 'failure_reason',
+            'verifications', 'user_id', 'ip_address', 'module'
+        ],
+        dtypes={
+            'transaction_id': 'string', 'timestamp_secu': 'datetime', 'validation_result': 'category',
+            'failure_reason': 'category', 'verifications': 'string'
+        },
+        stages=[('SECURITY_CHECK', 'timestamp_secu')],
+        flag='has_security_check',
+        label='security check'
+    ))
+    registry.register(LogSource(
+        name='midflow',
+        parse=_parse_midflow,
+        stream=_stream_midflow,
+        event_reader=_midflow_events,
+        columns=['start_time', 'end_time', 'operation', 'service_latency', 'total_latency'],
+        dtypes={
+            'start_time': 'datetime', 'end_time': 'datetime', 'operation': 'category',
+            'service_latency': 'float', 'total_latency': 'float'
+        },
+        stages=[('MIDDLEWARE_REQUEST', 'start_time'), ('MIDDLEWARE_RESPONSE', 'end_time')],
+        flag='has_middleware_flow',
+        label='middleware flow',
+        presence_column='service_latency',
+        cache_entries=['midflow', 'midflow_orphans'],
+        unmatched_label='Middleware requests without response'
+    ))
+    registry.register(LogSource(
+        name='corebank',
+        parse=_parse_corebank,
+        stream=_stream_corebank,
+        event_reader=_corebank_events,
+        columns=['timestamp_core', 'status', 'amount', 'account_type'],
+        dtypes={'timestamp_core': 'datetime', 'status': 'category', 'amount': 'float', 'account_type': 'category'},
+        stages=[('CORE_BANKING', 'timestamp_core')],
+        flag='has_core_banking',
+        label='core banking'
+    ))
+    return registry
+
+
+# Sources used unless a registry is passed explicitly
+SOURCES = default_registry()
@@ -0,0 +1,138 @@
+"""
+On-disk hash partitions of log sources for merges larger than memory.
+"""
+from typing import Dict, List
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from .categories import concat_frames
+from .columnar import read_frame, write_frame
+
+logger = setup_logger('spill')
+
+
+class PartitionSpill:
+    """
+    Log source rows spilled to disk in buckets by a hash of the transaction key.
+    
+    Rows with the same key always land in the same bucket, so a bucket of
+    every source can be joined on its own. Rows are buffered in memory per
+    bucket and written as columnar parts once the buffers reach `flush_bytes`;
+    parts keep the order in which rows were added.
+    """
+    
+    # Fibonacci hashing multiplier: spreads sequential keys evenly over buckets
+    HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+    
+    def __init__(self, spill_dir: str, num_buckets: int, flush_bytes: int, key: str = 'txn_key'):
+        """
+        Initialize the spill.
+        
+        Args:
+            spill_dir (str): Directory under which a private directory for the bucket
+                files is created; only that one is removed by cleanup
+            num_buckets (int): Number of hash buckets
+            flush_bytes (int): Buffered bytes above which buckets are written to disk
+            key (str): Integer transaction key column
+        """
+        # Private to this spill, so cleanup never touches other files under spill_dir
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = tempfile.mkdtemp(prefix='spill-', dir=spill_dir)
+        self.num_buckets = num_buckets
+        self.flush_bytes = flush_bytes
+        self.key = key
+        
+        self._buffers: Dict[str, List[List[pd.DataFrame]]] = {}
+        self._buffered_bytes = 0
+        self._parts: Dict[str, List[List[str]]] = {}
+        self._empty: Dict[str, pd.DataFrame] = {}
+        
+        # Estimated in-memory bytes of each bucket, all sources together
+        self.bucket_bytes = np.zeros(num_buckets, dtype=np.int64)
+        
+    def bucket_of(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Compute the bucket of each transaction key.
+        
+        Args:
+            keys (np.ndarray): int64 transaction keys
+            
+        Returns:
+            np.ndarray: Bucket number of each key
+        """
+        mixed = np.asarray(keys, dtype=np.int64).view(np.uint64) * self.HASH_MULTIPLIER
+        return ((mixed >> np.uint64(32)) % np.uint64(self.num_buckets)).astype(np.int64)
+        
+    def add(self, source: str, df: pd.DataFrame) -> None:
+        """
+        Partition rows of a source into buckets.
+        
+        Args:
+            source (str): Source name
+            df (pd.DataFrame): Rows with the transaction key column
+        """
+        if source not in self._buffers:
+            self._buffers[source] = [[] for _ in range(self.num_buckets)]
+            self._parts[source] = [[] for _ in range(self.num_buckets)]
+        if df.empty:
+            self._empty.setdefault(source, df.iloc[:0])
+            return
+        self._empty[source] = df.iloc[:0]
+        
+        buckets = self.bucket_of(df[self.key].to_numpy())
+        order = np.argsort(buckets, kind='stable')
+        bounds = np.searchsorted(buckets[order], np.arange(self.num_buckets + 1))
+        
+        row_bytes = df.memory_usage(index=False, deep=True).sum() / len(df)
+        for bucket in np.flatnonzero(np.diff(bounds)):
+            rows = order[bounds[bucket]:bounds[bucket + 1]]
+            self._buffers[source][bucket].append(df.iloc[rows])
+            self.bucket_bytes[bucket] += int(row_bytes * len(rows))
+            
+        self._buffered_bytes += int(row_bytes * len(df))
+        if self._buffered_bytes >= self.flush_bytes:
+            self.flush()
+            
+    def flush(self) -> None:
+        """Write every buffered bucket to disk as one part per source and bucket."""
+        for source, buffers in self._buffers.items():
+            source_dir = os.path.join(self.spill_dir, source)
+            os.makedirs(source_dir, exist_ok=True)
+            for bucket, frames in enumerate(buffers):
+                if not frames:
+                    continue
+                parts = self._parts[source][bucket]
+                path = os.path.join(source_dir, f"{bucket:05d}.{len(parts)}.npz")
+                write_frame(path, concat_frames(frames))
+                parts.append(path)
+                buffers[bucket] = []
+        self._buffered_bytes = 0
+        
+    def load(self, source: str, bucket: int) -> pd.DataFrame:
+        """
+        Load the rows of a source that fell into a bucket.
+        
+        Args:
+            source (str): Source name
+            bucket (int): Bucket number
+            
+        Returns:
+            pd.DataFrame: Rows in the order they were added, or an empty frame with
+                the source columns (if known) when none were
+        """
+        if source not in self._parts:
+            return pd.DataFrame()
+        frames = [read_frame(path) for path in self._parts[source][bucket]]
+        frames.extend(self._buffers[source][bucket])
+        if not frames:
+            return self._empty[source]
+        return concat_frames(frames)
+        
+    def cleanup(self) -> None:
+        """Delete the bucket files of this spill and their private directory."""
+        shutil.rmtree(self.spill_dir, ignore_errors=True)
+        logger.info(f"Removed spill files in {self.spill_dir}")
@@ -0,0 +1,223 @@
+"""
+Event-time streaming merger emitting transactions as soon as their stages arrive.
+"""
+from typing import Any, Callable, Dict, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from utils.config import STREAM_WATERMARK_DELAY
+from .categories import concat_frames
+from .events import Event
+from .merger import MERGED_LAYOUT, join_sources
+from .schema import empty_frame, validate_frame
+from .sort_merge import SortMergeJoin
+from .sources import SOURCES, SourceRegistry
+
+logger = setup_logger('streaming_merger')
+
+
+class StreamingMerger:
+    """
+    Streaming counterpart of LogMerger.
+    
+    Parsed events of the registered sources are pushed in micro-batches, in
+    any interleaving. Each source's rows wait in a state table until their
+    transaction has been seen by every source (for the built-in ones, a
+    security check, a middleware pair and a core banking line), at which
+    point the merged record is emitted. The watermark trails the newest event
+    time seen by `watermark_delay`; base rows older than the watermark are
+    emitted as they are, with the has_* flags and completion_pct showing the
+    missing stages. Rows of other sources older than the watermark that never
+    met a base row are dropped, as merge_logs drops them, so state only holds
+    events newer than the watermark. Event times are the first stage
+    timestamp each source declares.
+    """
+    
+    def __init__(self, watermark_delay: float = STREAM_WATERMARK_DELAY, registry: SourceRegistry = SOURCES):
+        """
+        Initialize the merger.
+        
+        Args:
+            watermark_delay (float): Seconds an event may lag behind the newest
+                event time before its transaction is emitted or dropped
+            registry (SourceRegistry): Sources to merge; the built-in three by default
+        """
+        self.watermark_delay = pd.Timedelta(seconds=watermark_delay)
+        self.registry = registry
+        self.joiner = SortMergeJoin(key=registry.base.key, check_columns=registry.base.check_columns)
+        
+        # Pending rows of each source, waiting for the other stages
+        self._state: Dict[str, Optional[pd.DataFrame]] = {source.name: None for source in registry}
+        
+        # Event readers of the sources fed event records, made on first use
+        self._readers: Dict[str, Callable[[Sequence[Event]], Any]] = {}
+        
+        self._newest: Optional[pd.Timestamp] = None
+        self.watermark: Optional[pd.Timestamp] = None
+        
+        self.counts = {'complete': 0, 'expired': 0, 'dropped': 0}
+        
+    def pending(self) -> Dict[str, int]:
+        """
+        Count rows held in state.
+        
+        Returns:
+            Dict[str, int]: Pending rows by source
+        """
+        return {name: 0 if df is None else len(df) for name, df in self._state.items()}
+        
+    def process(self, source: str, events: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add a micro-batch of parsed events and emit the transactions it settles.
+        
+        Args:
+            source (str): Registered source name, e.g. 'secucheck', 'midflow' or 'corebank'
+            events (pd.DataFrame): Parser output for the batch, middleware as
+                request-response pairs
+                
+        Returns:
+            pd.DataFrame: Merged records, with the columns of merge_logs
+            
+        Raises:
+            SchemaError: If the events do not have the columns and kinds the source declares
+        """
+        try:
+            if source not in self.registry:
+                raise ValueError(f"Unknown source: {source}")
+                
+            if not events.empty:
+                validate_frame(events, self.registry[source].schema, f"{source} events")
+                state = self._state[source]
+                self._state[source] = events if state is None else concat_frames([state, events])
+                
+                newest = events[self.registry[source].event_time_column].max()
+                if pd.notna(newest) and (self._newest is None or newest > self._newest):
+                    self._newest = newest
+                    self.watermark = newest - self.watermark_delay
+                    
+            return self._emit(final=False)
+            
+        except Exception as e:
+            logger.error(f"Error processing {source} events: {str(e)}")
+            raise
+            
+    def process_events(self, source: str, events: Sequence[Event]) -> pd.DataFrame:
+        """
+        Add a micro-batch of event records and emit the transactions it settles.
+        
+        The records are turned into columns by the source's event reader;
+        middleware requests wait there for their response, and only
+        request-response pairs reach the merge.
+        
+        Args:
+            source (str): Registered source name, e.g. 'secucheck', 'midflow' or 'corebank'
+            events (Sequence[Event]): Records of the source, e.g. from parse_line
+                
+        Returns:
+            pd.DataFrame: Merged records, with the columns of merge_logs
+        """
+        try:
+            if source not in self.registry:
+                raise ValueError(f"Unknown source: {source}")
+            declared = self.registry[source]
+            if declared.event_reader is None:
+                raise ValueError(f"Source {source} has no event reader")
+                
+            if source not in self._readers:
+                self._readers[source] = declared.event_reader()
+            frame, _ = declared.split_result(self._readers[source](events))
+            return self.process(source, frame)
+            
+        except Exception as e:
+            logger.error(f"Error processing {source} event records: {str(e)}")
+            raise
+            
+    def flush(self) -> pd.DataFrame:
+        """
+        Emit every pending transaction, e.g. at shutdown.
+        
+        Returns:
+            pd.DataFrame: Merged records, with the columns of merge_logs
+        """
+        return self._emit(final=True)
+        
+    def _emit(self, final: bool) -> pd.DataFrame:
+        """
+        Emit complete and expired transactions and evict their rows from state.
+        
+        Args:
+            final (bool): Emit everything pending regardless of the watermark
+            
+        Returns:
+            pd.DataFrame: Merged records
+        """
+        base = self.registry.base
+        base_df = self._state[base.name]
+        emitted = empty_frame(self.registry.merged_schema(MERGED_LAYOUT))
+        ready_keys = np.empty(0, dtype=np.int64)
+        
+        if base_df is not None and not base_df.empty:
+            keys = base_df[base.key].to_numpy()
+            complete = np.ones(len(base_df), dtype=bool)
+            for source in self.registry.joined:
+                other = self._state[source.name]
+                if other is None:
+                    complete[:] = False
+                else:
+                    complete &= np.isin(keys, other[source.key].to_numpy())
+                    
+            ready = complete.copy()
+            if final:
+                ready[:] = True
+            elif self.watermark is not None:
+                ready |= (base_df[base.event_time_column] < self.watermark).to_numpy()
+                
+            if ready.any():
+                ready_keys = np.unique(keys[ready])
+                frames = {base.name: base_df[np.isin(keys, ready_keys)]}
+                for source in self.registry.joined:
+                    frames[source.name] = self._select(source.name, ready_keys)
+                emitted, _ = join_sources(self.joiner, frames, self.registry)
+                settled = int((emitted['completion_pct'] == 100).sum())
+                self.counts['complete'] += settled
+                self.counts['expired'] += len(emitted) - settled
+                self._state[base.name] = base_df[~np.isin(keys, ready_keys)].reset_index(drop=True)
+                
+        self._evict(ready_keys, final)
+        return emitted.reset_index(drop=True)
+        
+    def _select(self, source: str, keys: np.ndarray) -> pd.DataFrame:
+        """Rows of a source's state with the given transaction keys, possibly none."""
+        declared = self.registry[source]
+        state = self._state[source]
+        if state is None:
+            # Source not seen yet: an empty frame, as merge_logs gets from an empty file
+            return empty_frame(declared.schema)
+        return state[np.isin(state[declared.key].to_numpy(), keys)]
+        
+    def _evict(self, emitted_keys: np.ndarray, final: bool) -> None:
+        """
+        Remove emitted transactions and expired rows from the state of the joined sources.
+        
+        Args:
+            emitted_keys (np.ndarray): Keys of the transactions just emitted
+            final (bool): Drop every pending row
+        """
+        for source in self.registry.joined:
+            name = source.name
+            state = self._state[name]
+            if state is None or state.empty:
+                continue
+            keep = ~np.isin(state[source.key].to_numpy(), emitted_keys)
+            if final:
+                expired = keep.copy()
+            elif self.watermark is not None:
+                expired = keep & (state[source.event_time_column] < self.watermark).to_numpy()
+            else:
+                expired = np.zeros(len(state), dtype=bool)
+                
+            if expired.any():
+                self.counts['dropped'] += int(expired.sum())
+                logger.debug(f"{name}: dropped {int(expired.sum())} rows without a {self.registry.base.name} row")
+            self._state[name] = state[keep & ~expired].reset_index(drop=True)
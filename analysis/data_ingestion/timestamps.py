@@ -0,0 +1,111 @@
+"""
+Log timestamps: parsed once at ingestion, then handled as int64 UTC epoch nanoseconds.
+
+Parsed timestamp columns are datetime64[ns], whose values are int64
+nanoseconds since the epoch. The helpers here work on those integers
+directly, so latencies and flow timings need no per-row Timestamp objects,
+and strings are only built in bulk for output.
+"""
+from typing import Iterable, Union
+import numpy as np
+import pandas as pd
+
+# Layout of the timestamps of every log source, e.g. 2025-05-13 08:00:00 (UTC)
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Integer value of missing timestamps (NaT)
+NAT = np.iinfo(np.int64).min
+
+NANOS_PER_SECOND = 1_000_000_000
+
+
+def parse_timestamps(values: Union[pd.Series, Iterable[str]], errors: str = 'raise') -> Union[pd.Series, pd.DatetimeIndex]:
+    """
+    Parse log timestamps with the known layout instead of inferring it.
+    
+    Args:
+        values (Union[pd.Series, Iterable[str]]): Timestamp strings in TIMESTAMP_FORMAT
+        errors (str): 'raise' on malformed values, or 'coerce' to NaT
+        
+    Returns:
+        Union[pd.Series, pd.DatetimeIndex]: datetime64[ns] values, a Series for a Series
+    """
+    return pd.to_datetime(values, format=TIMESTAMP_FORMAT, errors=errors)
+
+
+def epoch_nanos(timestamps: pd.Series) -> np.ndarray:
+    """
+    Epoch nanoseconds of a timestamp column, without copying.
+    
+    Args:
+        timestamps (pd.Series): datetime64[ns] column, naive (UTC) or with a time zone
+        
+    Returns:
+        np.ndarray: int64 UTC epoch nanoseconds, NAT where missing
+    """
+    return timestamps.array.asi8
+
+
+def epoch_seconds(timestamps: pd.Series) -> np.ndarray:
+    """
+    Epoch seconds of a timestamp column, as Timestamp.timestamp gives them row by row.
+    
+    Values are the same for times with at most microsecond precision, such
+    as every log timestamp; finer times may differ in the last bits.
+    
+    Args:
+        timestamps (pd.Series): datetime64[ns] column
+        
+    Returns:
+        np.ndarray: float64 UTC epoch seconds (microsecond precision), NaN where missing
+    """
+    nanos = epoch_nanos(timestamps)
+    seconds = np.round(nanos / NANOS_PER_SECOND, 6)
+    seconds[nanos == NAT] = np.nan
+    return seconds
+
+
+def elapsed_seconds(start: pd.Series, end: pd.Series) -> np.ndarray:
+    """
+    Seconds between two timestamp columns, computed on their epoch integers.
+    
+    Args:
+        start (pd.Series): datetime64[ns] start times
+        end (pd.Series): datetime64[ns] end times
+        
+    Returns:
+        np.ndarray: float64 seconds from start to end, NaN where either is missing
+    """
+    start_nanos = epoch_nanos(start)
+    end_nanos = epoch_nanos(end)
+    seconds = (end_nanos - start_nanos) / NANOS_PER_SECOND
+    seconds[(start_nanos == NAT) | (end_nanos == NAT)] = np.nan
+    return seconds
+
+
+def format_timestamps(timestamps: pd.Series) -> np.ndarray:
+    """
+    Build ISO 8601 UTC strings for a whole column, e.g. for an API response.
+    
+    Strings match Timestamp.isoformat of the UTC time: 2025-05-13T08:00:00+00:00,
+    with fractional seconds only when there are any.
+    
+    Args:
+        timestamps (pd.Series): datetime64[ns] column
+        
+    Returns:
+        np.ndarray: Strings (object array), None where missing
+    """
+    nanos = epoch_nanos(timestamps)
+    values = nanos.view('datetime64[ns]')
+    strings = np.datetime_as_string(values, unit='s').astype(object)
+    
+    fraction = nanos % NANOS_PER_SECOND
+    for unit, precise in (('us', fraction % 1000 == 0), ('ns', fraction % 1000 != 0)):
+        rows = np.flatnonzero((fraction != 0) & precise)
+        if len(rows):
+            strings[rows] = np.datetime_as_string(values[rows], unit=unit).astype(object)
+            
+    strings = strings + '+00:00'
+    strings[nanos == NAT] = None
+    return strings
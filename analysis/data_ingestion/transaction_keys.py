@@ -0,0 +1,127 @@
+"""
+Encoding of transaction IDs as int64 keys for joins, indexes and lookups.
+"""
+from typing import Dict, Iterable, Union
+import hashlib
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+
+logger = setup_logger('transaction_keys')
+
+
+class TransactionKeyEncoder:
+    """
+    Encoder of transaction IDs to dense int64 keys.
+    
+    Well-formed IDs (`txn-` followed by 1 to 16 digits) are read as numbers:
+    the key holds the number in its low 56 bits and the digit count above
+    them, so `txn-0007` and `txn-7` stay distinct. Any other ID gets a
+    negative key from a 62-bit hash of the string. Keys are not decoded:
+    frames keep the `transaction_id` column for output. The encoder holds no
+    state, so keys do not depend on encoding order or process, and frames
+    encoded in different worker processes or read from the cache join
+    correctly.
+    """
+    
+    PREFIX = 'txn-'
+    MAX_DIGITS = 16
+    WIDTH_SHIFT = 56
+    
+    # IDs converted to a fixed-width character array at a time
+    BLOCK_SIZE = 1 << 20
+    
+    def _fallback_key(self, txn_id) -> int:
+        """
+        Build the key of an ID that is not well formed.
+        
+        Args:
+            txn_id: Transaction ID
+            
+        Returns:
+            int: Negative key derived from a hash of the ID
+        """
+        digest = hashlib.blake2b(str(txn_id).encode('utf-8'), digest_size=8).digest()
+        return -(int.from_bytes(digest, 'little') >> 2) - 1
+        
+    def _encode_block(self, values: np.ndarray) -> np.ndarray:
+        """
+        Encode a block of IDs.
+        
+        Args:
+            values (np.ndarray): Transaction IDs (object array)
+            
+        Returns:
+            np.ndarray: int64 keys
+        """
+        prefix_len = len(self.PREFIX)
+        width = prefix_len + self.MAX_DIGITS + 1
+        
+        # One row of UTF-32 code points per ID; longer IDs are cut but then
+        # show more than MAX_DIGITS digits and fall back
+        chars = np.asarray(values, dtype=f'U{width}').view(np.uint32).reshape(len(values), width)
+        
+        prefix = np.array([ord(c) for c in self.PREFIX], dtype=np.uint32)
+        digits = chars[:, prefix_len:]
+        is_digit = (digits >= ord('0')) & (digits <= ord('9'))
+        num_digits = is_digit.cumprod(axis=1).sum(axis=1)
+        
+        well_formed = (
+            (chars[:, :prefix_len] == prefix).all(axis=1)
+            & (num_digits >= 1)
+            & (num_digits <= self.MAX_DIGITS)
+            & (is_digit | (digits == 0)).all(axis=1)
+            & (is_digit.sum(axis=1) == num_digits)
+        )
+        
+        number = np.zeros(len(values), dtype=np.int64)
+        for j in range(self.MAX_DIGITS):
+            active = j < num_digits
+            number = np.where(active, number * 10 + (digits[:, j].astype(np.int64) - ord('0')), number)
+            
+        keys = number | (num_digits.astype(np.int64) << self.WIDTH_SHIFT)
+        
+        # Hash collisions are checked within the block only, so that memory
+        # does not grow with every ID ever encoded
+        fallback: Dict[int, str] = {}
+        for i in np.flatnonzero(~well_formed):
+            keys[i] = self._fallback_key(values[i])
+            known = fallback.setdefault(int(keys[i]), str(values[i]))
+            if known != str(values[i]):
+                raise ValueError(f"Transaction key collision between {known!r} and {values[i]!r}")
+                
+        return keys
+        
+    def encode(self, ids: Union[pd.Series, Iterable]) -> np.ndarray:
+        """
+        Encode transaction IDs.
+        
+        Args:
+            ids (Union[pd.Series, Iterable]): Transaction IDs
+            
+        Returns:
+            np.ndarray: int64 key of each ID
+        """
+        try:
+            values = np.asarray(ids, dtype=object)
+            keys = np.empty(len(values), dtype=np.int64)
+            for start in range(0, len(values), self.BLOCK_SIZE):
+                end = start + self.BLOCK_SIZE
+                keys[start:end] = self._encode_block(values[start:end])
+            return keys
+        except Exception as e:
+            logger.error(f"Error encoding transaction IDs: {str(e)}")
+            raise
+            
+    def encode_one(self, txn_id: str) -> int:
+        """
+        Encode a single transaction ID, e.g. for a lookup.
+        
+        Args:
+            txn_id (str): Transaction ID
+            
+        Returns:
+            int: Key of the ID
+        """
+        return int(self.encode([txn_id])[0])
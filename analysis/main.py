@@ -6,6 +6,7 @@ from datetime import datetime
 
 import pandas as pd
 
+from data_ingestion.cache import ParsedCache
 from data_ingestion.corebank_parser import CorebankParser
 from data_ingestion.merger import LogMerger
 from data_ingestion.midflow_parser import MidflowParser
@@ -14,6 +15,10 @@ from processing.anomaly_detector import AnomalyDetector
 from processing.flow_mapper import FlowMapper
 from processing.latency_analysis import LatencyAnalyzer
 from processing.normalizer import LogNormalizer
+from utils.config import (
+    SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS,
+    PARALLEL_PARSING, PARSE_SHARDS, PARSE_CACHE, PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES
+)
 from utils.logger import setup_logger
 
 logger = setup_logger('main')
@@ -34,9 +39,12 @@ def main():
         # 1. Unir logs
         logger.info("Uniendo logs...")
         merger = LogMerger(
-            secucheck_path='../source/logs_SecuCheck.json',
-            midflow_path='../source/logs_MidFlow_ESB.csv',
-            corebank_path='../source/logs_CoreBank.log'
+            secucheck_path=SECUCHECK_LOGS,
+            midflow_path=MIDFLOW_LOGS,
+            corebank_path=COREBANK_LOGS,
+            parallel=PARALLEL_PARSING,
+            num_shards=PARSE_SHARDS,
+            cache=ParsedCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES) if PARSE_CACHE else None
         )
         df = merger.merge_logs()
         
@@ -45,7 +53,8 @@ def main():
         normalizer = LogNormalizer()
         normalized_df = normalizer.normalize_dataframe(
             df,
-            numeric_cols=['service_latency', 'total_latency', 'e2e_latency', 'amount']
+            numeric_cols=['service_latency', 'total_latency', 'e2e_latency', 'amount'],
+            inplace=True
         )
         
         # 3. Análisis de latencias
@@ -61,8 +70,8 @@ def main():
         # Análisis por dimensión
         latency_by_module = latency_analyzer.analyze_by_dimension(
             normalized_df,
-            'e2e_latency',
-            'module'
+            'module',
+            'e2e_latency'
         )
         
         # Encontrar cuellos de botella
@@ -87,7 +96,7 @@ def main():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         
         # Guardar DataFrames
-        normalized_df.to_csv(
+        normalizer.format_ip(normalized_df).to_csv(
             os.path.join(output_dir, f"normalized_data_{timestamp}.csv"),
             index=False
         )
@@ -11,6 +11,7 @@ from datetime import datetime, timedelta
 
 from utils.logger import setup_logger
 from utils.config import LATENCY_THRESHOLD, ANOMALY_SCORE_THRESHOLD
+from data_ingestion.schema import validate_frame
 
 logger = setup_logger('anomaly_detector')
 
@@ -147,7 +148,7 @@ class AnomalyDetector:
             df = df.sort_values('timestamp_secu')
             
             # Group transactions by user
-            for user_id, user_df in df.groupby('user_id'):
+            for user_id, user_df in df.groupby('user_id', observed=True):
                 # Check transaction frequency
                 for i in range(len(user_df) - 1):
                     current = user_df.iloc[i]
@@ -207,6 +208,9 @@ class AnomalyDetector:
             Dict[str, pd.DataFrame]: Dictionary of anomaly results by type
         """
         try:
+            # Features must arrive as numbers, not objects to convert
+            validate_frame(df, {col: 'numeric' for col in latency_cols + pattern_features}, 'anomaly input', required=False)
+            
             results = {
                 'latency_anomalies': self.detect_latency_anomalies(df, latency_cols),
                 'pattern_anomalies': self.detect_pattern_anomalies(df, pattern_features),
@@ -3,9 +3,13 @@ Flow mapper for tracking transaction paths through the system.
 """
 from typing import Dict, List, Optional, Tuple
 import pandas as pd
+import numpy as np
 import networkx as nx
 from datetime import datetime
 
+from data_ingestion.sources import SOURCES, SourceRegistry
+from data_ingestion.timestamps import epoch_seconds
+from data_ingestion.transaction_keys import TransactionKeyEncoder
 from utils.logger import setup_logger
 
 logger = setup_logger('flow_mapper')
@@ -13,15 +17,19 @@ logger = setup_logger('flow_mapper')
 class FlowMapper:
     """Mapper for transaction flows through the system."""
     
-    def __init__(self):
-        """Initialize the flow mapper."""
-        # Define expected flow stages
-        self.stages = [
-            'SECURITY_CHECK',
-            'MIDDLEWARE_REQUEST',
-            'MIDDLEWARE_RESPONSE',
-            'CORE_BANKING'
-        ]
+    def __init__(self, registry: SourceRegistry = SOURCES):
+        """
+        Initialize the flow mapper.
+        
+        Args:
+            registry (SourceRegistry): Log sources whose stages make up the expected flow
+        """
+        self.registry = registry
+        
+        # Expected flow stages, in the order the sources declare them
+        self.stages = registry.stages()
+        
+        self.key_encoder = TransactionKeyEncoder()
         
     def create_flow_graph(self) -> nx.DiGraph:
         """
@@ -37,9 +45,8 @@ class FlowMapper:
             G.add_node(stage)
             
         # Add edges representing valid transitions
-        G.add_edge('SECURITY_CHECK', 'MIDDLEWARE_REQUEST')
-        G.add_edge('MIDDLEWARE_REQUEST', 'MIDDLEWARE_RESPONSE')
-        G.add_edge('MIDDLEWARE_RESPONSE', 'CORE_BANKING')
+        for stage, next_stage in zip(self.stages, self.stages[1:]):
+            G.add_edge(stage, next_stage)
         
         return G
         
@@ -59,48 +66,58 @@ class FlowMapper:
             Tuple[List[str], List[float]]: List of stages and their timestamps
         """
         try:
-            # Get transaction data
-            txn_df = df[df['transaction_id'] == transaction_id]
+            # Get transaction data, comparing integer keys when available
+            if 'txn_key' in df.columns:
+                txn_df = df[df['txn_key'] == self.key_encoder.encode_one(transaction_id)]
+                txn_df = txn_df[txn_df['transaction_id'] == transaction_id]
+            else:
+                txn_df = df[df['transaction_id'] == transaction_id]
             if txn_df.empty:
                 logger.warning(f"No data found for transaction {transaction_id}")
                 return [], []
                 
-            txn = txn_df.iloc[0]
+            return self.map_row_flow(txn_df.iloc[0])
+            
+        except Exception as e:
+            logger.error(f"Error mapping transaction flow: {str(e)}")
+            raise
+            
+    def map_row_flow(self, txn: pd.Series) -> Tuple[List[str], List[float]]:
+        """
+        Map the flow of a transaction from its merged row.
+        
+        Args:
+            txn (pd.Series): Merged log row of the transaction
             
+        Returns:
+            Tuple[List[str], List[float]]: List of stages and their timestamps
+        """
+        try:
             flow = []
             timestamps = []
             
-            # Check security stage
-            if pd.notna(txn.get('timestamp_secu')):
-                flow.append('SECURITY_CHECK')
-                timestamps.append(txn['timestamp_secu'].timestamp())
-                
-            # Check middleware stages
-            has_middleware = (
-                pd.notna(txn.get('service_latency')) and
-                pd.notna(txn.get('start_time')) and
-                pd.notna(txn.get('end_time'))
-            )
-            
-            if has_middleware:
-                # Add middleware stages in sequence
-                flow.extend(['MIDDLEWARE_REQUEST', 'MIDDLEWARE_RESPONSE'])
-                timestamps.extend([
-                    txn['start_time'].timestamp(),
-                    txn['end_time'].timestamp()
-                ])
-                
-            # Check core banking stage
-            if pd.notna(txn.get('timestamp_core')):
-                flow.append('CORE_BANKING')
-                timestamps.append(txn['timestamp_core'].timestamp())
-                
+            # A source contributes its stages when it matched and all their timestamps are set
+            for source in self.registry:
+                present = pd.notna(txn.get(source.presence_column)) and all(
+                    pd.notna(txn.get(column)) for _, column in source.stages
+                )
+                if present:
+                    for stage, column in source.stages:
+                        flow.append(stage)
+                        timestamps.append(txn[column].timestamp())
+                        
             return flow, timestamps
             
         except Exception as e:
             logger.error(f"Error mapping transaction flow: {str(e)}")
             raise
             
+    def _column_present(self, df: pd.DataFrame, column: str) -> np.ndarray:
+        """Whether each row has a value in a column (never, if the column is missing)."""
+        if column not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        return df[column].notna().to_numpy()
+        
     def analyze_flow_patterns(
         self,
         df: pd.DataFrame
@@ -117,36 +134,54 @@ class FlowMapper:
                 Dictionary with pattern statistics
         """
         try:
-            patterns = []
-            flow_counts = {}
-            
-            # Analyze each transaction
-            for _, txn in df.iterrows():
-                flow, timestamps = self.map_transaction_flow(df, txn['transaction_id'])
-                flow_path = '->'.join(flow)
-                
-                # Count unique flow patterns
-                flow_counts[flow_path] = flow_counts.get(flow_path, 0) + 1
-                
-                pattern = {
-                    'transaction_id': txn['transaction_id'],
-                    'flow_path': flow_path,
-                    'num_stages': len(flow),
-                    'is_complete': len(flow) == len(self.stages),
-                    'total_duration': max(timestamps) - min(timestamps) if timestamps else 0,
-                    'start_time': min(timestamps) if timestamps else None,
-                    'end_time': max(timestamps) if timestamps else None
-                }
-                
-                patterns.append(pattern)
+            # Which sources each transaction went through, as one bit per source,
+            # and the epoch seconds of the stages of those sources (NaN elsewhere)
+            sources_seen = np.zeros(len(df), dtype=np.int64)
+            stage_times = []
+            for bit, source in enumerate(self.registry):
+                present = self._column_present(df, source.presence_column)
+                seconds = []
+                for _, column in source.stages:
+                    present &= self._column_present(df, column)
+                    seconds.append(epoch_seconds(df[column]) if column in df.columns else np.full(len(df), np.nan))
+                sources_seen |= present.astype(np.int64) << bit
+                stage_times.extend(np.where(present, column_seconds, np.nan) for column_seconds in seconds)
                 
-            # Log flow pattern distribution
+            # Flow path and number of stages of each combination of sources
+            combinations, combination = np.unique(sources_seen, return_inverse=True)
+            paths = []
+            path_stages = []
+            for seen in combinations:
+                flow = [
+                    stage
+                    for bit, source in enumerate(self.registry) if seen >> bit & 1
+                    for stage, _ in source.stages
+                ]
+                paths.append('->'.join(flow))
+                path_stages.append(len(flow))
+            paths = np.array(paths, dtype=object)
+            num_stages = np.array(path_stages, dtype=np.int64)[combination]
+            
+            times = np.column_stack(stage_times) if stage_times else np.empty((len(df), 0))
+            start_times = np.fmin.reduce(times, axis=1) if times.shape[1] else np.full(len(df), np.nan)
+            end_times = np.fmax.reduce(times, axis=1) if times.shape[1] else np.full(len(df), np.nan)
+            
+            # Log flow pattern distribution, in order of first appearance
+            counts = np.bincount(combination, minlength=len(combinations))
             logger.info("Flow pattern distribution:")
-            for pattern, count in flow_counts.items():
-                logger.info(f"  {pattern}: {count} transactions")
+            for index in pd.unique(combination):
+                logger.info(f"  {paths[index]}: {counts[index]} transactions")
                 
             # Create patterns dataframe
-            patterns_df = pd.DataFrame(patterns)
+            patterns_df = pd.DataFrame({
+                'transaction_id': df['transaction_id'].to_numpy(),
+                'flow_path': paths[combination],
+                'num_stages': num_stages,
+                'is_complete': num_stages == len(self.stages),
+                'total_duration': np.where(num_stages > 0, end_times - start_times, 0.0),
+                'start_time': start_times,
+                'end_time': end_times
+            })
             
             # Calculate statistics
             stats = {
@@ -0,0 +1,148 @@
+"""
+Grouped latency statistics computed in one pass over one sorted buffer.
+"""
+from typing import List, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+# Combined group codes are renumbered before they would pass this bound
+MAX_GROUP_CODE = 2 ** 62
+
+
+def percentile_name(percentile: float) -> str:
+    """Column name of a percentile, e.g. p95 or p99.9."""
+    return f"p{percentile:g}"
+
+
+def _factorize(values: pd.Series) -> Tuple[np.ndarray, pd.Index]:
+    """
+    Encode a key column as integer codes in the order groupby sorts keys.
+    
+    Args:
+        values (pd.Series): Key column
+        
+    Returns:
+        Tuple[np.ndarray, pd.Index]:
+            Code of each row (-1 where missing) and the key of each code
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Category codes already follow the category order
+        dtype = values.dtype
+        uniques = pd.CategoricalIndex(pd.Categorical.from_codes(np.arange(len(dtype.categories)), dtype=dtype))
+        return values.cat.codes.to_numpy(dtype=np.int64), uniques
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int64, copy=False), pd.Index(uniques)
+
+
+def _combine(key_codes: List[np.ndarray], sizes: List[int]) -> np.ndarray:
+    """
+    Combine the codes of several key columns into one code per row.
+    
+    Codes are combined in mixed radix, so combined codes sort like the key
+    tuples. When the radix would overflow, the combinations seen so far are
+    renumbered in order first.
+    
+    Args:
+        key_codes (List[np.ndarray]): Non-negative codes of each key column
+        sizes (List[int]): Number of distinct codes of each key column
+        
+    Returns:
+        np.ndarray: int64 group code of each row
+    """
+    codes = key_codes[0].copy()
+    bound = sizes[0]
+    for column_codes, size in zip(key_codes[1:], sizes[1:]):
+        if bound * size >= MAX_GROUP_CODE:
+            seen, codes = np.unique(codes, return_inverse=True)
+            bound = len(seen)
+        codes = codes * size + column_codes
+        bound *= size
+    return codes
+
+
+def grouped_stats(
+    df: pd.DataFrame,
+    dimensions: Sequence[str],
+    value_col: str,
+    percentiles: Sequence[float] = (95, 99)
+) -> pd.DataFrame:
+    """
+    Compute mean, median, std, min, max, percentiles and count of a column by group.
+    
+    The keys are factorized once and the rows sorted by group and value;
+    every statistic is then read from the same sorted buffer, instead of
+    grouping the data again for each one. Results match pandas groupby:
+    groups are sorted by key, rows with a missing key or value are left out,
+    std has one degree of freedom and percentiles interpolate linearly.
+    
+    Args:
+        df (pd.DataFrame): Input data
+        dimensions (Sequence[str]): Key columns, e.g. ['module', 'operation', 'status']
+        value_col (str): Numeric column to summarize
+        percentiles (Sequence[float]): Percentiles between 0 and 100, e.g. (95, 99)
+        
+    Returns:
+        pd.DataFrame: One row per group seen, indexed by the keys (a MultiIndex
+            for several dimensions), with columns mean, median, std, min, max,
+            one per percentile (p95, p99, ...) and count
+    """
+    dimensions = list(dimensions)
+    factorized = [_factorize(df[dimension]) for dimension in dimensions]
+    values = df[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    
+    valid = ~np.isnan(values)
+    for codes, _ in factorized:
+        valid &= codes >= 0
+    rows = np.flatnonzero(valid)
+    key_codes = [codes[rows] for codes, _ in factorized]
+    values = values[rows]
+    
+    # Sort by value, then stably by group: values end up in order within each
+    # group. Narrow group codes take NumPy's radix sort.
+    group = _combine(key_codes, [max(len(uniques), 1) for _, uniques in factorized])
+    order = np.argsort(values)
+    group = group[order]
+    if len(group):
+        group = group.astype(np.min_scalar_type(group.max()), copy=False)
+    by_group = np.argsort(group, kind='stable')
+    order = order[by_group]
+    group = group[by_group]
+    values = values[order]
+    
+    n = len(values)
+    starts = np.flatnonzero(np.diff(group.astype(np.int64), prepend=-1)) if n else np.empty(0, dtype=np.int64)
+    counts = np.diff(np.append(starts, n))
+    last = starts + counts - 1
+    
+    stats = {}
+    if n:
+        stats['mean'] = np.add.reduceat(values, starts) / counts
+        deviations = values - np.repeat(stats['mean'], counts)
+        squares = np.add.reduceat(deviations * deviations, starts)
+    else:
+        stats['mean'] = squares = np.empty(0)
+        
+    lower = starts + (counts - 1) // 2
+    stats['median'] = (values[lower] + values[starts + counts // 2]) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        stats['std'] = np.where(counts > 1, np.sqrt(squares / (counts - 1)), np.nan)
+    stats['min'] = values[starts]
+    stats['max'] = values[last]
+    
+    for percentile in percentiles:
+        position = starts + (counts - 1) * (percentile / 100)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, last)
+        fraction = position - below
+        stats[percentile_name(percentile)] = values[below] + (values[above] - values[below]) * fraction
+        
+    stats['count'] = counts.astype(np.int64)
+    
+    # Keys of each group, read from its first row
+    first_rows = order[starts]
+    levels = [
+        uniques.take(codes[first_rows]).rename(dimension)
+        for dimension, codes, (_, uniques) in zip(dimensions, key_codes, factorized)
+    ]
+    index = levels[0] if len(levels) == 1 else pd.MultiIndex.from_arrays(levels, names=dimensions)
+    return pd.DataFrame(stats, index=index)
@@ -0,0 +1,183 @@
+"""
+Encoding of IP addresses as uint32 (IPv4) and packed 16-byte (IPv6) values.
+"""
+from typing import Iterable, Optional, Tuple, Union
+import ipaddress
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+
+logger = setup_logger('ip_addresses')
+
+
+class IPAddressEncoder:
+    """
+    Encoder of IP address strings to compact numeric values.
+    
+    Dotted quads are parsed in bulk into uint32 values; leading zeros are
+    dropped as they were by the string normalization (`010.0.0.1` is
+    `10.0.0.1`). The few values that are not plain dotted quads (IPv6,
+    surrounding spaces) are parsed one by one with the ipaddress module;
+    IPv6 addresses are kept apart as packed 16-byte values. Canonical
+    strings are rebuilt only for output, once per distinct address.
+    """
+    
+    # Values parsed as one text buffer at a time
+    BLOCK_SIZE = 1 << 16
+    
+    # Dotted form of every 16-bit half of an address, e.g. '192.168'
+    HALVES = np.array([f"{high}.{low}" for high in range(256) for low in range(256)], dtype=object)
+    
+    def _encode_block(self, values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Parse a block of dotted quads.
+        
+        The block is joined into one line-separated byte buffer. Rows with
+        exactly three dots and only digits in between are dotted quads; each
+        octet is read from the up to three digits before its closing dot.
+        
+        Args:
+            values (np.ndarray): IP address strings (object array)
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]:
+                uint32 addresses and whether each value was a dotted quad
+        """
+        n = len(values)
+        try:
+            text = '\n'.join(values) + '\n'
+        except TypeError:
+            # Missing or non-string values; missing ones become empty lines
+            text = '\n'.join(map(str, np.where(pd.isna(values), '', values))) + '\n'
+        buf = np.frombuffer(text.encode('utf-8'), dtype=np.uint8)
+        ends = np.flatnonzero(buf == ord('\n'))
+        is_dot = buf == ord('.')
+        dots = np.flatnonzero(is_dot)
+        if len(ends) != n or len(dots) < 3:
+            # Line breaks inside values, or no dotted quads at all
+            return np.zeros(n, dtype=np.uint32), np.zeros(n, dtype=bool)
+            
+        starts = np.empty(n, dtype=np.int64)
+        starts[0] = 0
+        starts[1:] = ends[:-1] + 1
+        
+        first_dot = np.searchsorted(dots, starts)
+        valid = np.diff(np.append(first_dot, len(dots))) == 3
+        
+        # Byte values wrap, so anything but a digit is above 9
+        digits = buf - np.uint8(ord('0'))
+        invalid_bytes = np.flatnonzero((digits > 9) & ~is_dot & (buf != ord('\n')))
+        valid[np.searchsorted(ends, invalid_bytes)] = False
+        
+        # Separator before and after each octet
+        first_dot = np.minimum(first_dot, len(dots) - 3)
+        separators = [starts - 1] + [dots[first_dot + k] for k in range(3)] + [ends]
+        
+        address = np.zeros(n, dtype=np.uint32)
+        for k in range(4):
+            close = separators[k + 1]
+            length = close - separators[k] - 1
+            valid &= (length >= 1) & (length <= 3)
+            
+            octet = np.zeros(n, dtype=np.uint32)
+            for place, scale in ((1, 1), (2, 10), (3, 100)):
+                digit = digits[np.maximum(close - place, 0)].astype(np.uint32)
+                octet += digit * np.uint32(scale) * (length >= place)
+            valid &= octet <= 255
+            address = (address << np.uint32(8)) | octet
+            
+        return address, valid
+        
+    def _encode_one(self, value) -> Union[ipaddress.IPv4Address, ipaddress.IPv6Address]:
+        """
+        Parse an address that is not a plain dotted quad.
+        
+        Args:
+            value: IP address
+            
+        Returns:
+            Union[ipaddress.IPv4Address, ipaddress.IPv6Address]: Parsed address
+        """
+        text = str(value).strip()
+        try:
+            return ipaddress.ip_address(text)
+        except ValueError:
+            pass
+        try:
+            # Octets with more than three digits, e.g. 0010.0.0.1
+            return ipaddress.IPv4Address('.'.join(str(int(part)) for part in text.split('.')))
+        except ValueError:
+            raise ValueError(f"Invalid IP address: {value!r}") from None
+            
+    def encode(self, ips: Union[pd.Series, Iterable]) -> Tuple[pd.arrays.IntegerArray, Optional[np.ndarray]]:
+        """
+        Encode IP addresses.
+        
+        Args:
+            ips (Union[pd.Series, Iterable]): IP address strings
+            
+        Returns:
+            Tuple[pd.arrays.IntegerArray, Optional[np.ndarray]]:
+                UInt32 IPv4 addresses (missing for IPv6 and missing values) and packed
+                16-byte IPv6 addresses (object array, None elsewhere), or None if there
+                are none
+        """
+        try:
+            values = np.asarray(ips, dtype=object)
+            v4 = np.empty(len(values), dtype=np.uint32)
+            parsed = np.empty(len(values), dtype=bool)
+            for start in range(0, len(values), self.BLOCK_SIZE):
+                end = start + self.BLOCK_SIZE
+                v4[start:end], parsed[start:end] = self._encode_block(values[start:end])
+                
+            missing = ~parsed
+            v6 = None
+            for i in np.flatnonzero(~parsed):
+                if pd.isna(values[i]):
+                    continue
+                address = self._encode_one(values[i])
+                if address.version == 4:
+                    v4[i] = int(address)
+                    missing[i] = False
+                else:
+                    if v6 is None:
+                        v6 = np.full(len(values), None, dtype=object)
+                    v6[i] = address.packed
+                    
+            return pd.arrays.IntegerArray(v4, missing), v6
+        except Exception as e:
+            logger.error(f"Error encoding IP addresses: {str(e)}")
+            raise
+            
+    def decode(
+        self,
+        v4: Union[pd.Series, pd.arrays.IntegerArray],
+        v6: Optional[Union[pd.Series, np.ndarray]] = None
+    ) -> np.ndarray:
+        """
+        Rebuild canonical address strings.
+        
+        Args:
+            v4 (Union[pd.Series, pd.arrays.IntegerArray]): UInt32 IPv4 addresses
+            v6 (Union[pd.Series, np.ndarray], optional): Packed IPv6 addresses
+            
+        Returns:
+            np.ndarray: Address strings (object array), None where both are missing
+        """
+        v4 = pd.array(v4, dtype='UInt32')
+        ips = np.full(len(v4), None, dtype=object)
+        
+        present = ~v4.isna()
+        codes, uniques = pd.factorize(v4[present].to_numpy(dtype=np.uint32))
+        uniques = np.asarray(uniques, dtype=np.uint32)
+        strings = self.HALVES[uniques >> np.uint32(16)] + '.'
+        strings += self.HALVES[uniques & np.uint32(0xFFFF)]
+        ips[present] = strings[codes]
+        
+        if v6 is not None:
+            packed = np.asarray(v6, dtype=object)
+            for i in np.flatnonzero(pd.notna(packed)):
+                ips[i] = ipaddress.IPv6Address(packed[i]).compressed
+                
+        return ips
@@ -1,18 +1,77 @@
 """
 Latency analysis for transaction processing times.
 """
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
 from utils.logger import setup_logger
+from data_ingestion.categories import concat_frames
+from data_ingestion.schema import validate_frame
+from .group_stats import grouped_stats, percentile_name
+from .latency_histogram import LatencyHistogram, group_histograms
+from .sliding_window import rolling_trends
 
 logger = setup_logger('latency_analysis')
 
+# Values sampled to place a cutoff below a high quantile before selecting it exactly
+TAIL_SAMPLE_SIZE = 65536
+
+def _upper_tail(values: np.ndarray, fraction: float) -> Tuple[float, np.ndarray]:
+    """
+    Quantile of a column and the positions of the values above it.
+    
+    The quantile interpolates linearly between order statistics, as pandas
+    quantile does. They are selected among the values above a cutoff placed
+    well below the quantile from a strided sample, so only the upper tail
+    is partitioned instead of the whole column; if the cutoff turns out
+    too high, the whole column is.
+    
+    Args:
+        values (np.ndarray): float64 column, NaN where missing
+        fraction (float): Fraction between 0 and 1, e.g. 0.95
+        
+    Returns:
+        Tuple[float, np.ndarray]: Quantile (NaN without values) and positions
+            of the values above it, in order
+    """
+    valid_count = len(values) - int(np.count_nonzero(np.isnan(values)))
+    if not valid_count:
+        return np.nan, np.empty(0, dtype=np.int64)
+    position = (valid_count - 1) * fraction
+    lower = min(int(np.floor(position)), valid_count - 1)
+    upper = min(lower + 1, valid_count - 1)
+    weight = position - lower
+    
+    candidates, below = None, 0
+    step = len(values) // TAIL_SAMPLE_SIZE
+    if step > 1:
+        sample = values[::step]
+        sample = sample[~np.isnan(sample)]
+        # Five standard errors of the sample quantile's rank below the quantile
+        margin = 5 * np.sqrt(fraction * (1 - fraction) / max(len(sample), 1)) + 1 / max(len(sample), 1)
+        if len(sample) and fraction - margin > 0:
+            candidates = np.flatnonzero(values > np.quantile(sample, fraction - margin))
+            below = valid_count - len(candidates)
+            if below > lower:
+                candidates, below = None, 0
+    if candidates is None:
+        candidates = np.flatnonzero(~np.isnan(values))
+        
+    tail = values[candidates]
+    ranks = [lower - below, upper - below]
+    low, high = np.partition(tail, ranks)[ranks]
+    gap = high - low
+    threshold = float(high - gap * (1 - weight) if weight >= 0.5 else low + gap * weight)
+    return threshold, candidates[tail > threshold]
+
 class LatencyAnalyzer:
     """Analyzer for transaction processing latencies."""
     
+    # Stage of each latency column checked for bottlenecks
+    BOTTLENECK_STAGES = [('MIDDLEWARE', 'service_latency'), ('END_TO_END', 'e2e_latency')]
+    
     def __init__(self):
         """Initialize the latency analyzer."""
         pass
@@ -20,7 +79,8 @@ class LatencyAnalyzer:
     def calculate_basic_stats(
         self,
         df: pd.DataFrame,
-        latency_cols: List[str]
+        latency_cols: List[str],
+        exact: bool = True
     ) -> Dict[str, Dict[str, float]]:
         """
         Calculate basic latency statistics.
@@ -28,11 +88,17 @@ class LatencyAnalyzer:
         Args:
             df (pd.DataFrame): Input dataframe
             latency_cols (List[str]): List of latency column names
+            exact (bool): Whether to compute percentiles from the sorted values;
+                if False they are read from latency histograms (see
+                histogram_stats), which also report p50, p90 and p99.9
             
         Returns:
             Dict[str, Dict[str, float]]: Statistics by latency type
         """
         try:
+            if not exact:
+                return self.histogram_stats(self.build_histograms(df, latency_cols))
+                
             stats = {}
             
             for col in latency_cols:
@@ -53,50 +119,128 @@ class LatencyAnalyzer:
             logger.error(f"Error calculating latency stats: {str(e)}")
             raise
             
+    def build_histograms(
+        self,
+        df: pd.DataFrame,
+        latency_cols: List[str]
+    ) -> Dict[str, LatencyHistogram]:
+        """
+        Build a latency histogram of each latency column.
+        
+        Histograms of different partitions or time windows can be merged,
+        subtracted and serialized before statistics are read from them.
+        
+        Args:
+            df (pd.DataFrame): Input dataframe
+            latency_cols (List[str]): List of latency column names
+            
+        Returns:
+            Dict[str, LatencyHistogram]: Histogram by latency type
+        """
+        try:
+            validate_frame(df, {col: 'numeric' for col in latency_cols if col in df.columns}, 'latency input')
+            return {
+                col: LatencyHistogram().update(df[col])
+                for col in latency_cols
+                if col in df.columns
+            }
+            
+        except Exception as e:
+            logger.error(f"Error building latency histograms: {str(e)}")
+            raise
+            
+    def _histogram_summary(
+        self,
+        histogram: LatencyHistogram,
+        percentiles: Sequence[float]
+    ) -> Dict[str, float]:
+        """Mean, median, std, min, max and percentiles of a histogram (NaN when empty)."""
+        return {
+            'mean': histogram.mean(),
+            'median': histogram.quantile(0.5),
+            'std': histogram.std(),
+            'min': histogram.min if histogram.count else np.nan,
+            'max': histogram.max if histogram.count else np.nan,
+            **histogram.percentiles(percentiles)
+        }
+        
+    def histogram_stats(
+        self,
+        histograms: Dict[str, LatencyHistogram],
+        percentiles: Sequence[float] = LatencyHistogram.DEFAULT_PERCENTILES
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Calculate basic latency statistics from latency histograms instead of the rows.
+        
+        Args:
+            histograms (Dict[str, LatencyHistogram]): Histogram by latency type,
+                e.g. merged from several partitions
+            percentiles (Sequence[float]): Percentiles to report, by default
+                p50, p90, p95, p99 and p99.9
+            
+        Returns:
+            Dict[str, Dict[str, float]]: Statistics by latency type, with the keys
+                of calculate_basic_stats plus one per percentile; percentiles are
+                within the histograms' relative accuracy
+        """
+        return {col: self._histogram_summary(histogram, percentiles) for col, histogram in histograms.items()}
+        
     def analyze_by_dimension(
         self,
         df: pd.DataFrame,
-        dimension: str,
-        latency_col: str = 'service_latency'
+        dimension: Union[str, List[str]],
+        latency_col: str = 'service_latency',
+        percentiles: Sequence[float] = (95, 99),
+        exact: bool = True
     ) -> pd.DataFrame:
         """
-        Analyze latencies grouped by a specific dimension.
+        Analyze latencies grouped by one or more dimensions.
+        
+        Exact statistics come from one factorization of the keys and one sort
+        of the latencies (see grouped_stats); otherwise the median and
+        percentiles are read from one latency histogram per group (see
+        group_histograms), within its relative accuracy.
         
         Args:
             df (pd.DataFrame): Input dataframe
-            dimension (str): Column to group by
+            dimension (Union[str, List[str]]): Column to group by, or several,
+                e.g. ['module', 'operation', 'status']
             latency_col (str): Latency column to analyze
+            percentiles (Sequence[float]): Percentiles to report, e.g. (95, 99)
+            exact (bool): Whether to read the median and percentiles from sorted values
             
         Returns:
-            pd.DataFrame: Latency statistics by dimension
+            pd.DataFrame: Latency statistics by dimension (a MultiIndex for several)
         """
         try:
-            # Ensure latency column is numeric
-            df[latency_col] = pd.to_numeric(df[latency_col], errors='coerce')
-            
-            # Filter out rows with missing latency values
-            valid_df = df[pd.notna(df[latency_col])].copy()
+            # Latencies must arrive as numbers, not objects to convert
+            validate_frame(df, {latency_col: 'numeric'}, 'latency input')
+            dimensions = [dimension] if isinstance(dimension, str) else list(dimension)
             
             # Log data quality stats
             total_rows = len(df)
-            valid_rows = len(valid_df)
+            valid_rows = int(df[latency_col].notna().sum())
             logger.info(f"Analyzing latencies for {latency_col}:")
             logger.info(f"Total rows: {total_rows}")
             logger.info(f"Valid numeric values: {valid_rows} ({valid_rows/total_rows*100:.1f}%)")
             
-            # Group by dimension and calculate statistics
-            grouped = pd.DataFrame()
-            grouped['mean'] = valid_df.groupby(dimension)[latency_col].mean()
-            grouped['median'] = valid_df.groupby(dimension)[latency_col].median()
-            grouped['std'] = valid_df.groupby(dimension)[latency_col].std()
-            grouped['min'] = valid_df.groupby(dimension)[latency_col].min()
-            grouped['max'] = valid_df.groupby(dimension)[latency_col].max()
-            grouped['p95'] = valid_df.groupby(dimension)[latency_col].quantile(0.95)
-            grouped['p99'] = valid_df.groupby(dimension)[latency_col].quantile(0.99)
-            grouped['count'] = valid_df.groupby(dimension)[latency_col].count()
+            numeric_cols = ['mean', 'median', 'std', 'min', 'max'] + [percentile_name(p) for p in percentiles]
             
+            # Group by dimension and calculate statistics in a single pass
+            if exact:
+                grouped = grouped_stats(df, dimensions, latency_col, percentiles)
+            else:
+                histograms = group_histograms(df, dimensions, latency_col)
+                grouped = pd.DataFrame(
+                    [
+                        {**self._histogram_summary(histogram, percentiles), 'count': histogram.count}
+                        for histogram in histograms
+                    ],
+                    index=histograms.index,
+                    columns=numeric_cols + ['count']
+                )
+                
             # Round numeric columns to 3 decimal places
-            numeric_cols = ['mean', 'median', 'std', 'min', 'max', 'p95', 'p99']
             grouped[numeric_cols] = grouped[numeric_cols].round(3)
             
             return grouped
@@ -109,38 +253,27 @@ class LatencyAnalyzer:
         self,
         df: pd.DataFrame,
         latency_col: str,
-        window: str = '5min'
+        window: str = '5min',
+        by: Optional[str] = 'module'
     ) -> pd.DataFrame:
         """
         Analyze latency trends over time.
         
+        Rolling statistics are kept over a time window per module, with
+        running sums and a max deque (see rolling_trends); TrendTracker
+        gives the same results live, as events arrive.
+        
         Args:
             df (pd.DataFrame): Input dataframe
             latency_col (str): Name of latency column to analyze
             window (str): Time window for rolling calculations
+            by (str, optional): Column keeping a window per value, or None for one window
             
         Returns:
             pd.DataFrame: Trend analysis results
         """
         try:
-            # Sort by timestamp
-            df = df.sort_values('timestamp_secu')
-            
-            # Calculate rolling statistics
-            trends = pd.DataFrame()
-            trends['timestamp'] = df['timestamp_secu']
-            trends['latency'] = df[latency_col]
-            trends['rolling_mean'] = df[latency_col].rolling(window=window).mean()
-            trends['rolling_std'] = df[latency_col].rolling(window=window).std()
-            trends['rolling_max'] = df[latency_col].rolling(window=window).max()
-            
-            # Calculate trend indicators
-            trends['trend'] = trends['rolling_mean'].diff().fillna(0)
-            trends['volatility'] = (
-                trends['rolling_std'] / trends['rolling_mean']
-            ).fillna(0)
-            
-            return trends
+            return rolling_trends(df, latency_col, window, by)
             
         except Exception as e:
             logger.error(f"Error analyzing trends: {str(e)}")
@@ -149,53 +282,97 @@ class LatencyAnalyzer:
     def find_bottlenecks(
         self,
         df: pd.DataFrame,
-        threshold_percentile: float = 95
+        threshold_percentile: float = 95,
+        top_k: Optional[int] = None
     ) -> pd.DataFrame:
         """
         Identify bottlenecks in transaction processing.
         
+        Each stage's bottlenecks are the transactions whose latency is above
+        the stage's percentile threshold, selected with masks over the whole
+        column at once.
+        
         Args:
             df (pd.DataFrame): Input dataframe
             threshold_percentile (float): Percentile to use for thresholds
+            top_k (int, optional): Keep only the k slowest bottlenecks of all
+                stages, slowest first; equal latencies keep stage and input order
             
         Returns:
-            pd.DataFrame: Identified bottlenecks
+            pd.DataFrame: Identified bottlenecks (transaction_id, stage, latency,
+                threshold, operation, module), by stage in input order unless top_k is given
         """
         try:
+            if top_k is not None and top_k < 1:
+                raise ValueError(f"top_k must be at least 1, got {top_k}")
             bottlenecks = []
             
-            # Analyze service latency
-            if 'service_latency' in df.columns:
-                service_threshold = df['service_latency'].quantile(threshold_percentile/100)
-                service_bottlenecks = df[df['service_latency'] > service_threshold]
-                
-                for _, txn in service_bottlenecks.iterrows():
-                    bottlenecks.append({
-                        'transaction_id': txn['transaction_id'],
-                        'stage': 'MIDDLEWARE',
-                        'latency': txn['service_latency'],
-                        'threshold': service_threshold,
-                        'operation': txn['operation'],
-                        'module': txn['module']
-                    })
+            for stage, col in self.BOTTLENECK_STAGES:
+                if col not in df.columns:
+                    continue
                     
-            # Analyze end-to-end latency
-            if 'e2e_latency' in df.columns:
-                e2e_threshold = df['e2e_latency'].quantile(threshold_percentile/100)
-                e2e_bottlenecks = df[df['e2e_latency'] > e2e_threshold]
-                
-                for _, txn in e2e_bottlenecks.iterrows():
-                    bottlenecks.append({
-                        'transaction_id': txn['transaction_id'],
-                        'stage': 'END_TO_END',
-                        'latency': txn['e2e_latency'],
-                        'threshold': e2e_threshold,
-                        'operation': txn['operation'],
-                        'module': txn['module']
-                    })
+                latencies = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                threshold, rows = _upper_tail(latencies, threshold_percentile / 100)
+                if top_k is not None and len(rows) > top_k:
+                    # Slowest first, earliest rows first among equal latencies
+                    rows = np.sort(rows[np.lexsort((rows, -latencies[rows]))[:top_k]])
                     
-            return pd.DataFrame(bottlenecks)
+                bottlenecks.append(pd.DataFrame({
+                    'transaction_id': df['transaction_id'].iloc[rows].reset_index(drop=True),
+                    'stage': stage,
+                    'latency': latencies[rows],
+                    'threshold': threshold,
+                    'operation': df['operation'].iloc[rows].reset_index(drop=True),
+                    'module': df['module'].iloc[rows].reset_index(drop=True)
+                }))
+                
+            if not bottlenecks:
+                return pd.DataFrame(columns=['transaction_id', 'stage', 'latency', 'threshold', 'operation', 'module'])
+            bottlenecks = concat_frames(bottlenecks)
+            
+            if top_k is not None:
+                # Slowest first; ties keep stage and input order
+                latencies = bottlenecks['latency'].to_numpy()
+                order = np.lexsort((np.arange(len(latencies)), -latencies))[:top_k]
+                bottlenecks = bottlenecks.iloc[order].reset_index(drop=True)
+                
+            return bottlenecks
             
         except Exception as e:
             logger.error(f"Error finding bottlenecks: {str(e)}")
+            raise
+            
+    def count_bottlenecks(
+        self,
+        df: pd.DataFrame,
+        by: Union[str, List[str], pd.Grouper],
+        threshold_percentile: float = 95
+    ) -> pd.Series:
+        """
+        Count the bottlenecks find_bottlenecks reports in each group, without listing them.
+        
+        Args:
+            df (pd.DataFrame): Input dataframe
+            by: Key of the groups, e.g. pd.Grouper(key='timestamp_secu', freq='30s')
+            threshold_percentile (float): Percentile to use for each group's thresholds
+            
+        Returns:
+            pd.Series: Number of bottlenecks of all stages by group
+        """
+        try:
+            grouped = df.groupby(by, observed=True)
+            sizes = grouped.size()
+            groups = grouped.ngroup().to_numpy()
+            counts = np.zeros(len(sizes), dtype=np.int64)
+            
+            for _, col in self.BOTTLENECK_STAGES:
+                if col in df.columns:
+                    thresholds = grouped[col].transform('quantile', threshold_percentile / 100)
+                    above = (df[col] > thresholds).to_numpy(dtype=bool)
+                    counts += np.bincount(groups[above], minlength=len(sizes))
+                    
+            return pd.Series(counts, index=sizes.index, name='num_bottlenecks')
+            
+        except Exception as e:
+            logger.error(f"Error counting bottlenecks: {str(e)}")
             raise 
\ No newline at end of file
@@ -0,0 +1,641 @@
+"""
+Pre-aggregated latency cube by module, operation, status and minute, for dashboard queries.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from utils.config import LATENCY_CUBE_ACCURACY
+from data_ingestion.categories import concat_frames
+from data_ingestion.schema import validate_frame
+from data_ingestion.timestamps import NANOS_PER_SECOND, NAT, epoch_nanos
+from .group_stats import percentile_name
+from .latency_histogram import LatencyHistogram, LogBuckets
+
+logger = setup_logger('latency_cube')
+
+
+class LatencyCube:
+    """
+    Latency statistics pre-aggregated in cells keyed by (module, operation, status, minute).
+    
+    Each cell holds, per latency column, the count, sum, sum of squares,
+    min and max of its values and the bucket counts of a latency histogram
+    (see LatencyHistogram) of relative accuracy a. Cells are additive, so
+    rows are folded in batch by batch as they are ingested, and any
+    query (a time range, a module, by operation, by 5-minute window) is
+    answered by adding up the cells it covers instead of scanning rows.
+    
+    Cells are also kept by 5 minutes, hour and day (LEVELS), so a query over
+    a week adds up day cells plus finer cells at its edges.
+    
+    Minute cells also count each distinct latency value, from which
+    exceedances of a percentile (the bottlenecks of
+    LatencyAnalyzer.find_bottlenecks) are counted exactly.
+    
+    Means, std, min, max, counts and exceedances are exact for the cells
+    covered; percentiles are within a relative error of `a` of a value of
+    the right rank. Time ranges are resolved to whole minutes; per-row
+    answers (e.g. the transactions behind a bottleneck) still come from the
+    rows.
+    """
+    
+    DIMENSIONS = ['module', 'operation', 'status']
+    METRICS = ['service_latency', 'total_latency', 'e2e_latency']
+    TIME_COLUMN = 'timestamp_secu'
+    
+    BUCKET_SECONDS = 60
+    
+    # Minutes per cell of each level: minute, 5 minutes, hour, day
+    LEVELS = [1, 5, 60, 1440]
+    
+    KEYS = DIMENSIONS + ['minute']
+    MOMENTS = ['count', 'sum', 'sumsq', 'min', 'max']
+    MOMENT_AGGREGATES = {'count': 'sum', 'sum': 'sum', 'sumsq': 'sum', 'min': 'min', 'max': 'max'}
+    
+    def __init__(self, relative_accuracy: float = LATENCY_CUBE_ACCURACY):
+        """
+        Initialize an empty cube.
+        
+        Args:
+            relative_accuracy (float): Relative error of percentiles, e.g. 0.01 for 1%
+        """
+        self.buckets = LogBuckets(relative_accuracy)
+        self.relative_accuracy = relative_accuracy
+        self.rows = 0
+        
+        # Compacted cells by latency column and level, sorted by their first
+        # minute, and minute cells of batches not yet folded into them
+        self._moments: Dict[Tuple[str, int], pd.DataFrame] = {}
+        self._buckets: Dict[Tuple[str, int], pd.DataFrame] = {}
+        self._pending: Dict[str, List[pd.DataFrame]] = {metric: [] for metric in self.METRICS}
+        self._pending_buckets: Dict[str, List[pd.DataFrame]] = {metric: [] for metric in self.METRICS}
+        self._values: Dict[Tuple[str, int], pd.DataFrame] = {}
+        self._pending_values: Dict[str, List[pd.DataFrame]] = {metric: [] for metric in self.METRICS}
+        
+    def update(self, df: pd.DataFrame) -> 'LatencyCube':
+        """
+        Fold a batch of merged rows into the cube.
+        
+        Args:
+            df (pd.DataFrame): Merged (normalized) rows with timestamp_secu, the
+                dimension columns and any of the latency columns
+                
+        Returns:
+            LatencyCube: This cube
+        """
+        try:
+            metrics = [metric for metric in self.METRICS if metric in df.columns]
+            validate_frame(
+                df,
+                {self.TIME_COLUMN: 'datetime', **{metric: 'numeric' for metric in metrics}},
+                'latency cube input'
+            )
+            
+            nanos = epoch_nanos(df[self.TIME_COLUMN])
+            timed = nanos != NAT
+            keys = df[self.DIMENSIONS].reset_index(drop=True)
+            keys['minute'] = nanos // (self.BUCKET_SECONDS * NANOS_PER_SECOND)
+            
+            for metric in metrics:
+                values = df[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+                valid = timed & ~np.isnan(values)
+                if not valid.any():
+                    continue
+                values = values[valid]
+                cells = keys[valid].assign(value=values, sumsq=values ** 2, bucket=self.buckets.key_of(values))
+                self._pending[metric].append(
+                    cells.groupby(self.KEYS, observed=True, dropna=False, sort=False).agg(
+                        count=('value', 'size'),
+                        sum=('value', 'sum'),
+                        sumsq=('sumsq', 'sum'),
+                        min=('value', 'min'),
+                        max=('value', 'max')
+                    ).reset_index()
+                )
+                self._pending_buckets[metric].append(
+                    cells.groupby(self.KEYS + ['bucket'], observed=True, dropna=False, sort=False)
+                    .size().rename('count').reset_index()
+                )
+                self._pending_values[metric].append(self._count_values(cells))
+                
+            self.rows += int(timed.sum())
+            if len(df) > timed.sum():
+                logger.warning(f"Latency cube skipped {len(df) - int(timed.sum())} rows without {self.TIME_COLUMN}")
+            return self
+            
+        except Exception as e:
+            logger.error(f"Error updating latency cube: {str(e)}")
+            raise
+            
+    def _count_values(self, cells: pd.DataFrame) -> pd.DataFrame:
+        """
+        Value count cells of rows keyed by the dimensions and minute, with
+        their latency in 'value'.
+        """
+        return cells.groupby(self.KEYS + ['value'], observed=True, dropna=False, sort=False).size().rename('count').reset_index()
+        
+    def _fold(self, cells: Optional[pd.DataFrame], batch: pd.DataFrame, keys: List[str], aggregates: Dict[str, str]) -> pd.DataFrame:
+        """
+        Add a batch of cells into compacted cells.
+        
+        Only cells from the batch's first minute on are regrouped, so batches
+        of recent rows cost in proportion to the batch.
+        
+        Args:
+            cells (pd.DataFrame, optional): Compacted cells, sorted by minute
+            batch (pd.DataFrame): New cells of the same level
+            keys (List[str]): Cell keys
+            aggregates (Dict[str, str]): How each value column adds up
+            
+        Returns:
+            pd.DataFrame: Compacted cells, sorted by minute
+        """
+        head = None
+        if cells is not None:
+            split = np.searchsorted(cells['minute'].to_numpy(), batch['minute'].min(), side='left')
+            head = cells.iloc[:split]
+            batch = concat_frames([cells.iloc[split:], batch])
+        folded = batch.groupby(keys, observed=True, dropna=False, sort=False).agg(aggregates).reset_index()
+        folded = folded.sort_values('minute', kind='stable', ignore_index=True)
+        return folded if head is None or head.empty else concat_frames([head, folded])
+        
+    def _compact(self) -> None:
+        """Fold pending batches into the cells of every level."""
+        for metric in self.METRICS:
+            if not self._pending[metric]:
+                continue
+            moments = concat_frames(self._pending[metric])
+            buckets = concat_frames(self._pending_buckets[metric])
+            values = concat_frames(self._pending_values[metric])
+            for size in self.LEVELS:
+                level_moments = moments.assign(minute=moments['minute'] // size * size)
+                level_buckets = buckets.assign(minute=buckets['minute'] // size * size)
+                self._moments[metric, size] = self._fold(
+                    self._moments.get((metric, size)), level_moments, self.KEYS, self.MOMENT_AGGREGATES
+                )
+                self._buckets[metric, size] = self._fold(
+                    self._buckets.get((metric, size)), level_buckets, self.KEYS + ['bucket'], {'count': 'sum'}
+                )
+            # Distinct values seldom repeat across minutes: value counts are kept by minute only
+            self._values[metric, 1] = self._fold(
+                self._values.get((metric, 1)), values, self.KEYS + ['value'], {'count': 'sum'}
+            )
+            self._pending[metric] = []
+            self._pending_buckets[metric] = []
+            self._pending_values[metric] = []
+            
+    def cells(self) -> int:
+        """Number of (module, operation, status, minute, latency column) cells."""
+        self._compact()
+        return sum(len(self._moments[metric, 1]) for metric in self.METRICS if (metric, 1) in self._moments)
+        
+    def _minute(self, timestamp) -> int:
+        """Minute bucket of a timestamp; naive timestamps are taken as UTC."""
+        return pd.Timestamp(timestamp).value // (self.BUCKET_SECONDS * NANOS_PER_SECOND)
+        
+    def _whole_minutes(
+        self,
+        start: Optional[datetime],
+        end: Optional[datetime]
+    ) -> Tuple[Optional[pd.Timestamp], Optional[pd.Timestamp]]:
+        """
+        Start of the first and last minutes lying entirely within [start, end]
+        (None for an open end).
+        """
+        minute = self.BUCKET_SECONDS * NANOS_PER_SECOND
+        first = None if start is None else pd.Timestamp(-(-pd.Timestamp(start).value // minute) * minute, tz='UTC')
+        last = None if end is None else pd.Timestamp(((pd.Timestamp(end).value + 1) // minute - 1) * minute, tz='UTC')
+        return first, last
+        
+    def _edge_values(
+        self,
+        rows: pd.DataFrame,
+        metric: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        filters: Dict[str, Optional[str]]
+    ) -> pd.DataFrame:
+        """
+        Value count cells of the rows in [start, end] whose minute the range
+        covers only partly.
+        
+        Args:
+            rows (pd.DataFrame): Rows the cube was built from
+            metric (str): Latency column
+            start (datetime, optional): Start of the time range
+            end (datetime, optional): End of the time range
+            filters (Dict[str, Optional[str]]): Value of a dimension to keep,
+                e.g. {'module': 'WEB'}
+                
+        Returns:
+            pd.DataFrame: Value count cells of the partly covered minutes
+        """
+        nanos = epoch_nanos(rows[self.TIME_COLUMN])
+        minutes = nanos // (self.BUCKET_SECONDS * NANOS_PER_SECOND)
+        values = rows[metric].to_numpy(dtype=np.float64, na_value=np.nan)
+        first, last = self._whole_minutes(start, end)
+        
+        edge = (nanos != NAT) & ~np.isnan(values)
+        whole = np.ones(len(rows), dtype=bool)
+        if start is not None:
+            edge &= nanos >= pd.Timestamp(start).value
+            whole &= minutes >= self._minute(first)
+        if end is not None:
+            edge &= nanos <= pd.Timestamp(end).value
+            whole &= minutes <= self._minute(last)
+        edge &= ~whole
+        for dimension, value in filters.items():
+            if value is not None:
+                edge &= (rows[dimension] == value).to_numpy()
+                
+        cells = rows.loc[edge, self.DIMENSIONS].reset_index(drop=True)
+        return self._count_values(cells.assign(minute=minutes[edge], value=values[edge]))
+        
+    def _window_minutes(self, window: str) -> int:
+        """Length of a time window in whole minutes, e.g. 5 for '5min'."""
+        minutes = pd.Timedelta(window) / pd.Timedelta(seconds=self.BUCKET_SECONDS)
+        if minutes < 1 or minutes != int(minutes):
+            raise ValueError(f"Window must be a whole number of minutes, got {window}")
+        return int(minutes)
+        
+    def supports_window(self, window: str) -> bool:
+        """
+        Tell whether a time window can be rolled up from the cube's minute cells.
+        
+        Args:
+            window (str): Time window, e.g. '5min' or '30s'
+            
+        Returns:
+            bool: True for a whole number of minutes
+        """
+        try:
+            self._window_minutes(window)
+            return True
+        except ValueError:
+            return False
+            
+    def _spans(self, first: int, last: int, levels: List[int]) -> List[Tuple[int, int, int]]:
+        """
+        Cover a range of minutes with as few cells as possible.
+        
+        Args:
+            first (int): First minute of the range
+            last (int): Minute just after the range
+            levels (List[int]): Usable levels, finest first
+            
+        Returns:
+            List[Tuple[int, int, int]]: Level, first minute and end minute of each span
+        """
+        if first >= last:
+            return []
+        size = levels[-1]
+        inner_first = -(-first // size) * size
+        inner_last = last // size * size
+        if len(levels) == 1:
+            return [(size, first, last)]
+        if inner_first >= inner_last:
+            return self._spans(first, last, levels[:-1])
+        return (
+            self._spans(first, inner_first, levels[:-1])
+            + [(size, inner_first, inner_last)]
+            + self._spans(inner_last, last, levels[:-1])
+        )
+        
+    def _select(
+        self,
+        store: Dict[int, pd.DataFrame],
+        metric: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        window: Optional[str],
+        filters: Dict[str, Optional[str]]
+    ) -> pd.DataFrame:
+        """
+        Cells of one latency column in a time range, optionally restricted to
+        some dimension values.
+        
+        Args:
+            store (Dict[Tuple[str, int], pd.DataFrame]): Compacted moments, buckets or
+                value counts by latency column and level (value counts only by minute)
+            metric (str): Latency column
+            start (datetime, optional): Start of the range (its minute included)
+            end (datetime, optional): End of the range (its minute included)
+            window (str, optional): Time window of the query; only levels whose
+                cells fit in its windows are used
+            filters (Dict[str, Optional[str]]): Value of a dimension to keep,
+                e.g. {'module': 'WEB'}
+                
+        Returns:
+            pd.DataFrame: Selected cells, of mixed levels
+        """
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown latency column: {metric}")
+        unknown = set(filters) - set(self.DIMENSIONS)
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {sorted(unknown)}")
+        window_minutes = None if window is None else self._window_minutes(window)
+        levels = [
+            size for size in self.LEVELS
+            if (metric, size) in store and (window_minutes is None or window_minutes % size == 0)
+        ]
+        if (metric, 1) not in store:
+            return pd.DataFrame(columns=self.KEYS)
+            
+        minutes = store[metric, 1]['minute'].to_numpy()
+        first = minutes[0] if start is None else self._minute(start)
+        last = minutes[-1] + 1 if end is None else self._minute(end) + 1
+        
+        pieces = []
+        for size, span_first, span_last in self._spans(first, last, levels):
+            cells = store[metric, size]
+            cell_minutes = cells['minute'].to_numpy()
+            pieces.append(cells.iloc[
+                np.searchsorted(cell_minutes, span_first, side='left'):np.searchsorted(cell_minutes, span_last, side='left')
+            ])
+        selected = concat_frames(pieces) if len(pieces) > 1 else pieces[0] if pieces else store[metric, 1].iloc[:0]
+        
+        mask = np.ones(len(selected), dtype=bool)
+        for dimension, value in filters.items():
+            if value is not None:
+                mask &= (selected[dimension] == value).to_numpy()
+        return selected if mask.all() else selected[mask]
+        
+    def _group_keys(self, frame: pd.DataFrame, by: Sequence[str], window: Optional[str]) -> List[pd.Series]:
+        """Group keys of cells: the `by` dimensions, then the time window, if any."""
+        keys = [frame[dimension] for dimension in by]
+        if window is not None:
+            minutes = self._window_minutes(window)
+            keys.append((frame['minute'] // minutes * minutes).rename('window'))
+        if not keys:
+            keys.append(pd.Series(0, index=frame.index, name='all'))
+        return keys
+        
+    def _percentiles(
+        self,
+        cells: pd.DataFrame,
+        keys: List[pd.Series],
+        percentiles: Sequence[float],
+        column: str = 'bucket'
+    ) -> pd.DataFrame:
+        """
+        Read percentiles from the merged histograms of each group.
+        
+        Like pandas quantile, a percentile interpolates linearly between the
+        values of the two ranks around it; each rank's value is its bucket's,
+        or the exact value when reading value counts.
+        
+        Args:
+            cells (pd.DataFrame): Selected histogram cells, or value count cells
+            keys (List[pd.Series]): Group keys of the cells
+            percentiles (Sequence[float]): Percentiles between 0 and 100
+            column (str): 'bucket' for histogram cells, 'value' for value counts
+            
+        Returns:
+            pd.DataFrame: By group (sorted as groupby sorts), each percentile in
+                a column named by percentile_name
+        """
+        histogram = cells.groupby(keys + [cells[column]], observed=True, dropna=False)['count'].sum()
+        group = histogram.groupby(level=list(range(len(keys))), observed=True, dropna=False, sort=False).ngroup().to_numpy()
+        counts = histogram.to_numpy()
+        keyed = histogram.index.get_level_values(column).to_numpy()
+        values = self.buckets.value_of(keyed) if column == 'bucket' else keyed
+        
+        starts = np.flatnonzero(np.diff(group, prepend=-1))
+        cumulative = np.cumsum(counts)
+        before = cumulative[starts] - counts[starts]
+        totals = np.add.reduceat(counts, starts) if len(counts) else counts
+        
+        result = pd.DataFrame(index=histogram.index[starts].droplevel(column))
+        for percentile in percentiles:
+            exact_rank = (totals - 1) * percentile / 100
+            rank = before + np.floor(exact_rank).astype(np.int64)
+            position = np.searchsorted(cumulative, rank, side='right')
+            next_position = np.searchsorted(cumulative, np.minimum(rank + 1, before + totals - 1), side='right')
+            
+            lower = values[position]
+            upper = values[next_position]
+            result[percentile_name(percentile)] = lower + (upper - lower) * (exact_rank - np.floor(exact_rank))
+        return result
+        
+    def _finish_index(self, result: pd.DataFrame, keys: List[pd.Series], window: Optional[str]) -> pd.DataFrame:
+        """
+        Drop the placeholder key of ungrouped results and turn window minutes
+        into timestamps.
+        """
+        names = [key.name for key in keys]
+        if names == ['all']:
+            return result.reset_index(drop=True)
+        if window is not None:
+            result = result.reset_index()
+            result['window'] = pd.to_datetime(result['window'] * self.BUCKET_SECONDS, unit='s', utc=True)
+            result = result.set_index(names)
+        return result
+        
+    def rollup(
+        self,
+        metric: str,
+        percentiles: Sequence[float] = (50, 95, 99),
+        by: Sequence[str] = (),
+        window: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        **filters: Optional[str]
+    ) -> pd.DataFrame:
+        """
+        Add up the cells of a query into latency statistics.
+        
+        Args:
+            metric (str): Latency column, e.g. 'e2e_latency'
+            percentiles (Sequence[float]): Percentiles between 0 and 100
+            by (Sequence[str]): Dimensions to group by, e.g. ['module', 'operation']
+            window (str, optional): Also group by time window, e.g. '5min' (whole minutes)
+            start (datetime, optional): Start of the time range
+            end (datetime, optional): End of the time range
+            **filters: Dimension values to keep, e.g. module='WEB'
+            
+        Returns:
+            pd.DataFrame: count, mean, std, min, max and one column per
+                percentile (p50, p95, ...), by group (window timestamps in UTC);
+                a single row without grouping, none when no cell matches
+        """
+        try:
+            self._compact()
+            moments = self._select(self._moments, metric, start, end, window, filters)
+            buckets = self._select(self._buckets, metric, start, end, window, filters)
+            columns = ['count', 'mean', 'std', 'min', 'max'] + [percentile_name(p) for p in percentiles]
+            if moments.empty:
+                return pd.DataFrame(columns=columns)
+                
+            keys = self._group_keys(moments, by, window)
+            result = moments.groupby(keys, observed=True, dropna=False)[self.MOMENTS].agg(self.MOMENT_AGGREGATES)
+            counts = result['count'].to_numpy()
+            result['mean'] = result['sum'] / counts
+            with np.errstate(divide='ignore', invalid='ignore'):
+                variance = (result['sumsq'] - result['sum'] * result['mean']) / (counts - 1)
+            result['std'] = np.where(counts > 1, np.sqrt(variance.clip(lower=0)), np.nan)
+            
+            # Percentiles stay within the values seen in each group
+            quantiles = self._percentiles(buckets, self._group_keys(buckets, by, window), percentiles)
+            for name in map(percentile_name, percentiles):
+                result[name] = np.clip(quantiles[name].to_numpy(), result['min'].to_numpy(), result['max'].to_numpy())
+                
+            return self._finish_index(result[columns], keys, window)
+            
+        except Exception as e:
+            logger.error(f"Error rolling up latency cube: {str(e)}")
+            raise
+            
+    def stats(
+        self,
+        metric: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        **filters: Optional[str]
+    ) -> Dict[str, float]:
+        """
+        Overall statistics of a latency column, as
+        LatencyAnalyzer.calculate_basic_stats reports them.
+        
+        Args:
+            metric (str): Latency column
+            start (datetime, optional): Start of the time range
+            end (datetime, optional): End of the time range
+            **filters: Dimension values to keep, e.g. module='WEB'
+            
+        Returns:
+            Dict[str, float]: mean, median, std, min, max, p95 and p99 (NaN without values)
+        """
+        result = self.rollup(metric, (50, 95, 99), start=start, end=end, **filters)
+        row = result.iloc[0] if len(result) else pd.Series(np.nan, index=result.columns)
+        return {
+            'mean': row['mean'],
+            'median': row['p50'],
+            'std': row['std'],
+            'min': row['min'],
+            'max': row['max'],
+            'p95': row['p95'],
+            'p99': row['p99']
+        }
+        
+    def histogram(
+        self,
+        metric: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        **filters: Optional[str]
+    ) -> LatencyHistogram:
+        """
+        Latency histogram of the cells of a query, e.g. to merge with another cube's.
+        
+        Args:
+            metric (str): Latency column
+            start (datetime, optional): Start of the time range
+            end (datetime, optional): End of the time range
+            **filters: Dimension values to keep, e.g. module='WEB'
+            
+        Returns:
+            LatencyHistogram: Histogram of the latencies in the range (empty without values)
+        """
+        try:
+            self._compact()
+            moments = self._select(self._moments, metric, start, end, None, filters)
+            buckets = self._select(self._buckets, metric, start, end, None, filters)
+            if moments.empty:
+                return LatencyHistogram(self.relative_accuracy)
+                
+            counts = buckets.groupby('bucket')['count'].sum()
+            return LatencyHistogram.from_dict({
+                'relative_accuracy': self.relative_accuracy,
+                'count': moments['count'].sum(),
+                'sum': moments['sum'].sum(),
+                'sumsq': moments['sumsq'].sum(),
+                'min': moments['min'].min(),
+                'max': moments['max'].max(),
+                'keys': counts.index.to_numpy(),
+                'counts': counts.to_numpy()
+            })
+            
+        except Exception as e:
+            logger.error(f"Error reading latency histogram: {str(e)}")
+            raise
+            
+    def exceedances(
+        self,
+        metric: str,
+        percentile: float = 95,
+        by: Sequence[str] = (),
+        window: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        rows: Optional[pd.DataFrame] = None,
+        **filters: Optional[str]
+    ) -> pd.DataFrame:
+        """
+        Count the latencies above a percentile, as
+        LatencyAnalyzer.find_bottlenecks selects them.
+        
+        The threshold is the exact percentile over the whole query, or over
+        each window when one is given, read from the value counts of the
+        cells. The counts of the values above it are added up per cell, so
+        the totals of any breakdown are the same integers.
+        
+        Like other queries, a time range is resolved to whole minutes unless
+        the rows are given: the minutes it covers only partly are then
+        counted from the rows, and the counts are those of the rows in
+        [start, end].
+        
+        Args:
+            metric (str): Latency column, e.g. 'service_latency'
+            percentile (float): Threshold percentile between 0 and 100
+            by (Sequence[str]): Dimensions to break the counts down by, e.g. ['module']
+            window (str, optional): Time window, e.g. '5min' (whole minutes)
+            start (datetime, optional): Start of the time range
+            end (datetime, optional): End of the time range
+            rows (pd.DataFrame, optional): Rows the cube was built from, to count
+                the edges of the time range exactly
+            **filters: Dimension values to keep, e.g. module='WEB'
+            
+        Returns:
+            pd.DataFrame: threshold, count and sum (total latency) of the
+                exceeding values by window and group; groups without any are
+                left out
+        """
+        try:
+            self._compact()
+            if rows is None or (start is None and end is None):
+                values = self._select(self._values, metric, start, end, window, filters)
+            else:
+                first, last = self._whole_minutes(start, end)
+                values = self._select(self._values, metric, first, last, window, filters)
+                edges = self._edge_values(rows, metric, start, end, filters)
+                if not edges.empty:
+                    values = concat_frames([values, edges])
+            if values.empty:
+                return pd.DataFrame(columns=['threshold', 'count', 'sum'])
+                
+            # Threshold of each window (or of the whole query)
+            window_keys = self._group_keys(values, (), window)
+            thresholds = self._percentiles(values, window_keys, [percentile], column='value')[percentile_name(percentile)]
+            
+            value = values['value'].to_numpy()
+            exceeding = value > thresholds.reindex(window_keys[0].to_numpy()).to_numpy()
+            if not exceeding.any():
+                return pd.DataFrame(columns=['threshold', 'count', 'sum'])
+                
+            above = values[exceeding]
+            above = above.assign(total=above['count'].to_numpy() * value[exceeding])
+            keys = self._group_keys(above, by, window)
+            result = above.groupby(keys, observed=True, dropna=False)[['count', 'total']].sum().rename(
+                columns={'total': 'sum'}
+            )
+            result['count'] = result['count'].astype(np.int64)
+            windows = result.index.get_level_values('window') if window is not None else np.zeros(len(result))
+            result.insert(0, 'threshold', thresholds.reindex(windows).to_numpy())
+            return self._finish_index(result, keys, window)
+            
+        except Exception as e:
+            logger.error(f"Error counting latency exceedances: {str(e)}")
+            raise
@@ -0,0 +1,361 @@
+"""
+Log-bucketed latency histograms with a fixed relative error: mergeable,
+subtractable and serializable, for percentiles at any granularity.
+"""
+from typing import Dict, Iterable, Sequence, Union
+import numpy as np
+import pandas as pd
+
+from utils.config import LATENCY_HISTOGRAM_ACCURACY
+from .group_stats import percentile_name
+
+
+class LogBuckets:
+    """
+    Logarithmic buckets with a fixed relative accuracy.
+    
+    Bucket i > 0 holds the values in (MIN_VALUE * gamma**(i-1), MIN_VALUE * gamma**i],
+    with gamma = (1 + a) / (1 - a) for a relative accuracy a; bucket 0 holds
+    the values up to MIN_VALUE in magnitude and negative values go to
+    bucket -i. The value standing for a bucket is within a relative error
+    of `a` of every value in it.
+    """
+    
+    # Smallest latency told apart from zero, in seconds
+    MIN_VALUE = 1e-6
+    
+    def __init__(self, relative_accuracy: float = LATENCY_HISTOGRAM_ACCURACY):
+        """
+        Initialize the buckets.
+        
+        Args:
+            relative_accuracy (float): Relative error of bucket values, e.g. 0.01 for 1%
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError(f"Relative accuracy must be between 0 and 1, got {relative_accuracy}")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = np.log(self.gamma)
+        self._log_min = np.log(self.MIN_VALUE)
+        
+    def key_of(self, values: np.ndarray) -> np.ndarray:
+        """Bucket of each value; 0 near zero, negative for negative values."""
+        magnitude = np.abs(values)
+        with np.errstate(divide='ignore'):
+            scaled = np.log(magnitude)
+        scaled -= self._log_min
+        scaled /= self._log_gamma
+        np.ceil(scaled, out=scaled)
+        np.maximum(scaled, 1, out=scaled)
+        scaled[~(magnitude > self.MIN_VALUE)] = 0
+        keys = scaled.astype(np.int64)
+        negative = values < 0
+        if negative.any():
+            np.negative(keys, out=keys, where=negative)
+        return keys
+        
+    def value_of(self, keys: np.ndarray) -> np.ndarray:
+        """Value standing for each bucket, within the relative accuracy of its values."""
+        magnitude = self.MIN_VALUE * self.gamma ** (np.abs(keys) - 1) * (1 + self.relative_accuracy)
+        return np.where(keys == 0, 0.0, np.sign(keys) * magnitude)
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies over logarithmic buckets (see LogBuckets).
+    
+    Only the count of each bucket is kept, plus the count, sum, sum of
+    squares, min and max of the values, so a histogram takes a few kilobytes
+    however many values it summarizes. Histograms of different partitions,
+    processes or time windows with the same accuracy add up into the
+    histogram of their union (merge); subtracting the histogram of a window
+    from one that contains it leaves the histogram of the rest, e.g. of
+    (t1, t2] from the running histograms at t1 and t2.
+    
+    Error: a percentile read from the histogram interpolates linearly
+    between the values of the two ranks around it, as pandas quantile
+    does, so for positive values it is within a relative error `a` of the
+    exact percentile (and within MIN_VALUE of it near zero);
+    tests/test_latency_histogram.py asserts it, and bench_latency_histogram
+    fails above it on the bundled logs. Count, mean
+    and std are exact; min and max are too, except after a subtraction,
+    when they are read from the buckets within the relative accuracy.
+    """
+    
+    DEFAULT_PERCENTILES = (50, 90, 95, 99, 99.9)
+    
+    def __init__(self, relative_accuracy: float = LATENCY_HISTOGRAM_ACCURACY):
+        """
+        Initialize an empty histogram.
+        
+        Args:
+            relative_accuracy (float): Relative error of percentiles, e.g. 0.01 for 1%
+        """
+        self.buckets = LogBuckets(relative_accuracy)
+        self.count = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        
+        # Non-empty buckets in order and their counts
+        self._keys = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        
+    @property
+    def relative_accuracy(self) -> float:
+        """Relative error of the histogram's percentiles."""
+        return self.buckets.relative_accuracy
+        
+    def _add(self, keys: np.ndarray, counts: np.ndarray) -> None:
+        """Add counts to buckets, dropping the buckets left empty."""
+        keys, positions = np.unique(np.concatenate([self._keys, keys]), return_inverse=True)
+        counts = np.bincount(positions, weights=np.concatenate([self._counts, counts]), minlength=len(keys))
+        counts = counts.round().astype(np.int64)
+        if (counts < 0).any():
+            raise ValueError("Cannot subtract a histogram holding values this one does not")
+        nonzero = counts > 0
+        self._keys = keys[nonzero]
+        self._counts = counts[nonzero]
+        
+    def _check_compatible(self, other: 'LatencyHistogram') -> None:
+        """Make sure another histogram has the same buckets."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError(
+                f"Cannot combine histograms of relative accuracy {self.relative_accuracy} and {other.relative_accuracy}"
+            )
+            
+    def update(self, values: Union[pd.Series, np.ndarray, Iterable[float]]) -> 'LatencyHistogram':
+        """
+        Add a chunk of values; NaN and None are ignored, as by pandas quantile.
+        
+        Args:
+            values (Union[pd.Series, np.ndarray, Iterable[float]]): Latencies
+            
+        Returns:
+            LatencyHistogram: This histogram
+        """
+        values = pd.to_numeric(pd.Series(values)).to_numpy(dtype=np.float64, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return self
+            
+        # Buckets span a narrow range of keys: count them without sorting
+        keys = self.buckets.key_of(values)
+        lowest = keys.min()
+        counts = np.bincount(keys - lowest)
+        present = np.flatnonzero(counts)
+        self._add(present + lowest, counts[present])
+        
+        self.count += len(values)
+        self.sum += float(values.sum())
+        self.sumsq += float(np.dot(values, values))
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        return self
+        
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """
+        Add the values summarized by another histogram.
+        
+        Args:
+            other (LatencyHistogram): Histogram of other values, e.g. another partition
+            
+        Returns:
+            LatencyHistogram: This histogram, now summarizing both
+        """
+        self._check_compatible(other)
+        self._add(other._keys, other._counts)
+        self.count += other.count
+        self.sum += other.sum
+        self.sumsq += other.sumsq
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+        
+    def subtract(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """
+        Remove the values summarized by another histogram, e.g. of an earlier window.
+        
+        Args:
+            other (LatencyHistogram): Histogram of values this one holds
+            
+        Returns:
+            LatencyHistogram: This histogram, without the other's values
+            
+        Raises:
+            ValueError: If the other histogram holds values this one does not
+        """
+        self._check_compatible(other)
+        self._add(other._keys, -other._counts)
+        self.count -= other.count
+        self.sum -= other.sum
+        self.sumsq -= other.sumsq
+        if not self.count:
+            self.sum = self.sumsq = 0.0
+            self.min, self.max = np.inf, -np.inf
+        else:
+            # The extremes may have been removed: read them from the end buckets
+            self.min = float(np.clip(self.buckets.value_of(self._keys[:1])[0], self.min, self.max))
+            self.max = float(np.clip(self.buckets.value_of(self._keys[-1:])[0], self.min, self.max))
+        return self
+        
+    def quantiles(self, fractions: Sequence[float]) -> np.ndarray:
+        """
+        Estimate quantiles.
+        
+        Args:
+            fractions (Sequence[float]): Fractions between 0 and 1, e.g. [0.95, 0.99]
+            
+        Returns:
+            np.ndarray: Estimated quantile of each fraction (NaN if the histogram is empty)
+        """
+        fractions = np.asarray(fractions, dtype=np.float64)
+        if not self.count:
+            return np.full(len(fractions), np.nan)
+            
+        cumulative = np.cumsum(self._counts)
+        exact_rank = (self.count - 1) * fractions
+        rank = np.floor(exact_rank).astype(np.int64)
+        lower = self.buckets.value_of(self._keys[np.searchsorted(cumulative, rank, side='right')])
+        upper = self.buckets.value_of(
+            self._keys[np.searchsorted(cumulative, np.minimum(rank + 1, self.count - 1), side='right')]
+        )
+        return np.clip(lower + (upper - lower) * (exact_rank - rank), self.min, self.max)
+        
+    def quantile(self, fraction: float) -> float:
+        """
+        Estimate one quantile.
+        
+        Args:
+            fraction (float): Fraction between 0 and 1
+            
+        Returns:
+            float: Estimated quantile
+        """
+        return float(self.quantiles([fraction])[0])
+        
+    def percentiles(self, percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """
+        Estimate percentiles.
+        
+        Args:
+            percentiles (Sequence[float]): Percentiles between 0 and 100
+            
+        Returns:
+            Dict[str, float]: Estimate by percentile name, e.g. {'p50': ..., 'p99.9': ...}
+        """
+        estimates = self.quantiles(np.asarray(percentiles, dtype=np.float64) / 100)
+        return {percentile_name(p): float(estimate) for p, estimate in zip(percentiles, estimates)}
+        
+    def mean(self) -> float:
+        """Mean of the values (NaN if the histogram is empty)."""
+        return self.sum / self.count if self.count else np.nan
+        
+    def std(self) -> float:
+        """Sample standard deviation of the values, as pandas std (NaN below two values)."""
+        if self.count < 2:
+            return np.nan
+        return float(np.sqrt(max(self.sumsq - self.sum * self.sum / self.count, 0.0) / (self.count - 1)))
+        
+    def bucket_count(self) -> int:
+        """Number of non-empty buckets held by the histogram."""
+        return len(self._keys)
+        
+    def copy(self) -> 'LatencyHistogram':
+        """Independent copy of the histogram."""
+        return LatencyHistogram.from_dict(self.to_dict())
+        
+    def to_dict(self) -> Dict:
+        """
+        Serialize the histogram.
+        
+        Returns:
+            Dict: JSON-compatible state
+        """
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'count': self.count,
+            'sum': self.sum,
+            'sumsq': self.sumsq,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'keys': self._keys.tolist(),
+            'counts': self._counts.tolist()
+        }
+        
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'LatencyHistogram':
+        """
+        Rebuild a histogram serialized by to_dict.
+        
+        Args:
+            state (Dict): Serialized state
+            
+        Returns:
+            LatencyHistogram: Restored histogram
+        """
+        histogram = cls(relative_accuracy=state['relative_accuracy'])
+        histogram.count = int(state['count'])
+        histogram.sum = float(state['sum'])
+        histogram.sumsq = float(state['sumsq'])
+        histogram.min = np.inf if state['min'] is None else float(state['min'])
+        histogram.max = -np.inf if state['max'] is None else float(state['max'])
+        histogram._keys = np.asarray(state['keys'], dtype=np.int64)
+        histogram._counts = np.asarray(state['counts'], dtype=np.int64)
+        return histogram
+
+
+def group_histograms(
+    df: pd.DataFrame,
+    dimensions: Sequence[str],
+    value_col: str,
+    relative_accuracy: float = LATENCY_HISTOGRAM_ACCURACY
+) -> pd.Series:
+    """
+    Build one latency histogram per group.
+    
+    Buckets are counted by group with one groupby instead of one histogram
+    update per group; rows with a missing key or value are left out.
+    
+    Args:
+        df (pd.DataFrame): Input data
+        dimensions (Sequence[str]): Key columns, e.g. ['module', 'operation']
+        value_col (str): Latency column
+        relative_accuracy (float): Relative error of percentiles
+        
+    Returns:
+        pd.Series: LatencyHistogram by group, indexed by the keys (a MultiIndex
+            for several dimensions), sorted as groupby sorts them
+    """
+    dimensions = list(dimensions)
+    buckets = LogBuckets(relative_accuracy)
+    values = df[value_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(values)
+    values = values[valid]
+    cells = df.loc[valid, dimensions].assign(value=values, sumsq=values * values, bucket=buckets.key_of(values))
+    
+    moments = cells.groupby(dimensions, observed=True).agg(
+        count=('value', 'size'),
+        sum=('value', 'sum'),
+        sumsq=('sumsq', 'sum'),
+        min=('value', 'min'),
+        max=('value', 'max')
+    )
+    counts = cells.groupby(dimensions + ['bucket'], observed=True).size()
+    group = counts.groupby(level=dimensions, observed=True).ngroup().to_numpy()
+    starts = np.flatnonzero(np.diff(group, prepend=-1))
+    ends = np.append(starts[1:], len(group))
+    keys = counts.index.get_level_values('bucket').to_numpy()
+    counts = counts.to_numpy()
+    
+    histograms = [
+        LatencyHistogram.from_dict({
+            'relative_accuracy': relative_accuracy,
+            **row,
+            'keys': keys[start:end],
+            'counts': counts[start:end]
+        })
+        for row, start, end in zip(moments.to_dict('records'), starts, ends)
+    ]
+    return pd.Series(histograms, index=moments.index, name=value_col, dtype=object)
@@ -1,20 +1,41 @@
 """
 Normalizer for standardizing fields across log sources.
 """
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
+import time
+import tracemalloc
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
 from utils.logger import setup_logger
+from data_ingestion.merger import MERGED_SCHEMA
+from data_ingestion.schema import validate_frame
+from .ip_addresses import IPAddressEncoder
+from .quantile_sketch import QuantileSketch, SketchStore
 
 logger = setup_logger('normalizer')
 
 class LogNormalizer:
     """Normalizer for standardizing log fields."""
     
-    def __init__(self):
-        """Initialize the normalizer."""
+    # Suffix of the column holding IPv6 addresses next to the IPv4 column
+    IPV6_SUFFIX = '_v6'
+    
+    # Packed outlier flags of the normalized numeric columns, one bit per column
+    OUTLIER_FLAGS = 'outlier_flags'
+    OUTLIER_FLAG_TYPES = [np.uint8, np.uint16, np.uint32, np.uint64]
+    
+    def __init__(self, sketch_store: Optional[SketchStore] = None, schema: Optional[Dict[str, str]] = None):
+        """
+        Initialize the normalizer.
+        
+        Args:
+            sketch_store (SketchStore, optional): Where the quantile sketches of
+                incremental normalization are kept between runs
+            schema (Dict[str, str], optional): Column kinds of the input frames
+                (defaults to the merged data of the built-in sources)
+        """
         # Standard mappings for modules
         self.module_mapping = {
             'mobile': 'MOBILE',
@@ -43,27 +64,69 @@ class LogNormalizer:
             'corriente': 'CHECKING'
         }
         
+        self.ip_encoder = IPAddressEncoder()
+        
+        # Running quantile sketches of the numeric columns for incremental normalization
+        self.sketch_store = sketch_store
+        self.sketches: Dict[str, QuantileSketch] = sketch_store.load() if sketch_store else {}
+        
+        # Time, frame size and (when tracemalloc is tracing) peak memory of each stage of the last run
+        self.stage_stats: Dict[str, Dict[str, float]] = {}
+        
+        self.schema = dict(MERGED_SCHEMA if schema is None else schema)
+        
     def normalize_ip(self, df: pd.DataFrame, ip_col: str = 'ip_address') -> pd.DataFrame:
         """
-        Normalize IP addresses to standard format.
+        Normalize IP addresses to integers.
+        
+        IPv4 addresses become a UInt32 column (4 bytes per row instead of a
+        Python string); IPv6 addresses, if any, go to a separate column of
+        packed 16-byte values named after the IP column with IPV6_SUFFIX.
+        Canonical strings are rebuilt with format_ip when needed for output.
         
         Args:
             df (pd.DataFrame): Input dataframe
             ip_col (str): Name of IP address column
             
         Returns:
-            pd.DataFrame: DataFrame with normalized IPs
+            pd.DataFrame: DataFrame with encoded IPs
         """
         try:
-            # Ensure IP addresses are in standard format (no leading zeros)
-            df[ip_col] = df[ip_col].apply(
-                lambda x: '.'.join(str(int(i)) for i in x.split('.'))
-            )
+            if ip_col not in df.columns or isinstance(df[ip_col].dtype, pd.UInt32Dtype):
+                return df
+                
+            v4, v6 = self.ip_encoder.encode(df[ip_col])
+            df[ip_col] = pd.Series(v4, index=df.index)
+            if v6 is not None:
+                df[f'{ip_col}{self.IPV6_SUFFIX}'] = v6
             return df
         except Exception as e:
             logger.error(f"Error normalizing IPs: {str(e)}")
             raise
             
+    def format_ip(self, df: pd.DataFrame, ip_col: str = 'ip_address') -> pd.DataFrame:
+        """
+        Restore canonical IP address strings, e.g. before writing or serving rows.
+        
+        Args:
+            df (pd.DataFrame): Dataframe with IPs encoded by normalize_ip
+            ip_col (str): Name of IP address column
+            
+        Returns:
+            pd.DataFrame: Copy with IPv4 and IPv6 addresses as strings in ip_col
+        """
+        try:
+            if ip_col not in df.columns or not isinstance(df[ip_col].dtype, pd.UInt32Dtype):
+                return df
+                
+            v6_col = f'{ip_col}{self.IPV6_SUFFIX}'
+            v6 = df[v6_col] if v6_col in df.columns else None
+            ips = self.ip_encoder.decode(df[ip_col], v6)
+            return df.drop(columns=[v6_col], errors='ignore').assign(**{ip_col: ips})
+        except Exception as e:
+            logger.error(f"Error formatting IPs: {str(e)}")
+            raise
+            
     def normalize_timestamps(
         self,
         df: pd.DataFrame,
@@ -81,13 +144,56 @@ class LogNormalizer:
         """
         try:
             for col in timestamp_cols:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col]).dt.tz_localize('UTC')
+                if col not in df.columns:
+                    continue
+                    
+                # Parsers already emit datetime64 columns; only convert other types
+                series = df[col]
+                if not pd.api.types.is_datetime64_any_dtype(series.dtype):
+                    series = pd.to_datetime(series)
+                    
+                if series.dt.tz is None:
+                    df[col] = series.dt.tz_localize('UTC')
+                elif str(series.dt.tz) != 'UTC':
+                    df[col] = series.dt.tz_convert('UTC')
+                elif series is not df[col]:
+                    df[col] = series
             return df
         except Exception as e:
             logger.error(f"Error normalizing timestamps: {str(e)}")
             raise
             
+    def _remap_categories(self, series: pd.Series, mapping: Dict[str, str]) -> pd.Series:
+        """
+        Map the values of a categorical column by rewriting its categories only.
+        
+        Rows keep their codes, so the cost depends on the number of
+        categories rather than the number of rows. Values missing from the
+        mapping become NaN, as with Series.map.
+        
+        Args:
+            series (pd.Series): Column to map (converted to categorical if needed)
+            mapping (Dict[str, str]): Standard value for each raw value
+            
+        Returns:
+            pd.Series: Categorical column with standard values
+        """
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+            
+        mapped = series.cat.categories.map(lambda value: mapping.get(value, np.nan))
+        categories = mapped.dropna().unique().sort_values()
+        
+        # Old code -> new code; several raw values may share a standard value
+        code_map = np.append(categories.get_indexer(mapped), -1)
+        codes = code_map[series.cat.codes.to_numpy()]
+        
+        return pd.Series(
+            pd.Categorical.from_codes(codes, categories=categories),
+            index=series.index,
+            name=series.name
+        )
+        
     def normalize_categorical(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Normalize categorical fields to standard values.
@@ -101,19 +207,19 @@ class LogNormalizer:
         try:
             # Normalize modules
             if 'module' in df.columns:
-                df['module'] = df['module'].map(self.module_mapping)
+                df['module'] = self._remap_categories(df['module'], self.module_mapping)
                 
             # Normalize operations
             if 'operation' in df.columns:
-                df['operation'] = df['operation'].map(self.operation_mapping)
+                df['operation'] = self._remap_categories(df['operation'], self.operation_mapping)
                 
             # Normalize status
             if 'status' in df.columns:
-                df['status'] = df['status'].map(self.status_mapping)
+                df['status'] = self._remap_categories(df['status'], self.status_mapping)
                 
             # Normalize account types
             if 'account_type' in df.columns:
-                df['account_type'] = df['account_type'].map(self.account_mapping)
+                df['account_type'] = self._remap_categories(df['account_type'], self.account_mapping)
                 
             return df
         except Exception as e:
@@ -123,46 +229,177 @@ class LogNormalizer:
     def normalize_numeric(
         self,
         df: pd.DataFrame,
-        numeric_cols: List[str]
+        numeric_cols: List[str],
+        keep_raw: bool = False,
+        sketches: Optional[Dict[str, QuantileSketch]] = None
     ) -> pd.DataFrame:
         """
         Normalize numeric fields (scaling, handling outliers).
         
+        Values outside the IQR fences are capped at the fences. Quartiles
+        are the exact quantiles of this frame, or are read from the given
+        quantile sketches of a whole stream or set of partitions. Whether each
+        row was capped is stored as one bit per column in OUTLIER_FLAGS, in
+        the order recorded in df.attrs['outlier_columns']; is_outlier reads
+        it back.
+        
         Args:
             df (pd.DataFrame): Input dataframe
             numeric_cols (List[str]): List of numeric column names
+            keep_raw (bool): Also keep the uncapped values in `{col}_raw` columns
+            sketches (Dict[str, QuantileSketch], optional): Sketches by column to read
+                the quartiles from instead of computing them from this frame
             
         Returns:
             pd.DataFrame: DataFrame with normalized numeric values
         """
         try:
-            for col in numeric_cols:
-                if col in df.columns:
-                    # Handle outliers using IQR method
-                    Q1 = df[col].quantile(0.25)
-                    Q3 = df[col].quantile(0.75)
-                    IQR = Q3 - Q1
-                    lower = Q1 - 1.5 * IQR
-                    upper = Q3 + 1.5 * IQR
-                    
-                    # Cap outliers at boundaries
-                    df[f'{col}_raw'] = df[col].copy()  # Keep raw values
-                    df[col] = df[col].clip(lower=lower, upper=upper)
-                    
-                    # Add outlier flag
-                    df[f'{col}_is_outlier'] = (
-                        (df[f'{col}_raw'] < lower) | (df[f'{col}_raw'] > upper)
-                    )
-                    
+            columns = [col for col in numeric_cols if col in df.columns]
+            if len(columns) > 64:
+                raise ValueError(f"At most 64 numeric columns can be flagged, got {len(columns)}")
+                
+            flag_type = next(t for t in self.OUTLIER_FLAG_TYPES if np.iinfo(t).bits >= len(columns))
+            flags = np.zeros(len(df), dtype=flag_type)
+            
+            for bit, col in enumerate(columns):
+                values = df[col]
+                
+                # Handle outliers using IQR method; the whole column is in memory
+                # unless sketches of a larger stream or partition set are given
+                if sketches is not None and col in sketches:
+                    Q1, Q3 = sketches[col].quantiles([0.25, 0.75])
+                else:
+                    Q1, Q3 = values.quantile([0.25, 0.75])
+                IQR = Q3 - Q1
+                lower = Q1 - 1.5 * IQR
+                upper = Q3 + 1.5 * IQR
+                
+                outliers = ((values < lower) | (values > upper)).to_numpy(dtype=bool)
+                flags |= outliers.astype(flag_type) << flag_type(bit)
+                
+                # Cap outliers at boundaries
+                if keep_raw:
+                    df[f'{col}_raw'] = values
+                df[col] = values.clip(lower=lower, upper=upper)
+                
+            df[self.OUTLIER_FLAGS] = flags
+            df.attrs['outlier_columns'] = columns
             return df
         except Exception as e:
             logger.error(f"Error normalizing numeric fields: {str(e)}")
             raise
             
+    def sketch_numeric(self, df: pd.DataFrame, numeric_cols: List[str]) -> Dict[str, QuantileSketch]:
+        """
+        Build quantile sketches of the numeric columns of a frame, e.g. of one partition.
+        
+        Partition sketches combine with merge_sketches into the sketches of
+        all partitions, which normalize_numeric then takes to cap every
+        partition with the same bounds.
+        
+        Args:
+            df (pd.DataFrame): Input dataframe
+            numeric_cols (List[str]): List of numeric column names
+            
+        Returns:
+            Dict[str, QuantileSketch]: Sketch of each column present
+        """
+        return {col: QuantileSketch().update(df[col]) for col in numeric_cols if col in df.columns}
+        
+    def update_sketches(self, df: pd.DataFrame, numeric_cols: List[str]) -> None:
+        """
+        Add a chunk of rows to the running sketches and persist them.
+        
+        Args:
+            df (pd.DataFrame): New rows, e.g. a micro-batch of merged records
+            numeric_cols (List[str]): List of numeric column names
+        """
+        try:
+            for col, sketch in self.sketch_numeric(df, numeric_cols).items():
+                if col in self.sketches:
+                    self.sketches[col].merge(sketch)
+                else:
+                    self.sketches[col] = sketch
+            if self.sketch_store is not None:
+                self.sketch_store.save(self.sketches)
+        except Exception as e:
+            logger.error(f"Error updating quantile sketches: {str(e)}")
+            raise
+            
+    def is_outlier(self, df: pd.DataFrame, col: str) -> pd.Series:
+        """
+        Read the outlier flag of a numeric column from OUTLIER_FLAGS.
+        
+        Args:
+            df (pd.DataFrame): Dataframe normalized by normalize_numeric
+            col (str): Numeric column name
+            
+        Returns:
+            pd.Series: Whether each row's value was outside the IQR fences
+        """
+        columns = df.attrs.get('outlier_columns', [])
+        if col not in columns:
+            raise KeyError(f"No outlier flags for column: {col}")
+            
+        bit = df[self.OUTLIER_FLAGS].dtype.type(columns.index(col))
+        flags = df[self.OUTLIER_FLAGS].to_numpy()
+        return pd.Series((flags >> bit) & 1 == 1, index=df.index, name=f'{col}_is_outlier')
+        
+    def _run_stage(
+        self,
+        name: str,
+        stage: Callable[..., pd.DataFrame],
+        df: pd.DataFrame,
+        *args,
+        schema: Dict[str, str]
+    ) -> pd.DataFrame:
+        """
+        Run a normalization stage, record its time, frame size and peak memory,
+        and check its output.
+        
+        Peak memory is only measured while tracemalloc is tracing, e.g. in
+        benchmarks, as tracing slows everything down.
+        
+        Args:
+            name (str): Stage name
+            stage (Callable): Stage method taking the dataframe first
+            df (pd.DataFrame): Input dataframe
+            *args: Further stage arguments
+            schema (Dict[str, str]): Column kinds the stage output must have, where present
+            
+        Returns:
+            pd.DataFrame: Stage output
+            
+        Raises:
+            SchemaError: If the stage left a column of another kind, e.g. numbers as objects
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            current, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        
+        df = validate_frame(stage(df, *args), schema, f"normalizing {name}", required=False)
+        
+        stats = {
+            'seconds': time.perf_counter() - start,
+            'frame_bytes': int(df.memory_usage(index=False).sum())
+        }
+        if tracing:
+            stats['peak_bytes'] = tracemalloc.get_traced_memory()[1] - current
+        self.stage_stats[name] = stats
+        
+        peak = f", peak +{stats['peak_bytes'] / 1e6:,.1f} MB" if tracing else ""
+        logger.info(f"Normalized {name} in {stats['seconds']:.2f}s (frame {stats['frame_bytes'] / 1e6:,.1f} MB{peak})")
+        return df
+        
     def normalize_dataframe(
         self,
         df: pd.DataFrame,
-        numeric_cols: Optional[List[str]] = None
+        numeric_cols: Optional[List[str]] = None,
+        inplace: bool = False,
+        keep_raw: bool = False,
+        incremental: bool = False
     ) -> pd.DataFrame:
         """
         Apply all normalizations to a dataframe.
@@ -170,27 +407,46 @@ class LogNormalizer:
         Args:
             df (pd.DataFrame): Input dataframe
             numeric_cols (List[str], optional): List of numeric columns to normalize
+            inplace (bool): Normalize the columns of df itself instead of a copy,
+                for callers that do not use the raw frame afterwards
+            keep_raw (bool): Keep uncapped numeric values in `{col}_raw` columns
+            incremental (bool): Treat df as new rows of a stream: add them to the running
+                sketches and cap outliers with the bounds of everything seen so far
             
         Returns:
             pd.DataFrame: Fully normalized DataFrame
         """
         try:
             # Make a copy to avoid modifying original
-            df = df.copy()
+            if not inplace:
+                df = df.copy()
+            self.stage_stats = {}
+            
+            # Column kinds expected after each stage, starting from the input's
+            schema = dict(self.schema)
+            validate_frame(df, schema, 'merge', required=False)
             
             # Normalize timestamps
             timestamp_cols = [col for col in df.columns if 'timestamp' in col.lower()]
-            df = self.normalize_timestamps(df, timestamp_cols)
+            df = self._run_stage('timestamps', self.normalize_timestamps, df, timestamp_cols, schema=schema)
             
             # Normalize IP addresses
-            df = self.normalize_ip(df)
+            if 'ip_address' in schema:
+                schema['ip_address'] = 'uint32'
+            df = self._run_stage('ip', self.normalize_ip, df, schema=schema)
             
             # Normalize categorical fields
-            df = self.normalize_categorical(df)
+            df = self._run_stage('categorical', self.normalize_categorical, df, schema=schema)
             
             # Normalize numeric fields if specified
             if numeric_cols:
-                df = self.normalize_numeric(df, numeric_cols)
+                sketches = None
+                if incremental:
+                    self.update_sketches(df, numeric_cols)
+                    sketches = self.sketches
+                schema.update({col: 'numeric' for col in numeric_cols})
+                schema[self.OUTLIER_FLAGS] = 'uint'
+                df = self._run_stage('numeric', self.normalize_numeric, df, numeric_cols, keep_raw, sketches, schema=schema)
                 
             return df
             
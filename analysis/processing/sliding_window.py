@@ -0,0 +1,376 @@
+"""
+Sliding time windows of latencies with amortized O(1) updates, for batch and live trends.
+"""
+from collections import deque
+from typing import Deque, Dict, Hashable, Optional, Tuple
+import math
+import numpy as np
+import pandas as pd
+
+from utils.logger import setup_logger
+from data_ingestion.schema import validate_frame
+from data_ingestion.timestamps import NAT, epoch_nanos
+
+logger = setup_logger('sliding_window')
+
+TIME_COLUMN = 'timestamp_secu'
+
+
+def _window_nanos(window: str) -> int:
+    """Length of a time window in nanoseconds, e.g. of '5min'."""
+    nanos = pd.Timedelta(window).value
+    if nanos <= 0:
+        raise ValueError(f"Window must be a positive duration, got {window}")
+    return nanos
+
+
+def _indicators(mean: np.ndarray, std: np.ndarray, change: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trend and volatility columns: the change in rolling mean since the
+    group's previous event and the rolling std over the rolling mean, 0
+    where undefined.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = std / mean
+    trend = np.nan_to_num(change, nan=0.0, posinf=np.inf, neginf=-np.inf)
+    return trend, np.nan_to_num(volatility, nan=0.0, posinf=np.inf, neginf=-np.inf)
+
+
+class SlidingWindow:
+    """
+    Mean, std and max of one stream of latencies over a time-based sliding window.
+    
+    The window at an event holds the stream's values timed in (t - window, t],
+    as pandas time-based rolling holds them. Running totals of the values
+    and of their squares are kept, and the totals reached before each value
+    still in the window sit in a deque, so the window's sums are the
+    difference of two totals; the max is the head of a deque of the window's
+    values in decreasing order. Each value enters and leaves each deque
+    once, so updates are amortized O(1) however long the window. Values are
+    offset by the stream's first value before summing, which keeps the
+    variance of steady latencies from cancelling out.
+    """
+    
+    def __init__(self, window: str):
+        """
+        Initialize an empty window.
+        
+        Args:
+            window (str): Window length, e.g. '5min'
+        """
+        self.window_nanos = _window_nanos(window)
+        self.newest: Optional[int] = None
+        self._reference: Optional[float] = None
+        self._count = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        
+        # (time, count, sum, sum of squares) totals before each value in the window
+        self._totals: Deque[Tuple[int, int, float, float]] = deque()
+        
+        # (time, value) of the window's values, decreasing
+        self._maxima: Deque[Tuple[int, float]] = deque()
+        
+    def push(self, timestamp: int, value: float) -> Tuple[float, float, float]:
+        """
+        Add an event and read the window ending at it.
+        
+        Args:
+            timestamp (int): Event time in epoch nanoseconds, never before the last one
+            value (float): Latency; NaN moves the window without adding a value
+            
+        Returns:
+            Tuple[float, float, float]: Mean, std (one degree of freedom) and max
+                of the window; NaN without values (std: below two values)
+                
+        Raises:
+            ValueError: If the event is older than the previous one
+        """
+        if self.newest is not None and timestamp < self.newest:
+            raise ValueError(f"Event at {timestamp} is older than the newest event at {self.newest}")
+        self.newest = timestamp
+        
+        if not math.isnan(value):
+            if self._reference is None:
+                self._reference = value
+            shifted = value - self._reference
+            self._totals.append((timestamp, self._count, self._sum, self._sumsq))
+            self._count += 1
+            self._sum += shifted
+            self._sumsq += shifted * shifted
+            while self._maxima and self._maxima[-1][1] <= value:
+                self._maxima.pop()
+            self._maxima.append((timestamp, value))
+            
+        start = timestamp - self.window_nanos
+        while self._totals and self._totals[0][0] <= start:
+            self._totals.popleft()
+        while self._maxima and self._maxima[0][0] <= start:
+            self._maxima.popleft()
+        if not self._totals:
+            return math.nan, math.nan, math.nan
+            
+        _, count, total, squares = self._totals[0]
+        n = self._count - count
+        window_sum = self._sum - total
+        window_squares = self._sumsq - squares
+        mean = self._reference + window_sum / n
+        std = math.sqrt(max(window_squares - window_sum * window_sum / n, 0.0) / (n - 1)) if n > 1 else math.nan
+        return mean, std, self._maxima[0][1]
+
+
+def _window_stats(times: np.ndarray, values: np.ndarray, window_nanos: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mean and std of the window ending at each event of one time-sorted stream.
+    
+    Computes what SlidingWindow.push returns, with the same floating-point
+    operations: running totals are cumulative sums and the totals before
+    the window's first value are found by binary search.
+    
+    Args:
+        times (np.ndarray): Event times in epoch nanoseconds, sorted
+        values (np.ndarray): Latencies (NaN for events without one)
+        window_nanos (int): Window length in nanoseconds
+        
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Mean and std of each event's window
+    """
+    valid = ~np.isnan(values)
+    if not valid.any():
+        return np.full(len(values), np.nan), np.full(len(values), np.nan)
+        
+    shifted = values[valid] - values[valid][0]
+    sums = np.concatenate([[0.0], np.cumsum(shifted)])
+    squares = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+    end = np.cumsum(valid)
+    start = np.searchsorted(times[valid], times - window_nanos, side='right')
+    
+    n = end - start
+    with np.errstate(divide='ignore', invalid='ignore'):
+        window_sum = sums[end] - sums[start]
+        window_squares = squares[end] - squares[start]
+        mean = np.where(n > 0, values[valid][0] + window_sum / n, np.nan)
+        variance = np.maximum(window_squares - window_sum * window_sum / n, 0.0) / (n - 1)
+        std = np.where(n > 1, np.sqrt(variance), np.nan)
+    return mean, std
+
+
+def rolling_trends(
+    df: pd.DataFrame,
+    latency_col: str,
+    window: str = '5min',
+    by: Optional[str] = 'module'
+) -> pd.DataFrame:
+    """
+    Rolling latency statistics and trend indicators at each event, in batch.
+    
+    Events are taken in time order (ties in row order) and each is given
+    the mean, std and max of the latencies of its group (e.g. its module)
+    over the time window ending at it, the change in that mean since the
+    group's previous event (trend) and the window's std over its mean
+    (volatility). Results are those of TrendTracker fed the same events.
+    
+    Args:
+        df (pd.DataFrame): Merged rows with timestamp_secu and the latency column
+        latency_col (str): Latency column, e.g. 'e2e_latency'
+        window (str): Window length, e.g. '5min'
+        by (str, optional): Column keeping a window per value, or None for one window
+        
+    Returns:
+        pd.DataFrame: timestamp, the `by` column, latency, rolling_mean,
+            rolling_std, rolling_max, trend and volatility, by event in time order
+    """
+    validate_frame(df, {TIME_COLUMN: 'datetime', latency_col: 'numeric'}, 'trend input')
+    window_nanos = _window_nanos(window)
+    
+    df = df.sort_values(TIME_COLUMN, kind='stable')
+    timed = df[TIME_COLUMN].notna().to_numpy()
+    if not timed.all():
+        logger.warning(f"Trends skipped {len(df) - int(timed.sum())} rows without {TIME_COLUMN}")
+        df = df[timed]
+        
+    times = epoch_nanos(df[TIME_COLUMN])
+    values = df[latency_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    mean = np.full(len(df), np.nan)
+    std = np.full(len(df), np.nan)
+    maximum = np.full(len(df), np.nan)
+    change = np.full(len(df), np.nan)
+    
+    # A max involves no arithmetic, so pandas' rolling max equals the deque's
+    codes = pd.factorize(df[by], use_na_sentinel=False)[0] if by else np.zeros(len(df), dtype=np.int64)
+    order = np.argsort(codes, kind='stable')
+    bounds = np.flatnonzero(np.diff(codes[order], prepend=-1, append=-1))
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        rows = order[first:last]
+        mean[rows], std[rows] = _window_stats(times[rows], values[rows], window_nanos)
+        maximum[rows] = pd.Series(values[rows], index=pd.to_datetime(times[rows])).rolling(pd.Timedelta(window)).max()
+        change[rows[1:]] = np.diff(mean[rows])
+        
+    trends = pd.DataFrame(index=df.index)
+    trends['timestamp'] = df[TIME_COLUMN]
+    if by:
+        trends[by] = df[by]
+    trends['latency'] = values
+    trends['rolling_mean'] = mean
+    trends['rolling_std'] = std
+    trends['rolling_max'] = maximum
+    trends['trend'], trends['volatility'] = _indicators(mean, std, change)
+    return trends
+
+
+class TrendTracker:
+    """
+    Live counterpart of rolling_trends, fed merged rows in micro-batches.
+    
+    Each group (e.g. module) keeps a SlidingWindow, so every event costs
+    amortized O(1) instead of a rolling pass over the history. Rows wait
+    until the watermark, `watermark_delay` behind the newest event time
+    seen, passes them, and are emitted in time order: with a delay of 0
+    each batch is emitted as it arrives; a feed whose events may come out
+    of order, such as StreamingMerger's, needs a delay covering the
+    disorder (e.g. STREAM_WATERMARK_DELAY). Events older than their
+    group's last emitted one are dropped and counted in `late`. Over the
+    rows it emits, the results are identical to rolling_trends on the same
+    rows, dtypes included: timestamps keep the input's time zone (or lack
+    of one) and a categorical `by` column stays categorical.
+    """
+    
+    def __init__(
+        self,
+        latency_col: str,
+        window: str = '5min',
+        by: Optional[str] = 'module',
+        watermark_delay: float = 0.0
+    ):
+        """
+        Initialize the tracker.
+        
+        Args:
+            latency_col (str): Latency column, e.g. 'e2e_latency'
+            window (str): Window length, e.g. '5min'
+            by (str, optional): Column keeping a window per value, or None for one window
+            watermark_delay (float): Seconds an event may lag behind the newest event time
+        """
+        self.latency_col = latency_col
+        self.window = window
+        self.by = by
+        self.watermark_delay = pd.Timedelta(seconds=watermark_delay).value
+        
+        # Fail on a bad window before any event arrives
+        _window_nanos(window)
+        
+        self._windows: Dict[Hashable, SlidingWindow] = {}
+        self._means: Dict[Hashable, float] = {}
+        
+        # Times, keys and latencies of rows waiting for the watermark
+        self._times = np.empty(0, dtype=np.int64)
+        self._keys = np.empty(0, dtype=object)
+        self._latencies = np.empty(0, dtype=np.float64)
+        self._newest: Optional[int] = None
+        self.late = 0
+        
+        # Time zone of the event times and categories of the `by` column, kept in the output
+        self._tz = None
+        self._key_dtype: Optional[pd.CategoricalDtype] = None
+        
+    def process(self, events: pd.DataFrame) -> pd.DataFrame:
+        """
+        Add a micro-batch of merged rows and emit the rows the watermark has passed.
+        
+        Args:
+            events (pd.DataFrame): Rows with timestamp_secu, the latency and `by` columns
+                
+        Returns:
+            pd.DataFrame: Trend rows, as rolling_trends gives them (index reset)
+        """
+        try:
+            validate_frame(events, {TIME_COLUMN: 'datetime', self.latency_col: 'numeric'}, 'trend input')
+            self._tz = events[TIME_COLUMN].dt.tz
+            if self.by and isinstance(events[self.by].dtype, pd.CategoricalDtype):
+                categories = events[self.by].cat.categories
+                if self._key_dtype is not None:
+                    categories = self._key_dtype.categories.append(categories.difference(self._key_dtype.categories))
+                self._key_dtype = pd.CategoricalDtype(categories, ordered=events[self.by].cat.ordered)
+                
+            times = epoch_nanos(events[TIME_COLUMN])
+            timed = times != NAT
+            if not timed.all():
+                logger.warning(f"Trends skipped {len(events) - int(timed.sum())} rows without {TIME_COLUMN}")
+                
+            if timed.any():
+                keys = events[self.by].to_numpy(dtype=object) if self.by else np.full(len(events), None, dtype=object)
+                keys[pd.isna(keys)] = None
+                latencies = events[self.latency_col].to_numpy(dtype=np.float64, na_value=np.nan)
+                self._times = np.concatenate([self._times, times[timed]])
+                self._keys = np.concatenate([self._keys, keys[timed]])
+                self._latencies = np.concatenate([self._latencies, latencies[timed]])
+                newest = int(times[timed].max())
+                self._newest = newest if self._newest is None else max(self._newest, newest)
+            return self._emit(final=False)
+            
+        except Exception as e:
+            logger.error(f"Error processing trend events: {str(e)}")
+            raise
+            
+    def flush(self) -> pd.DataFrame:
+        """
+        Emit every pending row, e.g. at shutdown.
+        
+        Returns:
+            pd.DataFrame: Trend rows
+        """
+        return self._emit(final=True)
+        
+    def _emit(self, final: bool) -> pd.DataFrame:
+        """
+        Run the rows the watermark has passed through their windows.
+        
+        Args:
+            final (bool): Emit everything pending regardless of the watermark
+            
+        Returns:
+            pd.DataFrame: Trend rows in time order
+        """
+        ready = np.ones(len(self._times), dtype=bool)
+        if not final and len(self._times):
+            ready = self._times <= self._newest - self.watermark_delay
+        order = np.flatnonzero(ready)
+        order = order[np.argsort(self._times[order], kind='stable')]
+        times, keys, latencies = self._times[order], self._keys[order], self._latencies[order]
+        self._times, self._keys, self._latencies = self._times[~ready], self._keys[~ready], self._latencies[~ready]
+        
+        emitted = np.ones(len(times), dtype=bool)
+        stats = []
+        for i, (timestamp, key, latency) in enumerate(zip(times.tolist(), keys.tolist(), latencies.tolist())):
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = SlidingWindow(self.window)
+            elif timestamp < window.newest:
+                emitted[i] = False
+                continue
+                
+            mean, std, maximum = window.push(timestamp, latency)
+            stats.append((mean, std, maximum, mean - self._means.get(key, math.nan)))
+            self._means[key] = mean
+            
+        self.late += int(len(emitted) - emitted.sum())
+        stats = np.array(stats, dtype=np.float64).reshape(-1, 4)
+        trend, volatility = _indicators(stats[:, 0], stats[:, 1], stats[:, 3])
+        
+        # Same dtypes as rolling_trends: the input's time zone (or none) and categories
+        timestamps = pd.to_datetime(times[emitted])
+        if self._tz is not None:
+            timestamps = timestamps.tz_localize('UTC').tz_convert(self._tz)
+        keys = keys[emitted]
+        if self._key_dtype is not None:
+            keys = pd.Categorical(keys, dtype=self._key_dtype)
+        return pd.DataFrame({
+            'timestamp': timestamps,
+            **({self.by: keys} if self.by else {}),
+            'latency': latencies[emitted],
+            'rolling_mean': stats[:, 0],
+            'rolling_std': stats[:, 1],
+            'rolling_max': stats[:, 2],
+            'trend': trend,
+            'volatility': volatility
+        })
@@ -0,0 +1,105 @@
+"""
+Tests of the parsed-source cache on copies of the bundled logs.
+"""
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from data_ingestion.cache import ParsedCache
+from data_ingestion.checkpoint import CheckpointStore
+from data_ingestion.merger import LogMerger
+from data_ingestion.sources import SOURCES
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+@pytest.fixture
+def logs(tmp_path):
+    """Copies of the bundled logs, by source name."""
+    paths = {}
+    for name, path in [('secucheck', SECUCHECK_LOGS), ('midflow', MIDFLOW_LOGS), ('corebank', COREBANK_LOGS)]:
+        paths[name] = str(tmp_path / os.path.basename(path))
+        shutil.copyfile(path, paths[name])
+    return paths
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParsedCache(str(tmp_path / 'cache'), max_bytes=1 << 30)
+
+
+def merger(logs, cache, **options):
+    return LogMerger(logs['secucheck'], logs['midflow'], logs['corebank'], cache=cache, **options)
+
+
+def append_line(path, old_id, new_id):
+    """Append a copy of the first line of a log with another transaction ID."""
+    with open(path) as f:
+        line = f.readline()
+    with open(path, 'a') as f:
+        f.write(line.replace(old_id, new_id))
+
+
+@pytest.mark.parametrize('name', ['secucheck', 'midflow', 'corebank'])
+def test_parser_output_round_trips(logs, cache, name):
+    frames = SOURCES[name].parse(logs[name])
+    frames = frames if isinstance(frames, tuple) else (frames,)
+    
+    for entry, frame in zip(SOURCES[name].cache_entries, frames):
+        cache.store(logs[name], entry, frame)
+        pd.testing.assert_frame_equal(cache.load(logs[name], entry), frame)
+
+
+def test_changed_file_invalidates_entry(logs, cache):
+    path = logs['corebank']
+    df, _ = SOURCES['corebank'].split_result(SOURCES['corebank'].parse(path))
+    cache.store(path, 'corebank', df)
+    fingerprint = cache.fingerprint(path)
+    
+    # Same size and content, new mtime
+    os.utime(path, ns=(fingerprint['mtime_ns'] + 10 ** 9, fingerprint['mtime_ns'] + 10 ** 9))
+    assert cache.load(path, 'corebank') is None
+    
+    cache.store(path, 'corebank', df)
+    append_line(path, 'txn-0000', 'txn-9000')
+    assert cache.fingerprint(path) != fingerprint
+    assert cache.load(path, 'corebank') is None
+
+
+def test_merge_reads_unchanged_sources_from_cache(logs, cache, monkeypatch):
+    first = merger(logs, cache).merge_logs()
+    append_line(logs['corebank'], 'txn-0000', 'txn-9000')
+    
+    # Only the changed source is parsed again
+    for name in ['secucheck', 'midflow']:
+        monkeypatch.setattr(SOURCES[name], 'parse', lambda *args: pytest.fail('parsed a cached source'))
+    second = merger(logs, cache).merge_logs()
+    
+    pd.testing.assert_frame_equal(second, first)
+    monkeypatch.undo()
+    pd.testing.assert_frame_equal(second, merger(logs, None).merge_logs())
+
+
+def test_tail_cache_resumes_in_a_new_merger(logs, cache, tmp_path):
+    store = CheckpointStore(str(tmp_path / 'checkpoints.json'))
+    merger(logs, cache, checkpoint_store=store).merge_logs()
+    append_line(logs['corebank'], 'txn-0000', 'txn-9000')
+    
+    # A new merger, as after a restart, extends the cached rows with the appended line
+    resumed = merger(logs, cache, checkpoint_store=store).merge_logs()
+    core_df = cache.load_tail(logs['corebank'], 'corebank_tail')[0]
+    
+    assert core_df['transaction_id'].iloc[-1] == 'txn-9000'
+    pd.testing.assert_frame_equal(core_df, SOURCES['corebank'].parse(logs['corebank']))
+    pd.testing.assert_frame_equal(resumed, merger(logs, None).merge_logs())
+
+
+def test_eviction_keeps_the_cache_within_max_bytes(logs, tmp_path):
+    cache = ParsedCache(str(tmp_path / 'small_cache'), max_bytes=1)
+    df = SOURCES['secucheck'].parse(logs['secucheck'])
+    
+    cache.store(logs['secucheck'], 'secucheck', df)
+    
+    assert cache.load(logs['secucheck'], 'secucheck') is None
+    assert os.listdir(cache.cache_dir) == []
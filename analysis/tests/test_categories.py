@@ -0,0 +1,44 @@
+"""
+Tests of dictionary-encoded columns from parsing to the merged data.
+"""
+import pandas as pd
+
+from data_ingestion.categories import CATEGORY_SETS, concat_frames, to_categorical
+from data_ingestion.merger import LogMerger
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+def test_unexpected_values_become_extra_categories(caplog):
+    values = pd.Series(['web', 'kiosk', 'api', None])
+    
+    encoded = to_categorical(values, 'module')
+    
+    assert list(encoded.cat.categories) == ['api', 'kiosk', 'mobile', 'web']
+    assert encoded.astype(object).where(encoded.notna(), None).tolist() == ['web', 'kiosk', 'api', None]
+    assert 'kiosk' in caplog.text
+
+
+def test_concatenation_keeps_data_categories():
+    first = pd.DataFrame({'user_id': to_categorical(pd.Series(['user1', 'user3']), 'user_id')})
+    second = pd.DataFrame({'user_id': to_categorical(pd.Series(['user2']), 'user_id')})
+    
+    combined = concat_frames([first, second])
+    
+    assert list(combined['user_id'].cat.categories) == ['user1', 'user2', 'user3']
+    assert combined['user_id'].tolist() == ['user1', 'user3', 'user2']
+
+
+def test_merged_columns_are_categorical_with_plain_group_order():
+    merged = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+    
+    for col, categories in CATEGORY_SETS.items():
+        assert isinstance(merged[col].dtype, pd.CategoricalDtype), col
+        if categories is not None:
+            assert list(merged[col].cat.categories) == categories
+            
+    # Grouping by the codes lists groups and values as grouping by the strings does
+    for col in ['module', 'operation', 'status']:
+        by_codes = merged.groupby(col, observed=True)['e2e_latency'].mean()
+        by_strings = merged.assign(**{col: merged[col].astype(object)}).groupby(col)['e2e_latency'].mean()
+        assert by_codes.index.astype(object).tolist() == by_strings.index.tolist()
+        assert by_codes.tolist() == by_strings.tolist()
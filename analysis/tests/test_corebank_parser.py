@@ -0,0 +1,144 @@
+"""
+Tests of CorebankParser bulk parsing and tail mode on copies of the bundled CoreBank log.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from data_ingestion.checkpoint import CheckpointStore
+from data_ingestion.corebank_parser import CorebankParser
+from data_ingestion.merger import LogMerger
+from data_ingestion.sharding import compute_byte_ranges
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+def expected_ids(lines):
+    """Transaction ids of raw core banking log lines."""
+    return CorebankParser().parse_text_bulk(b''.join(lines).decode('utf-8'))[0]['transaction_id'].tolist()
+
+
+@pytest.fixture
+def lines():
+    with open(COREBANK_LOGS, 'rb') as f:
+        return f.read().splitlines(keepends=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return CheckpointStore(str(tmp_path / 'checkpoints.json'))
+
+
+def test_bulk_parse_matches_line_by_line(tmp_path, lines):
+    malformed = [
+        b'garbage line\n',
+        b'\n',
+        b'2025-05-13 08:01:00 INFO [web] user1@10.0.0.1 Transacci\xc3\xb3n ejecutada (transaction: txn-9998, tipo: retirar)\n'
+    ]
+    path = tmp_path / 'core.log'
+    path.write_bytes(b''.join(lines[:300] + malformed + lines[300:]))
+    parser = CorebankParser(str(path))
+    
+    bulk, report = parser.parse_file_bulk()
+    
+    pd.testing.assert_frame_equal(bulk, parser.parse_file())
+    assert report['parsed'] == len(lines) and report['rejected'] == 2
+    assert report['rejected_sample'][0] == 'garbage line'
+
+
+def test_bulk_parse_rejects_invalid_timestamps(lines):
+    invalid = lines[0].replace(b'08:00:10', b'08:00:99')
+    
+    df, report = CorebankParser().parse_text_bulk(b''.join(lines[:10] + [invalid]).decode('utf-8'))
+    
+    assert df['transaction_id'].tolist() == expected_ids(lines[:10])
+    assert report['rejected'] == 1 and report['rejected_sample'] == [invalid.decode('utf-8').rstrip()]
+
+
+@pytest.mark.parametrize('num_shards', [2, 3, 7, 64])
+def test_sharded_parse_matches_bulk(tmp_path, lines, num_shards):
+    # A malformed line in the middle and no newline at the end of the file
+    path = tmp_path / 'core.log'
+    path.write_bytes(b''.join(lines[:400] + [b'garbage line\n'] + lines[400:]).rstrip(b'\n'))
+    parser = CorebankParser(str(path))
+    
+    df, report = parser.parse_file_sharded(num_shards)
+    expected, expected_report = parser.parse_file_bulk()
+    
+    pd.testing.assert_frame_equal(df, expected)
+    assert report['parsed'] == expected_report['parsed'] and report['rejected'] == 1
+    assert len(report['shards']) == min(num_shards, len(lines) + 1)
+    
+    # Every range starts at the start of a line
+    data = path.read_bytes()
+    assert all(start == 0 or data[start - 1:start] == b'\n' for start, _ in compute_byte_ranges(str(path), num_shards))
+
+
+def test_tail_reads_blocks_and_leaves_partial_line(tmp_path, store, lines):
+    path = tmp_path / 'core.log'
+    path.write_bytes(b''.join(lines[:500]) + lines[500].rstrip(b'\n'))
+    parser = CorebankParser(str(path), store)
+    
+    # Blocks of a few lines give the rows of a single read of the file
+    first = parser.parse_new_lines(block_size=1024)
+    expected, _ = CorebankParser(str(path)).parse_text_bulk(b''.join(lines[:500]).decode('utf-8'))
+    pd.testing.assert_frame_equal(first, expected, check_categorical=False)
+    assert store.get(str(path))['offset'] == len(b''.join(lines[:500]))
+    
+    # The line still being written is read once complete
+    with open(path, 'ab') as f:
+        f.write(b'\n' + b''.join(lines[501:600]))
+    second = parser.parse_new_lines(block_size=1024)
+    assert not parser.read_from_start
+    assert second['transaction_id'].tolist() == expected_ids(lines[500:600])
+
+
+def test_truncated_file_replaces_accumulated_rows(tmp_path, store, lines):
+    path = tmp_path / 'core.log'
+    path.write_bytes(b''.join(lines[:600]))
+    merger = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, str(path), checkpoint_store=store)
+    assert len(merger._parse_corebank_tail()) == 600
+    
+    with open(path, 'ab') as f:
+        f.write(b''.join(lines[600:700]))
+    assert len(merger._parse_corebank_tail()) == 700
+    
+    # Rewritten in place, shorter than the checkpointed offset: same inode, new content
+    inode = os.stat(path).st_ino
+    with open(path, 'wb') as f:
+        f.write(b''.join(lines[:300]))
+    assert os.stat(path).st_ino == inode
+    
+    core = merger._parse_corebank_tail()
+    assert core['transaction_id'].tolist() == expected_ids(lines[:300])
+
+
+def test_file_rewritten_past_checkpoint_is_read_from_start(tmp_path, store, lines):
+    path = tmp_path / 'core.log'
+    path.write_bytes(b''.join(lines[:300]))
+    parser = CorebankParser(str(path), store)
+    parser.parse_new_lines()
+    
+    # copytruncate, then more than the consumed bytes written before the next poll
+    with open(path, 'r+b') as f:
+        f.truncate(0)
+        f.write(b''.join(lines[300:800]))
+        
+    rows = parser.parse_new_lines()
+    assert parser.read_from_start
+    assert rows['transaction_id'].tolist() == expected_ids(lines[300:800])
+
+
+def test_checkpoint_without_fingerprint_resumes(tmp_path, store, lines):
+    path = tmp_path / 'core.log'
+    path.write_bytes(b''.join(lines[:300]))
+    parser = CorebankParser(str(path), store)
+    parser.parse_new_lines()
+    # As written before fingerprints were recorded
+    del store.get(str(path))['fingerprint']
+    
+    with open(path, 'ab') as f:
+        f.write(b''.join(lines[300:400]))
+        
+    assert parser.parse_new_lines()['transaction_id'].tolist() == expected_ids(lines[300:400])
+    assert not parser.read_from_start
@@ -0,0 +1,101 @@
+"""
+Tests of the slotted event records against the file parsers.
+"""
+import json
+
+import pandas as pd
+import pytest
+
+from data_ingestion.corebank_parser import CorebankParser
+from data_ingestion.events import CorePostingEvent, Event, MiddlewareEvent, SecurityCheckEvent
+from data_ingestion.midflow_parser import MidflowParser
+from data_ingestion.secucheck_parser import SecucheckParser
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+@pytest.fixture(scope='module')
+def secu_events():
+    parser = SecucheckParser()
+    with open(SECUCHECK_LOGS, encoding='utf-8') as f:
+        return [parser.parse_record(record) for record in json.load(f)]
+
+
+@pytest.fixture(scope='module')
+def mid_events():
+    parser = MidflowParser()
+    with open(MIDFLOW_LOGS, encoding='utf-8') as f:
+        return [parser.parse_line(line) for line in f.readlines()[1:]]
+
+
+@pytest.fixture(scope='module')
+def core_events():
+    parser = CorebankParser()
+    with open(COREBANK_LOGS, encoding='utf-8') as f:
+        return [parser.parse_line(line.strip()) for line in f]
+
+
+def test_events_have_no_instance_dict(secu_events, mid_events, core_events):
+    for event in (secu_events[0], mid_events[0], core_events[0]):
+        assert not hasattr(event, '__dict__')
+        with pytest.raises(AttributeError):
+            event.extra = 1
+
+
+def test_low_cardinality_fields_are_interned(secu_events, mid_events, core_events):
+    # Values parsed from different lines are one shared string object
+    assert len({id(event.module) for event in secu_events}) == len({event.module for event in secu_events})
+    assert len({id(event.operation) for event in mid_events}) == len({event.operation for event in mid_events})
+    assert len({id(event.status) for event in core_events}) == len({event.status for event in core_events})
+
+
+def test_secucheck_events_frame_equals_file_parse(secu_events):
+    events_df = SecucheckParser().build_frame(secu_events)
+    file_df = SecucheckParser(SECUCHECK_LOGS).parse_file()
+    
+    pd.testing.assert_frame_equal(events_df, file_df[events_df.columns])
+
+
+def test_midflow_events_frame_equals_csv_read(mid_events):
+    parser = MidflowParser()
+    
+    pd.testing.assert_frame_equal(parser.build_frame(mid_events), parser._read_chunk(MIDFLOW_LOGS))
+
+
+def test_midflow_paired_events_equal_file_parse(mid_events):
+    parser = MidflowParser()
+    pairs, evicted = parser.pair_events(mid_events)
+    file_pairs, file_orphans = MidflowParser(MIDFLOW_LOGS).parse_file_with_orphans()
+    
+    # The file parse also flushes the requests still pending at the end
+    orphans = parser._concat([evicted, parser._build_orphans(parser._pending)], parser.ORPHAN_COLUMNS)
+    
+    pd.testing.assert_frame_equal(pairs, file_pairs)
+    pd.testing.assert_frame_equal(orphans.reset_index(drop=True), file_orphans.reset_index(drop=True))
+
+
+def test_corebank_events_frame_equals_bulk_parse(core_events):
+    events_df = CorebankParser().build_frame(core_events)
+    bulk_df, _ = CorebankParser(COREBANK_LOGS).parse_file_bulk()
+    
+    pd.testing.assert_frame_equal(events_df, bulk_df)
+
+
+@pytest.mark.parametrize('event_class', [SecurityCheckEvent, MiddlewareEvent, CorePostingEvent])
+def test_empty_batch_keeps_columns(event_class):
+    df = event_class.frame([])
+    
+    expected = [event_class.COLUMN_NAMES.get(field, field) for field in event_class.__slots__]
+    assert df.empty
+    assert list(df.columns) == expected
+
+
+def test_equality_and_repr():
+    line = '2025-05-13 08:00:06,INFO,txn-0000,response,consignar,200,272,user65,198.81.20.19,mobile'
+    event = MidflowParser().parse_line(line)
+    
+    assert event == MidflowParser().parse_line(line + '\n')
+    assert event != MidflowParser().parse_line(line.replace('272', '273'))
+    assert event != object()
+    assert repr(event).startswith("MiddlewareEvent(timestamp='2025-05-13 08:00:06', level='INFO'")
+    assert "latency_ms=272.0" in repr(event)
+    assert isinstance(event, Event)
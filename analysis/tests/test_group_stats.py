@@ -0,0 +1,101 @@
+"""
+Tests of the one-pass grouped statistics against one pandas groupby per statistic.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import processing.group_stats as group_stats
+from benchmarks.bench_group_stats import build_frame, groupby_per_statistic
+from processing.group_stats import grouped_stats, percentile_name
+from processing.latency_analysis import LatencyAnalyzer
+
+DIMENSIONS = [['module'], ['module', 'operation'], ['module', 'operation', 'status']]
+
+
+def groupby_quantiles(df, dimensions, value_col, percentiles):
+    """Percentile columns computed with one pandas groupby quantile each."""
+    valid_df = df[df[value_col].notna()]
+    return pd.DataFrame({
+        percentile_name(p): valid_df.groupby(dimensions, observed=True)[value_col].quantile(p / 100)
+        for p in percentiles
+    })
+
+
+@pytest.fixture(scope='module')
+def frame():
+    return build_frame(20_000)
+
+
+@pytest.fixture
+def text_frame():
+    # Object keys with gaps, a singleton group and ties in the values
+    rng = np.random.default_rng(1)
+    n = 2_000
+    df = pd.DataFrame({
+        'module': rng.choice(['WEB', 'MOBILE', 'API', None], n),
+        'operation': rng.choice(['DEPOSIT', 'TRANSFER'], n),
+        'status': rng.choice(['COMPLETED', 'REJECTED'], n),
+        'e2e_latency': rng.integers(0, 20, n).astype(float)
+    })
+    df.loc[rng.random(n) < 0.1, 'e2e_latency'] = np.nan
+    return pd.concat([df, pd.DataFrame({
+        'module': ['BATCH'], 'operation': ['DEPOSIT'], 'status': ['COMPLETED'], 'e2e_latency': [3.0]
+    })], ignore_index=True)
+
+
+@pytest.mark.parametrize('dimensions', DIMENSIONS)
+def test_categorical_keys_match_groupby(frame, dimensions):
+    expected = groupby_per_statistic(frame, dimensions, 'e2e_latency')
+    
+    pd.testing.assert_frame_equal(grouped_stats(frame, dimensions, 'e2e_latency'), expected)
+
+
+@pytest.mark.parametrize('dimensions', DIMENSIONS)
+def test_text_keys_with_missing_values_match_groupby(text_frame, dimensions):
+    expected = groupby_per_statistic(text_frame, dimensions, 'e2e_latency')
+    result = grouped_stats(text_frame, dimensions, 'e2e_latency')
+    
+    pd.testing.assert_frame_equal(result, expected)
+    assert np.isnan(result['std'].loc['BATCH']).all()
+
+
+@pytest.mark.parametrize('percentiles', [(50,), (0, 25, 75, 100), (90, 99.9)])
+def test_percentiles_match_groupby_quantile(frame, percentiles):
+    dimensions = ['module', 'status']
+    expected = groupby_quantiles(frame, dimensions, 'e2e_latency', percentiles)
+    result = grouped_stats(frame, dimensions, 'e2e_latency', percentiles)
+    
+    pd.testing.assert_frame_equal(result[expected.columns], expected)
+
+
+def test_renumbered_group_codes_match_groupby(frame, monkeypatch):
+    # A tiny bound renumbers the combined codes before every extra key
+    monkeypatch.setattr(group_stats, 'MAX_GROUP_CODE', 4)
+    dimensions = DIMENSIONS[-1]
+    
+    pd.testing.assert_frame_equal(
+        grouped_stats(frame, dimensions, 'e2e_latency'),
+        groupby_per_statistic(frame, dimensions, 'e2e_latency')
+    )
+
+
+def test_no_valid_values_gives_empty_frame(frame):
+    empty = frame.assign(e2e_latency=np.nan)
+    result = grouped_stats(empty, ['module', 'status'], 'e2e_latency')
+    
+    assert result.empty
+    assert list(result.columns) == ['mean', 'median', 'std', 'min', 'max', 'p95', 'p99', 'count']
+    assert result.index.names == ['module', 'status']
+
+
+@pytest.mark.parametrize('dimension', ['module', ['module', 'operation', 'status']])
+def test_analyze_by_dimension_matches_groupby(frame, dimension):
+    dimensions = [dimension] if isinstance(dimension, str) else dimension
+    expected = groupby_per_statistic(frame, dimensions, 'e2e_latency')
+    numeric_cols = ['mean', 'median', 'std', 'min', 'max', 'p95', 'p99']
+    expected[numeric_cols] = expected[numeric_cols].round(3)
+    
+    result = LatencyAnalyzer().analyze_by_dimension(frame, dimension, 'e2e_latency')
+    
+    pd.testing.assert_frame_equal(result, expected)
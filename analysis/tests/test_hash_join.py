@@ -0,0 +1,57 @@
+"""
+Tests of the single-pass and sort-merge transaction joins against four-key pandas merges.
+"""
+import pandas as pd
+import pytest
+
+from benchmarks.bench_hash_join import build_sources, in_key_order, single_pass, sort_merge, two_merges
+from data_ingestion.hash_join import TransactionJoin
+from data_ingestion.sort_merge import SortMergeJoin
+
+KEYS = ['txn_key', 'user_id', 'ip_address', 'module']
+
+
+def values(df):
+    """Column values with missing entries as None, comparable across dtypes."""
+    return {col: df[col].astype(object).where(df[col].notna(), None).tolist() for col in df.columns}
+
+
+@pytest.fixture
+def base():
+    return pd.DataFrame({
+        'transaction_id': ['t1', 't2', 't3', 't4'],
+        'txn_key': [1, 2, 3, 4],
+        'user_id': ['u1', 'u2', 'u3', 'u4'],
+        'ip_address': ['ip1', 'ip2', 'ip3', 'ip4'],
+        'module': ['web', 'web', 'api', 'api']
+    })
+
+
+@pytest.mark.parametrize('join', [single_pass, sort_merge])
+@pytest.mark.parametrize('key_order', [False, True])
+def test_join_matches_pandas_merges(join, key_order):
+    secu, mid, core = build_sources(20_000)
+    if key_order:
+        mid, core = in_key_order(mid), in_key_order(core)
+        
+    assert values(join(secu, mid, core)) == values(two_merges(secu, mid, core))
+
+
+@pytest.mark.parametrize('join', [TransactionJoin, SortMergeJoin])
+def test_inconsistent_matches_are_left_out_and_reported(base, join):
+    # t2 has another user, t3 is repeated: first with another module, then consistent
+    other = pd.DataFrame({
+        'txn_key': [2, 3, 1, 3],
+        'user_id': ['other', 'u3', 'u1', 'u3'],
+        'ip_address': ['ip2', 'ip3', 'ip1', 'ip3'],
+        'module': ['web', 'web', 'web', 'api'],
+        'amount': [20.0, 30.0, 10.0, 31.0]
+    })
+    columns = {'transaction_id': 'base', 'amount': 'other'}
+    
+    joined, mismatches = join().join('base', base, {'other': other}, columns)
+    expected = pd.merge(base, other, on=KEYS, how='left')[list(columns)]
+    
+    assert values(joined) == values(expected)
+    assert values(joined)['amount'] == [10.0, None, 31.0, None]
+    assert mismatches[['transaction_id', 'source', 'mismatched_columns']].values.tolist() == [['t2', 'other', 'user_id']]
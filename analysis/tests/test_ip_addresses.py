@@ -0,0 +1,60 @@
+"""
+Tests of IP address encoding against the ipaddress module and the string normalization.
+"""
+import ipaddress
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing.ip_addresses import IPAddressEncoder
+from processing.normalizer import LogNormalizer
+
+MIXED = [
+    '192.168.1.10', '010.001.000.007', '0.0.0.0', '255.255.255.255', ' 10.0.0.1 ',
+    '0010.0.0.1', '2001:db8::1', '::ffff:1.2.3.4', None, '8.8.8.8'
+]
+
+
+def random_ips(num_values):
+    rng = np.random.default_rng(0)
+    numbers = rng.integers(0, 1 << 32, num_values, dtype=np.uint64)
+    return [str(ipaddress.IPv4Address(int(number))) for number in numbers]
+
+
+def test_round_trip_gives_canonical_addresses():
+    encoder = IPAddressEncoder()
+    
+    v4, v6 = encoder.encode(MIXED)
+    decoded = encoder.decode(v4, v6)
+    
+    assert decoded.tolist() == [
+        '192.168.1.10', '10.1.0.7', '0.0.0.0', '255.255.255.255', '10.0.0.1',
+        '10.0.0.1', '2001:db8::1', '::ffff:102:304', None, '8.8.8.8'
+    ]
+    assert v4.isna().tolist() == [False] * 6 + [True, True, True, False]
+
+
+def test_dotted_quads_encode_to_their_integer():
+    ips = random_ips(200_000)
+    
+    v4, v6 = IPAddressEncoder().encode(pd.Series(ips))
+    
+    assert v6 is None
+    np.testing.assert_array_equal(v4.to_numpy(dtype=np.uint32), [int(ipaddress.IPv4Address(ip)) for ip in ips])
+    assert IPAddressEncoder().decode(v4).tolist() == ips
+
+
+@pytest.mark.parametrize('value', ['256.1.1.1', '1.2.3', '1.2.3.4.5', 'abc', '1..2.3', '-1.2.3.4'])
+def test_invalid_addresses_are_rejected(value):
+    with pytest.raises(ValueError):
+        IPAddressEncoder().encode(['10.0.0.1', value])
+
+
+def test_normalizer_matches_string_normalization():
+    ips = random_ips(5000) + ['010.001.000.007']
+    normalizer = LogNormalizer()
+    
+    formatted = normalizer.format_ip(normalizer.normalize_ip(pd.DataFrame({'ip_address': ips})))
+    
+    assert formatted['ip_address'].tolist() == ['.'.join(str(int(part)) for part in ip.split('.')) for ip in ips]
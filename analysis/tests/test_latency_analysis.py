@@ -0,0 +1,45 @@
+"""
+Tests of bottleneck selection by LatencyAnalyzer.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from processing.latency_analysis import LatencyAnalyzer
+
+
+def tied_frame(num_rows: int = 5000) -> pd.DataFrame:
+    """Rows whose latencies repeat, so many bottlenecks share the k-th latency."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        'transaction_id': [f"TXN{i:06d}" for i in range(num_rows)],
+        'operation': rng.choice(['DEPOSIT', 'TRANSFER'], num_rows),
+        'module': rng.choice(['WEB', 'API'], num_rows),
+        'service_latency': rng.integers(1, 30, num_rows) / 10,
+        'e2e_latency': rng.integers(1, 60, num_rows) / 10
+    })
+
+
+def test_thresholds_match_pandas_quantile():
+    df = tied_frame()
+    bottlenecks = LatencyAnalyzer().find_bottlenecks(df, threshold_percentile=95)
+    
+    for stage, col in LatencyAnalyzer.BOTTLENECK_STAGES:
+        found = bottlenecks[bottlenecks['stage'] == stage]
+        threshold = df[col].quantile(0.95)
+        assert (found['threshold'] == threshold).all()
+        assert found['transaction_id'].tolist() == df.loc[df[col] > threshold, 'transaction_id'].tolist()
+
+
+@pytest.mark.parametrize('top_k', [1, 7, 40, 250])
+def test_top_k_keeps_stage_and_input_order_among_ties(top_k):
+    df = tied_frame()
+    analyzer = LatencyAnalyzer()
+    everything = analyzer.find_bottlenecks(df, threshold_percentile=90)
+    expected = everything.iloc[np.lexsort((np.arange(len(everything)), -everything['latency'].to_numpy()))[:top_k]]
+    
+    top = analyzer.find_bottlenecks(df, threshold_percentile=90, top_k=top_k)
+    
+    # The k-th latency is shared by bottlenecks left out
+    assert (everything['latency'] == top['latency'].iloc[-1]).sum() > (top['latency'] == top['latency'].iloc[-1]).sum()
+    pd.testing.assert_frame_equal(top, expected.reset_index(drop=True))
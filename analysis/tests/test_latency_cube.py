@@ -0,0 +1,70 @@
+"""
+Tests of the latency cube's exceedance counts against the rows.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_latency_cube import build_frame
+from processing.latency_cube import LatencyCube
+
+
+@pytest.fixture(scope='module')
+def rows():
+    # Latencies rounded to the millisecond, so thresholds fall on ties
+    df = build_frame(20_000, 1)
+    for col in LatencyCube.METRICS:
+        df[col] = df[col].round(3)
+    return df
+
+
+@pytest.fixture(scope='module')
+def cube(rows):
+    cube = LatencyCube()
+    for part in np.array_split(np.arange(len(rows)), 7):
+        cube.update(rows.iloc[part])
+    return cube
+
+
+def exceeding(df, col):
+    """Rows above the column's p95, as LatencyAnalyzer.find_bottlenecks selects them."""
+    return df[df[col] > df[col].quantile(0.95)]
+
+
+@pytest.mark.parametrize('col', ['service_latency', 'e2e_latency'])
+def test_breakdowns_add_up_to_the_rows_above_p95(rows, cube, col):
+    expected = exceeding(rows, col)
+    total = cube.exceedances(col)
+    cells = cube.exceedances(col, by=['operation', 'module'])
+    
+    assert int(total['count'].iloc[0]) == len(expected)
+    assert int(cells['count'].sum()) == len(expected)
+    assert total['threshold'].iloc[0] == rows[col].quantile(0.95)
+    assert total['sum'].iloc[0] == pytest.approx(expected[col].sum())
+    by_module = cells.groupby('module', observed=True)['count'].sum()
+    assert by_module.to_dict() == expected['module'].value_counts().to_dict()
+
+
+@pytest.mark.parametrize('start, end', [
+    ('2025-05-13 08:00', '2025-05-13 08:05'),
+    ('2025-05-13 08:00:30', '2025-05-13 09:17:45'),
+    ('2025-05-13 10:20:10', '2025-05-13 10:20:50')
+])
+def test_ranges_with_rows_count_partial_minutes_exactly(rows, cube, start, end):
+    start, end = pd.Timestamp(start, tz='UTC'), pd.Timestamp(end, tz='UTC')
+    in_range = rows[(rows['timestamp_secu'] >= start) & (rows['timestamp_secu'] <= end)]
+    
+    cells = cube.exceedances('service_latency', by=['module'], start=start, end=end, rows=rows)
+    
+    assert int(cells['count'].sum()) == len(exceeding(in_range, 'service_latency'))
+
+
+@pytest.mark.parametrize('window', ['5min', '1h'])
+def test_window_counts_match_rows(rows, cube, window):
+    expected = rows.set_index('timestamp_secu').resample(window)['service_latency'].apply(
+        lambda values: int((values > values.quantile(0.95)).sum())
+    )
+    
+    counts = cube.exceedances('service_latency', window=window)['count']
+    
+    assert counts.to_dict() == expected[expected > 0].to_dict()
@@ -0,0 +1,47 @@
+"""
+Tests of the documented relative accuracy of latency histogram percentiles.
+"""
+import numpy as np
+import pytest
+
+from benchmarks.bench_latency_histogram import check_bundled_logs
+from processing.latency_histogram import LatencyHistogram, LogBuckets
+
+FRACTIONS = np.linspace(0, 1, 1001)
+
+
+def columns(num_values: int):
+    """Latency-like, near-zero, mixed-sign and heavily repeated values."""
+    rng = np.random.default_rng(0)
+    return {
+        'lognormal': rng.lognormal(-1.0, 1.2, num_values),
+        'near_zero': rng.exponential(2e-6, num_values),
+        'mixed_sign': rng.normal(0.0, 1.0, num_values),
+        'repeated': rng.integers(1, 20, num_values) / 10
+    }
+
+
+@pytest.mark.parametrize('accuracy', [0.01, 0.05])
+def test_percentiles_within_relative_accuracy(accuracy):
+    for name, values in columns(100_000).items():
+        estimates = LatencyHistogram(accuracy).update(values).quantiles(FRACTIONS)
+        exact = np.quantile(values, FRACTIONS)
+        
+        # Within the relative accuracy, and within MIN_VALUE near zero
+        excess = np.abs(estimates - exact) - (accuracy * np.abs(exact) + LogBuckets.MIN_VALUE)
+        assert excess.max() <= 0, f"{name}: error above the bound at fraction {FRACTIONS[excess.argmax()]}"
+
+
+@pytest.mark.parametrize('accuracy', [0.01, 0.05])
+def test_bundled_logs_within_relative_accuracy(accuracy):
+    # Whole columns, by module and operation, merged from partitions and subtracted across windows
+    assert check_bundled_logs(accuracy)
+
+
+def test_merged_partitions_equal_whole():
+    values = columns(10_000)['lognormal']
+    merged = LatencyHistogram()
+    for part in np.array_split(values, 7):
+        merged.merge(LatencyHistogram().update(part))
+        
+    np.testing.assert_array_equal(merged.quantiles(FRACTIONS), LatencyHistogram().update(values).quantiles(FRACTIONS))
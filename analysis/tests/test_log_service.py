@@ -0,0 +1,49 @@
+"""
+Tests of LogService on the bundled logs.
+"""
+import pandas as pd
+import pytest
+
+pytest.importorskip('fastapi')
+pytest.importorskip('pydantic')
+
+from api.repositories.log_repository import LogRepository
+from api.services.log_service import LogService
+
+
+@pytest.fixture(scope='module')
+def service():
+    repository = LogRepository()
+    repository.refresh_data()
+    return LogService(repository)
+
+
+@pytest.mark.parametrize('window', ['30s', '1min', '5min'])
+@pytest.mark.parametrize('tz', [None, 'UTC'])
+def test_latency_trends_are_labelled_in_utc(service, window, tz):
+    # The cube serves whole minutes and the rows shorter windows; both take naive bounds as UTC
+    trends = service.get_latency_trends(
+        pd.Timestamp('2025-05-13 08:00', tz=tz), pd.Timestamp('2025-05-13 09:00', tz=tz), window
+    )
+    
+    assert trends
+    assert all(str(pd.Timestamp(trend.timestamp).tz) == 'UTC' for trend in trends)
+    assert trends[0].timestamp == pd.Timestamp('2025-05-13 08:00', tz='UTC')
+
+
+@pytest.mark.parametrize('start, end', [
+    (None, None),
+    (pd.Timestamp('2025-05-13 08:00', tz='UTC'), pd.Timestamp('2025-05-13 08:05', tz='UTC'))
+])
+def test_bottleneck_summary_matches_rows(service, start, end):
+    df = service.repository.get_data()
+    if start is not None:
+        df = df[(df['timestamp_secu'] >= start) & (df['timestamp_secu'] <= end)]
+    expected = service.repository.latency_analyzer.find_bottlenecks(df)
+    
+    summary = service.get_bottlenecks_summary(start, end)
+    
+    assert summary.total_bottlenecks == len(expected)
+    assert sum(summary.by_operation.values()) == summary.total_bottlenecks
+    assert sum(summary.by_module.values()) == summary.total_bottlenecks
+    assert summary.by_module == expected['module'].value_counts().to_dict()
@@ -0,0 +1,115 @@
+"""
+Tests of rotated, compressed log sets built by splitting the bundled logs.
+"""
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion import corebank_parser, midflow_parser, secucheck_parser
+from data_ingestion.corebank_parser import CorebankParser
+from data_ingestion.log_set import LogFileSet
+from data_ingestion.merger import LogMerger
+from data_ingestion.midflow_parser import MidflowParser
+from data_ingestion.secucheck_parser import SecucheckParser
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+# Rotated names, oldest first, as logrotate and dated rotation write them
+CORE_NAMES = ['core.log.3.gz', 'core.log.2.gz', 'core.log.1', 'core.log']
+DATED_NAMES = ['{}-2025-05-13T08.{}.gz', '{}-2025-05-13T09.{}', '{}-2025-05-13T10.{}.gz']
+
+
+def write_file(path, text):
+    if path.suffix == '.gz':
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(text)
+    else:
+        path.write_text(text, encoding='utf-8')
+
+
+def split(items, num_parts):
+    return [list(part) for part in np.array_split(np.array(items, dtype=object), num_parts)]
+
+
+@pytest.fixture(autouse=True)
+def file_index(tmp_path, monkeypatch):
+    """Keep the time range index of the tests out of the output directory."""
+    path = str(tmp_path / 'file_index.json')
+    for module in [corebank_parser, midflow_parser, secucheck_parser]:
+        monkeypatch.setattr(module, 'FILE_INDEX_PATH', path)
+    return path
+
+
+@pytest.fixture
+def log_sets(tmp_path):
+    """Directories of rotated files holding the bundled logs, by source name."""
+    dirs = {name: tmp_path / name for name in ['secucheck', 'midflow', 'corebank']}
+    for directory in dirs.values():
+        directory.mkdir()
+        
+    with open(COREBANK_LOGS, encoding='utf-8') as f:
+        lines = f.readlines()
+    for name, part in zip(CORE_NAMES, split(lines, len(CORE_NAMES))):
+        write_file(dirs['corebank'] / name, ''.join(part))
+        
+    with open(MIDFLOW_LOGS, encoding='utf-8') as f:
+        header, *rows = f.readlines()
+    for name, part in zip(DATED_NAMES, split(rows, len(DATED_NAMES))):
+        write_file(dirs['midflow'] / name.format('midflow', 'csv'), header + ''.join(part))
+        
+    with open(SECUCHECK_LOGS, encoding='utf-8') as f:
+        entries = json.load(f)
+    for name, part in zip(DATED_NAMES, split(entries, len(DATED_NAMES))):
+        write_file(dirs['secucheck'] / name.format('secucheck', 'json'), json.dumps(part, ensure_ascii=False, indent=2))
+        
+    return {name: str(directory) for name, directory in dirs.items()}
+
+
+def by_transaction(df):
+    return df.sort_values(['transaction_id', 'start_time'], kind='stable', ignore_index=True)
+
+
+def test_files_resolve_oldest_first(log_sets):
+    names = [path.rsplit('/', 1)[1] for path in LogFileSet(log_sets['corebank']).resolve()]
+    
+    assert names == CORE_NAMES
+
+
+def test_log_sets_parse_like_single_files(log_sets):
+    core_df, report = CorebankParser(log_sets['corebank']).parse_file_bulk()
+    pd.testing.assert_frame_equal(core_df, CorebankParser(COREBANK_LOGS).parse_file_bulk()[0], check_categorical=False)
+    assert [entry['parsed'] for entry in report['files']] == [len(part) for part in split(range(report['parsed']), 4)]
+    
+    secu_df = SecucheckParser(log_sets['secucheck']).parse_file()
+    pd.testing.assert_frame_equal(secu_df, SecucheckParser(SECUCHECK_LOGS).parse_file(), check_categorical=False)
+    
+    # Requests and responses split across files are still paired
+    pairs, orphans = MidflowParser(log_sets['midflow']).parse_file_with_orphans()
+    expected, expected_orphans = MidflowParser(MIDFLOW_LOGS).parse_file_with_orphans()
+    pd.testing.assert_frame_equal(by_transaction(pairs), by_transaction(expected), check_categorical=False)
+    assert sorted(orphans['transaction_id']) == sorted(expected_orphans['transaction_id'])
+
+
+def test_merge_of_log_sets_matches_single_files(log_sets):
+    merged = LogMerger(log_sets['secucheck'], log_sets['midflow'], log_sets['corebank']).merge_logs()
+    expected = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+    
+    pd.testing.assert_frame_equal(merged, expected, check_categorical=False)
+
+
+def test_time_range_skips_indexed_files(log_sets, file_index):
+    CorebankParser(log_sets['corebank']).parse_file_bulk()
+    full = CorebankParser(COREBANK_LOGS).parse_file_bulk()[0]
+    start = full['timestamp_core'].iloc[len(full) // 2 + 10]
+    
+    df, report = CorebankParser(log_sets['corebank'], time_range=(start, None)).parse_file_bulk()
+    
+    # Only the two newest files can hold entries from start on
+    assert [entry['path'].rsplit('/', 1)[1] for entry in report['files']] == CORE_NAMES[2:]
+    pd.testing.assert_frame_equal(
+        df[df['timestamp_core'] >= start].reset_index(drop=True),
+        full[full['timestamp_core'] >= start].reset_index(drop=True),
+        check_categorical=False
+    )
@@ -0,0 +1,86 @@
+"""
+Tests of LogMerger on the bundled logs against the two pandas merges it replaced.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.checkpoint import CheckpointStore
+from data_ingestion.hash_join import TransactionJoin
+from data_ingestion.merger import LogMerger, join_sources
+from data_ingestion.sources import SOURCES
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+MERGE_KEYS = ['transaction_id', 'user_id', 'ip_address', 'module']
+
+
+def plain(df):
+    """Frame with categories and integer keys turned back into plain columns."""
+    df = df.drop(columns='txn_key', errors='ignore')
+    return df.astype({col: object for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
+
+def baseline_merge(frames):
+    """Four-key pandas merges, flags and e2e latency of the former merge_logs."""
+    merged = pd.merge(plain(frames['secucheck']), plain(frames['midflow']), on=MERGE_KEYS, how='left', suffixes=('_secu', ''))
+    merged = pd.merge(merged, plain(frames['corebank']), on=MERGE_KEYS, how='left', suffixes=('', '_core'))
+    merged['has_security_check'] = merged['timestamp_secu'].notna()
+    merged['has_middleware_flow'] = merged['service_latency'].notna()
+    merged['has_core_banking'] = merged['timestamp_core'].notna()
+    merged['completion_pct'] = merged[['has_security_check', 'has_middleware_flow', 'has_core_banking']].mean(axis=1) * 100
+    complete = merged['has_security_check'] & merged['has_core_banking']
+    merged['e2e_latency'] = np.where(complete, (merged['timestamp_core'] - merged['timestamp_secu']).dt.total_seconds(), np.nan)
+    return merged
+
+
+def assert_same_values(merged, expected):
+    """Every merged column but txn_key holds the expected values, row by row."""
+    assert len(merged) == len(expected)
+    for col in merged.columns.drop('txn_key'):
+        values = merged[col].astype(object).where(merged[col].notna(), None)
+        assert values.tolist() == expected[col].astype(object).where(expected[col].notna(), None).tolist(), col
+
+
+@pytest.fixture(scope='module')
+def frames():
+    paths = {'secucheck': SECUCHECK_LOGS, 'midflow': MIDFLOW_LOGS, 'corebank': COREBANK_LOGS}
+    return {source.name: source.split_result(source.parse(paths[source.name]))[0] for source in SOURCES}
+
+
+@pytest.fixture(scope='module')
+def expected(frames):
+    return baseline_merge(frames)
+
+
+@pytest.mark.parametrize('parallel', [False, True])
+def test_merge_matches_pandas_merges(expected, parallel):
+    merged = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS, parallel=parallel, max_workers=3).merge_logs()
+    
+    assert_same_values(merged, expected)
+
+
+def test_parallel_tail_merge_matches_serial(tmp_path, expected):
+    merged = {}
+    for parallel in [False, True]:
+        store = CheckpointStore(str(tmp_path / f"checkpoints_{parallel}.json"))
+        merger = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS, checkpoint_store=store, parallel=parallel)
+        merger.merge_logs()
+        # Second merge: nothing new in the tail, the rest parsed again
+        merged[parallel] = merger.merge_logs()
+        
+    pd.testing.assert_frame_equal(merged[True], merged[False])
+    assert_same_values(merged[True], expected)
+
+
+@pytest.mark.parametrize('num_shards', [2, 5])
+def test_sharded_merge_matches_pandas_merges(expected, num_shards):
+    merged = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS, num_shards=num_shards).merge_logs()
+    
+    assert_same_values(merged, expected)
+
+
+def test_single_pass_join_matches_pandas_merges(frames, expected):
+    merged, mismatches = join_sources(TransactionJoin(), frames)
+    
+    assert_same_values(merged, expected)
+    assert mismatches.empty
@@ -0,0 +1,117 @@
+"""
+Tests of MidflowParser on the bundled middleware log and on files without pairs.
+"""
+import pandas as pd
+import pytest
+
+from data_ingestion.merger import LogMerger
+from data_ingestion.midflow_parser import MidflowParser
+from data_ingestion.schema import validate_frame
+from data_ingestion.sources import SOURCES
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+ORPHAN_SCHEMA = {col: MidflowParser.COLUMN_KINDS[col] for col in MidflowParser.ORPHAN_COLUMNS}
+
+
+@pytest.fixture
+def header_only(tmp_path):
+    """MidFlow CSV with the header row and no events."""
+    with open(MIDFLOW_LOGS) as f:
+        header = f.readline()
+    path = tmp_path / 'header_only.csv'
+    path.write_text(header)
+    return str(path)
+
+
+@pytest.fixture
+def requests_only(tmp_path):
+    """MidFlow CSV with the requests of the bundled log and none of its responses."""
+    with open(MIDFLOW_LOGS) as f:
+        lines = f.readlines()
+    path = tmp_path / 'requests_only.csv'
+    path.write_text(lines[0] + ''.join(line for line in lines[1:] if ',request,' in line))
+    return str(path)
+
+
+@pytest.mark.parametrize('num_shards', [1, 3])
+def test_files_without_pairs_give_typed_frames(header_only, requests_only, num_shards):
+    for path in [header_only, requests_only]:
+        parser = MidflowParser(path)
+        pairs, orphans = parser.parse_file_with_orphans() if num_shards == 1 else parser.parse_file_sharded(num_shards)
+        
+        # Every request is an orphan
+        with open(path) as f:
+            assert len(orphans) == len(f.readlines()) - 1
+        assert pairs.empty
+        validate_frame(pairs, SOURCES['midflow'].schema, 'parsing midflow')
+        validate_frame(orphans, ORPHAN_SCHEMA, 'parsing midflow orphans')
+
+
+@pytest.mark.parametrize('fixture', ['header_only', 'requests_only'])
+def test_merge_without_middleware_pairs(request, fixture):
+    merged = LogMerger(SECUCHECK_LOGS, request.getfixturevalue(fixture), COREBANK_LOGS).merge_logs()
+    
+    assert len(merged) == len(LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs())
+    assert not merged['has_middleware_flow'].any()
+    assert merged['service_latency'].isna().all()
+
+
+@pytest.mark.parametrize('num_shards', [2, 3, 4, 9, 12, 40])
+def test_sharded_output_matches_serial(num_shards):
+    serial, serial_orphans = MidflowParser(MIDFLOW_LOGS).parse_file_with_orphans()
+    pairs, orphans = MidflowParser(MIDFLOW_LOGS).parse_file_sharded(num_shards)
+    
+    # Same rows in the same order, shards without requests left for boundary pairing included
+    pd.testing.assert_frame_equal(pairs, serial, check_categorical=False)
+    pd.testing.assert_frame_equal(orphans, serial_orphans, check_categorical=False)
+
+
+@pytest.mark.parametrize('chunk_size', [97, 1000])
+def test_sharded_order_follows_serial_chunks(chunk_size):
+    serial, _ = MidflowParser(MIDFLOW_LOGS).parse_file_with_orphans(chunk_size=chunk_size)
+    pairs, _ = MidflowParser(MIDFLOW_LOGS).parse_file_sharded(4, chunk_size=chunk_size)
+    
+    pd.testing.assert_frame_equal(pairs, serial, check_categorical=False)
+
+
+@pytest.fixture
+def irregular_rows(tmp_path):
+    """Bundled MidFlow log with a blank status code and a misspelt response direction."""
+    with open(MIDFLOW_LOGS) as f:
+        lines = f.readlines()
+    # txn-0000: blank request status; txn-0001: misspelt response
+    lines[1] = lines[1].replace(',request,consignar,200,', ',request,consignar,,')
+    lines[4] = lines[4].replace(',response,', ',responce,')
+    path = tmp_path / 'irregular.csv'
+    path.write_text(''.join(lines))
+    return str(path)
+
+
+@pytest.mark.parametrize('num_shards', [1, 3])
+def test_blank_status_and_unknown_direction(irregular_rows, num_shards):
+    parser = MidflowParser(irregular_rows)
+    pairs, orphans = parser.parse_file_with_orphans() if num_shards == 1 else parser.parse_file_sharded(num_shards)
+    serial, serial_orphans = MidflowParser(MIDFLOW_LOGS).parse_file_with_orphans()
+    
+    # The blank status belongs to the request: the pair keeps the response's
+    assert pairs['status_code'].dtype == 'Int16'
+    assert 'txn-0000' in set(pairs['transaction_id'])
+    
+    # The misspelt row is neither paired as a response nor kept: its request is an orphan
+    assert 'txn-0001' not in set(pairs['transaction_id'])
+    assert set(orphans['transaction_id']) == set(serial_orphans['transaction_id']) | {'txn-0001'}
+    assert len(pairs) == len(serial) - 1
+
+
+def test_blank_status_in_response_is_missing(tmp_path):
+    with open(MIDFLOW_LOGS) as f:
+        lines = f.readlines()
+    lines[2] = lines[2].replace(',response,consignar,200,', ',response,consignar,,')
+    path = tmp_path / 'blank_status.csv'
+    path.write_text(''.join(lines))
+    
+    pairs, _ = MidflowParser(str(path)).parse_file_with_orphans()
+    
+    assert pairs['status_code'].isna().sum() == 1
+    assert pd.isna(pairs.loc[pairs['transaction_id'] == 'txn-0000', 'status_code'].iloc[0])
+    assert MidflowParser().parse_line(lines[2]).status_code is None
@@ -0,0 +1,89 @@
+"""
+Tests of LogNormalizer outlier capping and of the in-place pipeline on the bundled logs.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.merger import LogMerger
+from processing.normalizer import LogNormalizer
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+NUMERIC_COLUMNS = ['service_latency', 'total_latency', 'e2e_latency', 'amount']
+
+
+def latencies():
+    """Frame with more latencies than a quantile sketch keeps."""
+    return pd.DataFrame({'service_latency': np.random.default_rng(0).lognormal(0, 1.5, 50_000)})
+
+
+def test_in_memory_capping_uses_exact_quartiles():
+    values = latencies()['service_latency']
+    q1, q3 = values.quantile([0.25, 0.75])
+    upper = q3 + 1.5 * (q3 - q1)
+    
+    normalizer = LogNormalizer()
+    capped = normalizer.normalize_numeric(latencies(), ['service_latency'])
+    
+    assert capped['service_latency'].max() == upper
+    assert normalizer.is_outlier(capped, 'service_latency').equals(values > upper)
+
+
+def test_sketch_capping_is_the_same_on_every_run():
+    normalizer = LogNormalizer()
+    capped = [
+        normalizer.normalize_numeric(latencies(), ['service_latency'], sketches=normalizer.sketch_numeric(latencies(), ['service_latency']))
+        for _ in range(3)
+    ]
+    
+    # More values than the sketch keeps, so its quartiles are estimates
+    assert capped[0]['service_latency'].max() < latencies()['service_latency'].max()
+    for other in capped[1:]:
+        pd.testing.assert_frame_equal(other, capped[0])
+
+
+@pytest.fixture(scope='module')
+def merged():
+    return LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+
+
+def test_in_place_matches_copy(merged):
+    original = merged.copy()
+    
+    copied = LogNormalizer().normalize_dataframe(merged, NUMERIC_COLUMNS)
+    pd.testing.assert_frame_equal(merged, original)
+    
+    target = merged.copy()
+    in_place = LogNormalizer().normalize_dataframe(target, NUMERIC_COLUMNS, inplace=True)
+    
+    assert in_place is target
+    pd.testing.assert_frame_equal(in_place, copied)
+    assert in_place.attrs == copied.attrs
+
+
+def test_flags_and_raw_columns_match_former_columns(merged):
+    normalizer = LogNormalizer()
+    
+    df = normalizer.normalize_dataframe(merged, NUMERIC_COLUMNS, keep_raw=True)
+    
+    for col in NUMERIC_COLUMNS:
+        raw = merged[col].astype('float64')
+        q1, q3 = raw.quantile([0.25, 0.75])
+        lower, upper = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+        pd.testing.assert_series_equal(df[f'{col}_raw'], merged[col], check_names=False)
+        pd.testing.assert_series_equal(df[col], raw.clip(lower, upper), check_names=False)
+        assert normalizer.is_outlier(df, col).tolist() == ((raw < lower) | (raw > upper)).tolist()
+
+
+def test_categories_are_mapped_like_plain_strings(merged):
+    normalizer = LogNormalizer()
+    mappings = {
+        'module': normalizer.module_mapping, 'operation': normalizer.operation_mapping,
+        'status': normalizer.status_mapping, 'account_type': normalizer.account_mapping
+    }
+    
+    df = normalizer.normalize_categorical(merged.copy())
+    
+    for col, mapping in mappings.items():
+        expected = merged[col].astype(object).map(mapping)
+        assert df[col].astype(object).where(df[col].notna(), None).tolist() == expected.where(expected.notna(), None).tolist()
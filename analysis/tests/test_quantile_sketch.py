@@ -0,0 +1,26 @@
+"""
+Tests of the documented rank error bound of the quantile sketch.
+"""
+import numpy as np
+import pytest
+
+from benchmarks.bench_quantile_sketch import (
+    distributions, rank_error, sketch_chunks, sketch_once, sketch_partitions, sketch_persisted
+)
+from processing.quantile_sketch import QuantileSketch
+
+
+@pytest.mark.parametrize('k', [50, 200])
+@pytest.mark.parametrize('build', [sketch_once, sketch_chunks, sketch_partitions, sketch_persisted])
+def test_rank_error_within_bound(k, build):
+    bound = QuantileSketch.RANK_ERROR / k
+    for name, values in distributions(200_000).items():
+        error = rank_error(np.sort(values), build(values, k))
+        assert error <= bound, f"{name}: rank error {error:.3%} above {bound:.2%}"
+
+
+def test_exact_below_capacity():
+    values = np.random.default_rng(0).lognormal(size=150)
+    sketch = QuantileSketch(200).update(values)
+    
+    np.testing.assert_array_equal(sketch.quantiles([0.25, 0.75]), np.quantile(values, [0.25, 0.75]))
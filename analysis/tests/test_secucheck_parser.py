@@ -0,0 +1,112 @@
+"""
+Tests of SecucheckParser streaming on the bundled security check log and on small logs.
+"""
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from data_ingestion.categories import concat_frames
+from data_ingestion.schema import validate_frame
+from data_ingestion.secucheck_parser import SecucheckParser
+from data_ingestion.sources import SOURCES
+from utils.config import SECUCHECK_LOGS
+
+
+def record(i, **fields):
+    """Security check entry in the bundled log's format."""
+    entry = {
+        'timestamp': f"2025-05-13 08:00:{i % 60:02d}",
+        'transaction_id': f"txn-{i:04d}",
+        'user_id': f"user{i % 7}",
+        'ip_address': f"10.0.0.{i % 250}",
+        'resultado_validación': 'Aprobada',
+        'motivo_fallo': '',
+        'modulo': 'web',
+        'verificaciones_realizadas': ['frecuencia', 'ubicacion']
+    }
+    entry.update(fields)
+    return entry
+
+
+class CountingReader(io.StringIO):
+    """Text stream counting the characters read from it."""
+    
+    def __init__(self, text):
+        super().__init__(text)
+        self.chars_read = 0
+        
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.chars_read += len(chunk)
+        return chunk
+
+
+def test_bundled_log_matches_whole_file_parse():
+    # Baseline parse: the whole array loaded at once
+    with open(SECUCHECK_LOGS) as f:
+        expected = pd.DataFrame(json.load(f)).rename(columns=SecucheckParser.COLUMN_RENAMES)
+    expected['timestamp_secu'] = pd.to_datetime(expected['timestamp_secu'])
+    expected['verifications'] = expected['verifications'].apply(','.join)
+    
+    df = SecucheckParser(SECUCHECK_LOGS).parse_file()
+    
+    assert len(df) == len(expected)
+    for col in expected.columns:
+        assert df[col].astype(object).tolist() == expected[col].astype(object).tolist(), col
+
+
+@pytest.mark.parametrize('batch_size', [7, 97, 1000])
+def test_batches_concatenate_to_the_whole_file(batch_size):
+    parser = SecucheckParser(SECUCHECK_LOGS)
+    batches = list(parser.iter_batches(batch_size))
+    
+    assert max(len(batch) for batch in batches) == batch_size
+    pd.testing.assert_frame_equal(concat_frames(batches), parser.parse_file())
+
+
+def test_malformed_object_fails_within_the_record_cap(monkeypatch):
+    monkeypatch.setattr(SecucheckParser, 'READ_SIZE', 256)
+    monkeypatch.setattr(SecucheckParser, 'MAX_RECORD_SIZE', 4096)
+    valid = ',\n'.join(json.dumps(record(i)) for i in range(2000))
+    stream = CountingReader('[' + json.dumps(record(0)) + ',\n{"timestamp": oops},\n' + valid + ']')
+    
+    with pytest.raises(json.JSONDecodeError):
+        list(SecucheckParser()._iter_stream(stream))
+        
+    # The rest of the file was not pulled into the buffer
+    assert stream.chars_read < 4096 + 2 * 256 < len(stream.getvalue())
+
+
+def test_objects_split_across_reads_decode(monkeypatch):
+    monkeypatch.setattr(SecucheckParser, 'READ_SIZE', 7)
+    records = [record(i) for i in range(50)]
+    
+    decoded = list(SecucheckParser()._iter_stream(io.StringIO(json.dumps(records, indent=2))))
+    
+    assert decoded == records
+
+
+def test_null_or_missing_verifications_give_empty_strings(tmp_path):
+    entries = [record(0), record(1, verificaciones_realizadas=None), record(2)]
+    del entries[2]['verificaciones_realizadas']
+    path = tmp_path / 'secucheck.json'
+    path.write_text(json.dumps(entries))
+    parser = SecucheckParser(str(path))
+    
+    df = parser.parse_file()
+    
+    assert df['verifications'].tolist() == ['frecuencia,ubicacion', '', '']
+    assert [parser.parse_record(entry).verifications for entry in entries] == ['frecuencia,ubicacion', '', '']
+
+
+@pytest.mark.parametrize('text', ['[]', '', '[\n]\n'])
+def test_file_without_entries_gives_typed_frame(tmp_path, text):
+    path = tmp_path / 'secucheck.json'
+    path.write_text(text)
+    
+    df = SecucheckParser(str(path)).parse_file()
+    
+    assert df.empty
+    validate_frame(df, SOURCES['secucheck'].schema, 'parsing secucheck')
@@ -0,0 +1,32 @@
+"""
+Tests of live trends against batch trends on the bundled logs.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.merger import LogMerger
+from processing.sliding_window import TrendTracker, rolling_trends
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+@pytest.fixture(scope='module')
+def merged():
+    df = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+    return df.sort_values('timestamp_secu', kind='stable', ignore_index=True)
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC'])
+def test_live_trends_equal_batch(merged, tz):
+    df = merged.assign(timestamp_secu=merged['timestamp_secu'].dt.tz_localize(tz)) if tz else merged
+    batch = rolling_trends(df, 'e2e_latency', '5min').reset_index(drop=True)
+    
+    tracker = TrendTracker('e2e_latency', '5min')
+    live = [tracker.process(df.iloc[start:start + 97]) for start in range(0, len(df), 97)]
+    live = pd.concat(live + [tracker.flush()], ignore_index=True)
+    
+    # Values and dtypes: time zone of the input, categorical module
+    pd.testing.assert_frame_equal(live, batch)
+    assert isinstance(live['module'].dtype, pd.CategoricalDtype)
+    assert live['timestamp'].dt.tz == df['timestamp_secu'].dt.tz
+    assert tracker.late == 0 and np.isfinite(live['rolling_mean']).any()
@@ -0,0 +1,83 @@
+"""
+Tests of merging a registry with a source beyond the built-in three.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.merger import LogMerger
+from data_ingestion.sources import SOURCES, LogSource, SourceRegistry, default_registry
+from data_ingestion.transaction_keys import TransactionKeyEncoder
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+def _parse_scores(path: str, num_shards: int = 1) -> pd.DataFrame:
+    """Parse a CSV of fraud scores by transaction ID."""
+    df = pd.read_csv(path, parse_dates=['timestamp_fraud'])
+    df['txn_key'] = TransactionKeyEncoder().encode(df['transaction_id'])
+    return df
+
+
+def score_source() -> LogSource:
+    return LogSource(
+        name='fraud',
+        parse=_parse_scores,
+        columns=['timestamp_fraud', 'fraud_score'],
+        dtypes={'timestamp_fraud': 'datetime', 'fraud_score': 'float'},
+        stages=[('FRAUD_SCORING', 'timestamp_fraud')],
+        flag='has_fraud_score',
+        label='fraud scoring',
+        key_columns=['txn_key']
+    )
+
+
+@pytest.fixture
+def scores(tmp_path):
+    """Scores of every third transaction, newest first, plus one unknown transaction."""
+    secu = SOURCES['secucheck'].parse(SECUCHECK_LOGS)
+    scored = secu.iloc[::3].iloc[::-1]
+    df = pd.DataFrame({
+        'transaction_id': list(scored['transaction_id']) + ['txn-9999'],
+        'timestamp_fraud': list(scored['timestamp_secu'] + pd.Timedelta(seconds=2)) + [pd.Timestamp('2025-05-13')],
+        'fraud_score': [float(i % 100) / 100 for i in range(len(scored))] + [1.0]
+    })
+    path = tmp_path / 'scores.csv'
+    df.to_csv(path, index=False)
+    return str(path), df
+
+
+def test_registered_source_is_joined(scores):
+    path, df = scores
+    registry = default_registry()
+    registry.register(score_source())
+    
+    merged = LogMerger(
+        SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS, registry=registry, source_paths={'fraud': path}
+    ).merge_logs()
+    expected = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+    
+    # Built-in columns unchanged; the new columns and flag follow them
+    assert list(merged.columns) == list(expected.columns[:-4]) + [
+        'timestamp_fraud', 'fraud_score', 'has_security_check', 'has_middleware_flow',
+        'has_core_banking', 'has_fraud_score', 'completion_pct'
+    ]
+    pd.testing.assert_frame_equal(merged[expected.columns.drop('completion_pct')], expected.drop(columns='completion_pct'))
+    
+    by_id = df.set_index('transaction_id')['fraud_score']
+    np.testing.assert_array_equal(merged['fraud_score'], by_id.reindex(merged['transaction_id']))
+    assert merged['has_fraud_score'].sum() == len(df) - 1
+    assert merged['completion_pct'].tolist() == (merged[registry.flags()].mean(axis=1) * 100).tolist()
+
+
+def test_registry_rejects_conflicting_sources():
+    registry = default_registry()
+    
+    with pytest.raises(ValueError, match='already registered'):
+        registry.register(SOURCES['corebank'])
+    clashing = score_source()
+    clashing.columns = ['amount']
+    with pytest.raises(ValueError, match='already provided'):
+        registry.register(clashing)
+    with pytest.raises(ValueError, match='No log path'):
+        registry.register(score_source())
+        LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS, registry=registry)
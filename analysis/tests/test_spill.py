@@ -0,0 +1,60 @@
+"""
+Tests of the out-of-core merge and the on-disk partitions it uses.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from data_ingestion.categories import concat_frames
+from data_ingestion.columnar import read_frame
+from data_ingestion.merger import LogMerger
+from data_ingestion.spill import PartitionSpill
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+
+def test_cleanup_keeps_other_files_in_spill_dir(tmp_path):
+    kept = tmp_path / 'unrelated.txt'
+    kept.write_text('not spill data')
+    
+    spill = PartitionSpill(str(tmp_path), num_buckets=4, flush_bytes=1)
+    assert os.path.dirname(spill.spill_dir) == str(tmp_path)
+    spill.cleanup()
+    
+    assert not os.path.exists(spill.spill_dir)
+    assert os.listdir(tmp_path) == ['unrelated.txt']
+
+
+def test_spilled_merge_leaves_spill_dir_contents(tmp_path):
+    spill_dir = tmp_path / 'spill'
+    spill_dir.mkdir()
+    (spill_dir / 'unrelated.txt').write_text('not spill data')
+    
+    paths = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs_spilled(
+        output_dir=str(tmp_path / 'merged'),
+        memory_budget=1024 * 1024,
+        spill_dir=str(spill_dir)
+    )
+    
+    assert paths
+    assert os.listdir(spill_dir) == ['unrelated.txt']
+
+
+@pytest.mark.parametrize('memory_budget, num_partitions', [(1 << 30, 1), (1 << 20, 2), (256 << 10, 8)])
+def test_partitions_hold_the_rows_of_merge_logs(tmp_path, memory_budget, num_partitions):
+    merger = LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS)
+    expected = merger.merge_logs()
+    
+    paths = merger.merge_logs_spilled(
+        output_dir=str(tmp_path / 'merged'),
+        memory_budget=memory_budget,
+        spill_dir=str(tmp_path)
+    )
+    merged = concat_frames([read_frame(path) for path in paths])
+    
+    # Rows of each partition keep the base order; put them back in the order of the whole merge
+    order = pd.Index(expected['txn_key']).get_indexer(merged['txn_key'])
+    merged = merged.iloc[order.argsort()].reset_index(drop=True)
+    
+    assert len(paths) == num_partitions
+    pd.testing.assert_frame_equal(merged, expected, check_categorical=False)
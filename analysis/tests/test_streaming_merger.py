@@ -0,0 +1,102 @@
+"""
+Tests of the streaming merger fed micro-batches of the bundled logs.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.categories import concat_frames
+from data_ingestion.corebank_parser import CorebankParser
+from data_ingestion.merger import LogMerger
+from data_ingestion.midflow_parser import MidflowParser
+from data_ingestion.secucheck_parser import SecucheckParser
+from data_ingestion.sources import SOURCES
+from data_ingestion.streaming_merger import StreamingMerger
+from utils.config import SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS
+
+PATHS = {'secucheck': SECUCHECK_LOGS, 'midflow': MIDFLOW_LOGS, 'corebank': COREBANK_LOGS}
+
+
+def interleave(batches):
+    """Round-robin over the sources' batch lists, as events arriving from three feeds."""
+    order = []
+    for i in range(max(len(items) for items in batches.values())):
+        order.extend((name, items[i]) for name, items in batches.items() if i < len(items))
+    return order
+
+
+def in_merge_order(emitted, expected):
+    """Emitted records put in the row order of merge_logs."""
+    order = pd.Index(expected['txn_key']).get_indexer(emitted['txn_key'])
+    return emitted.iloc[order.argsort()].reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def expected():
+    return LogMerger(SECUCHECK_LOGS, MIDFLOW_LOGS, COREBANK_LOGS).merge_logs()
+
+
+@pytest.fixture(scope='module')
+def frames():
+    return {source.name: source.split_result(source.parse(PATHS[source.name]))[0] for source in SOURCES}
+
+
+@pytest.mark.parametrize('batch_rows', [1000, 50, 13])
+def test_stream_of_batches_matches_merge_logs(frames, expected, batch_rows):
+    merger = StreamingMerger(watermark_delay=86400)
+    batches = {name: [df.iloc[i:i + batch_rows] for i in range(0, len(df), batch_rows)] for name, df in frames.items()}
+    
+    emitted = [merger.process(name, batch) for name, batch in interleave(batches)]
+    emitted = concat_frames(emitted + [merger.flush()])
+    
+    pd.testing.assert_frame_equal(in_merge_order(emitted, expected), expected, check_categorical=False)
+    assert merger.pending() == dict.fromkeys(PATHS, 0)
+    assert merger.counts['dropped'] == 0
+
+
+def test_event_records_match_parsed_frames(frames, expected):
+    with open(SECUCHECK_LOGS) as f:
+        secu_parser = SecucheckParser()
+        secu_events = [secu_parser.parse_record(record) for record in json.load(f)]
+    with open(MIDFLOW_LOGS) as f:
+        mid_parser = MidflowParser()
+        mid_events = [mid_parser.parse_line(line) for line in f.readlines()[1:]]
+    with open(COREBANK_LOGS) as f:
+        core_parser = CorebankParser()
+        core_events = [core_parser.parse_line(line.strip()) for line in f]
+        
+    merger = StreamingMerger(watermark_delay=86400)
+    batches = {
+        name: [events[i:i + 100] for i in range(0, len(events), 100)]
+        for name, events in [('secucheck', secu_events), ('midflow', mid_events), ('corebank', core_events)]
+    }
+    emitted = [merger.process_events(name, batch) for name, batch in interleave(batches)]
+    emitted = concat_frames(emitted + [merger.flush()])
+    
+    pd.testing.assert_frame_equal(in_merge_order(emitted, expected), expected, check_categorical=False)
+
+
+def test_watermark_emits_incomplete_and_drops_late_rows(frames):
+    secu, core = frames['secucheck'].iloc[:20], frames['corebank'].iloc[:20]
+    merger = StreamingMerger(watermark_delay=60)
+    
+    first = merger.process('secucheck', secu)
+    assert first.empty
+    
+    # Core banking rows ten minutes later move the watermark past every security check
+    late = core.assign(timestamp_core=core['timestamp_core'] + pd.Timedelta(minutes=10))
+    emitted = merger.process('corebank', late)
+    
+    assert len(emitted) == len(secu)
+    assert not emitted['has_middleware_flow'].any()
+    # txn-0014 has no core banking line
+    assert emitted['has_core_banking'].tolist() == secu['txn_key'].isin(core['txn_key']).tolist()
+    assert np.isfinite(emitted['e2e_latency']).tolist() == emitted['has_core_banking'].tolist()
+    
+    # Middleware pairs of those transactions arrive behind the watermark and never meet a
+    # security check, as the core banking line of txn-0020 does not
+    merger.process('midflow', frames['midflow'].iloc[:5])
+    assert merger.flush().empty
+    assert merger.counts == {'complete': 0, 'expired': len(secu), 'dropped': 5 + 1}
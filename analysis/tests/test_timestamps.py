@@ -0,0 +1,66 @@
+"""
+Tests of timestamp helpers against the pandas row-by-row results they replace.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.timestamps import elapsed_seconds, epoch_seconds, format_timestamps, parse_timestamps
+
+
+@pytest.fixture
+def timestamps():
+    """Whole, microsecond and nanosecond times, and a missing one."""
+    rng = np.random.default_rng(0)
+    nanos = pd.Timestamp('2025-05-13').value + rng.integers(0, 86400, 1000) * 10 ** 9
+    nanos[1::3] += rng.integers(1, 10 ** 6, len(nanos[1::3])) * 1000
+    nanos[2::3] += rng.integers(1, 10 ** 9, len(nanos[2::3]))
+    series = pd.Series(pd.to_datetime(nanos))
+    series[5] = pd.NaT
+    return series
+
+
+def test_parse_matches_inferred_parsing():
+    values = pd.Series(['2025-05-13 08:00:10', '2025-12-31 23:59:59', '2024-02-29 00:00:00'])
+    
+    pd.testing.assert_series_equal(parse_timestamps(values), pd.to_datetime(values))
+
+
+def test_malformed_values_raise_or_become_missing():
+    values = pd.Series(['2025-05-13 08:00:10', '2025-05-13T08:00:10', '2025-05-13 08:00:99'])
+    
+    with pytest.raises(ValueError):
+        parse_timestamps(values)
+    assert parse_timestamps(values, errors='coerce').isna().tolist() == [False, True, True]
+
+
+@pytest.mark.parametrize('tz', [None, 'UTC', 'America/Bogota'])
+def test_epoch_seconds_match_timestamp(timestamps, tz):
+    if tz:
+        timestamps = timestamps.dt.tz_localize(tz)
+        
+    expected = np.array([np.nan if pd.isna(ts) else ts.timestamp() for ts in timestamps])
+    seconds = epoch_seconds(timestamps)
+    
+    # Identical up to microseconds, within rounding of the last bits for nanosecond times
+    microsecond = timestamps.dt.nanosecond.to_numpy() == 0
+    np.testing.assert_array_equal(seconds[microsecond], expected[microsecond])
+    np.testing.assert_allclose(seconds, expected, rtol=0, atol=2e-6)
+
+
+def test_elapsed_seconds_match_timedelta_seconds(timestamps):
+    end = timestamps.sample(frac=1, random_state=0).reset_index(drop=True)
+    
+    np.testing.assert_allclose(elapsed_seconds(timestamps, end), (end - timestamps).dt.total_seconds(), rtol=0, atol=1e-9)
+    assert np.isnan(elapsed_seconds(timestamps, end)).sum() == (end - timestamps).isna().sum()
+
+
+@pytest.mark.parametrize('tz', [None, 'America/Bogota'])
+def test_format_matches_isoformat_in_utc(timestamps, tz):
+    if tz:
+        timestamps = timestamps.dt.tz_localize(tz)
+        
+    utc = timestamps.dt.tz_convert('UTC') if tz else timestamps.dt.tz_localize('UTC')
+    expected = [None if pd.isna(ts) else ts.isoformat() for ts in utc]
+    
+    assert format_timestamps(timestamps).tolist() == expected
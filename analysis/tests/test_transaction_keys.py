@@ -0,0 +1,53 @@
+"""
+Tests of transaction key encoding.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_ingestion.transaction_keys import TransactionKeyEncoder
+
+IDS = ['txn-0007', 'txn-7', 'txn-1234567890123456', 'txn-12345678901234567', 'TXN-7', 'txn-', 'txn-7a', 'ref/42', '']
+
+
+def test_keys_are_distinct_and_independent_of_encoder():
+    keys = TransactionKeyEncoder().encode(IDS)
+    
+    assert len(set(keys.tolist())) == len(IDS)
+    assert (keys[:3] >= 0).all() and (keys[3:] < 0).all()
+    # A fresh encoder, as in another worker process, gives the same keys in any order
+    np.testing.assert_array_equal(TransactionKeyEncoder().encode(IDS[::-1]), keys[::-1])
+
+
+def test_lookup_keys_leave_no_state():
+    encoder = TransactionKeyEncoder()
+    state = dict(vars(encoder))
+    
+    for i in range(1000):
+        encoder.encode_one(f"unknown-{i}")
+        
+    assert vars(encoder) == state
+
+
+def test_collision_within_a_block_is_reported(monkeypatch):
+    encoder = TransactionKeyEncoder()
+    monkeypatch.setattr(encoder, '_fallback_key', lambda txn_id: -1)
+    
+    with pytest.raises(ValueError, match='collision'):
+        encoder.encode(['ref/1', 'ref/2'])
+
+
+def test_join_on_keys_matches_join_on_ids():
+    rng = np.random.default_rng(0)
+    ids = pd.Series([f"txn-{i:06d}" for i in range(2000)] + [f"ref-{i}" for i in range(200)])
+    encoder = TransactionKeyEncoder()
+    left = pd.DataFrame({'transaction_id': ids, 'left_value': np.arange(len(ids))})
+    right = pd.DataFrame({'transaction_id': ids.sample(frac=0.6, random_state=1).to_numpy()})
+    right['right_value'] = rng.random(len(right))
+    left['txn_key'] = encoder.encode(left['transaction_id'])
+    right['txn_key'] = TransactionKeyEncoder().encode(right['transaction_id'])
+    
+    by_id = pd.merge(left.drop(columns='txn_key'), right.drop(columns='txn_key'), on='transaction_id')
+    by_key = pd.merge(left, right.drop(columns='transaction_id'), on='txn_key').drop(columns='txn_key')
+    
+    pd.testing.assert_frame_equal(by_key, by_id)
@@ -16,12 +16,49 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__fil
 SOURCE_DIR = os.path.join(BASE_DIR, "source")
 OUTPUT_DIR = os.path.join(BASE_DIR, "analysis", "output")
 
+# Log sources: a file, a directory or a glob of rotated (optionally .gz/.zst) files
+SECUCHECK_LOGS = os.getenv("SECUCHECK_LOGS", os.path.join(SOURCE_DIR, "logs_SecuCheck.json"))
+MIDFLOW_LOGS = os.getenv("MIDFLOW_LOGS", os.path.join(SOURCE_DIR, "logs_MidFlow_ESB.csv"))
+COREBANK_LOGS = os.getenv("COREBANK_LOGS", os.path.join(SOURCE_DIR, "logs_CoreBank.log"))
+
 # Ensure output directory exists
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Processing Configuration
 BATCH_SIZE = int(os.getenv("BATCH_SIZE", "1000"))
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", "4"))
+PARALLEL_PARSING = os.getenv("PARALLEL_PARSING", "false").lower() == "true"
+PARSE_SHARDS = int(os.getenv("PARSE_SHARDS", "1"))  # byte ranges per large log file
+CSV_CHUNK_SIZE = int(os.getenv("CSV_CHUNK_SIZE", "100000"))
+PENDING_REQUEST_TTL = float(os.getenv("PENDING_REQUEST_TTL", "300"))  # seconds
+FILE_INDEX_PATH = os.getenv("FILE_INDEX_PATH", os.path.join(OUTPUT_DIR, "file_index.json"))  # time range per rotated file
+
+# Out-of-core merge configuration
+MERGE_MEMORY_BUDGET = int(os.getenv("MERGE_MEMORY_BUDGET", str(1024 ** 3)))  # 1 GB
+SPILL_DIR = os.getenv("SPILL_DIR", os.path.join(OUTPUT_DIR, "spill"))
+MERGED_PARTITIONS_DIR = os.getenv("MERGED_PARTITIONS_DIR", os.path.join(OUTPUT_DIR, "merged"))
+
+# Streaming merge configuration
+STREAM_WATERMARK_DELAY = float(os.getenv("STREAM_WATERMARK_DELAY", "60"))  # seconds behind the newest event
+
+# Quantile sketches for IQR outlier bounds
+QUANTILE_SKETCH_K = int(os.getenv("QUANTILE_SKETCH_K", "200"))  # rank error within 4 / k (2%)
+QUANTILE_SKETCH_PATH = os.getenv("QUANTILE_SKETCH_PATH", os.path.join(OUTPUT_DIR, "quantile_sketches.json"))
+
+# Log-bucketed latency histograms (mergeable percentiles)
+LATENCY_HISTOGRAM_ACCURACY = float(os.getenv("LATENCY_HISTOGRAM_ACCURACY", "0.01"))  # relative error of percentiles
+
+# Latency cube (pre-aggregated statistics by module, operation, status and minute)
+LATENCY_CUBE_ACCURACY = float(os.getenv("LATENCY_CUBE_ACCURACY", "0.01"))  # relative error of percentiles
+
+# Incremental ingestion (tail mode) configuration
+TAIL_MODE = os.getenv("TAIL_MODE", "false").lower() == "true"
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(OUTPUT_DIR, "checkpoints.json"))
+
+# Parsed-source cache configuration
+PARSE_CACHE = os.getenv("PARSE_CACHE", "false").lower() == "true"
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", os.path.join(OUTPUT_DIR, "cache"))
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))  # 2 GB
 
 # Anomaly Detection Configuration
 LATENCY_THRESHOLD = 5.0  # seconds